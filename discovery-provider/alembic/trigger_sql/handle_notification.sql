@@ -0,0 +1,63 @@
+create or replace function handle_notification() returns trigger as $$
+begin
+  -- materialize the notification for each recipient along with the seen
+  -- interval (prev_seen_at, seen_at] it falls into
+  insert into user_notification
+    (user_id, notification_id, group_id, timestamp, seen_at, prev_seen_at)
+  select
+    recipient.user_id,
+    new.id,
+    new.group_id,
+    new.timestamp,
+    (
+      select min(s.seen_at) from notification_seen s
+      where s.user_id = recipient.user_id and s.seen_at >= new.timestamp
+    ),
+    (
+      select max(s.seen_at) from notification_seen s
+      where s.user_id = recipient.user_id and s.seen_at < new.timestamp
+    )
+  from unnest(new.user_ids) as recipient(user_id)
+  on conflict do nothing;
+
+  return null;
+end;
+$$ language plpgsql;
+
+do $$ begin
+  create trigger on_notification
+  after insert on notification
+  for each row execute procedure handle_notification();
+exception
+  when others then null;
+end $$;
+
+
+create or replace function handle_notification_seen() returns trigger as $$
+begin
+  -- notifications up to the new seen_at that were unseen or seen later
+  -- are now closed by this seen_at
+  update user_notification
+  set seen_at = new.seen_at
+  where user_id = new.user_id
+    and timestamp <= new.seen_at
+    and (seen_at is null or seen_at > new.seen_at);
+
+  -- notifications after the new seen_at start their interval from it
+  update user_notification
+  set prev_seen_at = new.seen_at
+  where user_id = new.user_id
+    and timestamp > new.seen_at
+    and (prev_seen_at is null or prev_seen_at < new.seen_at);
+
+  return null;
+end;
+$$ language plpgsql;
+
+do $$ begin
+  create trigger on_notification_seen
+  after insert on notification_seen
+  for each row execute procedure handle_notification_seen();
+exception
+  when others then null;
+end $$;
@@ -0,0 +1,41 @@
+"""aggregate_karma
+
+Revision ID: 013b04f847e5
+Revises: 7b7aa3a27b3e
+Create Date: 2023-02-14 11:20:41.583306
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "013b04f847e5"
+down_revision = "7b7aa3a27b3e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "aggregate_karma",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("item_type", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.Date(), nullable=False),
+        sa.Column("karma", sa.BigInteger(), nullable=False),
+        sa.Column("xf_karma", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("item_id", "item_type", "timestamp"),
+    )
+
+    # the table is built by the index_aggregate_karma task on its first run
+    connection = op.get_bind()
+    connection.execute(
+        "DELETE FROM indexing_checkpoints WHERE tablename = 'aggregate_karma';"
+    )
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(
+        "DELETE FROM indexing_checkpoints WHERE tablename = 'aggregate_karma';"
+    )
+    op.drop_table("aggregate_karma")
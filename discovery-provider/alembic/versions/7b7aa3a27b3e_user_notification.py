@@ -0,0 +1,81 @@
+"""user_notification
+
+Revision ID: 7b7aa3a27b3e
+Revises: 988f095a1d43
+Create Date: 2023-02-08 17:42:10.118412
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from src.utils.alembic_helpers import build_sql
+
+# revision identifiers, used by Alembic.
+revision = "7b7aa3a27b3e"
+down_revision = "988f095a1d43"
+branch_labels = None
+depends_on = None
+
+
+up_files = [
+    # New triggers
+    "handle_notification.sql",
+]
+
+
+def upgrade():
+    op.create_table(
+        "user_notification",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("notification_id", sa.Integer(), nullable=False),
+        sa.Column("group_id", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("seen_at", sa.DateTime(), nullable=True),
+        sa.Column("prev_seen_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("user_id", "notification_id"),
+    )
+
+    connection = op.get_bind()
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_user_notification_user_seen_group
+        ON user_notification (user_id, seen_at DESC NULLS FIRST, group_id DESC);
+
+        CREATE INDEX IF NOT EXISTS ix_user_notification_user_timestamp
+        ON user_notification (user_id, timestamp);
+
+        CREATE INDEX IF NOT EXISTS ix_user_notification_unseen
+        ON user_notification (user_id, group_id) WHERE seen_at IS NULL;
+
+        INSERT INTO user_notification
+          (user_id, notification_id, group_id, timestamp, seen_at, prev_seen_at)
+        SELECT
+          recipient.user_id,
+          n.id,
+          n.group_id,
+          n.timestamp,
+          (
+            SELECT min(s.seen_at) FROM notification_seen s
+            WHERE s.user_id = recipient.user_id AND s.seen_at >= n.timestamp
+          ),
+          (
+            SELECT max(s.seen_at) FROM notification_seen s
+            WHERE s.user_id = recipient.user_id AND s.seen_at < n.timestamp
+          )
+        FROM notification n, unnest(n.user_ids) AS recipient(user_id)
+        ON CONFLICT DO NOTHING;
+        """
+    )
+    connection.execute(build_sql(up_files))
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(
+        """
+        DROP TRIGGER IF EXISTS on_notification ON notification;
+        DROP TRIGGER IF EXISTS on_notification_seen ON notification_seen;
+        DROP FUNCTION IF EXISTS handle_notification();
+        DROP FUNCTION IF EXISTS handle_notification_seen();
+        """
+    )
+    op.drop_table("user_notification")
@@ -0,0 +1,151 @@
+import json
+from typing import List
+
+import src.challenges.challenge_event_bus as challenge_event_bus
+from src.challenges.challenge_event_bus import (
+    REDIS_DEAD_LETTER_STREAM,
+    REDIS_QUEUE_PREFIX,
+    ChallengeEventBus,
+    get_challenge_event_queue_stats,
+    get_processed_by_listener_key,
+    get_stream_key,
+)
+from src.utils.redis_connection import get_redis
+
+TEST_EVENT = "TEST_EVENT"
+
+
+class RecordingListener:
+    """Stands in for a ChallengeManager, recording the events it is given"""
+
+    def __init__(self, challenge_id, fail=False):
+        self.challenge_id = challenge_id
+        self.fail = fail
+        self.events: List = []
+
+    def process(self, session, event_type, event_metadatas):
+        if self.fail:
+            raise Exception("listener failed")
+        self.events.extend(event_metadatas)
+
+
+def test_shards_events_by_user(app):
+    redis = get_redis()
+    bus = ChallengeEventBus(redis, num_shards=2)
+    listener = RecordingListener("test_challenge")
+    bus.register_listener(TEST_EVENT, listener)
+
+    with bus.use_scoped_dispatch_queue():
+        for user_id in range(1, 5):
+            bus.dispatch(TEST_EVENT, 100, user_id)
+
+    assert redis.xlen(get_stream_key(0)) == 2
+    assert redis.xlen(get_stream_key(1)) == 2
+
+    # Consumers can drain shards independently
+    assert bus.process_events(None, shard=1) == (2, False)
+    assert sorted(e["user_id"] for e in listener.events) == [1, 3]
+    assert bus.process_events(None) == (2, False)
+    assert sorted(e["user_id"] for e in listener.events) == [1, 2, 3, 4]
+
+    # Processed events are acknowledged
+    assert bus.process_events(None) == (0, False)
+    stats = get_challenge_event_queue_stats(redis, num_shards=2)
+    assert stats["length"] == 4
+    assert stats["pending"] == 0
+    assert stats["oldest_unprocessed_age_sec"] is None
+
+
+def test_redelivers_and_dead_letters_failed_events(app, monkeypatch):
+    monkeypatch.setattr(challenge_event_bus, "PENDING_RETRY_IDLE_MS", 0)
+    monkeypatch.setattr(challenge_event_bus, "MAX_DELIVERIES", 2)
+    redis = get_redis()
+    bus = ChallengeEventBus(redis, num_shards=1)
+    listener = RecordingListener("test_challenge", fail=True)
+    bus.register_listener(TEST_EVENT, listener)
+
+    with bus.use_scoped_dispatch_queue():
+        bus.dispatch(TEST_EVENT, 100, 1)
+
+    assert bus.process_events(None) == (1, True)
+    stats = get_challenge_event_queue_stats(redis, num_shards=1)
+    assert stats["pending"] == 1
+    assert stats["oldest_unprocessed_age_sec"] is not None
+
+    # Redelivered to the next consumer after failing
+    assert bus.process_events(None) == (1, True)
+
+    # Dead-lettered once out of deliveries
+    assert bus.process_events(None) == (0, False)
+    assert redis.xlen(REDIS_DEAD_LETTER_STREAM) == 1
+    stats = get_challenge_event_queue_stats(redis, num_shards=1)
+    assert stats["pending"] == 0
+    assert stats["dead_letter"] == 1
+
+
+def test_redelivers_only_to_failed_listeners(app, monkeypatch):
+    monkeypatch.setattr(challenge_event_bus, "PENDING_RETRY_IDLE_MS", 0)
+    redis = get_redis()
+    bus = ChallengeEventBus(redis, num_shards=1)
+    succeeding = RecordingListener("succeeding_challenge")
+    failing = RecordingListener("failing_challenge", fail=True)
+    bus.register_listener(TEST_EVENT, succeeding)
+    bus.register_listener(TEST_EVENT, failing)
+
+    with bus.use_scoped_dispatch_queue():
+        bus.dispatch(TEST_EVENT, 100, 1)
+
+    assert bus.process_events(None) == (1, True)
+    assert len(succeeding.events) == 1
+
+    # The retry only reaches the listener that failed
+    failing.fail = False
+    assert bus.process_events(None) == (1, False)
+    assert len(succeeding.events) == 1
+    assert len(failing.events) == 1
+    stats = get_challenge_event_queue_stats(redis, num_shards=1)
+    assert stats["pending"] == 0
+    stream = get_stream_key(0)
+    assert not redis.smembers(
+        get_processed_by_listener_key(stream, "succeeding_challenge")
+    )
+
+
+def test_drains_legacy_queue(app):
+    redis = get_redis()
+    redis.rpush(
+        REDIS_QUEUE_PREFIX,
+        json.dumps(
+            {"event": TEST_EVENT, "user_id": 1, "block_number": 100, "extra": {}}
+        ),
+    )
+    bus = ChallengeEventBus(redis, num_shards=1)
+    listener = RecordingListener("test_challenge")
+    bus.register_listener(TEST_EVENT, listener)
+
+    assert bus.process_events(None) == (1, False)
+    assert listener.events == [{"user_id": 1, "block_number": 100, "extra": {}}]
+    assert redis.llen(REDIS_QUEUE_PREFIX) == 0
+
+
+def test_keeps_legacy_queue_until_moved(app, mocker):
+    redis = get_redis()
+    redis.rpush(
+        REDIS_QUEUE_PREFIX,
+        json.dumps({"event": TEST_EVENT, "user_id": 1, "block_number": 100}),
+        "not json",
+    )
+    bus = ChallengeEventBus(redis, num_shards=1)
+
+    # Nothing is removed from the list if the events can't be added to the streams
+    bus._redis = mocker.Mock(wraps=redis)
+    bus._redis.pipeline.side_effect = Exception("redis down")
+    bus._drain_legacy_queue()
+    assert redis.llen(REDIS_QUEUE_PREFIX) == 2
+
+    # Malformed events are dead-lettered rather than dropped
+    bus._redis = redis
+    bus._drain_legacy_queue()
+    assert redis.llen(REDIS_QUEUE_PREFIX) == 0
+    assert redis.xlen(get_stream_key(0)) == 1
+    assert redis.xlen(REDIS_DEAD_LETTER_STREAM) == 1
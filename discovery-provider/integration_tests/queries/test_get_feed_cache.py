@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from integration_tests.utils import populate_mock_db
+from src.models.social.repost import Repost
+from src.models.tracks.track import Track
+from src.queries.get_feed_cache import (
+    FEED_FANOUT_BLOCK_KEY,
+    fan_out_feed_items,
+    get_activity_timestamp,
+    get_cached_feed_items,
+    get_feed_cache_key,
+    get_feed_item_score,
+    get_feed_large_followees_key,
+    invalidate_feed_cache,
+    parse_feed_cursor,
+)
+from src.tasks.aggregates import get_latest_blocknumber
+from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
+
+t1 = datetime(2020, 10, 10, 10, 35, 0)
+t2 = t1 - timedelta(hours=1)
+t3 = t1 - timedelta(hours=2)
+
+
+def test_parse_feed_cursor():
+    score = get_feed_item_score(t1)
+    assert get_activity_timestamp(score) == t1
+    # activity timestamps are accepted as returned by the feed
+    assert parse_feed_cursor("2020-10-10T10:35:00 Z") == score
+    assert parse_feed_cursor("2020-10-10 10:35:00") == score
+    assert parse_feed_cursor("2020-10-10T12:35:00+02:00") == score
+    assert parse_feed_cursor(str(score)) == score
+
+
+def test_get_cached_feed_items(app):
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": i + 1} for i in range(4)],
+            "follows": [
+                {"follower_user_id": 1, "followee_user_id": 2},
+                {"follower_user_id": 1, "followee_user_id": 3},
+                {"follower_user_id": 4, "followee_user_id": 2},
+            ],
+            "tracks": [
+                {"track_id": 1, "owner_id": 2, "created_at": t3},
+                {"track_id": 2, "owner_id": 3, "created_at": t2},
+            ],
+            "reposts": [
+                {"user_id": 3, "repost_item_id": 1, "created_at": t2},
+            ],
+        },
+    )
+
+    with db.scoped_session() as session:
+        # reposts of items created by followees are shown as originals
+        items = get_cached_feed_items(session, redis, 1, 10)
+        assert [item[:3] for item in items] == [("o", "track", 2), ("o", "track", 1)]
+        reposts = get_cached_feed_items(session, redis, 1, 10, "repost")
+        assert [item[:3] for item in reposts] == [("r", "track", 1)]
+
+        # pages continue from the activity timestamp of the previous page
+        next_page = get_cached_feed_items(session, redis, 1, 10, cursor=items[0][3])
+        assert [item[:3] for item in next_page] == [("o", "track", 1)]
+
+        # new items are only fanned out to feeds that are being read
+        score = get_feed_item_score(t1)
+        fan_out_feed_items(session, redis, [(2, "o:track:3", score)])
+        assert redis.zscore(get_feed_cache_key(1), "o:track:3") == score
+        assert not redis.exists(get_feed_cache_key(4))
+
+        # feeds built from replicas that have not indexed the invalidating block,
+        # or the latest fanned out block, are not cached
+        latest_block = get_latest_blocknumber(session)
+        invalidate_feed_cache(redis, [1], latest_block + 1)
+        items = get_cached_feed_items(session, redis, 1, 10)
+        assert [item[:3] for item in items] == [("o", "track", 2), ("o", "track", 1)]
+        assert not redis.exists(get_feed_large_followees_key(1))
+
+        invalidate_feed_cache(redis, [1], latest_block)
+        redis.set(FEED_FANOUT_BLOCK_KEY, latest_block + 1)
+        get_cached_feed_items(session, redis, 1, 10)
+        assert not redis.exists(get_feed_large_followees_key(1))
+
+        redis.set(FEED_FANOUT_BLOCK_KEY, latest_block)
+        get_cached_feed_items(session, redis, 1, 10)
+        assert redis.exists(get_feed_large_followees_key(1))
+
+        # items from large accounts are merged in at read time
+        with mock.patch("src.queries.get_feed_cache.FEED_FANOUT_MAX_FOLLOWERS", 0):
+            invalidate_feed_cache(redis, [1], latest_block)
+            items = get_cached_feed_items(session, redis, 1, 10)
+            assert [item[:3] for item in items] == [
+                ("o", "track", 2),
+                ("o", "track", 1),
+            ]
+            assert redis.zcard(get_feed_cache_key(1)) == 0
+
+
+def test_get_cached_feed_items_drops_removed_items(app):
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": i + 1} for i in range(3)],
+            "follows": [{"follower_user_id": 1, "followee_user_id": 2}],
+            "tracks": [
+                {"track_id": 1, "owner_id": 2, "created_at": t1},
+                {"track_id": 2, "owner_id": 2, "created_at": t2},
+                {"track_id": 3, "owner_id": 3, "created_at": t3},
+                {"track_id": 4, "owner_id": 2, "created_at": t3},
+            ],
+            "reposts": [
+                {
+                    "user_id": 2,
+                    "repost_item_id": 3,
+                    "created_at": t2 - timedelta(minutes=30),
+                },
+            ],
+        },
+    )
+
+    with db.scoped_session() as session:
+        items = get_cached_feed_items(session, redis, 1, 10)
+        assert [item[:3] for item in items] == [
+            ("o", "track", 1),
+            ("o", "track", 2),
+            ("r", "track", 3),
+            ("o", "track", 4),
+        ]
+        # offset pages skip the items of the previous pages
+        page = get_cached_feed_items(session, redis, 1, 2, offset=2)
+        assert [item[:3] for item in page] == [("r", "track", 3), ("o", "track", 4)]
+
+        # deleted tracks and un-reposted items are dropped before paginating
+        session.query(Track).filter(Track.track_id == 2).update({"is_delete": True})
+        session.query(Repost).filter(Repost.repost_item_id == 3).update(
+            {"is_delete": True}
+        )
+        session.flush()
+        page = get_cached_feed_items(session, redis, 1, 2)
+        assert [item[:3] for item in page] == [("o", "track", 1), ("o", "track", 4)]
+        assert redis.zscore(get_feed_cache_key(1), "o:track:2") is None
+        assert redis.zscore(get_feed_cache_key(1), "r:track:3") is None
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from src.queries.get_premium_track_signatures import (
+    HOT_NFT_HOLDERS_KEY,
+    NftGate,
+    _decode_balances,
+    get_nft_ownership,
+    refresh_hot_nft_holders,
+)
+from src.utils.redis_connection import get_redis
+
+erc721_gate = NftGate("eth", "0x5aeda56215b167893e80b4fe645ba6d5bab767de", "ERC721")
+erc1155_gate = NftGate(
+    "eth", "0x495f947276749ce646f68ac8c248420045cb7b5e", "ERC1155", (1, 2)
+)
+sol_gate = NftGate("sol", "J1S9H3QjnRtBbbuD4HjPV6RpRhwuk4zKbxsnCHuTgh9w")
+
+
+def test_get_nft_ownership(app):
+    with app.app_context():
+        redis = get_redis()
+
+    checks = [
+        (erc721_gate, "0xwallet1"),
+        (erc1155_gate, "0xwallet1"),
+        (sol_gate, "solwallet1"),
+    ]
+    with mock.patch(
+        "src.queries.get_premium_track_signatures._fetch_eth_nft_ownership"
+    ) as fetch_eth, mock.patch(
+        "src.queries.get_premium_track_signatures._fetch_sol_nft_ownership"
+    ) as fetch_sol:
+        # the erc1155 balance call failed, so it is not owned and not cached
+        fetch_eth.return_value = {(erc721_gate, "0xwallet1"): True}
+        fetch_sol.return_value = {(sol_gate, "solwallet1"): False}
+        ownership = get_nft_ownership(checks)
+        assert ownership == {
+            (erc721_gate, "0xwallet1"): True,
+            (erc1155_gate, "0xwallet1"): False,
+            (sol_gate, "solwallet1"): False,
+        }
+        fetch_eth.assert_called_once_with(checks[:2])
+        fetch_sol.assert_called_once_with(checks[2:])
+
+        # owners and non owners are served from the cache
+        fetch_eth.reset_mock()
+        fetch_sol.reset_mock()
+        fetch_eth.return_value = {(erc1155_gate, "0xwallet1"): True}
+        ownership = get_nft_ownership(checks)
+        assert ownership == {
+            (erc721_gate, "0xwallet1"): True,
+            (erc1155_gate, "0xwallet1"): True,
+            (sol_gate, "solwallet1"): False,
+        }
+        fetch_eth.assert_called_once_with([(erc1155_gate, "0xwallet1")])
+        fetch_sol.assert_not_called()
+
+        # wallets checked more than once are refreshed in the background,
+        # once their cache entries are about to expire
+        assert redis.zcard(HOT_NFT_HOLDERS_KEY) == 2
+        fetch_eth.reset_mock()
+        fetch_sol.return_value = {(sol_gate, "solwallet1"): True}
+        assert refresh_hot_nft_holders(redis) == 1
+        fetch_eth.assert_not_called()
+        fetch_sol.assert_called_once_with([(sol_gate, "solwallet1")])
+        fetch_sol.reset_mock()
+        assert get_nft_ownership(checks[2:]) == {(sol_gate, "solwallet1"): True}
+        fetch_sol.assert_not_called()
+
+
+def test_decode_balances():
+    balance_of = (3).to_bytes(32, "big")
+    assert _decode_balances("ERC721", balance_of) == [3]
+
+    balance_of_batch = b"".join(n.to_bytes(32, "big") for n in [32, 3, 0, 1, 5])
+    assert _decode_balances("ERC1155", balance_of_batch) == [0, 1, 5]
+
+    # calls to addresses that are not contracts return no data
+    assert _decode_balances("ERC721", b"") == []
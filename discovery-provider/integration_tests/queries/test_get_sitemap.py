@@ -1,17 +1,24 @@
+import gzip
 import logging
 from unittest import mock
 
 from integration_tests.utils import populate_mock_db
 from src.queries.get_sitemap import (
     build_default,
+    get_cached_page,
+    get_cached_root,
     get_playlist_page,
     get_playlist_root,
+    get_sitemap_cache_key,
     get_track_page,
     get_track_root,
     get_user_page,
     get_user_root,
+    refresh_sitemaps,
 )
+from src.queries.queries import sitemap_response
 from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
 
 logger = logging.getLogger(__name__)
 
@@ -129,3 +136,49 @@ def test_get_sitemaps(mock_set_base_url, mock_get_client_base_url, app):
                 user_page_3
                 == b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n  <url>\n    <loc>https://audius.co/user_16</loc>\n  </url>\n  <url>\n    <loc>https://audius.co/user_17</loc>\n  </url>\n  <url>\n    <loc>https://audius.co/user_18</loc>\n  </url>\n  <url>\n    <loc>https://audius.co/user_19</loc>\n  </url>\n</urlset>\n'
             )
+
+            # Validate that cached sitemaps match the freshly built ones
+            redis = get_redis()
+            assert gzip.decompress(get_cached_root(session, redis, "user")) == (
+                get_user_root(session)
+            )
+            assert gzip.decompress(get_cached_page(session, redis, "user", 1)) == (
+                get_user_page(session, 1)
+            )
+            assert redis.get(get_sitemap_cache_key("user", "1")) is not None
+
+            refresh_sitemaps(session, redis)
+            for type, get_page in [
+                ("track", get_track_page),
+                ("playlist", get_playlist_page),
+                ("user", get_user_page),
+            ]:
+                assert gzip.decompress(
+                    redis.get(get_sitemap_cache_key(type, "1"))
+                ) == get_page(session, 1)
+            # Pages past the end are served empty but not cached
+            assert gzip.decompress(get_cached_page(session, redis, "track", 2)) == (
+                b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"/>\n'
+            )
+            assert redis.get(get_sitemap_cache_key("track", "2")) is None
+
+
+def test_sitemap_response(app):
+    gzipped_xml = gzip.compress(b"<urlset/>")
+    for accept_encoding, is_gzipped in [
+        ("gzip, deflate", True),
+        ("deflate, gzip;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("identity", False),
+        ("", False),
+    ]:
+        with app.test_request_context(headers={"Accept-Encoding": accept_encoding}):
+            response = sitemap_response(gzipped_xml)
+        assert response.headers["Vary"] == "Accept-Encoding"
+        if is_gzipped:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.get_data() == gzipped_xml
+        else:
+            assert "Content-Encoding" not in response.headers
+            assert response.get_data() == b"<urlset/>"
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from integration_tests.utils import populate_mock_db
+from src.models.social.repost import RepostType
+from src.models.social.save import SaveType
+from src.queries.get_social_graph import (
+    OVERFLOW_MARKER,
+    get_followee_ids,
+    get_reposted_item_ids,
+    get_saved_item_ids,
+    get_social_graph_key,
+    invalidate_social_graph,
+    pack_ids,
+    unpack_ids,
+)
+from src.tasks.aggregates import get_latest_blocknumber
+from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
+
+
+def test_pack_ids():
+    assert unpack_ids(pack_ids([3, 1, 2])) == {1, 2, 3}
+    assert unpack_ids(pack_ids([])) == set()
+    assert len(pack_ids(range(10))) == 40
+
+
+def test_get_social_graph(app):
+    """Tests that followee and save/repost sets are cached and invalidated"""
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": i} for i in range(1, 4)],
+            "follows": [
+                {"follower_user_id": 1, "followee_user_id": 2},
+                {"follower_user_id": 1, "followee_user_id": 3},
+            ],
+            "saves": [
+                {"user_id": 1, "save_item_id": 1, "save_type": "track"},
+                {"user_id": 1, "save_item_id": 2, "save_type": "playlist"},
+            ],
+            "reposts": [
+                {"user_id": 1, "repost_item_id": 3, "repost_type": "track"},
+                {"user_id": 2, "repost_item_id": 4, "repost_type": "track"},
+            ],
+        },
+    )
+
+    with db.scoped_session() as session:
+        assert get_followee_ids(session, redis, 1) == {2, 3}
+        assert get_followee_ids(session, redis, 2) == set()
+        assert get_saved_item_ids(session, redis, 1, SaveType.track) == {1}
+        assert get_saved_item_ids(session, redis, 1, SaveType.playlist) == {2}
+        assert get_reposted_item_ids(session, redis, 1, RepostType.track) == {3}
+        assert redis.hget(get_social_graph_key(1), "followees") == pack_ids([2, 3])
+
+        populate_mock_db(
+            db, {"follows": [{"follower_user_id": 1, "followee_user_id": 4}]}
+        )
+        # served from the cache until invalidated
+        assert get_followee_ids(session, redis, 1) == {2, 3}
+        latest_block = get_latest_blocknumber(session)
+
+        # replicas that have not indexed the invalidating block don't refill it
+        invalidate_social_graph(redis, [1], latest_block + 1)
+        assert get_followee_ids(session, redis, 1) == {2, 3, 4}
+        assert redis.hget(get_social_graph_key(1), "followees") is None
+
+        invalidate_social_graph(redis, [1], latest_block)
+        assert get_followee_ids(session, redis, 1) == {2, 3, 4}
+        assert redis.hget(get_social_graph_key(1), "followees") == pack_ids([2, 3, 4])
+
+        # sets that are too large are not cached
+        with mock.patch("src.queries.get_social_graph.SOCIAL_GRAPH_MAX_SET_SIZE", 2):
+            invalidate_social_graph(redis, [1], latest_block)
+            assert get_followee_ids(session, redis, 1) is None
+            assert redis.hget(get_social_graph_key(1), "followees") == OVERFLOW_MARKER
@@ -0,0 +1,47 @@
+from integration_tests.utils import populate_mock_db
+from src.queries.get_track_stream_info import (
+    get_track_stream_info,
+    get_track_stream_info_key,
+    get_user_stream_info_key,
+    invalidate_track_stream_info,
+)
+from src.tasks.aggregates import get_latest_blocknumber
+from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
+
+
+def test_get_track_stream_info(app):
+    """Tests that stream info is cached and not refilled from stale replicas"""
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+        populate_mock_db(
+            db,
+            {
+                "users": [{"user_id": 1}],
+                "tracks": [{"track_id": 1, "owner_id": 1}],
+            },
+        )
+        with db.scoped_session() as session:
+            latest_block = get_latest_blocknumber(session)
+
+        stream_info = get_track_stream_info(1)
+        assert stream_info["track_id"] == 1
+        assert stream_info["owner_id"] == 1
+        assert redis.get(get_track_stream_info_key(1)) is not None
+        assert redis.get(get_user_stream_info_key(1)) is not None
+
+        # replicas that have not indexed the invalidating block don't refill it
+        invalidate_track_stream_info(redis, [1], [], latest_block + 1)
+        assert get_track_stream_info(1)["track_id"] == 1
+        assert redis.get(get_track_stream_info_key(1)) is None
+
+        invalidate_track_stream_info(redis, [], [1], latest_block)
+        assert get_track_stream_info(1)["track_id"] == 1
+        assert redis.get(get_track_stream_info_key(1)) is None
+
+        invalidate_track_stream_info(redis, [1], [1], latest_block)
+        assert get_track_stream_info(1)["track_id"] == 1
+        assert redis.get(get_track_stream_info_key(1)) is not None
+        assert redis.get(get_user_stream_info_key(1)) is not None
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from integration_tests.utils import populate_mock_db
+from src.queries.get_notifications import (
+    get_notification_groups,
+    get_unread_notification_count,
+)
+from src.utils.db_session import get_db
+
+t1 = datetime(2020, 10, 10, 10, 35, 0)
+t2 = t1 - timedelta(hours=1)
+t3 = t1 - timedelta(hours=2)
+
+
+def test_unread_notifications(app):
+    with app.app_context():
+        db_mock = get_db()
+
+    populate_mock_db(
+        db_mock,
+        {
+            "users": [{"user_id": i + 1} for i in range(5)],
+            "tracks": [{"track_id": 1, "owner_id": 1}],
+            "follows": [
+                {"follower_user_id": 2, "followee_user_id": 1, "created_at": t3},
+                {"follower_user_id": 3, "followee_user_id": 1, "created_at": t2},
+            ],
+            "saves": [
+                {
+                    "user_id": 4,
+                    "save_item_id": 1,
+                    "save_type": "track",
+                    "created_at": t2,
+                }
+            ],
+        },
+    )
+
+    with db_mock.scoped_session() as session:
+        assert get_unread_notification_count(session, 1) == 2
+        assert get_unread_notification_count(session, 2) == 0
+
+        # page through unseen groups with a cursor
+        now = datetime.now()
+        first_page = get_notification_groups(
+            session, {"user_id": 1, "limit": 1, "timestamp": now}
+        )
+        second_page = get_notification_groups(
+            session,
+            {
+                "user_id": 1,
+                "limit": 1,
+                "timestamp": now,
+                "group_id": first_page[0]["group_id"],
+            },
+        )
+        assert len(first_page) == 1 and len(second_page) == 1
+        assert first_page[0]["group_id"] > second_page[0]["group_id"]
+        assert not first_page[0]["is_seen"] and not second_page[0]["is_seen"]
+
+    # viewing notifications marks the existing groups as seen
+    populate_mock_db(db_mock, {"notification_seens": [{"user_id": 1, "seen_at": t2}]})
+    with db_mock.scoped_session() as session:
+        assert get_unread_notification_count(session, 1) == 0
+        groups = get_notification_groups(session, {"user_id": 1, "limit": 10})
+        assert len(groups) == 2
+        assert all(group["is_seen"] and group["seen_at"] == t2 for group in groups)
+
+    # new notifications after the last view are unseen again
+    populate_mock_db(
+        db_mock,
+        {"follows": [{"follower_user_id": 5, "followee_user_id": 1, "created_at": t1}]},
+    )
+    with db_mock.scoped_session() as session:
+        assert get_unread_notification_count(session, 1) == 1
+        groups = get_notification_groups(session, {"user_id": 1, "limit": 10})
+        assert len(groups) == 3
+        assert groups[0]["group_id"] == "follow:1"
+        assert not groups[0]["is_seen"]
+        assert groups[0]["prev_seen_at"] == t2
+        assert groups[0]["count"] == 1
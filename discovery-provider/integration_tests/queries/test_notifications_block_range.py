@@ -0,0 +1,56 @@
+from integration_tests.utils import populate_mock_db
+from src.queries.notifications import (
+    NOTIFICATIONS_BLOCK_CHUNK_SIZE,
+    get_block_chunks,
+    get_cached_block_range_notifications,
+    get_notifications_chunk_cache_key,
+)
+from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
+
+
+def test_get_block_chunks():
+    assert get_block_chunks(2, 25, 10) == [(2, 10), (10, 20), (20, 25)]
+    assert get_block_chunks(10, 20, 10) == [(10, 20)]
+    assert get_block_chunks(10, 10, 10) == []
+    # a poll of the max block diff spans at most two chunks
+    chunk_size = NOTIFICATIONS_BLOCK_CHUNK_SIZE
+    assert len(get_block_chunks(chunk_size - 1, 2 * chunk_size - 1)) == 2
+
+
+def test_get_cached_block_range_notifications(app):
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": i + 1} for i in range(20)],
+            "follows": [
+                {"follower_user_id": 2, "followee_user_id": 1, "blocknumber": 3},
+                {"follower_user_id": 3, "followee_user_id": 1, "blocknumber": 15},
+                {"follower_user_id": 4, "followee_user_id": 1, "blocknumber": 12},
+            ],
+        },
+    )
+
+    with app.app_context(), db.scoped_session() as session:
+        # chunks that reach the current block are not cached
+        chunk = get_cached_block_range_notifications(session, redis, None, 10, 20, 19)
+        assert [n["blocknumber"] for n in chunk["notifications"]] == [12, 15]
+        assert not redis.exists(get_notifications_chunk_cache_key(10, 20))
+
+        chunk = get_cached_block_range_notifications(session, redis, None, 0, 10, 19)
+        assert [n["initiator"] for n in chunk["notifications"]] == [2]
+        assert redis.exists(get_notifications_chunk_cache_key(0, 10))
+
+    populate_mock_db(
+        db,
+        {"follows": [{"follower_user_id": 5, "followee_user_id": 1, "blocknumber": 5}]},
+    )
+
+    with app.app_context(), db.scoped_session() as session:
+        # completed chunks are served from the cache
+        chunk = get_cached_block_range_notifications(session, redis, None, 0, 10, 19)
+        assert [n["initiator"] for n in chunk["notifications"]] == [2]
@@ -3,7 +3,10 @@ import logging
 from integration_tests.utils import populate_mock_db
 from src.queries import response_name_constants
 from src.queries.get_top_users import _get_top_users
-from src.queries.query_helpers import populate_user_metadata
+from src.queries.query_helpers import (
+    get_current_user_followee_ids,
+    populate_user_metadata,
+)
 from src.utils.db_session import get_db
 
 logger = logging.getLogger(__name__)
@@ -158,3 +161,36 @@ def test_populate_user_metadata(app):
         # get_top_users: should return only artists, most followers first
         top_user_ids = [u["user_id"] for u in _get_top_users(session, 1, 100, 0)]
         assert top_user_ids == [3, 2, 1]
+
+
+def test_current_user_followee_ids_cached_per_request(app):
+    """Tests that the current user's followees are only fetched once per request"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": i} for i in range(1, 4)],
+            "follows": [
+                {"follower_user_id": 1, "followee_user_id": 2},
+                {"follower_user_id": 1, "followee_user_id": 3},
+            ],
+        },
+    )
+
+    with db.scoped_session() as session:
+        assert get_current_user_followee_ids(session, None) == set()
+        with app.test_request_context():
+            followee_ids = get_current_user_followee_ids(session, 1)
+            assert followee_ids == {2, 3}
+
+            populate_mock_db(
+                db, {"follows": [{"follower_user_id": 2, "followee_user_id": 3}]}
+            )
+            # cached for the rest of the request
+            assert get_current_user_followee_ids(session, 1) is followee_ids
+            assert get_current_user_followee_ids(session, 2) == {3}
+
+        with app.test_request_context():
+            assert get_current_user_followee_ids(session, 1) is not followee_ids
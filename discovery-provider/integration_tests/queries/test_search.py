@@ -1,6 +1,7 @@
 import os
 import subprocess
 from datetime import datetime
+from unittest import mock
 
 import pytest
 from src.models.indexing.block import Block
@@ -10,8 +11,9 @@ from src.models.social.save import Save, SaveType
 from src.models.tracks.track import Track
 from src.models.users.user import User
 from src.models.users.user_balance import UserBalance
-from src.queries.search_es import search_es_full
+from src.queries.search_es import get_search_es_cache_key, search_es_full
 from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
 
 
 @pytest.fixture(autouse=True, scope="module")
@@ -504,3 +506,28 @@ def test_get_internal_albums(app_module):
     es_res = search_es_full(search_args)
     assert len(es_res["albums"]) == 1
     assert len(es_res["saved_albums"]) == 1
+
+
+def test_search_es_cache(app_module):
+    """Tests repeated searches are served from the cache"""
+
+    search_args = {
+        "is_auto_complete": True,
+        "kind": "users",
+        "query": "user",
+        "current_user_id": 1,
+        "with_users": True,
+        "limit": 10,
+        "offset": 0,
+        "only_downloadable": False,
+    }
+    es_res = search_es_full(search_args)
+
+    redis = get_redis()
+    key = get_search_es_cache_key(search_args)
+    assert redis.exists(key)
+    assert get_search_es_cache_key({**search_args, "current_user_id": 2}) != key
+
+    with mock.patch("src.queries.search_es.search_es_full_uncached") as uncached:
+        assert search_es_full(search_args) == es_res
+        uncached.assert_not_called()
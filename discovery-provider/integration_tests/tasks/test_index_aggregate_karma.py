@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+from integration_tests.utils import populate_mock_db
+from src.models.social.repost import Repost
+from src.queries.query_helpers import get_karma
+from src.tasks.index_aggregate_karma import _index_aggregate_karma
+from src.utils.db_session import get_db
+
+two_weeks_ago = datetime.now() - timedelta(weeks=2)
+# outside of the week window, but usually on the window's first day
+week_and_an_hour_ago = datetime.now() - timedelta(weeks=1, hours=1)
+
+
+def get_all_karma(session, ids):
+    return {
+        (time, xf): sorted(get_karma(session, ids, None, time, False, xf))
+        for time in [None, "week"]
+        for xf in [False, True]
+    }
+
+
+def test_index_aggregate_karma(app):
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [
+                {"user_id": 1},
+                {"user_id": 2, "profile_picture": "Qm", "cover_photo": "Qm"},
+                {"user_id": 3},
+                {"user_id": 4},
+            ],
+            "follows": [
+                {"follower_user_id": 3, "followee_user_id": 1},
+                {"follower_user_id": 4, "followee_user_id": 1},
+                {"follower_user_id": 1, "followee_user_id": 2},
+            ],
+            "tracks": [
+                {"track_id": 1, "owner_id": 3},
+                {"track_id": 2, "owner_id": 3},
+            ],
+            "reposts": [
+                {"user_id": 1, "repost_item_id": 1},
+                {"user_id": 2, "repost_item_id": 1, "created_at": two_weeks_ago},
+                {
+                    "user_id": 2,
+                    "repost_item_id": 2,
+                    "created_at": week_and_an_hour_ago,
+                },
+            ],
+            "saves": [{"user_id": 1, "save_item_id": 2}],
+        },
+    )
+
+    ids = (1, 2)
+    with db.scoped_session() as session:
+        # karma is queried on demand until the aggregate is built
+        expected = get_all_karma(session, ids)
+        _index_aggregate_karma(session)
+    with db.scoped_session() as session:
+        assert get_all_karma(session, ids) == expected
+        assert expected == {
+            (None, False): [(1, 3), (2, 3)],
+            (None, True): [(1, 1), (2, 1)],
+            ("week", False): [(1, 2), (2, 2)],
+            ("week", True): [],
+        }
+
+    # follower count changes and removed reposts are applied incrementally
+    with db.scoped_session() as session:
+        session.query(Repost).filter(Repost.user_id == 1).update({"is_current": False})
+    populate_mock_db(
+        db,
+        {
+            "follows": [{"follower_user_id": 4, "followee_user_id": 2}],
+            "reposts": [{"user_id": 1, "repost_item_id": 1, "is_delete": True}],
+        },
+    )
+    with db.scoped_session() as session:
+        _index_aggregate_karma(session)
+    with db.scoped_session() as session:
+        assert get_all_karma(session, ids) == {
+            (None, False): [(1, 2), (2, 4)],
+            (None, True): [(1, 2), (2, 2)],
+            ("week", False): [(2, 2)],
+            ("week", True): [],
+        }
@@ -1,84 +1,60 @@
-import json
-
-from src.solana.solana_transaction_types import ConfirmedSignatureForAddressResult
+from integration_tests.utils import populate_mock_db
 from src.tasks.index_solana_plays import (
-    REDIS_TX_CACHE_QUEUE_PREFIX,
-    cache_traversed_tx,
-    fetch_traversed_tx_from_cache,
+    SOLANA_PLAYS_CHECKPOINT,
+    get_latest_slot,
+    get_txs_in_db,
+)
+from src.utils.db_session import get_db
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_signature_checkpoint,
+    save_indexed_signature_checkpoint,
 )
-from src.utils.redis_connection import get_redis
-
-mock_tx_result_1: ConfirmedSignatureForAddressResult = {
-    "signature": "4NyCD5Ef5bsheuqXKFASJXPsiiss8ESqPg61bF5QNLBMYGshGbKTCfTAFjrxZYAH1JxZdY14kSeQG2b66Cis7vxj",
-    "slot": 111753419,
-    "blockTime": 1640126543,
-    "confirmationStatus": "finalized",
-    "err": None,
-    "memo": None,
-}
-
-mock_tx_result_2: ConfirmedSignatureForAddressResult = {
-    "signature": "5211pasG9iDECHnNm4GCWH9xETWJYRk4cxWVcJQyqTJCFGbmmvki2oHyvHJL8MgppztYjXsXPyG4RXcMXuQRpBia",
-    "slot": mock_tx_result_1["slot"] + 100,
-    "blockTime": 1640126543,
-    "confirmationStatus": "finalized",
-    "err": None,
-    "memo": None,
-}
-
-
-# Confirm expected length of cache array
-def assert_cache_array_length(redis, expected_length: int):
-    cached_val_array = redis.lrange(REDIS_TX_CACHE_QUEUE_PREFIX, 0, 100)
-    cached_val_length = len(cached_val_array)
-    assert cached_val_length == expected_length
-
-
-# Validate caching behavior
 
 
-def test_cache_traversed_tx(app):
+def test_get_txs_in_db(app):
     with app.app_context():
-        redis = get_redis()
-
-    cache_traversed_tx(redis, mock_tx_result_1)
-    assert_cache_array_length(redis, 1)
-    cached_val_array = redis.lrange(REDIS_TX_CACHE_QUEUE_PREFIX, 0, 100)
-    cached_first_entry = json.loads(cached_val_array[0])
-    assert cached_first_entry == mock_tx_result_1
-
-
-def test_fetch_traversed_tx_from_cache(app):
+        db = get_db()
+
+    populate_mock_db(
+        db,
+        {
+            "plays": [
+                {"item_id": 1, "slot": 10, "signature": "sig1"},
+                {"item_id": 1, "slot": 11, "signature": "sig2"},
+                {"item_id": 1, "slot": 12},
+            ]
+        },
+    )
+
+    with db.scoped_session() as session:
+        assert get_latest_slot(session) == 11
+        assert get_txs_in_db(session, ["sig1", "sig2", "sig3"]) == {"sig1", "sig2"}
+        assert get_txs_in_db(session, ["sig3"]) == set()
+
+
+def test_signature_checkpoint(app):
     with app.app_context():
-        redis = get_redis()
-
-    tx_slot = 111753419
-    first_mock_tx: ConfirmedSignatureForAddressResult = {
-        "signature": "4NyCD5Ef5bsheuqXKFASJXPsiiss8ESqPg61bF5QNLBMYGshGbKTCfTAFjrxZYAH1JxZdY14kSeQG2b66Cis7vxj",
-        "slot": tx_slot,
-        "blockTime": 1640126543,
-        "confirmationStatus": "finalized",
-        "err": None,
-        "memo": None,
-    }
-
-    cache_traversed_tx(redis, first_mock_tx)
-    # Confirm that if the latest db slot is greater than the cached value, it is removed from redis
-    latest_db_slot = tx_slot + 10
-    fetched_tx = fetch_traversed_tx_from_cache(redis, latest_db_slot)
-    assert fetched_tx == None
-
-    # Confirm the values have been removed from redis queue
-    assert_cache_array_length(redis, 0)
-
-    # Now, populate 2 entries into redis
-    cache_traversed_tx(redis, first_mock_tx)
-    cache_traversed_tx(redis, mock_tx_result_2)
-
-    assert_cache_array_length(redis, 2)
-
-    fetched_tx = fetch_traversed_tx_from_cache(redis, latest_db_slot)
-    assert fetched_tx == mock_tx_result_2["signature"]
-
-    # Confirm the values have been removed from redis queue
-    assert_cache_array_length(redis, 0)
+        db = get_db()
+
+    populate_mock_db(
+        db,
+        {"indexing_checkpoints": [{"tablename": "aggregate_plays"}]},
+    )
+
+    with db.scoped_session() as session:
+        assert (
+            get_last_indexed_signature_checkpoint(session, SOLANA_PLAYS_CHECKPOINT)
+            is None
+        )
+        # checkpoints without a signature are not solana checkpoints
+        assert get_last_indexed_signature_checkpoint(session, "aggregate_plays") is None
+
+        save_indexed_signature_checkpoint(
+            session, SOLANA_PLAYS_CHECKPOINT, 100, "sig100"
+        )
+        save_indexed_signature_checkpoint(
+            session, SOLANA_PLAYS_CHECKPOINT, 101, "sig101"
+        )
+        assert get_last_indexed_signature_checkpoint(
+            session, SOLANA_PLAYS_CHECKPOINT
+        ) == (101, "sig101")
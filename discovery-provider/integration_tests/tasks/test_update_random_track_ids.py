@@ -0,0 +1,57 @@
+from integration_tests.utils import populate_mock_db
+from src.queries.get_random_tracks import (
+    RANDOM_TRACK_IDS_KEY,
+    get_random_track_ids,
+    get_random_tracks,
+)
+from src.tasks.update_random_track_ids import _update_random_track_ids
+from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
+
+
+def get_sampled_track_ids(redis):
+    return {int(track_id) for track_id in redis.smembers(RANDOM_TRACK_IDS_KEY)}
+
+
+def test_update_random_track_ids(app):
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": 1}],
+            "tracks": [
+                {"track_id": 1, "owner_id": 1},
+                {"track_id": 2, "owner_id": 1, "is_unlisted": True},
+                {"track_id": 3, "owner_id": 1, "is_delete": True},
+            ],
+        },
+    )
+
+    with db.scoped_session() as session:
+        assert get_random_track_ids(redis, 10) is None
+        _update_random_track_ids(session, redis)
+    assert get_sampled_track_ids(redis) == {1}
+
+    # new and updated tracks are added and removed incrementally
+    populate_mock_db(
+        db,
+        {
+            "tracks": [
+                {"track_id": 1, "owner_id": 1, "is_unlisted": True},
+                {"track_id": 2, "owner_id": 1},
+                {"track_id": 4, "owner_id": 1},
+            ],
+        },
+    )
+    with db.scoped_session() as session:
+        _update_random_track_ids(session, redis)
+    assert get_sampled_track_ids(redis) == {2, 4}
+    assert sorted(get_random_track_ids(redis, 10)) == [2, 4]
+    assert len(get_random_track_ids(redis, 1)) == 1
+
+    with app.app_context():
+        tracks = get_random_tracks({"limit": 10})
+    assert sorted(track["track_id"] for track in tracks) == [2, 4]
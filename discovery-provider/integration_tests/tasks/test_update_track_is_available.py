@@ -6,12 +6,12 @@ from src.models.tracks.track import Track
 from src.tasks.update_track_is_available import (
     ALL_UNAVAILABLE_TRACKS_REDIS_KEY,
     _get_redis_set_members_as_list,
-    check_track_is_available,
+    _load_unavailable_track_ids,
     fetch_unavailable_track_ids,
     fetch_unavailable_track_ids_in_network,
     get_unavailable_tracks_redis_key,
+    is_track_available_in_replica_set,
     query_replica_set_by_track_id,
-    query_tracks_by_track_ids,
     update_tracks_is_available_status,
 )
 from src.utils.db_session import get_db
@@ -53,10 +53,11 @@ def test_fetch_unavailable_track_ids_in_network(
 
     spID_1_unavailable_tracks = [1, 2, 3, 4]
     spID_2_unavailable_tracks = [4, 5, 6, 7]
-    mock_fetch_unavailable_track_ids.side_effect = [
-        spID_1_unavailable_tracks,
-        spID_2_unavailable_tracks,
-    ]
+    # Content nodes are polled concurrently, so respond based on the endpoint
+    mock_fetch_unavailable_track_ids.side_effect = lambda endpoint: {
+        "http://content_node.com": spID_1_unavailable_tracks,
+        "http://content_node2.com": spID_2_unavailable_tracks,
+    }[endpoint]
 
     with app.app_context():
         redis = get_redis()
@@ -108,8 +109,7 @@ def test_fetch_unavailable_track_ids(mock_requests, app):
     assert fetch_response == track_ids
 
 
-@mock.patch("src.tasks.update_track_is_available.check_track_is_available")
-def test_update_tracks_is_available_status(mock_check_track_is_available, app):
+def test_update_tracks_is_available_status(app):
     with app.app_context():
         db = get_db()
         redis = get_redis()
@@ -118,22 +118,26 @@ def test_update_tracks_is_available_status(mock_check_track_is_available, app):
     mock_unavailable_tracks = [1, 2, 3, 4, 5, 6, 7]
     _seed_db_with_data(db)
     redis.sadd(ALL_UNAVAILABLE_TRACKS_REDIS_KEY, *mock_unavailable_tracks)
-    mock_check_track_is_available.return_value = False
+    # Make the tracks unavailable on every node of their replica sets
+    for spID in [7, 9, 10, 11, 12, 13]:
+        redis.sadd(get_unavailable_tracks_redis_key(spID), *mock_unavailable_tracks)
 
     update_tracks_is_available_status(db, redis)
 
     with db.scoped_session() as session:
         tracks = (
-            session.query(Track.track_id, Track.is_available)
+            session.query(Track.track_id, Track.is_available, Track.is_delete)
             .filter(
                 Track.track_id.in_(mock_unavailable_tracks), Track.is_current == True
             )
             .all()
         )
 
-        # Check that the 'is_available' value is False
+        # Check that the 'is_available' value is False and the track is deleted
+        assert len(tracks) == len(mock_unavailable_tracks)
         for track in tracks:
             assert track[1] == False
+            assert track[2] == True
 
         mock_available_tracks = [8, 9, 10]
         tracks = (
@@ -164,6 +168,16 @@ def test_query_replica_set_by_track_id(app):
         assert sorted_actual_results == expected_query_results
 
 
+def _check_track_is_available(redis, track_id, spID_replica_set):
+    spID_unavailable_track_ids = {}
+    _load_unavailable_track_ids(
+        redis, spID_unavailable_track_ids, set(spID_replica_set)
+    )
+    return is_track_available_in_replica_set(
+        spID_unavailable_track_ids, track_id, spID_replica_set
+    )
+
+
 def test_check_track_is_available__return_is_not_available(app):
     with app.app_context():
         redis = get_redis()
@@ -178,7 +192,7 @@ def test_check_track_is_available__return_is_not_available(app):
     redis.sadd(spID_3_key, 1)
     redis.sadd(spID_4_key, 1)
 
-    assert False == check_track_is_available(redis, 1, [2, 3, 4])
+    assert False == _check_track_is_available(redis, 1, [2, 3, 4])
 
 
 def test_check_track_is_available__return_is_available_1(app):
@@ -192,7 +206,7 @@ def test_check_track_is_available__return_is_available_1(app):
     redis.sadd(spID_3_key, 1)
     # Available on spID = 4
 
-    assert True == check_track_is_available(redis, 1, [2, 3, 4])
+    assert True == _check_track_is_available(redis, 1, [2, 3, 4])
 
 
 def test_check_track_is_available__return_is_available_2(app):
@@ -205,7 +219,7 @@ def test_check_track_is_available__return_is_available_2(app):
     # Available on spID = 3
     # Available on spID = 4
 
-    assert True == check_track_is_available(redis, 1, [2, 3, 4])
+    assert True == _check_track_is_available(redis, 1, [2, 3, 4])
 
 
 def test_check_track_is_available__return_is_available_3(app):
@@ -216,23 +230,33 @@ def test_check_track_is_available__return_is_available_3(app):
     # Available on spID = 3
     # Available on spID = 4
 
-    assert True == check_track_is_available(redis, 1, [2, 3, 4])
+    assert True == _check_track_is_available(redis, 1, [2, 3, 4])
 
 
-def test_query_tracks_by_track_id(app):
+def test_load_unavailable_track_ids(app):
     with app.app_context():
-        db = get_db()
+        redis = get_redis()
 
-    _seed_db_with_data(db)
+    redis.sadd(get_unavailable_tracks_redis_key(2), 1, 2)
+    spID_unavailable_track_ids = {3: {5}}
 
-    with db.scoped_session() as session:
-        track_ids = [1, 2, 3, 4, 5, 6, 7]
-        tracks = query_tracks_by_track_ids(session, track_ids)
+    # Only the spIDs not loaded yet are fetched
+    _load_unavailable_track_ids(redis, spID_unavailable_track_ids, {2, 3, 4})
+    assert spID_unavailable_track_ids == {2: {1, 2}, 3: {5}, 4: set()}
 
-        sorted_track_ids = list(map(lambda track: track.track_id, tracks))
-        sorted_track_ids.sort()
-        assert len(sorted_track_ids) == len(track_ids)
-        assert sorted_track_ids == track_ids
+
+def test_is_track_available_in_replica_set():
+    spID_unavailable_track_ids = {2: {1}, 3: {1}, 4: {1}}
+    assert False == is_track_available_in_replica_set(
+        spID_unavailable_track_ids, 1, [2, 3, 4]
+    )
+    assert True == is_track_available_in_replica_set(
+        spID_unavailable_track_ids, 2, [2, 3, 4]
+    )
+    # Unknown nodes have no unavailable tracks
+    assert True == is_track_available_in_replica_set(
+        spID_unavailable_track_ids, 1, [2, 3, 5]
+    )
 
 
 @mock.patch("src.tasks.update_track_is_available.query_registered_content_node_info")
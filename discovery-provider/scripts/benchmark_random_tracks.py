@@ -0,0 +1,63 @@
+"""
+Compares sampling random tracks with ORDER BY random() against sampling
+from the redis set of track ids maintained by the update_random_track_ids task.
+
+Run against a populated database and redis, e.g. inside the discovery container:
+
+    PYTHONPATH=. python scripts/benchmark_random_tracks.py --limit 25 --runs 100
+
+"""
+import argparse
+import time
+
+from sqlalchemy import func
+from src.models.tracks.track import Track
+from src.queries.get_random_tracks import (
+    filter_random_track_candidates,
+    get_random_track_ids,
+    rebuild_random_track_ids,
+)
+from src.utils.config import shared_config
+from src.utils.redis_connection import get_redis
+from src.utils.session_manager import SessionManager
+
+
+def timed(label, runs, fn):
+    start = time.time()
+    for _ in range(runs):
+        fn()
+    elapsed = (time.time() - start) / runs
+    print(f"{label}: {elapsed * 1000:.2f}ms per call")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+
+    db = SessionManager(shared_config["db"]["url_read_replica"], {})
+    redis = get_redis()
+
+    with db.scoped_session() as session:
+        start = time.time()
+        rebuild_random_track_ids(session, redis)
+        print(f"rebuild: {(time.time() - start) * 1000:.2f}ms")
+
+        def order_by_random():
+            filter_random_track_candidates(session.query(Track)).order_by(
+                func.random()
+            ).limit(args.limit).all()
+
+        def sampled():
+            track_ids = get_random_track_ids(redis, args.limit)
+            filter_random_track_candidates(
+                session.query(Track).filter(Track.track_id.in_(track_ids))
+            ).all()
+
+        timed("order by random()", args.runs, order_by_random)
+        timed("sampled track ids", args.runs, sampled)
+
+
+if __name__ == "__main__":
+    main()
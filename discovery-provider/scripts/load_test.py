@@ -0,0 +1,149 @@
+"""
+Load tests a running discovery provider with a mix of routes and reports the
+throughput and latency of each route, so that server setups (e.g. sync versus
+eventlet gunicorn workers) can be compared under the same load.
+
+Run a mix of fast and I/O bound routes against each setup, saving the results:
+
+    python scripts/load_test.py --url http://localhost:5000 \\
+        --route /v1/tracks/trending \\
+        --route /health_check \\
+        --route /v1/users/7eP5n/connected_wallets \\
+        --concurrency 64 --duration 60 --save sync.json
+
+    audius_gunicorn_worker_class=eventlet ./scripts/prod-server.sh
+    python scripts/load_test.py ... --save eventlet.json
+
+    python scripts/load_test.py --compare sync.json eventlet.json
+
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import requests
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_client(base_url, routes, deadline, timeout, offset, results, lock):
+    """Requests the routes round robin until the deadline"""
+    session = requests.Session()
+    samples = []
+    i = offset
+    while time.time() < deadline:
+        route = routes[i % len(routes)]
+        i += 1
+        start = time.time()
+        try:
+            response = session.get(f"{base_url}{route}", timeout=timeout)
+            ok = response.status_code < 500
+        except requests.exceptions.RequestException:
+            ok = False
+        samples.append((route, ok, time.time() - start))
+    with lock:
+        results.extend(samples)
+
+
+def summarize(results, duration) -> Dict[str, Dict]:
+    latencies = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    for route, ok, latency in results:
+        latencies[route].append(latency)
+        if not ok:
+            errors[route] += 1
+
+    summary = {}
+    for route, route_latencies in latencies.items():
+        summary[route] = {
+            "requests": len(route_latencies),
+            "errors": errors[route],
+            "rps": len(route_latencies) / duration,
+            "p50_ms": statistics.median(route_latencies) * 1000,
+            "p95_ms": percentile(route_latencies, 95) * 1000,
+            "p99_ms": percentile(route_latencies, 99) * 1000,
+            "max_ms": max(route_latencies) * 1000,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(
+        f"{'route':<50} {'requests':>9} {'errors':>7} {'rps':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for route, stats in summary.items():
+        print(
+            f"{route:<50} {stats['requests']:>9} {stats['errors']:>7} "
+            f"{stats['rps']:>8.1f} {stats['p50_ms']:>8.0f} "
+            f"{stats['p95_ms']:>8.0f} {stats['p99_ms']:>8.0f}"
+        )
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"{'route':<50} {'rps':>18} {'p95 ms':>18} {'errors':>14}")
+    for route in before:
+        if route not in after:
+            continue
+        b, a = before[route], after[route]
+        print(
+            f"{route:<50} "
+            f"{b['rps']:>8.1f} -> {a['rps']:<6.1f} "
+            f"{b['p95_ms']:>8.0f} -> {a['p95_ms']:<6.0f} "
+            f"{b['errors']:>5} -> {a['errors']:<5}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--route", action="append")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--save", help="write the results as json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    routes = args.route or ["/v1/tracks/trending", "/health_check"]
+    results: List = []
+    lock = threading.Lock()
+    start = time.time()
+    deadline = start + args.duration
+    clients = [
+        threading.Thread(
+            target=run_client,
+            args=(args.url, routes, deadline, args.timeout, i, results, lock),
+        )
+        for i in range(args.concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    summary = summarize(results, time.time() - start)
+    print_summary(summary)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
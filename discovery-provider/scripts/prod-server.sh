@@ -22,6 +22,15 @@ else
   THREADS="${audius_gunicorn_threads}"
 fi
 
+# Use specified number of concurrent requests per worker if present (only used
+# for "eventlet" workers, which serve requests from greenlets so that requests
+# waiting on the db, redis or external calls don't hold up the others)
+if [[ -z "${audius_gunicorn_worker_connections}" ]]; then
+  WORKER_CONNECTIONS=1000
+else
+  WORKER_CONNECTIONS="${audius_gunicorn_worker_connections}"
+fi
+
 audius_discprov_loglevel=${audius_discprov_loglevel:-info}
 
 if [[ "$audius_openresty_enable" == true ]]; then
@@ -34,7 +43,7 @@ if [[ "$audius_openresty_enable" == true ]]; then
     exec gunicorn -b :3000 --access-logfile - --error-logfile - src.wsgi:app --log-level=$audius_discprov_loglevel --workers=$WORKERS --threads=$THREADS --timeout=600
   else
     WORKER_CLASS="${audius_gunicorn_worker_class}"
-    exec gunicorn -b :3000 --access-logfile - --error-logfile - src.wsgi:app --log-level=$audius_discprov_loglevel --worker-class=$WORKER_CLASS --workers=$WORKERS --timeout=600
+    exec gunicorn -b :3000 --access-logfile - --error-logfile - src.wsgi:app --log-level=$audius_discprov_loglevel --worker-class=$WORKER_CLASS --workers=$WORKERS --timeout=600 --worker-connections=$WORKER_CONNECTIONS
   fi
 else
   # If a worker class is specified, use that. Otherwise, use sync workers.
@@ -42,6 +51,6 @@ else
     exec gunicorn -b :5000 --access-logfile - --error-logfile - src.wsgi:app --log-level=$audius_discprov_loglevel --workers=$WORKERS --threads=$THREADS --timeout=600
   else
     WORKER_CLASS="${audius_gunicorn_worker_class}"
-    exec gunicorn -b :5000 --access-logfile - --error-logfile - src.wsgi:app --log-level=$audius_discprov_loglevel --worker-class=$WORKER_CLASS --workers=$WORKERS --timeout=600
+    exec gunicorn -b :5000 --access-logfile - --error-logfile - src.wsgi:app --log-level=$audius_discprov_loglevel --worker-class=$WORKER_CLASS --workers=$WORKERS --timeout=600 --worker-connections=$WORKER_CONNECTIONS
   fi
 fi
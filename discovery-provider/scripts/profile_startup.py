@@ -0,0 +1,103 @@
+"""
+Measures the import time of each process role (web, worker, beat) in fresh
+interpreters and lists the slowest imports, so startup changes can be compared
+run to run. No database, redis or chain connections are made.
+
+Run from the discovery-provider directory, e.g. inside the discovery container:
+
+    PYTHONPATH=. python scripts/profile_startup.py --runs 5 --top 20
+    PYTHONPATH=. python scripts/profile_startup.py --role web --runs 10
+
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# what each role imports before it can serve requests or run tasks
+ROLE_CODE = {
+    # create_app registers the route blueprints
+    "web": (
+        "from flask import Flask\n"
+        "from src.app import register_blueprints\n"
+        "register_blueprints(Flask('profile_startup'))\n"
+    ),
+    # celery workers import every task module
+    "worker": (
+        "import importlib\n"
+        "from src.app import CELERY_TASK_MODULES\n"
+        "for module in CELERY_TASK_MODULES:\n"
+        "    importlib.import_module(module)\n"
+    ),
+    # beat only schedules tasks by name
+    "beat": "import src.app\n",
+}
+
+TIMED_CODE = """
+import time
+start = time.perf_counter()
+{code}
+print(f"elapsed={{time.perf_counter() - start}}")
+"""
+
+
+def run_role(role):
+    """Returns the elapsed seconds and the -X importtime report of one run"""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            TIMED_CODE.format(code=ROLE_CODE[role]),
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{role} failed to import:\n{result.stderr[-2000:]}")
+    elapsed = float(result.stdout.strip().splitlines()[-1].split("=")[1])
+    return elapsed, result.stderr
+
+
+def parse_importtime(report):
+    """Maps module names to their cumulative import time in microseconds"""
+    cumulative = {}
+    for line in report.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split(":", 1)[1].split("|")
+        cumulative[module.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--role", choices=list(ROLE_CODE), action="append")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    for role in args.role or list(ROLE_CODE):
+        # the first run warms the file cache and writes bytecode
+        run_role(role)
+        runs = [run_role(role) for _ in range(args.runs)]
+        times = [elapsed for elapsed, _ in runs]
+        print(
+            f"{role}: median {statistics.median(times) * 1000:.0f}ms, "
+            f"min {min(times) * 1000:.0f}ms, max {max(times) * 1000:.0f}ms "
+            f"over {args.runs} runs"
+        )
+
+        # slowest imports of the median run
+        _, report = sorted(runs)[len(runs) // 2]
+        cumulative = parse_importtime(report)
+        slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)
+        for module, cumulative_us in slowest[: args.top]:
+            print(f"    {cumulative_us / 1000:8.1f}ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
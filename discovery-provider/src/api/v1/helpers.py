@@ -11,7 +11,12 @@ from src.queries.get_support_for_user import SupportResponse
 from src.queries.get_undisbursed_challenges import UndisbursedChallengeResponse
 from src.queries.query_helpers import SortDirection, SortMethod
 from src.queries.reactions import ReactionResponse
-from src.utils.helpers import decode_string_id, encode_int_id
+from src.utils.helpers import (
+    decode_string_id,
+    decode_string_ids,
+    encode_int_id,
+    encode_int_ids,
+)
 from src.utils.spl_audio import to_wei_string
 
 logger = logging.getLogger(__name__)
@@ -64,10 +69,12 @@ def add_playlist_added_timestamps(playlist):
     if "playlist_contents" not in playlist:
         return playlist
     added_timestamps = []
-    for track in playlist["playlist_contents"]["track_ids"]:
+    tracks = playlist["playlist_contents"]["track_ids"]
+    track_ids = encode_int_ids([track["track"] for track in tracks])
+    for track, track_id in zip(tracks, track_ids):
         added_timestamps.append(
             {
-                "track_id": encode_int_id(track["track"]),
+                "track_id": track_id,
                 "timestamp": track["time"],
                 "metadata_timestamp": track.get("metadata_time"),
             }
@@ -352,7 +359,7 @@ def extend_tip(tip):
     new_tip["sender"] = extend_user(tip["sender"])
     new_tip["receiver"] = extend_user(tip["receiver"])
     new_tip["followee_supporters"] = [
-        {"user_id": encode_int_id(id)} for id in new_tip["followee_supporters"]
+        {"user_id": id} for id in encode_int_ids(new_tip["followee_supporters"])
     ]
     return new_tip
 
@@ -417,7 +424,7 @@ def get_current_user_id(args):
 
 def decode_ids_array(ids_array):
     """Takes string ids and decodes them"""
-    return list(map(lambda id: decode_string_id(id), ids_array))
+    return decode_string_ids(ids_array)
 
 
 class DescriptiveArgument(reqparse.Argument):
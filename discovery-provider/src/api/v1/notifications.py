@@ -10,7 +10,10 @@ from src.api.v1.helpers import (
 )
 from src.api.v1.models.notifications import notifications, playlist_updates
 from src.api.v1.utils.extend_notification import extend_notification
-from src.queries.get_notifications import get_notifications
+from src.queries.get_notifications import (
+    get_notifications,
+    get_unread_notification_count,
+)
 from src.queries.get_user_playlist_update import (
     PlaylistUpdate,
     get_user_playlist_update,
@@ -55,7 +58,13 @@ class GetNotifications(Resource):
         with db.scoped_session() as session:
             notifications = get_notifications(session, args)
             formatted_notifications = list(map(extend_notification, notifications))
-            return success_response({"notifications": formatted_notifications})
+            unread_count = get_unread_notification_count(session, decoded_id)
+            return success_response(
+                {
+                    "notifications": formatted_notifications,
+                    "unread_count": unread_count,
+                }
+            )
 
 
 def extend_playlist_update(playlist_seen: PlaylistUpdate):
@@ -23,6 +23,7 @@ from src.api.v1.helpers import (
 )
 from src.api.v1.models.playlists import full_playlist_model, playlist_model
 from src.api.v1.models.users import user_model_full
+from src.api.v1.utils.compiled_marshal import marshal_with_compiled
 from src.queries.get_playlist_tracks import get_playlist_tracks
 from src.queries.get_playlists import get_playlists
 from src.queries.get_reposters_for_playlist import get_reposters_for_playlist
@@ -153,7 +154,7 @@ class FullPlaylist(Resource):
         params={"playlist_id": "A Playlist ID"},
     )
     @ns.expect(current_user_parser)
-    @ns.marshal_with(full_playlists_response)
+    @marshal_with_compiled(ns, full_playlists_response)
     @cache(ttl_sec=5)
     def get(self, playlist_id):
         playlist_id = decode_with_abort(playlist_id, full_ns)
@@ -178,7 +179,7 @@ class FullPlaylistByHandleAndSlug(Resource):
         params={"handle": "playlist owner handle", "slug": "playlist slug"},
     )
     @ns.expect(current_user_parser)
-    @ns.marshal_with(full_playlists_response)
+    @marshal_with_compiled(ns, full_playlists_response)
     @cache(ttl_sec=5)
     def get(self, handle, slug):
         args = current_user_parser.parse_args()
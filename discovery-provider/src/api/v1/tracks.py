@@ -34,6 +34,7 @@ from src.api.v1.helpers import (
     trending_parser_paginated,
 )
 from src.api.v1.models.users import user_model_full
+from src.api.v1.utils.compiled_marshal import marshal_with_compiled
 from src.queries.get_feed import get_feed
 from src.queries.get_latest_entities import get_latest_entities
 from src.queries.get_premium_track_signatures import (
@@ -54,11 +55,11 @@ from src.queries.get_stems_of import get_stems_of
 from src.queries.get_subsequent_tracks import get_subsequent_tracks
 from src.queries.get_top_followee_saves import get_top_followee_saves
 from src.queries.get_top_followee_windowed import get_top_followee_windowed
+from src.queries.get_track_stream_info import get_track_stream_info
 from src.queries.get_track_stream_signature import (
     CID_STREAM_ENABLED,
     get_track_stream_signature,
 )
-from src.queries.get_track_user_creator_node import get_track_user_creator_node
 from src.queries.get_tracks import RouteArgs, get_tracks
 from src.queries.get_tracks_including_unlisted import get_tracks_including_unlisted
 from src.queries.get_trending import get_full_trending, get_trending
@@ -418,28 +419,14 @@ class TrackStream(Resource):
         https://developer.mozilla.org/en-US/docs/Web/HTTP/Range_requests
         """
         decoded_id = decode_with_abort(track_id, ns)
-        args = {"track_id": decoded_id}
-        creator_nodes = get_track_user_creator_node(args)
-        if creator_nodes is None:
-            abort_not_found(track_id, ns)
-        creator_nodes = creator_nodes.split(",")
-        if not creator_nodes:
-            abort_not_found(track_id, ns)
-
         # before redirecting to content node,
         # make sure the track isn't deleted and the user isn't deactivated
-        args = {
-            "id": [decoded_id],
-            "with_users": True,
-            "skip_unlisted_filter": True,
-        }
-        tracks = get_tracks(args)
-
-        if not tracks:
+        track = get_track_stream_info(decoded_id)
+        if not track or track["is_delete"] or track["is_deactivated"]:
             abort_not_found(track_id, ns)
 
-        track = tracks[0]
-        if track["is_delete"] or track["user"]["is_deactivated"]:
+        creator_nodes = (track["creator_node_endpoint"] or "").split(",")
+        if not creator_nodes[0]:
             abort_not_found(track_id, ns)
 
         request_args = stream_parser.parse_args()
@@ -601,7 +588,7 @@ class FullTrending(Resource):
     @record_metrics
     @ns.doc()
     @full_ns.expect(full_trending_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     def get(self, version):
         trending_track_versions = trending_strategy_factory.get_versions_for_type(
             TrendingType.TRACKS
@@ -691,7 +678,7 @@ class UndergroundTrending(Resource):
 class FullUndergroundTrending(Resource):
     @record_metrics
     @full_ns.expect(pagination_with_current_user_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     def get(self, version):
         underground_trending_versions = trending_strategy_factory.get_versions_for_type(
             TrendingType.UNDERGROUND_TRACKS
@@ -785,7 +772,7 @@ full_recommended_track_parser.add_argument(
 class FullRecommendedTracks(Resource):
     @record_metrics
     @full_ns.expect(full_recommended_track_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     def get(self, version):
         trending_track_versions = trending_strategy_factory.get_versions_for_type(
             TrendingType.TRACKS
@@ -1101,7 +1088,7 @@ class BestNewReleases(Resource):
         id="Best New Releases",
         description='Gets the tracks found on the "Best New Releases" smart playlist',
     )
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     @cache(ttl_sec=10)
     def get(self):
         request_args = best_new_releases_parser.parse_args()
@@ -1151,6 +1138,12 @@ under_the_radar_parser.add_argument(
     type=bool,
     description="Boolean to include user info with tracks",
 )
+under_the_radar_parser.add_argument(
+    "cursor",
+    required=False,
+    type=str,
+    description="ISO-8601 activity timestamp to page from, only older activity is included",
+)
 
 
 @full_ns.route("/under_the_radar")
@@ -1161,7 +1154,7 @@ class UnderTheRadar(Resource):
         description="""Gets the tracks found on the \"Under the Radar\" smart playlist""",
     )
     @full_ns.expect(under_the_radar_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     @cache(ttl_sec=10)
     def get(self):
         request_args = under_the_radar_parser.parse_args()
@@ -1172,6 +1165,7 @@ class UnderTheRadar(Resource):
             "offset": format_offset(request_args),
             "user_id": get_current_user_id(request_args),
             "filter": request_args.get("filter"),
+            "cursor": request_args.get("cursor"),
         }
         feed_results = get_feed(args)
         feed_results = list(map(extend_track, feed_results))
@@ -1202,7 +1196,7 @@ class MostLoved(Resource):
         description="""Gets the tracks found on the \"Most Loved\" smart playlist""",
     )
     @full_ns.expect(most_loved_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     @cache(ttl_sec=10)
     def get(self):
         request_args = most_loved_parser.parse_args()
@@ -1240,7 +1234,7 @@ class FeelingLucky(Resource):
         description="""Gets random tracks found on the \"Feeling Lucky\" smart playlist""",
     )
     @full_ns.expect(feeling_lucky_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     @cache(ttl_sec=10)
     def get(self):
         request_args = feeling_lucky_parser.parse_args()
@@ -60,6 +60,7 @@ from src.api.v1.models.users import (
 )
 from src.api.v1.models.wildcard_model import WildcardModel
 from src.api.v1.playlists import get_tracks_for_playlist
+from src.api.v1.utils.compiled_marshal import marshal_with_compiled
 from src.challenges.challenge_event_bus import setup_challenge_bus
 from src.queries.get_associated_user_id import get_associated_user_id
 from src.queries.get_associated_user_wallet import get_associated_user_wallet
@@ -352,7 +353,7 @@ class FullTrackList(Resource):
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
     @full_ns.expect(user_tracks_route_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     @auth_middleware()
     @cache(ttl_sec=5)
     def get(self, id, authed_user_id=None):
@@ -438,7 +439,7 @@ class HandleFullTrackList(Resource):
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
     @full_ns.expect(user_tracks_route_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @marshal_with_compiled(full_ns, full_tracks_response)
     def get(self, handle, authed_user_id=None):
         return self._get(handle, authed_user_id)
 
@@ -0,0 +1,284 @@
+from functools import wraps
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app, has_app_context, request
+from flask_restx import fields, marshal
+from flask_restx.fields import get_value
+from flask_restx.marshalling import make
+from flask_restx.marshalling import marshal_with as restx_marshal_with
+from flask_restx.utils import merge, unpack
+
+# flask-restx walks the field tree of a model for every object it marshals.
+# compile_marshaller resolves that walk once per model into a plan. Plain
+# fields (String, Integer, Boolean, Raw...) are read and formatted inline,
+# Nested and List fields recurse into compiled models, and anything else
+# (custom outputs, masks, wildcards, callable defaults) defers to the field's
+# own `output`, so the result is always identical to `marshal`.
+
+Marshaller = Callable[[Any], Any]
+
+# (model, marshaller) keyed by the model's id and skip_none, the model is kept
+# so that its id is not reused
+_compiled_marshallers: Dict[Tuple[int, bool], Tuple[Any, Marshaller]] = {}
+
+
+class _Fallback(Exception):
+    """Raised when a value needs the field's own output to be marshalled"""
+
+
+def _make_getter(name) -> Callable[[Any], Any]:
+    """Gets `name` from an object like flask-restx, with a fast path for dicts"""
+    # dotted names and names of dict attributes need get_value's handling
+    if not isinstance(name, str) or "." in name or hasattr(dict, name):
+        return lambda data: get_value(name, data)
+
+    def getter(data):
+        if type(data) is dict:
+            return data.get(name)
+        return get_value(name, data)
+
+    return getter
+
+
+def _is_plain_field(field) -> bool:
+    return (
+        type(field).output is fields.Raw.output
+        and not field.mask
+        and not callable(field.default)
+        and not callable(field.attribute)
+    )
+
+
+def _get_format(field) -> Optional[Callable[[Any], Any]]:
+    if type(field).format is fields.Raw.format:
+        return None
+    return field.format
+
+
+def _get_none_value(field):
+    # Raw.output formats the default when the value is missing
+    default = field.default
+    return field.format(default) if default else default
+
+
+def _compile_plain(key, field) -> Marshaller:
+    getter = _make_getter(key if field.attribute is None else field.attribute)
+    format_value = _get_format(field)
+    none_value = _get_none_value(field)
+
+    def output(data):
+        value = getter(data)
+        if value is None:
+            return none_value
+        if format_value is None:
+            return value
+        try:
+            return format_value(value)
+        except Exception:
+            return field.output(key, data)
+
+    return output
+
+
+def _compile_nested_value(field) -> Marshaller:
+    nested = compile_marshaller(field.nested, skip_none=field.skip_none)
+    allow_null = field.allow_null
+    default = field.default
+
+    def output(value):
+        if value is None:
+            if allow_null:
+                return None
+            elif default is not None:
+                return default
+        return nested(value)
+
+    return output
+
+
+def _compile_nested(key, field) -> Marshaller:
+    getter = _make_getter(key if field.attribute is None else field.attribute)
+    nested_value = _compile_nested_value(field)
+    return lambda data: nested_value(getter(data))
+
+
+def _compile_list_item(field) -> Optional[Marshaller]:
+    """Compiles the output of a List's container for each item of the list"""
+    if type(field) is fields.Nested and field.attribute is None:
+        return _compile_nested_value(field)
+    if not _is_plain_field(field) or field.attribute is not None:
+        return None
+
+    format_value = _get_format(field)
+    none_value = _get_none_value(field)
+    # List.format passes dict items to fields other than Raw and Nested on their own
+    check_dict = type(field) is not fields.Raw
+
+    def output(item):
+        if item is None:
+            return none_value
+        if check_dict and isinstance(item, dict):
+            raise _Fallback()
+        if format_value is None:
+            return item
+        try:
+            return format_value(item)
+        except Exception:
+            raise _Fallback()
+
+    return output
+
+
+def _compile_list(key, field) -> Marshaller:
+    item_output = _compile_list_item(field.container)
+    if item_output is None or not _is_plain_list(field):
+        return lambda data: field.output(key, data)
+
+    getter = _make_getter(key if field.attribute is None else field.attribute)
+
+    def output(data):
+        value = getter(data)
+        if type(value) is not list and type(value) is not tuple:
+            return field.output(key, data)
+        try:
+            return [item_output(item) for item in value]
+        except _Fallback:
+            return field.format(value)
+
+    return output
+
+
+def _is_plain_list(field) -> bool:
+    return (
+        type(field).output is fields.List.output
+        and type(field).format is fields.List.format
+        and not callable(field.attribute)
+    )
+
+
+def _compile_field(key, field, skip_none) -> Optional[Marshaller]:
+    """Returns the compiled output of a field, or None if it can't be compiled"""
+    if isinstance(field, dict):
+        # dicts of fields are marshalled from the same object
+        return compile_marshaller(field, skip_none=skip_none)
+
+    field = make(field)
+    if isinstance(field, fields.Wildcard):
+        return None
+    if isinstance(field, fields.List):
+        return _compile_list(key, field)
+    if type(field) is fields.Nested and not callable(field.attribute):
+        return _compile_nested(key, field)
+    if _is_plain_field(field):
+        return _compile_plain(key, field)
+    return lambda data: field.output(key, data)
+
+
+def compile_marshaller(model, skip_none=False) -> Marshaller:
+    """
+    Compiles a flask-restx model (or dict of fields) into a function that
+    returns the same output as `marshal(data, model, skip_none=skip_none)`.
+    Compiled marshallers are cached per model.
+    """
+    cache_key = (id(model), skip_none)
+    if cache_key in _compiled_marshallers:
+        return _compiled_marshallers[cache_key][1]
+
+    def fallback(data):
+        return marshal(data, model, skip_none=skip_none)
+
+    resolved = getattr(model, "resolved", model)
+    if getattr(model, "__mask__", None):
+        _compiled_marshallers[cache_key] = (model, fallback)
+        return fallback
+
+    outputs: List[Tuple[str, Marshaller]] = []
+
+    def marshal_one(data):
+        if skip_none:
+            out = {}
+            for key, output in outputs:
+                value = output(data)
+                if value is not None and value != {}:
+                    out[key] = value
+            return out
+        return {key: output(data) for key, output in outputs}
+
+    def marshaller(data):
+        if isinstance(data, (list, tuple)):
+            return [marshaller(item) for item in data]
+        return marshal_one(data)
+
+    # registered before compiling the fields so self-referencing models resolve
+    _compiled_marshallers[cache_key] = (model, marshaller)
+
+    for key, field in resolved.items():
+        output = _compile_field(key, field, skip_none)
+        if output is None:
+            # wildcards depend on the keys marshalled before them
+            _compiled_marshallers[cache_key] = (model, fallback)
+            return fallback
+        outputs.append((key, output))
+
+    return marshaller
+
+
+class compiled_marshal_with(restx_marshal_with):
+    """
+    flask-restx's marshal_with decorator using a compiled marshaller.
+    Falls back to `marshal` when a fields mask is requested.
+    """
+
+    def __init__(
+        self, fields, envelope=None, skip_none=False, mask=None, ordered=False
+    ):
+        super().__init__(fields, envelope, skip_none, mask, ordered)
+        self.marshaller = None
+        if not ordered:
+            self.marshaller = compile_marshaller(fields, skip_none=skip_none)
+
+    def marshal(self, data, mask):
+        if mask or self.marshaller is None:
+            return marshal(
+                data, self.fields, self.envelope, self.skip_none, mask, self.ordered
+            )
+        out = self.marshaller(data)
+        if self.envelope:
+            out = {self.envelope: out}
+        return out
+
+    def __call__(self, f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            resp = f(*args, **kwargs)
+            mask = self.mask
+            if has_app_context():
+                mask_header = current_app.config["RESTX_MASK_HEADER"]
+                mask = request.headers.get(mask_header) or mask
+            if isinstance(resp, tuple):
+                data, code, headers = unpack(resp)
+                return (self.marshal(data, mask), code, headers)
+            return self.marshal(resp, mask)
+
+        return wrapper
+
+
+def marshal_with_compiled(
+    ns, fields, as_list=False, code=HTTPStatus.OK, description=None, **kwargs
+):
+    """Drop-in replacement for `ns.marshal_with` using a compiled marshaller"""
+
+    def wrapper(func):
+        doc = {
+            "responses": {
+                str(code): (description, [fields], kwargs)
+                if as_list
+                else (description, fields, kwargs)
+            },
+            "__mask__": kwargs.get("mask", True),
+        }
+        func.__apidoc__ = merge(getattr(func, "__apidoc__", {}), doc)
+        return compiled_marshal_with(fields, ordered=ns.ordered, **kwargs)(func)
+
+    return wrapper
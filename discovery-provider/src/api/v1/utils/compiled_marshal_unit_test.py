@@ -0,0 +1,114 @@
+import random
+
+from flask import Flask
+from flask_restx import Namespace, fields, marshal
+from src.api.v1.models.playlists import full_playlist_model
+from src.api.v1.models.tracks import track, track_full
+from src.api.v1.models.users import user_model_full
+from src.api.v1.utils.compiled_marshal import compile_marshaller, marshal_with_compiled
+
+ns = Namespace("test")
+
+nested_model = ns.model("nested", {"id": fields.Integer, "name": fields.String})
+test_model = ns.model(
+    "test",
+    {
+        "id": fields.Integer(required=True),
+        "title": fields.String(default="untitled"),
+        "renamed": fields.String(attribute="original_name"),
+        "dotted": fields.String(attribute="nested.name"),
+        "items": fields.String,
+        "score": fields.Float,
+        "is_active": fields.Boolean,
+        "raw": fields.Raw,
+        "link": fields.FormattedString("/items/{id}"),
+        "nested": fields.Nested(nested_model),
+        "nullable": fields.Nested(nested_model, allow_null=True),
+        "skipping": fields.Nested(nested_model, skip_none=True),
+        "tags": fields.List(fields.String),
+        "children": fields.List(fields.Nested(nested_model)),
+        "inline": {"id": fields.Integer},
+    },
+)
+
+
+def random_value(field, rng, depth):
+    if isinstance(field, type):
+        field = field()
+    if rng.random() < 0.1:
+        return None
+    if isinstance(field, fields.Nested):
+        if depth > 3:
+            return None
+        if rng.random() < 0.2:
+            return [random_object(field.nested, rng, depth + 1) for _ in range(2)]
+        return random_object(field.nested, rng, depth + 1)
+    if isinstance(field, fields.List):
+        return [
+            random_value(field.container, rng, depth + 1)
+            for _ in range(rng.randint(0, 3))
+        ]
+    if isinstance(field, fields.Boolean):
+        return rng.choice([True, False, 0, 1, "invalid"])
+    if isinstance(field, fields.Integer):
+        return rng.choice([rng.randint(-5, 1000), "7", 2.5, "invalid"])
+    if isinstance(field, fields.Float):
+        return rng.choice([rng.random(), 3, "1.5"])
+    if isinstance(field, fields.String):
+        return rng.choice(["abc", 12, ""])
+    return rng.choice(["raw", 1, {"a": 1}, [1, 2]])
+
+
+def random_object(model, rng, depth=0):
+    obj = {"original_name": "original"}
+    for key, field in getattr(model, "resolved", model).items():
+        # leave out some keys entirely
+        if rng.random() < 0.1:
+            continue
+        obj[key] = random_value(field, rng, depth)
+    return obj
+
+
+def marshal_or_error(marshaller, data):
+    try:
+        return marshaller(data)
+    except Exception as e:
+        return (type(e), str(e))
+
+
+def test_compiled_marshaller_matches_marshal():
+    rng = random.Random(42)
+    for model in [test_model, track, track_full, user_model_full, full_playlist_model]:
+        for skip_none in [False, True]:
+            compiled = compile_marshaller(model, skip_none=skip_none)
+            for _ in range(200):
+                data = random_object(model, rng)
+                if rng.random() < 0.1:
+                    data = [data, random_object(model, rng)]
+                expected = marshal_or_error(
+                    lambda d: marshal(d, model, skip_none=skip_none), data
+                )
+                assert marshal_or_error(compiled, data) == expected
+
+
+def test_compiled_marshaller_is_cached():
+    assert compile_marshaller(track_full) is compile_marshaller(track_full)
+    assert compile_marshaller(track_full) is not compile_marshaller(
+        track_full, skip_none=True
+    )
+
+
+def test_marshal_with_compiled():
+    app = Flask(__name__)
+    app.config["RESTX_MASK_HEADER"] = "X-Fields"
+
+    @marshal_with_compiled(ns, nested_model, envelope="data")
+    def get():
+        return {"id": "1", "name": "a", "extra": True}, 200
+
+    assert "200" in get.__apidoc__["responses"]
+    with app.test_request_context("/"):
+        assert get() == ({"data": {"id": 1, "name": "a"}}, 200, {})
+    # masks are applied by flask-restx
+    with app.test_request_context("/", headers={"X-Fields": "name"}):
+        assert get() == ({"data": {"name": "a"}}, 200, {})
@@ -17,37 +17,17 @@ from opentelemetry.instrumentation.flask import FlaskInstrumentor  # type: ignor
 from sqlalchemy import exc
 from sqlalchemy_utils import create_database, database_exists
 from src import api_helpers, exceptions, tracer
-from src.api.v1 import api as api_v1
-from src.api.v1.playlists import playlist_stream_bp
-from src.challenges.challenge_event_bus import setup_challenge_bus
 from src.challenges.create_new_challenges import create_new_challenges
 from src.database_task import DatabaseTask
 from src.eth_indexing.event_scanner import eth_indexing_last_scanned_block_key
-from src.queries import (
-    block_confirmation,
-    get_redirect_weights,
-    health_check,
-    index_block_stats,
-    notifications,
-    prometheus_metrics_exporter,
-    queries,
-    search,
-    search_queries,
-    skipped_transactions,
-    user_signals,
-)
-from src.solana.solana_client_manager import SolanaClientManager
 from src.tasks import celery_app
-from src.tasks.index_reactions import INDEX_REACTIONS_LOCK
-from src.tasks.update_track_is_available import UPDATE_TRACK_IS_AVAILABLE_LOCK
-from src.utils import helpers
-from src.utils.cid_metadata_client import CIDMetadataClient
+from src.utils import helpers, redis_connection
 from src.utils.config import ConfigIni, config_files, shared_config
-from src.utils.eth_manager import EthManager
-from src.utils.multi_provider import MultiProvider
+from src.utils.lazy import init_lazy
 from src.utils.redis_constants import final_poa_block_redis_key
 from src.utils.redis_metrics import METRICS_INTERVAL, SYNCHRONIZE_METRICS_INTERVAL
 from src.utils.session_manager import SessionManager
+from src.utils.session_router import SessionRouter, with_connect_timeout
 from web3 import HTTPProvider, Web3
 from werkzeug.middleware.proxy_fix import ProxyFix
 
@@ -65,6 +45,41 @@ contract_addresses: Dict[str, Any] = defaultdict()
 
 logger = logging.getLogger(__name__)
 
+# task modules loaded by celery workers
+CELERY_TASK_MODULES = [
+    "src.tasks.index",
+    "src.tasks.index_nethermind",
+    "src.tasks.index_metrics",
+    "src.tasks.index_aggregate_monthly_plays",
+    "src.tasks.index_hourly_play_counts",
+    "src.tasks.vacuum_db",
+    "src.tasks.index_network_peers",
+    "src.tasks.index_trending",
+    "src.tasks.cache_user_balance",
+    "src.monitors.monitoring_queue",
+    "src.tasks.cache_trending_playlists",
+    "src.tasks.index_solana_plays",
+    "src.tasks.index_challenges",
+    "src.tasks.index_user_bank",
+    "src.tasks.index_eth",
+    "src.tasks.index_oracles",
+    "src.tasks.index_rewards_manager",
+    "src.tasks.index_related_artists",
+    "src.tasks.calculate_trending_challenges",
+    "src.tasks.backfill_cid_data",
+    "src.tasks.user_listening_history.index_user_listening_history",
+    "src.tasks.prune_plays",
+    "src.tasks.index_spl_token",
+    "src.tasks.index_aggregate_tips",
+    "src.tasks.index_reactions",
+    "src.tasks.update_track_is_available",
+    "src.tasks.update_sitemaps",
+    "src.tasks.update_feed_cache",
+    "src.tasks.update_random_track_ids",
+    "src.tasks.index_aggregate_karma",
+    "src.tasks.refresh_nft_ownership_cache",
+]
+
 
 def get_contract_addresses():
     return contract_addresses
@@ -100,6 +115,10 @@ def create_app(test_config=None):
 
 
 def create_celery(test_config=None):
+    # celery only dependencies are imported here so the web server doesn't load them
+    from src.solana.solana_client_manager import SolanaClientManager
+    from src.utils.multi_provider import MultiProvider
+
     # pylint: disable=W0603
     global web3endpoint, web3, abi_values, eth_abi_values, eth_web3
     global solana_client_manager
@@ -114,7 +133,9 @@ def create_celery(test_config=None):
     eth_abi_values = helpers.load_eth_abi_values()
 
     # Initialize Solana web3 provider
-    solana_client_manager = SolanaClientManager(shared_config["solana"]["endpoint"])
+    solana_client_manager = init_lazy(
+        lambda: SolanaClientManager(shared_config["solana"]["endpoint"])
+    )
 
     global entity_manager
     global contract_addresses
@@ -247,13 +268,56 @@ def configure_flask(test_config, app, mode="app"):
         ast.literal_eval(app.config["db"]["engine_args_literal"]),
     )
 
+    read_replica_engine_args = with_connect_timeout(
+        ast.literal_eval(app.config["db"]["engine_args_literal"])
+    )
     app.db_read_replica_session_manager = SessionManager(
         app.config["db"]["url_read_replica"],
-        ast.literal_eval(app.config["db"]["engine_args_literal"]),
+        read_replica_engine_args,
+    )
+
+    # reads are spread across the read replica and any additional replicas
+    read_replica_session_managers = [app.db_read_replica_session_manager]
+    for url in app.config["db"].get("url_read_replicas", "").split(","):
+        if url.strip():
+            read_replica_session_managers.append(
+                SessionManager(url.strip(), read_replica_engine_args)
+            )
+    app.db_session_router = SessionRouter(
+        app.db_session_manager,
+        read_replica_session_managers,
+        max_lag_sec=float(app.config["db"].get("read_replica_max_lag_sec", 30)),
+        redis=redis_connection.get_redis(),
+        max_primary_load=int(
+            app.config["db"].get("read_replica_primary_fallback_max_load", 10)
+        ),
     )
 
-    # Register route blueprints
     register_exception_handlers(app)
+    if mode == "app":
+        register_blueprints(app)
+
+    return app
+
+
+def register_blueprints(app):
+    # routes are imported here so celery workers and beat don't load them
+    from src.api.v1 import api as api_v1
+    from src.api.v1.playlists import playlist_stream_bp
+    from src.queries import (
+        block_confirmation,
+        get_redirect_weights,
+        health_check,
+        index_block_stats,
+        notifications,
+        prometheus_metrics_exporter,
+        queries,
+        search,
+        search_queries,
+        skipped_transactions,
+        user_signals,
+    )
+
     app.register_blueprint(queries.bp)
     app.register_blueprint(search.bp)
     app.register_blueprint(search_queries.bp)
@@ -270,10 +334,23 @@ def configure_flask(test_config, app, mode="app"):
     app.register_blueprint(api_v1.bp_full)
     app.register_blueprint(playlist_stream_bp)
 
-    return app
-
 
 def configure_celery(celery, test_config=None):
+    from src.challenges.challenge_event_bus import (
+        DEFAULT_NUM_SHARDS,
+        setup_challenge_bus,
+    )
+    from src.tasks.index_aggregate_karma import INDEX_AGGREGATE_KARMA_LOCK
+    from src.tasks.index_challenges import get_index_challenges_lock_key
+    from src.tasks.index_reactions import INDEX_REACTIONS_LOCK
+    from src.tasks.refresh_nft_ownership_cache import REFRESH_NFT_OWNERSHIP_CACHE_LOCK
+    from src.tasks.update_feed_cache import UPDATE_FEED_CACHE_LOCK
+    from src.tasks.update_random_track_ids import UPDATE_RANDOM_TRACK_IDS_LOCK
+    from src.tasks.update_sitemaps import UPDATE_SITEMAPS_LOCK
+    from src.tasks.update_track_is_available import UPDATE_TRACK_IS_AVAILABLE_LOCK
+    from src.utils.cid_metadata_client import CIDMetadataClient
+    from src.utils.eth_manager import EthManager
+
     database_url = shared_config["db"]["url"]
     database_url_read_replica = shared_config["db"]["url_read_replica"]
     redis_url = shared_config["redis"]["url"]
@@ -291,34 +368,7 @@ def configure_celery(celery, test_config=None):
 
     # Update celery configuration
     celery.conf.update(
-        imports=[
-            "src.tasks.index",
-            "src.tasks.index_nethermind",
-            "src.tasks.index_metrics",
-            "src.tasks.index_aggregate_monthly_plays",
-            "src.tasks.index_hourly_play_counts",
-            "src.tasks.vacuum_db",
-            "src.tasks.index_network_peers",
-            "src.tasks.index_trending",
-            "src.tasks.cache_user_balance",
-            "src.monitors.monitoring_queue",
-            "src.tasks.cache_trending_playlists",
-            "src.tasks.index_solana_plays",
-            "src.tasks.index_challenges",
-            "src.tasks.index_user_bank",
-            "src.tasks.index_eth",
-            "src.tasks.index_oracles",
-            "src.tasks.index_rewards_manager",
-            "src.tasks.index_related_artists",
-            "src.tasks.calculate_trending_challenges",
-            "src.tasks.backfill_cid_data",
-            "src.tasks.user_listening_history.index_user_listening_history",
-            "src.tasks.prune_plays",
-            "src.tasks.index_spl_token",
-            "src.tasks.index_aggregate_tips",
-            "src.tasks.index_reactions",
-            "src.tasks.update_track_is_available",
-        ],
+        imports=CELERY_TASK_MODULES,
         beat_schedule={
             "update_discovery_provider": {
                 "task": "update_discovery_provider",
@@ -428,6 +478,26 @@ def configure_celery(celery, test_config=None):
                 "task": "index_profile_challenge_backfill",
                 "schedule": timedelta(minutes=1),
             },
+            "update_sitemaps": {
+                "task": "update_sitemaps",
+                "schedule": timedelta(hours=6),
+            },
+            "update_feed_cache": {
+                "task": "update_feed_cache",
+                "schedule": timedelta(seconds=5),
+            },
+            "update_random_track_ids": {
+                "task": "update_random_track_ids",
+                "schedule": timedelta(seconds=10),
+            },
+            "index_aggregate_karma": {
+                "task": "index_aggregate_karma",
+                "schedule": timedelta(seconds=30),
+            },
+            "refresh_nft_ownership_cache": {
+                "task": "refresh_nft_ownership_cache",
+                "schedule": timedelta(seconds=60),
+            },
         },
         task_serializer="json",
         accept_content=["json"],
@@ -452,18 +522,26 @@ def configure_celery(celery, test_config=None):
     redis_inst = redis.Redis.from_url(url=redis_url)
 
     # Initialize CIDMetadataClient for celery task context
-    cid_metadata_client = CIDMetadataClient(
-        eth_web3,
-        shared_config,
-        redis_inst,
-        eth_abi_values,
+    # Clients that make network requests on init are created on first use
+    # when lazy_init is enabled
+    cid_metadata_client = init_lazy(
+        lambda: CIDMetadataClient(
+            eth_web3,
+            shared_config,
+            redis_inst,
+            eth_abi_values,
+        )
     )
 
-    registry_address = web3.toChecksumAddress(
-        shared_config["eth_contracts"]["registry"]
-    )
-    eth_manager = EthManager(eth_web3, eth_abi_values, registry_address)
-    eth_manager.init_contracts()
+    def init_eth_manager():
+        registry_address = web3.toChecksumAddress(
+            shared_config["eth_contracts"]["registry"]
+        )
+        eth_manager = EthManager(eth_web3, eth_abi_values, registry_address)
+        eth_manager.init_contracts()
+        return eth_manager
+
+    eth_manager = init_lazy(init_eth_manager)
 
     # Clear existing locks used in tasks if present
     redis_inst.delete(eth_indexing_last_scanned_block_key)
@@ -476,7 +554,8 @@ def configure_celery(celery, test_config=None):
     redis_inst.delete("aggregate_metrics_lock")
     redis_inst.delete("synchronize_metrics_lock")
     redis_inst.delete("solana_plays_lock")
-    redis_inst.delete("index_challenges_lock")
+    for shard in range(DEFAULT_NUM_SHARDS):
+        redis_inst.delete(get_index_challenges_lock_key(shard))
     redis_inst.delete("user_bank_lock")
     redis_inst.delete("index_eth_lock")
     redis_inst.delete("index_oracles_lock")
@@ -491,6 +570,11 @@ def configure_celery(celery, test_config=None):
     redis_inst.delete("index_trending_lock")
     redis_inst.delete(INDEX_REACTIONS_LOCK)
     redis_inst.delete(UPDATE_TRACK_IS_AVAILABLE_LOCK)
+    redis_inst.delete(UPDATE_SITEMAPS_LOCK)
+    redis_inst.delete(UPDATE_FEED_CACHE_LOCK)
+    redis_inst.delete(UPDATE_RANDOM_TRACK_IDS_LOCK)
+    redis_inst.delete(INDEX_AGGREGATE_KARMA_LOCK)
+    redis_inst.delete(REFRESH_NFT_OWNERSHIP_CACHE_LOCK)
 
     # delete cached final_poa_block in case it has changed
     redis_inst.delete(final_poa_block_redis_key)
@@ -512,7 +596,7 @@ def configure_celery(celery, test_config=None):
                 redis=redis_inst,
                 eth_web3_provider=eth_web3,
                 solana_client_manager=solana_client_manager,
-                challenge_event_bus=setup_challenge_bus(),
+                challenge_event_bus=init_lazy(setup_challenge_bus),
                 eth_manager=eth_manager,
             )
 
@@ -1,9 +1,13 @@
 import json
 import logging
+import os
+import socket
+import time
 from collections import defaultdict
 from contextlib import contextmanager
-from typing import Any, DefaultDict, Dict, List, Tuple, TypedDict
+from typing import Any, DefaultDict, Dict, List, Optional, Set, Tuple, TypedDict
 
+from redis.exceptions import ResponseError
 from sqlalchemy.orm.session import Session
 from src.challenges.challenge import ChallengeManager, EventMetadata
 from src.challenges.challenge_event import ChallengeEvent
@@ -24,10 +28,40 @@ from src.challenges.trending_challenge import (
     trending_track_challenge_manager,
     trending_underground_track_challenge_manager,
 )
+from src.utils.config import shared_config
+from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
+from src.utils.redis_cache import get_json_cached_key, set_json_cached_key
 from src.utils.redis_connection import get_redis
 
 logger = logging.getLogger(__name__)
+
+# Legacy list-based queue. Only drained into the streams for backwards compatibility.
 REDIS_QUEUE_PREFIX = "challenges-event-queue"
+LEGACY_QUEUE_DRAIN_BATCH_SIZE = 1000
+
+# Events are sharded by user_id across `num_shards` streams so that
+# multiple consumers can process them in parallel.
+REDIS_STREAM_PREFIX = "challenges-event-stream"
+REDIS_DEAD_LETTER_STREAM = f"{REDIS_STREAM_PREFIX}:dead-letter"
+CONSUMER_GROUP = "challenge-managers"
+
+# Approximate cap on each stream's length, enforced on XADD
+STREAM_MAX_LEN = 1_000_000
+# Pending (delivered but unacknowledged) events idle for longer than this
+# are assumed to belong to a crashed consumer and are redelivered
+PENDING_RETRY_IDLE_MS = 60 * 1000
+# Events delivered this many times without being acknowledged are dead-lettered
+MAX_DELIVERIES = 5
+# When some listeners of an event fail, the ids of the events the other listeners
+# processed are kept per listener, so that redeliveries only reach the failed ones.
+# Outlives the redeliveries, which end with the event being acked or dead-lettered
+PROCESSED_BY_LISTENER_TTL_SEC = 24 * 60 * 60
+
+# The stats take a few commands per shard, so health checks share them briefly
+CHALLENGE_EVENT_QUEUE_STATS_KEY = f"{REDIS_STREAM_PREFIX}:stats"
+CHALLENGE_EVENT_QUEUE_STATS_TTL_SEC = 10
+
+DEFAULT_NUM_SHARDS = int(shared_config["discprov"]["challenge_event_queue_shards"])
 
 
 class InternalEvent(TypedDict):
@@ -37,11 +71,116 @@ class InternalEvent(TypedDict):
     extra: Dict
 
 
+class ChallengeEventQueueStats(TypedDict):
+    # Total number of entries retained across the shard streams
+    length: int
+    # Delivered to a consumer but not yet acknowledged
+    pending: int
+    # Not yet delivered to any consumer, if reported by Redis (>= 7.0)
+    lag: Optional[int]
+    # Age of the oldest pending or undelivered event
+    oldest_unprocessed_age_sec: Optional[float]
+    dead_letter: int
+
+
+def get_stream_key(shard: int) -> str:
+    return f"{REDIS_STREAM_PREFIX}:{shard}"
+
+
+def get_processed_by_listener_key(stream: str, challenge_id: str) -> str:
+    return f"{stream}:processed:{challenge_id}"
+
+
+def get_shard(user_id: int, num_shards: int) -> int:
+    return user_id % num_shards
+
+
+def _stream_id_timestamp_sec(stream_id) -> float:
+    if isinstance(stream_id, bytes):
+        stream_id = stream_id.decode()
+    return int(stream_id.split("-")[0]) / 1000
+
+
+def _next_stream_id(stream_id) -> str:
+    """Returns the smallest stream id strictly greater than `stream_id`"""
+    if isinstance(stream_id, bytes):
+        stream_id = stream_id.decode()
+    ms, seq = stream_id.split("-")
+    return f"{ms}-{int(seq) + 1}"
+
+
+def get_challenge_event_queue_stats(
+    redis, num_shards: int = DEFAULT_NUM_SHARDS
+) -> ChallengeEventQueueStats:
+    """Summarizes the backlog of the challenge event streams across all shards"""
+    length = 0
+    pending = 0
+    lag: Optional[int] = None
+    oldest_unprocessed: Optional[float] = None
+
+    for shard in range(num_shards):
+        stream = get_stream_key(shard)
+        if not redis.exists(stream):
+            continue
+        length += redis.xlen(stream)
+        groups = {
+            (g["name"].decode() if isinstance(g["name"], bytes) else g["name"]): g
+            for g in redis.xinfo_groups(stream)
+        }
+        group = groups.get(CONSUMER_GROUP)
+        if group is None:
+            # Nothing has been consumed yet, so the whole stream is outstanding
+            first_ids = [entry[0] for entry in redis.xrange(stream, count=1)]
+        else:
+            pending_summary = redis.xpending(stream, CONSUMER_GROUP)
+            pending += pending_summary["pending"]
+            if group.get("lag") is not None:
+                lag = (lag or 0) + group["lag"]
+            first_ids = []
+            if pending_summary["pending"]:
+                first_ids.append(pending_summary["min"])
+            undelivered = redis.xrange(
+                stream, min=_next_stream_id(group["last-delivered-id"]), count=1
+            )
+            first_ids.extend(entry[0] for entry in undelivered)
+
+        for stream_id in first_ids:
+            timestamp = _stream_id_timestamp_sec(stream_id)
+            if oldest_unprocessed is None or timestamp < oldest_unprocessed:
+                oldest_unprocessed = timestamp
+
+    return {
+        "length": length,
+        "pending": pending,
+        "lag": lag,
+        "oldest_unprocessed_age_sec": (
+            time.time() - oldest_unprocessed if oldest_unprocessed else None
+        ),
+        "dead_letter": redis.xlen(REDIS_DEAD_LETTER_STREAM),
+    }
+
+
+def get_cached_challenge_event_queue_stats(
+    redis, num_shards: int = DEFAULT_NUM_SHARDS
+) -> ChallengeEventQueueStats:
+    stats = get_json_cached_key(redis, CHALLENGE_EVENT_QUEUE_STATS_KEY)
+    if stats is None:
+        stats = get_challenge_event_queue_stats(redis, num_shards)
+        set_json_cached_key(
+            redis,
+            CHALLENGE_EVENT_QUEUE_STATS_KEY,
+            stats,
+            CHALLENGE_EVENT_QUEUE_STATS_TTL_SEC,
+        )
+    return stats
+
+
 class ChallengeEventBus:
     """`ChallengeEventBus` supports:
-    - dispatching challenge events to a Redis queue
+    - dispatching challenge events to Redis streams, sharded by user_id
     - registering challenge managers to listen to the events.
-    - consuming items from the Redis queue
+    - consuming items from the Redis streams via a consumer group, acknowledging
+      them once processed (at-least-once delivery, with dead-lettering)
     - fetching the manager for a given challenge
     """
 
@@ -49,12 +188,20 @@ class ChallengeEventBus:
     _redis: Any
     _managers: Dict[str, ChallengeManager]
     _in_memory_queue: List[InternalEvent]
+    _num_shards: int
+    _consumer_name: str
 
-    def __init__(self, redis):
+    def __init__(self, redis, num_shards: int = DEFAULT_NUM_SHARDS):
         self._listeners = defaultdict(lambda: [])
         self._redis = redis
         self._managers = {}
         self._in_memory_queue: List[Dict] = []
+        self._num_shards = num_shards
+        self._consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+
+    @property
+    def num_shards(self) -> int:
+        return self._num_shards
 
     def register_listener(self, event: ChallengeEvent, listener: ChallengeManager):
         """Registers a listener (`ChallengeManager`) to listen for a particular event type."""
@@ -114,44 +261,75 @@ class ChallengeEventBus:
         )
 
     def flush(self):
-        """Flushes the in-memory queue of events and enqueues them to Redis"""
+        """Flushes the in-memory queue of events and enqueues them to Redis in a single round trip"""
         logger.info(
             f"ChallengeEventBus: Flushing {len(self._in_memory_queue)} events from in-memory queue"
         )
-        for event in self._in_memory_queue:
-            try:
-                event_json = self._event_to_json(
-                    event["event"],
-                    event["block_number"],
-                    event["user_id"],
-                    event.get("extra", {}),
-                )
-                logger.info(f"ChallengeEventBus: dispatch {event_json}")
-                self._redis.rpush(REDIS_QUEUE_PREFIX, event_json)
-            except Exception as e:
-                logger.warning(f"ChallengeEventBus: error enqueuing to Redis: {e}")
+        self._enqueue(self._in_memory_queue)
         self._in_memory_queue.clear()
 
-    def process_events(self, session: Session, max_events=1000) -> Tuple[int, bool]:
-        """Dequeues `max_events` from Redis queue and processes them, forwarding to listening ChallengeManagers.
+    def process_events(
+        self, session: Session, max_events=1000, shard: Optional[int] = None
+    ) -> Tuple[int, bool]:
+        """Reads up to `max_events` per shard from the Redis streams and processes them,
+        forwarding to listening ChallengeManagers. Processes every shard unless `shard` is given.
+
+        Events are only acknowledged once all of their listeners have processed them; events
+        whose listener raised are redelivered after `PENDING_RETRY_IDLE_MS` to the listeners
+        that have not processed them yet, and dead-lettered after `MAX_DELIVERIES` attempts.
+
         Returns (num_processed_events, did_error).
         Will return -1 as num_processed_events if an error prevented any events from
-        being processed (i.e. some error deserializing from Redis)
+        being processed (i.e. some error reading from Redis)
         """
+        self._drain_legacy_queue()
+
+        shards = range(self._num_shards) if shard is None else [shard]
+        num_processed = 0
+        did_error = False
+        did_read = False
+        for current_shard in shards:
+            (shard_processed, shard_error) = self._process_shard(
+                session, current_shard, max_events
+            )
+            did_error = did_error or shard_error
+            if shard_processed >= 0:
+                did_read = True
+                num_processed += shard_processed
+
+        if not did_read:
+            return (-1, True)
+        return (num_processed, did_error)
+
+    # Helpers
+
+    def _process_shard(
+        self, session: Session, shard: int, max_events: int
+    ) -> Tuple[int, bool]:
+        stream = get_stream_key(shard)
         try:
-            # get the first max_events elements.
-            events_json = self._redis.lrange(REDIS_QUEUE_PREFIX, 0, max_events)
-            logger.info(f"ChallengeEventBus: dequeued {len(events_json)} events")
-            # trim the first from the front of the list
-            self._redis.ltrim(REDIS_QUEUE_PREFIX, len(events_json), -1)
-            events_dicts = list(map(self._json_to_event, events_json))
+            entries, retried_ids = self._read_entries(stream, max_events)
+            logger.info(
+                f"ChallengeEventBus: read {len(entries)} events from shard {shard}"
+            )
 
             # Consolidate event types for processing
             # map of {"event_type": [{ user_id: number, block_number: number, extra: {} }]}}
             event_user_dict: DefaultDict[
                 ChallengeEvent, List[EventMetadata]
             ] = defaultdict(lambda: [])
-            for event_dict in events_dicts:
+            # map of {"event_type": [stream_id]} used to acknowledge processed events
+            event_ids_dict: DefaultDict[ChallengeEvent, List] = defaultdict(lambda: [])
+            malformed = []
+            for (entry_id, fields) in entries:
+                try:
+                    event_dict = self._json_to_event(fields[b"data"])
+                except Exception as e:
+                    logger.warning(
+                        f"ChallengeEventBus: malformed event {entry_id!r}: {e}"
+                    )
+                    malformed.append((entry_id, fields))
+                    continue
                 event_type = event_dict["event"]
                 event_user_dict[event_type].append(
                     {
@@ -162,27 +340,260 @@ class ChallengeEventBus:
                         ),
                     }
                 )
+                event_ids_dict[event_type].append(entry_id)
+            if malformed:
+                self._dead_letter(stream, malformed)
+        except Exception as e:
+            logger.warning(f"ChallengeEventBus: error processing from Redis: {e}")
+            return (-1, True)
+
+        try:
+            processed_by_listener = self._get_processed_by_listener(
+                stream, event_ids_dict, retried_ids
+            )
         except Exception as e:
             logger.warning(f"ChallengeEventBus: error processing from Redis: {e}")
             return (-1, True)
 
         did_error = False
+        processed_ids = []
+        # map of {challenge_id: [stream_id]} processed by listeners whose event type errored
+        partially_processed_ids: DefaultDict[str, List] = defaultdict(lambda: [])
         for (event_type, event_dicts) in event_user_dict.items():
+            event_ids = event_ids_dict[event_type]
             listeners = self._listeners[event_type]
+            listener_ids = {}
+            event_type_error = False
             for listener in listeners:
+                already_processed = processed_by_listener.get(
+                    listener.challenge_id, set()
+                )
+                pending = [
+                    (entry_id, event_dict)
+                    for (entry_id, event_dict) in zip(event_ids, event_dicts)
+                    if entry_id not in already_processed
+                ]
+                if not pending:
+                    continue
                 try:
-                    listener.process(session, event_type, event_dicts)
+                    listener.process(
+                        session, event_type, [event_dict for (_, event_dict) in pending]
+                    )
+                    listener_ids[listener.challenge_id] = [
+                        entry_id for (entry_id, _) in pending
+                    ]
                 except Exception as e:
                     # We really shouldn't see errors from a ChallengeManager (they should handle on their own),
-                    # but in case we do, swallow it and continue on
+                    # but in case we do, swallow it and continue on. The events stay pending to be retried.
                     logger.warning(
                         f"ChallengeEventBus: manager [{listener.challenge_id} unexpectedly propogated error: [{e}]"
                     )
-                    did_error = True
+                    event_type_error = True
+            if event_type_error:
+                did_error = True
+                for (challenge_id, ids) in listener_ids.items():
+                    partially_processed_ids[challenge_id].extend(ids)
+            else:
+                processed_ids.extend(event_ids)
+
+        try:
+            pipe = self._redis.pipeline()
+            for (challenge_id, ids) in partially_processed_ids.items():
+                key = get_processed_by_listener_key(stream, challenge_id)
+                pipe.sadd(key, *ids)
+                pipe.expire(key, PROCESSED_BY_LISTENER_TTL_SEC)
+            if processed_ids:
+                pipe.xack(stream, CONSUMER_GROUP, *processed_ids)
+            # the retried events that are now acked are no longer tracked
+            acked_retried_ids = retried_ids.intersection(processed_ids)
+            if acked_retried_ids:
+                for challenge_id in processed_by_listener:
+                    pipe.srem(
+                        get_processed_by_listener_key(stream, challenge_id),
+                        *acked_retried_ids,
+                    )
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"ChallengeEventBus: error acknowledging events: {e}")
+            did_error = True
 
-        return (len(events_json), did_error)
+        return (len(entries), did_error)
 
-    # Helpers
+    def _get_processed_by_listener(
+        self, stream: str, event_ids_dict: Dict[ChallengeEvent, List], retried_ids: Set
+    ) -> Dict[str, Set]:
+        """Gets the retried events that each listener already processed,
+        as a map of {challenge_id: {stream_id}}"""
+        if not retried_ids:
+            return {}
+        challenge_ids = {
+            listener.challenge_id
+            for event_type in event_ids_dict
+            for listener in self._listeners[event_type]
+        }
+        pipe = self._redis.pipeline()
+        for challenge_id in challenge_ids:
+            pipe.smembers(get_processed_by_listener_key(stream, challenge_id))
+        return {
+            challenge_id: processed & retried_ids
+            for (challenge_id, processed) in zip(challenge_ids, pipe.execute())
+            if processed & retried_ids
+        }
+
+    def _read_entries(self, stream: str, max_events: int) -> Tuple[List, Set]:
+        """Reads stale pending entries left behind by failed or crashed consumers,
+        followed by new entries, up to `max_events` in total.
+        Returns the entries and the ids of the stale ones"""
+        self._ensure_consumer_group(stream)
+        entries = self._claim_stale_entries(stream, max_events)
+        retried_ids = {entry_id for (entry_id, _) in entries}
+        remaining = max_events - len(entries)
+        if remaining > 0:
+            try:
+                response = self._redis.xreadgroup(
+                    CONSUMER_GROUP, self._consumer_name, {stream: ">"}, count=remaining
+                )
+            except ResponseError as e:
+                # The group can disappear out from under us, e.g. if redis was flushed
+                if "NOGROUP" not in str(e):
+                    raise e
+                self._ensure_consumer_group(stream)
+                response = self._redis.xreadgroup(
+                    CONSUMER_GROUP, self._consumer_name, {stream: ">"}, count=remaining
+                )
+            for (_, stream_entries) in response or []:
+                entries.extend(stream_entries)
+        return (entries, retried_ids)
+
+    def _claim_stale_entries(self, stream: str, max_events: int) -> List:
+        pending = self._redis.xpending_range(
+            stream, CONSUMER_GROUP, min="-", max="+", count=max_events
+        )
+        stale = [
+            entry
+            for entry in pending
+            if entry["time_since_delivered"] >= PENDING_RETRY_IDLE_MS
+        ]
+        if not stale:
+            return []
+
+        claimed = self._redis.xclaim(
+            stream,
+            CONSUMER_GROUP,
+            self._consumer_name,
+            PENDING_RETRY_IDLE_MS,
+            [entry["message_id"] for entry in stale],
+        )
+        times_delivered = {
+            entry["message_id"]: entry["times_delivered"] for entry in stale
+        }
+        retry = []
+        exhausted = []
+        for (entry_id, fields) in claimed:
+            if not fields:
+                # Entry was trimmed from the stream, nothing left to retry
+                self._redis.xack(stream, CONSUMER_GROUP, entry_id)
+            elif times_delivered.get(entry_id, 0) >= MAX_DELIVERIES:
+                exhausted.append((entry_id, fields))
+            else:
+                retry.append((entry_id, fields))
+        if exhausted:
+            self._dead_letter(stream, exhausted)
+        if retry:
+            logger.info(
+                f"ChallengeEventBus: retrying {len(retry)} stale events from {stream}"
+            )
+        return retry
+
+    def _dead_letter(self, stream: str, entries: List):
+        logger.warning(
+            f"ChallengeEventBus: dead-lettering {len(entries)} events from {stream}"
+        )
+        pipe = self._redis.pipeline(transaction=True)
+        for (entry_id, fields) in entries:
+            pipe.xadd(
+                REDIS_DEAD_LETTER_STREAM,
+                {**fields, "stream": stream, "id": entry_id},
+                maxlen=STREAM_MAX_LEN,
+                approximate=True,
+            )
+            pipe.xack(stream, CONSUMER_GROUP, entry_id)
+        pipe.execute()
+
+    def _ensure_consumer_group(self, stream: str):
+        try:
+            # Start from the beginning so events enqueued before the group existed are consumed
+            self._redis.xgroup_create(stream, CONSUMER_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise e
+
+    def _drain_legacy_queue(self):
+        """Moves any events left in the legacy list queue onto the streams.
+
+        Entries are only removed from the list once they have been added to the
+        streams, so an error leaves them to be moved on the next call.
+        """
+        try:
+            events_json = self._redis.lrange(
+                REDIS_QUEUE_PREFIX, 0, LEGACY_QUEUE_DRAIN_BATCH_SIZE - 1
+            )
+            if not events_json:
+                return
+            logger.info(
+                f"ChallengeEventBus: moving {len(events_json)} events from legacy queue"
+            )
+            pipe = self._redis.pipeline(transaction=True)
+            for event_json in events_json:
+                try:
+                    event = self._json_to_event(event_json)
+                    stream = get_stream_key(
+                        get_shard(event["user_id"], self._num_shards)
+                    )
+                    fields = {
+                        "data": self._event_to_json(
+                            event["event"],
+                            event["block_number"],
+                            event["user_id"],
+                            event.get("extra", {}),
+                        )
+                    }
+                except Exception as e:
+                    logger.warning(
+                        f"ChallengeEventBus: malformed legacy event {event_json!r}: {e}"
+                    )
+                    stream = REDIS_DEAD_LETTER_STREAM
+                    fields = {"data": event_json, "stream": REDIS_QUEUE_PREFIX}
+                pipe.xadd(stream, fields, maxlen=STREAM_MAX_LEN, approximate=True)
+            pipe.execute()
+            # Producers only append, so the moved events are still at the head
+            self._redis.ltrim(REDIS_QUEUE_PREFIX, len(events_json), -1)
+        except Exception as e:
+            logger.warning(f"ChallengeEventBus: error draining legacy queue: {e}")
+
+    def _enqueue(self, events: List[InternalEvent]):
+        pipe = self._redis.pipeline(transaction=False)
+        for event in events:
+            try:
+                event_json = self._event_to_json(
+                    event["event"],
+                    event["block_number"],
+                    event["user_id"],
+                    event.get("extra", {}),
+                )
+                logger.info(f"ChallengeEventBus: dispatch {event_json}")
+                pipe.xadd(
+                    get_stream_key(get_shard(event["user_id"], self._num_shards)),
+                    {"data": event_json},
+                    maxlen=STREAM_MAX_LEN,
+                    approximate=True,
+                )
+            except Exception as e:
+                logger.warning(f"ChallengeEventBus: error serializing event: {e}")
+        try:
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"ChallengeEventBus: error enqueuing to Redis: {e}")
 
     def _event_to_json(self, event: str, block_number: int, user_id: int, extra: Dict):
         event_dict = {
@@ -197,6 +608,21 @@ class ChallengeEventBus:
         return json.loads(event_json)
 
 
+def challenge_event_queue_prometheus_exporter():
+    stats = get_cached_challenge_event_queue_stats(get_redis())
+    for key, value in stats.items():
+        if value is not None:
+            PrometheusMetric(PrometheusMetricNames.CHALLENGE_EVENT_QUEUE).save(
+                value, {"key": key}
+            )
+
+
+PrometheusMetric.register_collector(
+    "challenge_event_queue_prometheus_exporter",
+    challenge_event_queue_prometheus_exporter,
+)
+
+
 def setup_challenge_bus():
     redis = get_redis()
     bus = ChallengeEventBus(redis)
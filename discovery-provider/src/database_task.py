@@ -2,10 +2,16 @@ from celery import Task
 from redis import Redis
 from src.challenges.challenge_event_bus import ChallengeEventBus
 from src.utils.eth_manager import EthManager
+from src.utils.lazy import resolve
 from src.utils.session_manager import SessionManager
 
 
 class DatabaseTask(Task):
+    """
+    Celery task with the discovery provider context. Clients may be passed as
+    src.utils.lazy.Lazy values to be created on first use.
+    """
+
     def __init__(
         self,
         db=None,
@@ -60,7 +66,7 @@ class DatabaseTask(Task):
 
     @property
     def cid_metadata_client(self):
-        return self._cid_metadata_client
+        return resolve(self._cid_metadata_client)
 
     @property
     def redis(self) -> Redis:
@@ -72,12 +78,12 @@ class DatabaseTask(Task):
 
     @property
     def solana_client_manager(self):
-        return self._solana_client_manager
+        return resolve(self._solana_client_manager)
 
     @property
     def challenge_event_bus(self) -> ChallengeEventBus:
-        return self._challenge_event_bus
+        return resolve(self._challenge_event_bus)
 
     @property
     def eth_manager(self) -> EthManager:
-        return self._eth_manager
+        return resolve(self._eth_manager)
@@ -43,6 +43,24 @@ class NotificationSeen(Base, RepresentableMixin):
     PrimaryKeyConstraint(user_id, seen_at)
 
 
+class UserNotification(Base, RepresentableMixin):
+    """
+    A notification materialized per recipient by the notification triggers,
+    along with the seen interval (prev_seen_at, seen_at] it falls into.
+    seen_at is null until the user has seen the notification.
+    """
+
+    __tablename__ = "user_notification"
+
+    user_id = Column(Integer, nullable=False)
+    notification_id = Column(Integer, nullable=False)
+    group_id = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    seen_at = Column(DateTime)
+    prev_seen_at = Column(DateTime)
+    PrimaryKeyConstraint(user_id, notification_id)
+
+
 class PlaylistSeen(Base, RepresentableMixin):
     __tablename__ = "playlist_seen"
 
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, Date, Integer, String
+from src.models.base import Base
+from src.models.model_utils import RepresentableMixin
+
+
+# Karma (the summed follower counts of the users who saved and reposted an item)
+# bucketed by the day of the save or repost.
+# Maintained by the index_aggregate_karma task.
+class AggregateKarma(Base, RepresentableMixin):
+    __tablename__ = "aggregate_karma"
+
+    item_id = Column(Integer, primary_key=True, nullable=False)
+    item_type = Column(String, primary_key=True, nullable=False)
+    timestamp = Column(Date, primary_key=True, nullable=False)
+    karma = Column(BigInteger, nullable=False)
+    # karma from users with a complete profile, null if there are none
+    xf_karma = Column(BigInteger)
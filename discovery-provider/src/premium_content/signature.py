@@ -1,10 +1,16 @@
 import json
 from datetime import datetime
-from typing import Optional, TypedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple, TypedDict
 
-from src.api_helpers import generate_signature
+from src.api_helpers import generate_signatures
 from src.premium_content.premium_content_types import PremiumContentType
 
+# Non-premium signatures carry no user data, so one signature per track is
+# reused within each bucket. Content nodes accept signatures for 6 hours.
+NON_PREMIUM_SIGNATURE_BUCKET_SEC = 60 * 5
+NON_PREMIUM_SIGNATURE_CACHE_SIZE = 10000
+
 
 class PremiumContentSignatureArgs(TypedDict):
     track_id: int
@@ -26,24 +32,73 @@ class PremiumContentSignature(TypedDict):
     signature: str
 
 
+# track id, cid, is premium, user wallet
+TrackSignatureArgs = Tuple[int, str, bool, Optional[str]]
+
+
 def _get_current_utc_timestamp_ms():
     return int(datetime.utcnow().timestamp() * 1000)
 
 
+def _get_signature_bucket(timestamp_ms: int) -> int:
+    return timestamp_ms // (NON_PREMIUM_SIGNATURE_BUCKET_SEC * 1000)
+
+
+@lru_cache(maxsize=NON_PREMIUM_SIGNATURE_CACHE_SIZE)
+def _get_bucketed_non_premium_track_signature(
+    track_id: int, cid: str, bucket: int
+) -> PremiumContentSignature:
+    return _sign_tracks([(track_id, cid, False, None)])[0]
+
+
 def get_premium_track_signature(
     track_id: int, cid: str, is_premium: bool, user_wallet: Optional[str]
 ) -> PremiumContentSignature:
-    data = {
-        "trackId": track_id,
-        "cid": cid,
-        "timestamp": _get_current_utc_timestamp_ms(),
-    }
-    if user_wallet:
-        data["user_wallet"] = user_wallet
-    if not is_premium:
-        data["shouldCache"] = 1
-    signature = generate_signature(data)
-    return {"data": json.dumps(data), "signature": signature}
+    return get_premium_track_signature_batch(
+        [(track_id, cid, is_premium, user_wallet)]
+    )[0]
+
+
+# Signs the tracks in one call to the signer, reusing the bucketed
+# signatures of non-premium tracks that are not signed for a user.
+def get_premium_track_signature_batch(
+    tracks: List[TrackSignatureArgs],
+) -> List[PremiumContentSignature]:
+    signatures: List[Optional[PremiumContentSignature]] = [None] * len(tracks)
+    bucket = _get_signature_bucket(_get_current_utc_timestamp_ms())
+    indexes_to_sign = []
+    for i, (track_id, cid, is_premium, user_wallet) in enumerate(tracks):
+        if not is_premium and not user_wallet:
+            signature = _get_bucketed_non_premium_track_signature(track_id, cid, bucket)
+            signatures[i] = {**signature}
+        else:
+            indexes_to_sign.append(i)
+
+    signed = _sign_tracks([tracks[i] for i in indexes_to_sign])
+    for i, signature in zip(indexes_to_sign, signed):
+        signatures[i] = signature
+    return signatures  # type: ignore
+
+
+def _sign_tracks(tracks: List[TrackSignatureArgs]) -> List[PremiumContentSignature]:
+    timestamp = _get_current_utc_timestamp_ms()
+    datas = []
+    for track_id, cid, is_premium, user_wallet in tracks:
+        data = {
+            "trackId": track_id,
+            "cid": cid,
+            "timestamp": timestamp,
+        }
+        if user_wallet:
+            data["user_wallet"] = user_wallet
+        if not is_premium:
+            data["shouldCache"] = 1
+        datas.append(data)
+    signatures = generate_signatures(datas)
+    return [
+        {"data": json.dumps(data), "signature": signature}
+        for data, signature in zip(datas, signatures)
+    ]
 
 
 def get_premium_content_signature(
@@ -70,3 +125,25 @@ def get_premium_content_signature_for_user(
             user_wallet=args["user_wallet"],
         )
     return None
+
+
+def get_premium_content_signatures_for_user(
+    args_list: List[PremiumContentSignatureForUserArgs],
+) -> List[Optional[PremiumContentSignature]]:
+    """Batch version of get_premium_content_signature_for_user"""
+    track_indexes = [i for i, args in enumerate(args_list) if args["type"] == "track"]
+    track_signatures = get_premium_track_signature_batch(
+        [
+            (
+                args_list[i]["track_id"],
+                args_list[i]["track_cid"],
+                args_list[i]["is_premium"],
+                args_list[i]["user_wallet"],
+            )
+            for i in track_indexes
+        ]
+    )
+    signatures: List[Optional[PremiumContentSignature]] = [None] * len(args_list)
+    for i, signature in zip(track_indexes, track_signatures):
+        signatures[i] = signature
+    return signatures
@@ -1,12 +1,19 @@
 import json
 from datetime import datetime
+from unittest import mock
 
-from src.api_helpers import recover_wallet
+from eth_account.messages import encode_defunct
+from src.api_helpers import generate_signature, recover_wallet
 from src.premium_content.signature import (
+    NON_PREMIUM_SIGNATURE_BUCKET_SEC,
+    _get_current_utc_timestamp_ms,
     get_premium_content_signature,
     get_premium_content_signature_for_user,
+    get_premium_content_signatures_for_user,
 )
 from src.utils.config import shared_config
+from web3 import Web3
+from web3.auto import w3
 
 
 def test_signature():
@@ -109,3 +116,65 @@ def test_signature_for_user():
     signature_data_obj = json.loads(signature_data)
 
     assert "shouldCache" not in signature_data_obj
+
+
+def test_non_premium_signature_reused_within_bucket():
+    args = {
+        "track_id": 2,
+        "track_cid": "some-other-track-cid",
+        "type": "track",
+        "is_premium": False,
+    }
+    first = get_premium_content_signature(args)
+    second = get_premium_content_signature(args)
+    assert first == second
+
+    # a new signature is generated once the bucket rolls over
+    next_bucket_ms = _get_current_utc_timestamp_ms() + (
+        NON_PREMIUM_SIGNATURE_BUCKET_SEC * 1000
+    )
+    with mock.patch(
+        "src.premium_content.signature._get_current_utc_timestamp_ms",
+        return_value=next_bucket_ms,
+    ):
+        third = get_premium_content_signature(args)
+    assert third != first
+    assert json.loads(third["data"])["timestamp"] == next_bucket_ms
+
+
+def test_generate_signature_matches_sign_message():
+    data = {"trackId": 3, "cid": "some-track-cid-\u00e9", "timestamp": 1}
+    to_sign_str = json.dumps(
+        data, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    signed_message = w3.eth.account.sign_message(
+        encode_defunct(hexstr=Web3.keccak(text=to_sign_str).hex()),
+        private_key=shared_config["delegate"]["private_key"],
+    )
+    assert generate_signature(data) == signed_message.signature.hex()
+
+
+def test_signatures_for_user():
+    user_wallet = "0x954221ddae7ddf40871d57b98ce97c82782886d3"
+    args_list = [
+        {
+            "track_id": track_id,
+            "track_cid": f"some-track-cid-{track_id}",
+            "type": "track",
+            "user_wallet": user_wallet,
+            "is_premium": track_id != 2,
+        }
+        for track_id in [1, 2, 3]
+    ]
+    results = get_premium_content_signatures_for_user(args_list)
+
+    assert len(results) == 3
+    for args, result in zip(args_list, results):
+        signature_data_obj = json.loads(result["data"])
+        assert signature_data_obj["trackId"] == args["track_id"]
+        assert signature_data_obj["user_wallet"] == user_wallet
+        assert ("shouldCache" in signature_data_obj) != args["is_premium"]
+        assert (
+            recover_wallet(signature_data_obj, result["signature"])
+            == shared_config["delegate"]["owner_wallet"]
+        )
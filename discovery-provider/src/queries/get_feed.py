@@ -9,6 +9,13 @@ from src.models.social.repost import Repost, RepostType
 from src.models.social.save import SaveType
 from src.models.tracks.track import Track
 from src.queries import response_name_constants
+from src.queries.get_feed_cache import (
+    ORIGINAL,
+    TRACK,
+    get_activity_timestamp,
+    get_cached_feed_items,
+    parse_feed_cursor,
+)
 from src.queries.get_feed_es import get_feed_es
 from src.queries.get_unpopulated_tracks import get_unpopulated_tracks
 from src.queries.query_helpers import (
@@ -22,6 +29,7 @@ from src.queries.query_helpers import (
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 from src.utils.elasticdsl import es_url
+from src.utils.redis_connection import get_redis
 
 trackDedupeMaxMinutes = 10
 
@@ -29,6 +37,20 @@ logger = logging.getLogger(__name__)
 
 
 def get_feed(args):
+    # Feeds of the current user's followees are served from the fanout cache
+    use_feed_cache = (
+        args.get("user_id")
+        and not args.get("followee_user_ids")
+        and request.args.get("feed_cache") != "0"
+    )
+    if use_feed_cache:
+        try:
+            feed_results = get_feed_cached(args)
+            if feed_results is not None:
+                return feed_results
+        except Exception as e:
+            logger.error(f"get_feed_cached failed: {e}", exc_info=True)
+
     skip_es = request.args.get("es") == "0"
     use_es = es_url and not skip_es
     if use_es:
@@ -43,7 +65,6 @@ def get_feed(args):
 
 
 def get_feed_sql(args):
-    feed_results = []
     db = get_db_read_replica()
 
     feed_filter = args.get("filter")
@@ -270,43 +291,139 @@ def get_feed_sql(args):
                     response_name_constants.activity_timestamp
                 ] = playlist_repost_timestamp_dict[playlist["playlist_id"]]
 
-        # bundle peripheral info into track and playlist objects
-        track_ids = list(map(lambda track: track["track_id"], tracks))
-        playlist_ids = list(map(lambda playlist: playlist["playlist_id"], playlists))
-        tracks = populate_track_metadata(session, track_ids, tracks, current_user_id)
-        playlists = populate_playlist_metadata(
+        return populate_feed(session, args, tracks, playlists, current_user_id)
+
+
+def populate_feed(session, args, tracks, playlists, current_user_id):
+    """Adds metadata to feed tracks and playlists and sorts them by activity"""
+    # bundle peripheral info into track and playlist objects
+    track_ids = list(map(lambda track: track["track_id"], tracks))
+    playlist_ids = list(map(lambda playlist: playlist["playlist_id"], playlists))
+    tracks = populate_track_metadata(session, track_ids, tracks, current_user_id)
+    playlists = populate_playlist_metadata(
+        session,
+        playlist_ids,
+        playlists,
+        [RepostType.playlist, RepostType.album],
+        [SaveType.playlist, SaveType.album],
+        current_user_id,
+    )
+
+    # build combined feed of tracks and playlists
+    unsorted_feed = tracks + playlists
+
+    # sort feed based on activity_timestamp
+    sorted_feed = sorted(
+        unsorted_feed,
+        key=lambda entry: entry[response_name_constants.activity_timestamp],
+        reverse=True,
+    )
+
+    # truncate feed to requested limit
+    (limit, _) = get_pagination_vars()
+    feed_results = sorted_feed[0:limit]
+    if "with_users" in args and args.get("with_users") != False:
+        user_id_list = get_users_ids(feed_results)
+        users = get_users_by_id(session, user_id_list)
+        for result in feed_results:
+            if "playlist_owner_id" in result:
+                user = users[result["playlist_owner_id"]]
+                if user:
+                    result["user"] = user
+            elif "owner_id" in result:
+                user = users[result["owner_id"]]
+                if user:
+                    result["user"] = user
+
+    return feed_results
+
+
+def get_feed_cached(args):
+    """
+    Gets the current user's feed from the fanout cache, paginated by `offset` or
+    by `cursor`, the activity timestamp of the last item of the previous page.
+    Returns None if the user's feed can't be cached.
+    """
+    db = get_db_read_replica()
+    redis = get_redis()
+
+    feed_filter = args.get("filter", "all")
+    tracks_only = args.get("tracks_only", False)
+    current_user_id = args.get("user_id")
+    cursor = args.get("cursor")
+    (limit, offset) = get_pagination_vars()
+
+    with db.scoped_session() as session:
+        feed_items = get_cached_feed_items(
             session,
-            playlist_ids,
-            playlists,
-            [RepostType.playlist, RepostType.album],
-            [SaveType.playlist, SaveType.album],
+            redis,
             current_user_id,
+            limit,
+            feed_filter,
+            tracks_only,
+            parse_feed_cursor(cursor) if cursor else None,
+            offset,
         )
+        if feed_items is None:
+            return None
 
-        # build combined feed of tracks and playlists
-        unsorted_feed = tracks + playlists
+        # item id -> (kind, activity timestamp)
+        track_activity = {}
+        playlist_activity = {}
+        for kind, item_type, item_id, score in feed_items:
+            activity = track_activity if item_type == TRACK else playlist_activity
+            activity[item_id] = (kind, get_activity_timestamp(score))
 
-        # sort feed based on activity_timestamp
-        sorted_feed = sorted(
-            unsorted_feed,
-            key=lambda entry: entry[response_name_constants.activity_timestamp],
-            reverse=True,
+        tracks = helpers.query_result_to_list(
+            session.query(Track)
+            .filter(
+                Track.is_current == True,
+                Track.is_delete == False,
+                Track.is_unlisted == False,
+                Track.stem_of == None,
+                Track.track_id.in_(list(track_activity.keys())),
+            )
+            .all()
+        )
+        playlists = helpers.query_result_to_list(
+            session.query(Playlist)
+            .filter(
+                Playlist.is_current == True,
+                Playlist.is_delete == False,
+                Playlist.is_private == False,
+                Playlist.playlist_id.in_(list(playlist_activity.keys())),
+            )
+            .all()
         )
 
-        # truncate feed to requested limit
-        (limit, _) = get_pagination_vars()
-        feed_results = sorted_feed[0:limit]
-        if "with_users" in args and args.get("with_users") != False:
-            user_id_list = get_users_ids(feed_results)
-            users = get_users_by_id(session, user_id_list)
-            for result in feed_results:
-                if "playlist_owner_id" in result:
-                    user = users[result["playlist_owner_id"]]
-                    if user:
-                        result["user"] = user
-                elif "owner_id" in result:
-                    user = users[result["owner_id"]]
-                    if user:
-                        result["user"] = user
+        # exclude tracks posted in "same action" as a playlist on the page
+        tracks_by_id = {track["track_id"]: track for track in tracks}
+        tracks_to_dedupe = set()
+        max_timedelta = datetime.timedelta(minutes=trackDedupeMaxMinutes)
+        for playlist in playlists:
+            if playlist_activity[playlist["playlist_id"]][0] != ORIGINAL:
+                continue
+            for track_entry in playlist["playlist_contents"]["track_ids"]:
+                track = tracks_by_id.get(track_entry["track"])
+                if (
+                    track
+                    and track_activity[track["track_id"]][0] == ORIGINAL
+                    and track["owner_id"] == playlist["playlist_owner_id"]
+                    and track["created_at"] <= playlist["created_at"]
+                    and playlist["created_at"] - track["created_at"] <= max_timedelta
+                ):
+                    tracks_to_dedupe.add(track["track_id"])
+        tracks = [
+            track for track in tracks if track["track_id"] not in tracks_to_dedupe
+        ]
 
-    return feed_results
+        for track in tracks:
+            track[response_name_constants.activity_timestamp] = track_activity[
+                track["track_id"]
+            ][1]
+        for playlist in playlists:
+            playlist[response_name_constants.activity_timestamp] = playlist_activity[
+                playlist["playlist_id"]
+            ][1]
+
+        return populate_feed(session, args, tracks, playlists, current_user_id)
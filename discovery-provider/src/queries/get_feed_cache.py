@@ -0,0 +1,470 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.models.indexing.block import Block
+from src.models.playlists.playlist import Playlist
+from src.models.social.follow import Follow
+from src.models.social.repost import Repost, RepostType
+from src.models.tracks.track import Track
+from src.models.users.aggregate_user import AggregateUser
+from src.queries.get_social_graph import get_followee_ids, pack_ids, unpack_ids
+from src.utils.helpers import split_list
+
+logger = logging.getLogger(__name__)
+
+# Home feeds of users who read their feed recently are kept in redis as capped
+# sorted sets of feed item keys scored by activity timestamp. Items from followees
+# with at most FEED_FANOUT_MAX_FOLLOWERS followers are pushed into the sets by the
+# update_feed_cache task as they are indexed. Items from larger accounts are not
+# fanned out, they are merged into the feed when it is read.
+FEED_CACHE_TTL_SEC = 24 * 60 * 60
+FEED_CACHE_MAX_SIZE = 500
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+# Latest block fanned out by update_feed_cache. Feeds built from a replica that
+# has not indexed it, or the block that last invalidated the feed, are returned
+# but not cached, as the items in between would never be fanned out to them
+FEED_FANOUT_BLOCK_KEY = "feed:fanout_block"
+
+ORIGINAL = "o"
+REPOST = "r"
+TRACK = "track"
+PLAYLIST = "playlist"
+
+# (author user id, feed item key, activity timestamp)
+FeedItem = Tuple[int, str, float]
+
+
+def get_feed_cache_key(user_id):
+    return f"feed:{user_id}"
+
+
+def get_feed_large_followees_key(user_id):
+    """Followees merged at read time, also marks the user's feed as materialized"""
+    return f"feed:{user_id}:large_followees"
+
+
+def get_feed_invalidated_at_block_key(user_id):
+    return f"feed:{user_id}:invalidated_at_block"
+
+
+def get_feed_item_score(activity_timestamp: datetime) -> float:
+    """Scores items by their activity timestamp, stored as naive UTC datetimes"""
+    return activity_timestamp.replace(tzinfo=timezone.utc).timestamp()
+
+
+def get_activity_timestamp(score: float) -> datetime:
+    return datetime.fromtimestamp(score, timezone.utc).replace(tzinfo=None)
+
+
+def parse_feed_cursor(cursor: str) -> float:
+    """
+    Parses a feed cursor into a score. Cursors are the activity timestamp of the
+    last item of a page as returned, e.g. "2020-10-10T10:35:00 Z", any ISO-8601
+    timestamp, or a unix timestamp. Timestamps without a timezone are UTC.
+    """
+    try:
+        return float(cursor)
+    except ValueError:
+        pass
+    timestamp = datetime.fromisoformat(cursor.rstrip("Z "))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def get_feed_item_key(kind: str, item_type: str, item_id: int) -> str:
+    return f"{kind}:{item_type}:{item_id}"
+
+
+def parse_feed_item_key(key) -> Tuple[str, str, int]:
+    if isinstance(key, bytes):
+        key = key.decode()
+    kind, item_type, item_id = key.split(":")
+    return kind, item_type, int(item_id)
+
+
+def get_feed_items(
+    session,
+    user_ids: Optional[Iterable[int]] = None,
+    limit: Optional[int] = None,
+    min_blocknumber: Optional[int] = None,
+    max_blocknumber: Optional[int] = None,
+) -> List[FeedItem]:
+    """
+    Gets the tracks and playlists created and the items reposted by `user_ids`,
+    or by every user in (min_blocknumber, max_blocknumber] when no ids are given
+    """
+    tracks_query = session.query(
+        Track.owner_id, Track.track_id, Track.created_at
+    ).filter(
+        Track.is_current == True,
+        Track.is_delete == False,
+        Track.is_unlisted == False,
+        Track.stem_of == None,
+    )
+    playlists_query = session.query(
+        Playlist.playlist_owner_id, Playlist.playlist_id, Playlist.created_at
+    ).filter(
+        Playlist.is_current == True,
+        Playlist.is_delete == False,
+        Playlist.is_private == False,
+    )
+    reposts_query = session.query(
+        Repost.user_id, Repost.repost_type, Repost.repost_item_id, Repost.created_at
+    ).filter(
+        Repost.is_current == True,
+        Repost.is_delete == False,
+    )
+
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        tracks_query = tracks_query.filter(Track.owner_id.in_(user_ids))
+        playlists_query = playlists_query.filter(
+            Playlist.playlist_owner_id.in_(user_ids)
+        )
+        reposts_query = reposts_query.filter(Repost.user_id.in_(user_ids))
+    if min_blocknumber is not None:
+        tracks_query = tracks_query.filter(Track.blocknumber > min_blocknumber)
+        playlists_query = playlists_query.filter(Playlist.blocknumber > min_blocknumber)
+        reposts_query = reposts_query.filter(Repost.blocknumber > min_blocknumber)
+    if max_blocknumber is not None:
+        tracks_query = tracks_query.filter(Track.blocknumber <= max_blocknumber)
+        playlists_query = playlists_query.filter(
+            Playlist.blocknumber <= max_blocknumber
+        )
+        reposts_query = reposts_query.filter(Repost.blocknumber <= max_blocknumber)
+    if limit is not None:
+        tracks_query = tracks_query.order_by(Track.created_at.desc()).limit(limit)
+        playlists_query = playlists_query.order_by(Playlist.created_at.desc()).limit(
+            limit
+        )
+        reposts_query = reposts_query.order_by(Repost.created_at.desc()).limit(limit)
+
+    items: List[FeedItem] = []
+    for owner_id, track_id, created_at in tracks_query.all():
+        items.append(
+            (
+                owner_id,
+                get_feed_item_key(ORIGINAL, TRACK, track_id),
+                get_feed_item_score(created_at),
+            )
+        )
+    for owner_id, playlist_id, created_at in playlists_query.all():
+        items.append(
+            (
+                owner_id,
+                get_feed_item_key(ORIGINAL, PLAYLIST, playlist_id),
+                get_feed_item_score(created_at),
+            )
+        )
+    for user_id, repost_type, item_id, created_at in reposts_query.all():
+        item_type = TRACK if repost_type == RepostType.track else PLAYLIST
+        items.append(
+            (
+                user_id,
+                get_feed_item_key(REPOST, item_type, item_id),
+                get_feed_item_score(created_at),
+            )
+        )
+    return items
+
+
+def merge_feed_items(items: Iterable[FeedItem], scores=None) -> Dict[str, float]:
+    """Maps item keys to scores, an item reposted by several users keeps the oldest repost"""
+    scores = dict(scores or {})
+    for _, key, score in items:
+        if key not in scores or score < scores[key]:
+            scores[key] = score
+    return scores
+
+
+def get_large_user_ids(session, user_ids: Iterable[int]) -> Set[int]:
+    """Gets the users with too many followers to fan their items out to"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+    rows = (
+        session.query(AggregateUser.user_id)
+        .filter(
+            AggregateUser.user_id.in_(user_ids),
+            AggregateUser.follower_count > FEED_FANOUT_MAX_FOLLOWERS,
+        )
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def materialize_feed(
+    session, redis, user_id: int
+) -> Optional[Tuple[Set[int], Dict[str, float]]]:
+    """
+    Builds the user's cached feed from their followees' latest items and returns
+    the ids of the large followees to merge at read time with the feed's scores,
+    or None if the user follows too many accounts to cache
+    """
+    followee_ids = get_followee_ids(session, redis, user_id)
+    if followee_ids is None:
+        return None
+
+    large_followee_ids = get_large_user_ids(session, followee_ids)
+    scores = merge_feed_items(
+        get_feed_items(
+            session, followee_ids - large_followee_ids, limit=FEED_CACHE_MAX_SIZE
+        )
+    )
+    top_scores = dict(
+        sorted(scores.items(), key=lambda item: item[1], reverse=True)[
+            :FEED_CACHE_MAX_SIZE
+        ]
+    )
+
+    latest_block = session.query(Block.number).filter(Block.is_current == True).scalar()
+    required_blocks = [
+        int(block)
+        for block in redis.mget(
+            get_feed_invalidated_at_block_key(user_id), FEED_FANOUT_BLOCK_KEY
+        )
+        if block is not None
+    ]
+    if required_blocks and (
+        latest_block is None or latest_block < max(required_blocks)
+    ):
+        return large_followee_ids, top_scores
+
+    key = get_feed_cache_key(user_id)
+    large_followees_key = get_feed_large_followees_key(user_id)
+    pipe = redis.pipeline()
+    pipe.delete(key)
+    if top_scores:
+        pipe.zadd(key, top_scores)
+        pipe.expire(key, FEED_CACHE_TTL_SEC)
+    pipe.set(large_followees_key, pack_ids(large_followee_ids), FEED_CACHE_TTL_SEC)
+    pipe.execute()
+    return large_followee_ids, top_scores
+
+
+def get_invalid_feed_item_keys(
+    session, user_id: int, items: List[Tuple[str, str, int, float]]
+) -> Set[str]:
+    """
+    Gets the keys of cached items that were deleted or hidden, or that are no
+    longer reposted by any of the user's followees, since they were cached
+    """
+    track_ids = [item_id for _, item_type, item_id, _ in items if item_type == TRACK]
+    playlist_ids = [
+        item_id for _, item_type, item_id, _ in items if item_type == PLAYLIST
+    ]
+    reposted_ids = [item_id for kind, _, item_id, _ in items if kind == REPOST]
+
+    valid_track_ids = set()
+    if track_ids:
+        rows = (
+            session.query(Track.track_id)
+            .filter(
+                Track.is_current == True,
+                Track.is_delete == False,
+                Track.is_unlisted == False,
+                Track.stem_of == None,
+                Track.track_id.in_(track_ids),
+            )
+            .all()
+        )
+        valid_track_ids = {row[0] for row in rows}
+    valid_playlist_ids = set()
+    if playlist_ids:
+        rows = (
+            session.query(Playlist.playlist_id)
+            .filter(
+                Playlist.is_current == True,
+                Playlist.is_delete == False,
+                Playlist.is_private == False,
+                Playlist.playlist_id.in_(playlist_ids),
+            )
+            .all()
+        )
+        valid_playlist_ids = {row[0] for row in rows}
+    valid_reposts = set()
+    if reposted_ids:
+        followee_ids = session.query(Follow.followee_user_id).filter(
+            Follow.follower_user_id == user_id,
+            Follow.is_current == True,
+            Follow.is_delete == False,
+        )
+        rows = (
+            session.query(Repost.repost_type, Repost.repost_item_id)
+            .filter(
+                Repost.is_current == True,
+                Repost.is_delete == False,
+                Repost.user_id.in_(followee_ids),
+                Repost.repost_item_id.in_(reposted_ids),
+            )
+            .distinct()
+            .all()
+        )
+        valid_reposts = {
+            (TRACK if repost_type == RepostType.track else PLAYLIST, item_id)
+            for repost_type, item_id in rows
+        }
+
+    invalid_keys = set()
+    for kind, item_type, item_id, _ in items:
+        valid_ids = valid_track_ids if item_type == TRACK else valid_playlist_ids
+        if item_id not in valid_ids or (
+            kind == REPOST and (item_type, item_id) not in valid_reposts
+        ):
+            invalid_keys.add(get_feed_item_key(kind, item_type, item_id))
+    return invalid_keys
+
+
+def get_cached_feed_items(
+    session,
+    redis,
+    user_id: int,
+    limit: int,
+    feed_filter: str = "all",
+    tracks_only: bool = False,
+    cursor: Optional[float] = None,
+    offset: int = 0,
+) -> Optional[List[Tuple[str, str, int, float]]]:
+    """
+    Reads a page of the user's feed as (kind, item type, item id, activity timestamp)
+    sorted newest first, with only items older than `cursor` when given.
+    Returns None if the feed can't be cached for this user.
+    """
+    key = get_feed_cache_key(user_id)
+    large_followees_key = get_feed_large_followees_key(user_id)
+
+    pipe = redis.pipeline()
+    pipe.get(large_followees_key)
+    pipe.zrevrange(key, 0, -1, withscores=True)
+    packed_large_followee_ids, cached_items = pipe.execute()
+
+    if packed_large_followee_ids is None:
+        feed = materialize_feed(session, redis, user_id)
+        if feed is None:
+            return None
+        large_followee_ids, scores = feed
+    else:
+        large_followee_ids = unpack_ids(packed_large_followee_ids)
+        # reading the feed keeps it active
+        pipe = redis.pipeline()
+        pipe.expire(key, FEED_CACHE_TTL_SEC)
+        pipe.expire(large_followees_key, FEED_CACHE_TTL_SEC)
+        pipe.execute()
+        scores = {
+            item_key.decode() if isinstance(item_key, bytes) else item_key: score
+            for item_key, score in cached_items
+        }
+    if large_followee_ids:
+        scores = merge_feed_items(
+            get_feed_items(session, large_followee_ids, limit=FEED_CACHE_MAX_SIZE),
+            scores,
+        )
+
+    items = []
+    for item_key, score in scores.items():
+        if cursor is not None and score >= cursor:
+            continue
+        kind, item_type, item_id = parse_feed_item_key(item_key)
+        if tracks_only and item_type != TRACK:
+            continue
+        if feed_filter == "original" and kind != ORIGINAL:
+            continue
+        if feed_filter == "repost" and kind != REPOST:
+            continue
+        # items created by followees are shown as originals rather than reposts
+        if (
+            feed_filter == "all"
+            and kind == REPOST
+            and get_feed_item_key(ORIGINAL, item_type, item_id) in scores
+        ):
+            continue
+        items.append((kind, item_type, item_id, score))
+
+    items.sort(key=lambda item: item[3], reverse=True)
+
+    # Drop items that are no longer in the feed before paginating, and remove
+    # them from the cached feed so reads don't keep them alive
+    page_end = offset + limit
+    valid_items: List[Tuple[str, str, int, float]] = []
+    invalid_keys: Set[str] = set()
+    for batch in split_list(items, page_end):
+        batch_invalid_keys = get_invalid_feed_item_keys(session, user_id, batch)
+        invalid_keys |= batch_invalid_keys
+        valid_items.extend(
+            item
+            for item in batch
+            if get_feed_item_key(*item[:3]) not in batch_invalid_keys
+        )
+        if len(valid_items) >= page_end:
+            break
+    if invalid_keys:
+        redis.zrem(key, *invalid_keys)
+    return valid_items[offset:page_end]
+
+
+def fan_out_feed_items(session, redis, items: List[FeedItem]):
+    """Pushes newly indexed items into the cached feeds of the authors' active followers"""
+    author_ids = {author_id for author_id, _, _ in items}
+    fanout_author_ids = author_ids - get_large_user_ids(session, author_ids)
+    if not fanout_author_ids:
+        return
+
+    items_by_author: Dict[int, List[FeedItem]] = {}
+    for item in items:
+        items_by_author.setdefault(item[0], []).append(item)
+
+    follows = (
+        session.query(Follow.follower_user_id, Follow.followee_user_id)
+        .filter(
+            Follow.followee_user_id.in_(list(fanout_author_ids)),
+            Follow.is_current == True,
+            Follow.is_delete == False,
+        )
+        .all()
+    )
+    feed_items: Dict[int, List[FeedItem]] = {}
+    for follower_id, followee_id in follows:
+        feed_items.setdefault(follower_id, []).extend(items_by_author[followee_id])
+    if not feed_items:
+        return
+
+    # only feeds that are materialized are kept up to date
+    follower_ids = list(feed_items.keys())
+    pipe = redis.pipeline()
+    for follower_id in follower_ids:
+        pipe.exists(get_feed_large_followees_key(follower_id))
+    is_active = pipe.execute()
+
+    pipe = redis.pipeline()
+    num_feeds = 0
+    for follower_id, active in zip(follower_ids, is_active):
+        if not active:
+            continue
+        key = get_feed_cache_key(follower_id)
+        # nx keeps the oldest repost of an item that is already in the feed
+        pipe.zadd(key, merge_feed_items(feed_items[follower_id]), nx=True)
+        pipe.zremrangebyrank(key, 0, -FEED_CACHE_MAX_SIZE - 1)
+        pipe.expire(key, FEED_CACHE_TTL_SEC)
+        num_feeds += 1
+    pipe.execute()
+    logger.info(
+        f"get_feed_cache.py | fanned out {len(items)} items to {num_feeds} feeds"
+    )
+
+
+def invalidate_feed_cache(redis, user_ids: Iterable[int], blocknumber: int):
+    """
+    Drops the cached feeds of users whose followees changed in `blocknumber`,
+    and keeps the block so stale replicas don't rebuild them
+    """
+    pipe = redis.pipeline()
+    for user_id in user_ids:
+        pipe.delete(get_feed_cache_key(user_id), get_feed_large_followees_key(user_id))
+        pipe.set(
+            get_feed_invalidated_at_block_key(user_id), blocknumber, FEED_CACHE_TTL_SEC
+        )
+    pipe.execute()
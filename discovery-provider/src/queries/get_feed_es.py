@@ -7,9 +7,9 @@ from src.utils.elasticdsl import (
     ES_TRACKS,
     ES_USERS,
     esclient,
+    fetch_users_es,
     pluck_hits,
     populate_track_or_playlist_metadata_es,
-    populate_user_metadata_es,
 )
 
 
@@ -208,15 +208,9 @@ def get_feed_es(args, limit=10):
             sorted_feed.append(item)
 
     # attach users
-    user_id_set = set([str(id) for id in get_users_ids(sorted_feed)])
-    user_id_set.add(current_user_id)
-    user_list = esclient.mget(index=ES_USERS, ids=list(user_id_set))
-    user_by_id = {d["_id"]: d["_source"] for d in user_list["docs"] if d["found"]}
-
-    # populate_user_metadata_es:
-    current_user = user_by_id.get(str(current_user_id))
-    for id, user in user_by_id.items():
-        user_by_id[id] = populate_user_metadata_es(user, current_user)
+    (user_by_id, current_user) = fetch_users_es(
+        get_users_ids(sorted_feed), current_user_id
+    )
 
     for item in sorted_feed:
         # GOTCHA: es ids must be strings, but our ids are ints...
@@ -7,6 +7,10 @@ from typing import Dict, Optional, Tuple, TypedDict, cast
 import requests
 from elasticsearch import Elasticsearch
 from redis import Redis
+from src.challenges.challenge_event_bus import (
+    ChallengeEventQueueStats,
+    get_cached_challenge_event_queue_stats,
+)
 from src.eth_indexing.event_scanner import eth_indexing_last_scanned_block_key
 from src.models.indexing.block import Block
 from src.monitors import monitor_names, monitors
@@ -21,7 +25,7 @@ from src.queries.get_sol_rewards_manager import get_sol_rewards_manager_health_i
 from src.queries.get_sol_user_bank import get_sol_user_bank_health_info
 from src.queries.get_spl_audio import get_spl_audio_health_info
 from src.utils import db_session, helpers, redis_connection, web3_provider
-from src.utils.config import shared_config
+from src.utils.config import load_service_location, shared_config
 from src.utils.elasticdsl import ES_INDEXES, esclient
 from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
 from src.utils.redis_constants import (
@@ -218,6 +222,7 @@ def get_health(args: GetHealthArgs, use_redis_cache: bool = True) -> Tuple[Dict,
     challenge_events_age_sec = get_elapsed_time_redis(
         redis, challenges_last_processed_event_redis_key
     )
+    challenge_event_queue_info = get_challenge_event_queue_info(redis)
     user_balances_age_sec = get_elapsed_time_redis(
         redis, user_balances_refresh_last_completion_redis_key
     )
@@ -301,6 +306,7 @@ def get_health(args: GetHealthArgs, use_redis_cache: bool = True) -> Tuple[Dict,
         "trending_tracks_age_sec": trending_tracks_age_sec,
         "trending_playlists_age_sec": trending_playlists_age_sec,
         "challenge_last_event_age_sec": challenge_events_age_sec,
+        "challenge_event_queue": challenge_event_queue_info,
         "user_balances_age_sec": user_balances_age_sec,
         "num_users_in_lazy_balance_refresh_queue": num_users_in_lazy_balance_refresh_queue,
         "num_users_in_immediate_balance_refresh_queue": num_users_in_immediate_balance_refresh_queue,
@@ -392,10 +398,23 @@ def get_health(args: GetHealthArgs, use_redis_cache: bool = True) -> Tuple[Dict,
     unhealthy_blocks = bool(
         enforce_block_diff and block_difference > healthy_block_diff
     )
+    challenge_queue_age_sec = (
+        challenge_event_queue_info["oldest_unprocessed_age_sec"]
+        if challenge_event_queue_info
+        else None
+    )
     unhealthy_challenges = bool(
         challenge_events_age_max_drift
-        and challenge_events_age_sec
-        and challenge_events_age_sec > challenge_events_age_max_drift
+        and (
+            (
+                challenge_events_age_sec
+                and challenge_events_age_sec > challenge_events_age_max_drift
+            )
+            or (
+                challenge_queue_age_sec
+                and challenge_queue_age_sec > challenge_events_age_max_drift
+            )
+        )
     )
 
     is_unhealthy = (
@@ -408,6 +427,14 @@ def get_health(args: GetHealthArgs, use_redis_cache: bool = True) -> Tuple[Dict,
     return health_results, is_unhealthy
 
 
+def get_challenge_event_queue_info(redis: Redis) -> Optional[ChallengeEventQueueStats]:
+    try:
+        return get_cached_challenge_event_queue_stats(redis)
+    except Exception as e:
+        logger.error(f"Could not get challenge event queue stats: {e}")
+        return None
+
+
 class LocationResponse(TypedDict):
     country: str
     latitude: str
@@ -415,6 +442,7 @@ class LocationResponse(TypedDict):
 
 
 def get_location() -> LocationResponse:
+    load_service_location()
     return {
         "country": shared_config["serviceLocation"]["serviceCountry"],
         "latitude": shared_config["serviceLocation"]["serviceLatitude"],
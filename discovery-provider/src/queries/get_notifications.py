@@ -16,62 +16,63 @@ class GetNotificationArgs(TypedDict):
     limit: Optional[int]
 
 
+# Notifications are materialized per recipient in user_notification by the
+# notification triggers, which also keep each row's seen interval
+# (prev_seen_at, seen_at] up to date as the user views notifications.
+# Rows are grouped by group and interval and read in index order
+# (user_id, seen_at desc nulls first, group_id desc), with unseen groups first.
 notification_groups_sql = text(
     """
---- Create Intervals of user seen
-WITH user_seen as (
-  SELECT
-    LAG(seen_at, 1, now()::timestamp) OVER ( ORDER BY seen_at desc ) AS seen_at,
-    seen_at as prev_seen_at
-  FROM
-    notification_seen
-  WHERE
-    user_id = :user_id
-  ORDER BY
-    seen_at desc
+WITH last_seen AS (
+  SELECT max(seen_at) AS seen_at
+  FROM notification_seen
+  WHERE user_id = :user_id
 )
 SELECT
-    n.group_id as group_id,
-    array_agg(n.id),
-    CASE 
-      WHEN user_seen.seen_at is not NULL THEN now()::timestamp != user_seen.seen_at
-      ELSE EXISTS(SELECT 1 from notification_seen where user_id = :user_id)
-    END as is_seen,
-    CASE 
-      WHEN user_seen.seen_at is not NULL THEN user_seen.seen_at
-      ELSE (
-        SELECT seen_at from notification_seen
-        WHERE user_id = :user_id
-        ORDER BY seen_at ASC
-        limit 1
-      )
-    END as seen_at,
-    user_seen.prev_seen_at,
-    count(n.group_id)
+    un.group_id AS group_id,
+    array_agg(un.notification_id),
+    un.seen_at IS NOT NULL AS is_seen,
+    un.seen_at,
+    un.prev_seen_at,
+    count(un.group_id)
 FROM
-    notification n
-LEFT JOIN user_seen on
-  user_seen.seen_at >= n.timestamp and user_seen.prev_seen_at < n.timestamp
+    user_notification un
 WHERE
-  :user_id = ANY(n.user_ids) AND
+  un.user_id = :user_id AND
   (
     (:timestamp_offset is NULL) OR
-    (user_seen.seen_at is NULL AND n.timestamp < :timestamp_offset) OR
-    (:timestamp_offset is NOT NULL AND user_seen.seen_at < :timestamp_offset) OR
     (
-        :group_id_offset is NOT NULL AND :timestamp_offset is NOT NULL AND 
-        (user_seen.seen_at = :timestamp_offset AND n.group_id < :group_id_offset)
+      -- unseen groups sort before every seen one, so they are only paged
+      -- while the cursor is past the user's last seen_at
+      un.seen_at is NULL AND
+      :timestamp_offset > coalesce(
+        (SELECT seen_at FROM last_seen), '-infinity'::timestamp
+      ) AND
+      (:group_id_offset is NULL OR un.group_id < :group_id_offset)
+    ) OR
+    (un.seen_at < :timestamp_offset) OR
+    (
+        :group_id_offset is NOT NULL AND
+        (un.seen_at = :timestamp_offset AND un.group_id < :group_id_offset)
     )
   )
 GROUP BY
-  n.group_id, user_seen.seen_at, user_seen.prev_seen_at
+  un.seen_at, un.group_id, un.prev_seen_at
 ORDER BY
-  user_seen.seen_at desc NULLS LAST,
-  n.group_id desc
+  un.seen_at desc NULLS FIRST,
+  un.group_id desc
 limit :limit;
 """
 )
 
+unread_notification_count_sql = text(
+    """
+SELECT count(DISTINCT group_id)
+FROM user_notification
+WHERE user_id = :user_id AND seen_at is NULL;
+"""
+)
+
 
 MAX_LIMIT = 50
 DEFAULT_LIMIT = 20
@@ -117,6 +118,14 @@ def get_notification_groups(session: Session, args: GetNotificationArgs):
     return res
 
 
+def get_unread_notification_count(session: Session, user_id: int) -> int:
+    """
+    Gets the number of unseen notification groups for the user, served from
+    the partial index over unseen user notifications
+    """
+    return session.execute(unread_notification_count_sql, {"user_id": user_id}).scalar()
+
+
 class FollowNotification(TypedDict):
     follower_user_id: int
     followee_user_id: int
@@ -1,15 +1,14 @@
-import asyncio
 import base64
 import concurrent.futures
 import json
 import logging
 import pathlib
 import struct
+import time
 from collections import defaultdict
-from typing import Dict, List, Set
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 
 import base58
-from eth_typing import ChecksumAddress
 from solana.publickey import PublicKey
 from sqlalchemy.orm.session import Session
 from src.models.tracks.track import Track
@@ -17,11 +16,11 @@ from src.models.users.user import User
 from src.premium_content.premium_content_access_checker import (
     premium_content_access_checker,
 )
-from src.premium_content.signature import get_premium_content_signature_for_user
+from src.premium_content.signature import get_premium_content_signatures_for_user
 from src.queries.get_associated_user_wallet import get_associated_user_wallet
 from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_helpers import METADATA_PROGRAM_ID_PK
-from src.utils import db_session, web3_provider
+from src.utils import db_session, redis_connection, web3_provider
 from src.utils.config import shared_config
 from web3 import Web3
 
@@ -29,10 +28,26 @@ logger = logging.getLogger(__name__)
 
 erc721_abi = None
 erc1155_abi = None
+multicall3_abi = None
 
 solana_client_manager = None
 
-eth_web3 = web3_provider.get_eth_web3()
+NFT_OWNERSHIP_CACHE_KEY_PREFIX = "nft_ownership"
+NFT_OWNED_TTL_SEC = 300
+NFT_NOT_OWNED_TTL_SEC = 60
+
+# Wallet and nft gate pairs served from the ownership cache, i.e. checked more
+# than once, in the last HOT_NFT_HOLDERS_WINDOW_SEC. The refresh_nft_ownership_cache
+# task runs every HOT_NFT_HOLDERS_REFRESH_INTERVAL_SEC and re-checks the ones whose
+# cache entries would expire before its next run.
+HOT_NFT_HOLDERS_KEY = "nft_ownership:hot_holders"
+HOT_NFT_HOLDERS_WINDOW_SEC = NFT_OWNED_TTL_SEC
+HOT_NFT_HOLDERS_REFRESH_INTERVAL_SEC = NFT_NOT_OWNED_TTL_SEC
+HOT_NFT_HOLDERS_MAX = 2000
+
+MULTICALL_BATCH_SIZE = 500
+# Maximum number of accounts in a getMultipleAccounts request
+SOLANA_MULTIPLE_ACCOUNTS_LIMIT = 100
 
 
 def _get_user_wallet(user_id: int, session: Session):
@@ -47,41 +62,164 @@ def _get_user_wallet(user_id: int, session: Session):
     return user_wallet[0] if user_wallet else None
 
 
-def _does_user_own_erc721_nft_collection(
-    contract_address: str, user_eth_wallets: List[ChecksumAddress]
-):
-    for wallet in user_eth_wallets:
+class NftGate(NamedTuple):
+    """An nft collection that gates tracks, with the gating token ids for ERC1155"""
+
+    chain: str
+    address: str
+    standard: Optional[str] = None
+    token_ids: Tuple[int, ...] = ()
+
+
+# An nft gate and a user wallet whose ownership of the gate is checked
+NftOwnershipCheck = Tuple[NftGate, str]
+
+
+def _get_nft_ownership_cache_key(check: NftOwnershipCheck):
+    gate, wallet = check
+    token_ids = "-".join(map(str, gate.token_ids))
+    return f"{NFT_OWNERSHIP_CACHE_KEY_PREFIX}:{gate.chain}:{gate.address}:{token_ids}:{wallet}"
+
+
+def _serialize_nft_ownership_check(check: NftOwnershipCheck):
+    gate, wallet = check
+    return json.dumps(
+        [gate.chain, gate.address, gate.standard, list(gate.token_ids), wallet]
+    )
+
+
+def _deserialize_nft_ownership_check(value) -> NftOwnershipCheck:
+    chain, address, standard, token_ids, wallet = json.loads(value)
+    return NftGate(chain, address, standard, tuple(token_ids)), wallet
+
+
+def _get_cached_nft_ownership(redis, checks: List[NftOwnershipCheck]):
+    """Returns the cached ownership of the checks, a check missing from the cache is None"""
+    if not checks:
+        return []
+    cached = redis.mget([_get_nft_ownership_cache_key(check) for check in checks])
+    return [None if value is None else value == b"1" for value in cached]
+
+
+def _set_cached_nft_ownership(redis, ownership: Dict[NftOwnershipCheck, bool]):
+    # Wallets that do not own the nft are cached for less time
+    # so that a user who just bought it gets access sooner.
+    pipe = redis.pipeline()
+    for check, is_owner in ownership.items():
+        pipe.set(
+            _get_nft_ownership_cache_key(check),
+            "1" if is_owner else "0",
+            ex=NFT_OWNED_TTL_SEC if is_owner else NFT_NOT_OWNED_TTL_SEC,
+        )
+    pipe.execute()
+
+
+def _record_hot_nft_holders(redis, checks: List[NftOwnershipCheck]):
+    if not checks:
+        return
+    now = time.time()
+    redis.zadd(
+        HOT_NFT_HOLDERS_KEY,
+        {_serialize_nft_ownership_check(check): now for check in checks},
+    )
+
+
+def _get_balance_call_data(contract, check: NftOwnershipCheck):
+    gate, wallet = check
+    if gate.standard == "ERC721":
+        return contract.encodeABI(fn_name="balanceOf", args=[wallet])
+    return contract.encodeABI(
+        fn_name="balanceOfBatch",
+        args=[[wallet] * len(gate.token_ids), list(gate.token_ids)],
+    )
+
+
+# Decodes the uint256 returned by balanceOf or the uint256[] returned by balanceOfBatch
+def _decode_balances(standard: Optional[str], return_data: bytes):
+    words = [
+        int.from_bytes(return_data[i : i + 32], "big")
+        for i in range(0, len(return_data), 32)
+    ]
+    if standard == "ERC721" or not words:
+        return words[:1]
+    # A uint256[] is encoded as the byte offset of the array, its length, then its items
+    start = words[0] // 32
+    return words[start + 1 : start + 1 + words[start]]
+
+
+def _get_nft_contract(eth_web3, gate: NftGate):
+    abi = erc721_abi if gate.standard == "ERC721" else erc1155_abi
+    return eth_web3.eth.contract(address=gate.address, abi=abi)
+
+
+def _fetch_eth_nft_ownership_without_multicall(checks: List[NftOwnershipCheck]):
+    eth_web3 = web3_provider.get_eth_web3()
+    ownership = {}
+    for gate, wallet in checks:
         try:
-            contract = eth_web3.eth.contract(address=contract_address, abi=erc721_abi)
-            nft_balance = contract.functions.balanceOf(wallet).call()
-            if int(nft_balance) > 0:
-                return True
+            contract = _get_nft_contract(eth_web3, gate)
+            if gate.standard == "ERC721":
+                nft_balances = [contract.functions.balanceOf(wallet).call()]
+            else:
+                nft_balances = contract.functions.balanceOfBatch(
+                    [wallet] * len(gate.token_ids), list(gate.token_ids)
+                ).call()
+            ownership[(gate, wallet)] = any(
+                int(nft_balance) > 0 for nft_balance in nft_balances
+            )
         except Exception as e:
             logger.error(
-                f"Could not get nft balance for erc721 nft collection {contract_address} and user wallet {wallet}. Error: {e}"
+                f"Could not get nft balance for {gate.standard} nft collection {gate.address} and user wallet {wallet}. Error: {e}"
             )
-    return False
+    return ownership
 
 
-def _does_user_own_erc1155_nft_collection(
-    contract_address: str, user_eth_wallets: List[ChecksumAddress], token_ids: List[int]
-):
-    for wallet in user_eth_wallets:
-        try:
-            contract = eth_web3.eth.contract(address=contract_address, abi=erc1155_abi)
-            nft_balances = contract.functions.balanceOfBatch(
-                [wallet] * len(token_ids), token_ids
-            ).call()
-            positive_nft_balances = list(
-                filter(lambda nft_balance: int(nft_balance) > 0, nft_balances)
+# Checks the nft balances of all the given wallets and collections with one
+# Multicall3 aggregate3 call per batch instead of one chain call per wallet.
+# Checks whose balance call fails are left out so that they are not cached.
+def _fetch_eth_nft_ownership(checks: List[NftOwnershipCheck]):
+    multicall_address = shared_config["web3"].get("eth_multicall_address")
+    if not multicall_address:
+        return _fetch_eth_nft_ownership_without_multicall(checks)
+
+    eth_web3 = web3_provider.get_eth_web3()
+    multicall = eth_web3.eth.contract(
+        address=Web3.toChecksumAddress(multicall_address), abi=multicall3_abi
+    )
+    contracts = {}
+    ownership = {}
+    for i in range(0, len(checks), MULTICALL_BATCH_SIZE):
+        batch = checks[i : i + MULTICALL_BATCH_SIZE]
+        calls = []
+        for gate, wallet in batch:
+            if gate not in contracts:
+                contracts[gate] = _get_nft_contract(eth_web3, gate)
+            calls.append(
+                (
+                    gate.address,
+                    True,
+                    _get_balance_call_data(contracts[gate], (gate, wallet)),
+                )
             )
-            if len(positive_nft_balances) > 0:
-                return True
+        try:
+            results = multicall.functions.aggregate3(calls).call()
         except Exception as e:
             logger.error(
-                f"Could not get nft balance for erc1155 nft collection {contract_address} and user wallet {wallet}. Error: {e}"
+                f"get_premium_track_signatures.py | Multicall of {len(calls)} nft balances failed, checking them one by one. Error: {e}"
+            )
+            ownership.update(_fetch_eth_nft_ownership_without_multicall(batch))
+            continue
+        for (gate, wallet), (success, return_data) in zip(batch, results):
+            if not success:
+                logger.error(
+                    f"Could not get nft balance for {gate.standard} nft collection {gate.address} and user wallet {wallet}."
+                )
+                continue
+            ownership[(gate, wallet)] = any(
+                nft_balance > 0
+                for nft_balance in _decode_balances(gate.standard, return_data)
             )
-    return False
+    return ownership
 
 
 def _get_tracks(track_ids: List[int], session: Session):
@@ -108,138 +246,81 @@ def _get_nft_gated_tracks(track_ids: List[int], session: Session):
     )
 
 
+def _get_nft_gated_track_signatures(
+    user_wallet: str,
+    wallets: List[str],
+    gate_track_map: Dict[NftGate, List[Track]],
+):
+    checks = [(gate, wallet) for gate in gate_track_map for wallet in wallets]
+    ownership = get_nft_ownership(checks)
+
+    # Generate premium content signatures for tracks whose
+    # nft collection is owned by any of the user wallets.
+    owned_tracks = [
+        track
+        for gate, gated_tracks in gate_track_map.items()
+        if any(ownership[(gate, wallet)] for wallet in wallets)
+        for track in gated_tracks
+    ]
+    signatures = get_premium_content_signatures_for_user(
+        [
+            {
+                "track_id": track.track_id,
+                "track_cid": track.track_cid,
+                "type": "track",
+                "user_wallet": user_wallet,
+                "is_premium": True,
+            }
+            for track in owned_tracks
+        ]
+    )
+    return {
+        track.track_id: signature for track, signature in zip(owned_tracks, signatures)
+    }
+
+
 def _get_eth_nft_gated_track_signatures(
     user_wallet: str,
     eth_associated_wallets: List[str],
     tracks: List[Track],
     track_token_id_map: Dict[int, List[str]],
 ):
-    track_signature_map = {}
-    track_cid_to_id_map = {}
-
     user_eth_wallets = list(
         map(Web3.toChecksumAddress, eth_associated_wallets + [user_wallet])
     )
 
-    erc721_gated_tracks = list(
-        filter(
-            lambda track: track.premium_conditions["nft_collection"]["standard"]  # type: ignore
-            == "ERC721",
-            tracks,
-        )
-    )
-
-    # Build a map of ERC721 collection address -> track ids
-    # so that only one chain call will be made for premium tracks
-    # that share the same nft collection gate.
-    erc721_collection_track_map = defaultdict(list)
-    for track in erc721_gated_tracks:
-        contract_address = Web3.toChecksumAddress(
-            track.premium_conditions["nft_collection"]["address"]  # type: ignore
-        )
-        erc721_collection_track_map[contract_address].append(track.track_cid)
-        track_cid_to_id_map[track.track_cid] = track.track_id
-
-    erc1155_gated_tracks = list(
-        filter(
-            lambda track: track.premium_conditions["nft_collection"]["standard"]  # type: ignore
-            == "ERC1155",
-            tracks,
-        )
-    )
-
-    # Build a map of ERC1155 collection address -> track ids
-    # so that only one chain call will be made for premium tracks
-    # that share the same nft collection gate.
-    # Also build a map of ERC1155 collection address -> nft token ids
-    # so that the balanceOf contract function can be used to check
+    # Build a map of ERC1155 collection address -> nft token ids
+    # so that the balanceOfBatch contract function can be used to check
     # batch ownership of ERC1155 nfts for a given collection.
-    erc1155_collection_track_map = defaultdict(list)
     contract_address_token_id_map: Dict[str, Set[int]] = defaultdict(set)
-    for track in erc1155_gated_tracks:
-        contract_address = Web3.toChecksumAddress(
-            track.premium_conditions["nft_collection"]["address"]  # type: ignore
-        )
-        erc1155_collection_track_map[contract_address].append(track.track_cid)
-        track_token_id_set = set(map(int, track_token_id_map[track.track_id]))
-        contract_address_token_id_map[contract_address] = contract_address_token_id_map[
-            contract_address
-        ].union(track_token_id_set)
-        track_cid_to_id_map[track.track_cid] = track.track_id
-
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Check ownership of nfts from erc721 collections from given contract addresses,
-        # using all user eth wallets, and generate signatures for corresponding tracks.
-        future_to_erc721_contract_address_map = {
-            executor.submit(
-                _does_user_own_erc721_nft_collection, contract_address, user_eth_wallets
-            ): contract_address
-            for contract_address in list(erc721_collection_track_map.keys())
-        }
-        for future in concurrent.futures.as_completed(
-            future_to_erc721_contract_address_map
-        ):
-            contract_address = future_to_erc721_contract_address_map[future]
-            try:
-                # Generate premium content signatures for tracks whose
-                # nft collection is owned by the user.
-                if future.result():
-                    for track_cid in erc721_collection_track_map[contract_address]:
-                        track_id = track_cid_to_id_map[track_cid]
-                        track_signature_map[
-                            track_id
-                        ] = get_premium_content_signature_for_user(
-                            {
-                                "track_id": track_id,
-                                "track_cid": track_cid,
-                                "type": "track",
-                                "user_wallet": user_wallet,
-                                "is_premium": True,
-                            }
-                        )
-            except Exception as e:
-                logger.error(
-                    f"Could not get future result for erc721 contract_address {contract_address}. Error: {e}"
-                )
-
-        # Check ownership of nfts from erc1155 collections from given contract addresses,
-        # using all user eth wallets, and generate signatures for corresponding tracks.
-        future_to_erc1155_contract_address_map = {
-            executor.submit(
-                _does_user_own_erc1155_nft_collection,
-                contract_address,
-                user_eth_wallets,
-                list(contract_address_token_id_map[contract_address]),
-            ): contract_address
-            for contract_address in list(erc1155_collection_track_map.keys())
-        }
-        for future in concurrent.futures.as_completed(
-            future_to_erc1155_contract_address_map
-        ):
-            contract_address = future_to_erc1155_contract_address_map[future]
-            try:
-                # Generate premium content signatures for tracks whose
-                # nft collection is owned by the user.
-                if future.result():
-                    for track_cid in erc1155_collection_track_map[contract_address]:
-                        track_id = track_cid_to_id_map[track_cid]
-                        track_signature_map[
-                            track_id
-                        ] = get_premium_content_signature_for_user(
-                            {
-                                "track_id": track_id,
-                                "track_cid": track_cid,
-                                "type": "track",
-                                "user_wallet": user_wallet,
-                                "is_premium": True,
-                            }
-                        )
-            except Exception as e:
-                logger.error(
-                    f"Could not get future result for erc1155 contract_address {contract_address}. Error: {e}"
-                )
+    for track in tracks:
+        nft_collection = track.premium_conditions["nft_collection"]  # type: ignore
+        if nft_collection["standard"] == "ERC1155":
+            contract_address = Web3.toChecksumAddress(nft_collection["address"])
+            contract_address_token_id_map[contract_address].update(
+                map(int, track_token_id_map[track.track_id])
+            )
 
-    return track_signature_map
+    # Build a map of nft gate -> tracks
+    # so that only one ownership check per wallet will be made
+    # for premium tracks that share the same nft collection gate.
+    gate_track_map = defaultdict(list)
+    for track in tracks:
+        nft_collection = track.premium_conditions["nft_collection"]  # type: ignore
+        standard = nft_collection["standard"]
+        contract_address = Web3.toChecksumAddress(nft_collection["address"])
+        if standard == "ERC721":
+            gate = NftGate("eth", contract_address, standard)
+        elif standard == "ERC1155":
+            token_ids = tuple(sorted(contract_address_token_id_map[contract_address]))
+            gate = NftGate("eth", contract_address, standard, token_ids)
+        else:
+            continue
+        gate_track_map[gate].append(track)
+
+    return _get_nft_gated_track_signatures(
+        user_wallet, user_eth_wallets, gate_track_map
+    )
 
 
 # Extended and simplified based on the reference links below
@@ -301,84 +382,149 @@ def _get_token_account_info(token_account):
     return token_account["account"]["data"]["parsed"]["info"]
 
 
-def _decode_metadata_account(metadata_account):
-    account_info = solana_client_manager.get_account_info(metadata_account)
-    if (
-        (not account_info)
-        or ("value" not in account_info)
-        or (not account_info["value"])
-        or ("data" not in account_info["value"])
-        or (not account_info["value"]["data"])
-    ):
-        return None
-    return base64.b64decode(account_info["value"]["data"][0])
-
-
-async def _wrap_decode_metadata_account(metadata_account):
-    loop = asyncio.get_running_loop()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=100) as pool:
-        result = await loop.run_in_executor(
-            pool, _decode_metadata_account, metadata_account
+# - Fetch and parse token accounts from the given wallet to get the mint addresses
+# - Filter out token accounts with positive amounts and whose decimal places are not 0
+# - Find the metadata PDAs for the mint addresses
+# - Get the account infos for the PDAs that exist, in batches with getMultipleAccounts
+# - Unpack the chain metadatas from the account infos
+# - Return the mint addresses of the verified collections of the wallet's nfts
+def _get_sol_wallet_nft_collections(wallet: str):
+    result = solana_client_manager.get_token_accounts_by_owner(wallet)
+    token_accounts = result["value"]
+    nft_token_accounts = list(
+        filter(
+            lambda item: _get_token_account_info(item)["tokenAmount"]["amount"] != "0"
+            and _get_token_account_info(item)["tokenAmount"]["decimals"] == 0,
+            token_accounts,
         )
-        return result
-
+    )
+    nft_mints = list(
+        map(
+            lambda item: _get_token_account_info(item)["mint"],
+            nft_token_accounts,
+        )
+    )
+    metadata_accounts = list(map(_get_metadata_account, nft_mints))
 
-async def _decode_metadata_accounts_async(metadata_accounts):
-    datas = await asyncio.gather(*map(_wrap_decode_metadata_account, metadata_accounts))
-    return datas
+    collection_mint_addresses = set()
+    for i in range(0, len(metadata_accounts), SOLANA_MULTIPLE_ACCOUNTS_LIMIT):
+        result = solana_client_manager.get_multiple_accounts(
+            metadata_accounts[i : i + SOLANA_MULTIPLE_ACCOUNTS_LIMIT]
+        )
+        for account_info in result["value"]:
+            if not account_info or not account_info.get("data"):
+                continue
+            metadata = _unpack_metadata_account_for_metaplex_nft(
+                base64.b64decode(account_info["data"][0])
+            )
+            collection = metadata["collection"]
+            if collection and collection["verified"]:
+                collection_mint_addresses.add(collection["key"].decode())
+    return collection_mint_addresses
 
 
-# - Fet and parse token accounts from given wallets to get the mint addresses
-# - Filter out token accounts with positive amounts and whose decimal places are not 0
-# - Find the metadata PDAs for the mint addresses
-# - Get the account infos for the PDAs if they exist
-# - Unpack the chain metadatas from the account infos
-# - Verify that the nft is from a verified collection whose mint address is the same as that passed into the function
-# - If so, then user owns nft from that collection
-def _does_user_own_sol_nft_collection(
-    collection_mint_address: str, user_sol_wallets: List[str]
-):
+# Fetches the nft collections of each wallet once, however many
+# collections are checked for it.
+# Wallets whose nfts could not be fetched are left out so that they are not cached.
+def _fetch_sol_nft_ownership(checks: List[NftOwnershipCheck]):
     if not solana_client_manager:
-        return False
+        return {}
 
-    for wallet in user_sol_wallets:
-        try:
-            result = solana_client_manager.get_token_accounts_by_owner(wallet)
-            token_accounts = result["value"]
-            nft_token_accounts = list(
-                filter(
-                    lambda item: _get_token_account_info(item)["tokenAmount"]["amount"]
-                    != "0"
-                    and _get_token_account_info(item)["tokenAmount"]["decimals"] == 0,
-                    token_accounts,
-                )
-            )
-            nft_mints = list(
-                map(
-                    lambda item: _get_token_account_info(item)["mint"],
-                    nft_token_accounts,
+    wallet_collections = {}
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        future_to_wallet_map = {
+            executor.submit(_get_sol_wallet_nft_collections, wallet): wallet
+            for wallet in {wallet for _, wallet in checks}
+        }
+        for future in concurrent.futures.as_completed(future_to_wallet_map):
+            wallet = future_to_wallet_map[future]
+            try:
+                wallet_collections[wallet] = future.result()
+            except Exception as e:
+                logger.error(
+                    f"Could not get nft collections for user wallet {wallet}. Error: {e}"
                 )
-            )
-            metadata_accounts = list(map(_get_metadata_account, nft_mints))
-            datas = asyncio.run(_decode_metadata_accounts_async(metadata_accounts))
-            datas = list(filter(lambda data: data is not None, datas))
-            metadatas = list(map(_unpack_metadata_account_for_metaplex_nft, datas))
-            collections = list(map(lambda metadata: metadata["collection"], metadatas))
-            has_collection_mint_address = list(
-                filter(
-                    lambda collection: collection
-                    and collection["verified"]
-                    and collection["key"].decode() == collection_mint_address,
-                    collections,
+
+    return {
+        (gate, wallet): gate.address in wallet_collections[wallet]
+        for gate, wallet in checks
+        if wallet in wallet_collections
+    }
+
+
+def _fetch_nft_ownership(checks: List[NftOwnershipCheck]):
+    ownership: Dict[NftOwnershipCheck, bool] = {}
+    eth_checks = [check for check in checks if check[0].chain == "eth"]
+    sol_checks = [check for check in checks if check[0].chain == "sol"]
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = []
+        if eth_checks:
+            futures.append(executor.submit(_fetch_eth_nft_ownership, eth_checks))
+        if sol_checks:
+            futures.append(executor.submit(_fetch_sol_nft_ownership, sol_checks))
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                ownership.update(future.result())
+            except Exception as e:
+                logger.error(
+                    f"get_premium_track_signatures.py | Could not fetch nft ownership. Error: {e}"
                 )
-            )
-            if has_collection_mint_address:
-                return True
-        except Exception as e:
-            logger.error(
-                f"Could not get nft balance for nft collection {collection_mint_address} and user wallet {wallet}. Error: {e}"
-            )
-    return False
+    return ownership
+
+
+# Returns whether each wallet owns an nft from each gate, from the ownership cache
+# or else from the chain. Checks served from the cache are marked as hot so that
+# the refresh_nft_ownership_cache task keeps their cache entries fresh.
+def get_nft_ownership(checks: List[NftOwnershipCheck]):
+    redis = redis_connection.get_redis()
+
+    ownership: Dict[NftOwnershipCheck, bool] = {}
+    uncached_checks = []
+    for check, is_owner in zip(checks, _get_cached_nft_ownership(redis, checks)):
+        if is_owner is None:
+            uncached_checks.append(check)
+        else:
+            ownership[check] = is_owner
+    _record_hot_nft_holders(redis, list(ownership.keys()))
+
+    if uncached_checks:
+        fetched_ownership = _fetch_nft_ownership(uncached_checks)
+        _set_cached_nft_ownership(redis, fetched_ownership)
+        for check in uncached_checks:
+            ownership[check] = fetched_ownership.get(check, False)
+    return ownership
+
+
+# Re-checks on chain the ownership of the hot wallets and nft gates whose cache
+# entries expire before the next refresh, so that they are updated before they expire.
+def refresh_hot_nft_holders(redis):
+    redis.zremrangebyscore(
+        HOT_NFT_HOLDERS_KEY, 0, time.time() - HOT_NFT_HOLDERS_WINDOW_SEC
+    )
+    redis.zremrangebyrank(HOT_NFT_HOLDERS_KEY, 0, -HOT_NFT_HOLDERS_MAX - 1)
+    checks = list(
+        map(
+            _deserialize_nft_ownership_check,
+            redis.zrange(HOT_NFT_HOLDERS_KEY, 0, -1),
+        )
+    )
+    if not checks:
+        return 0
+
+    pipe = redis.pipeline()
+    for check in checks:
+        pipe.ttl(_get_nft_ownership_cache_key(check))
+    # Entries that already expired are fetched again when they are next checked
+    expiring_checks = [
+        check
+        for check, ttl in zip(checks, pipe.execute())
+        if 0 <= ttl <= HOT_NFT_HOLDERS_REFRESH_INTERVAL_SEC
+    ]
+    if not expiring_checks:
+        return 0
+    ownership = _fetch_nft_ownership(expiring_checks)
+    _set_cached_nft_ownership(redis, ownership)
+    return len(ownership)
 
 
 def _get_sol_nft_gated_track_signatures(
@@ -386,56 +532,17 @@ def _get_sol_nft_gated_track_signatures(
     sol_associated_wallets: List[str],
     tracks: List[Track],
 ):
-    track_signature_map = {}
-    track_cid_to_id_map = {}
-
-    # Build a map of collection mint address -> track ids
-    # so that only one chain call will be made for premium tracks
-    # that share the same nft collection gate.
-    collection_track_map = defaultdict(list)
+    # Build a map of nft gate -> tracks
+    # so that only one ownership check per wallet will be made
+    # for premium tracks that share the same nft collection gate.
+    gate_track_map = defaultdict(list)
     for track in tracks:
         collection_mint_address = track.premium_conditions["nft_collection"]["address"]  # type: ignore
-        collection_track_map[collection_mint_address].append(track.track_cid)
-        track_cid_to_id_map[track.track_cid] = track.track_id
+        gate_track_map[NftGate("sol", collection_mint_address)].append(track)
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Check ownership of nfts from collections from given collection mint addresses,
-        # using all user sol wallets, and generate signatures for corresponding tracks.
-        future_to_collection_mint_address_map = {
-            executor.submit(
-                _does_user_own_sol_nft_collection,
-                collection_mint_address,
-                sol_associated_wallets,
-            ): collection_mint_address
-            for collection_mint_address in list(collection_track_map.keys())
-        }
-        for future in concurrent.futures.as_completed(
-            future_to_collection_mint_address_map
-        ):
-            collection_mint_address = future_to_collection_mint_address_map[future]
-            try:
-                # Generate premium content signatures for tracks whose
-                # nft collection is owned by the user.
-                if future.result():
-                    for track_cid in collection_track_map[collection_mint_address]:
-                        track_id = track_cid_to_id_map[track_cid]
-                        track_signature_map[
-                            track_id
-                        ] = get_premium_content_signature_for_user(
-                            {
-                                "track_id": track_id,
-                                "track_cid": track_cid,
-                                "type": "track",
-                                "user_wallet": user_wallet,
-                                "is_premium": True,
-                            }
-                        )
-            except Exception as e:
-                logger.error(
-                    f"Could not get future result for collection_mint_address {collection_mint_address}. Error: {e}"
-                )
-
-    return track_signature_map
+    return _get_nft_gated_track_signatures(
+        user_wallet, sol_associated_wallets, gate_track_map
+    )
 
 
 # Generates a premium content signature for each of the nft-gated tracks.
@@ -535,9 +642,8 @@ def get_premium_track_signatures(user_id: int, track_ids: List[int]):
             if track_access_for_user[track_id]["is_premium"]:
                 premium_track_ids.add(track_id)
 
-        track_signature_map = {}
-        for track_id in track_ids_with_access:
-            track_signature_map[track_id] = get_premium_content_signature_for_user(
+        signatures = get_premium_content_signatures_for_user(
+            [
                 {
                     "track_id": tracks_map[track_id].track_id,
                     "track_cid": tracks_map[track_id].track_cid,
@@ -545,18 +651,25 @@ def get_premium_track_signatures(user_id: int, track_ids: List[int]):
                     "user_wallet": user_wallet,
                     "is_premium": track_id in premium_track_ids,
                 }
-            )
-        return track_signature_map
+                for track_id in track_ids_with_access
+            ]
+        )
+        return dict(zip(track_ids_with_access, signatures))
 
 
 def _load_abis():
     global erc721_abi
     global erc1155_abi
+    global multicall3_abi
     ERC721_ABI_PATH = pathlib.Path(__file__).parent / "../abis" / "ERC721.json"
     ERC1155_ABI_PATH = pathlib.Path(__file__).parent / "../abis" / "ERC1155.json"
-    with open(ERC721_ABI_PATH) as f721, open(ERC1155_ABI_PATH) as f1155:
+    MULTICALL3_ABI_PATH = pathlib.Path(__file__).parent / "../abis" / "Multicall3.json"
+    with open(ERC721_ABI_PATH) as f721, open(ERC1155_ABI_PATH) as f1155, open(
+        MULTICALL3_ABI_PATH
+    ) as fmulticall3:
         erc721_abi = json.dumps(json.load(f721))
         erc1155_abi = json.dumps(json.load(f1155))
+        multicall3_abi = json.dumps(json.load(fmulticall3))
 
 
 def _init_solana_client_manager():
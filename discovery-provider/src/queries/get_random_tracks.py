@@ -1,13 +1,101 @@
-from sqlalchemy import func
+import logging
+from typing import List, Optional
+
+from sqlalchemy import and_, func
 from src.models.tracks.track import Track
 from src.queries.query_helpers import (
     get_users_by_id,
     get_users_ids,
     populate_track_metadata,
 )
-from src.utils import helpers
+from src.utils import helpers, redis_connection
 from src.utils.db_session import get_db_read_replica
 
+logger = logging.getLogger(__name__)
+
+# The ids of the tracks that can be sampled are kept in a redis set, maintained
+# by the update_random_track_ids task, so that sampling is O(limit) with
+# SRANDMEMBER instead of sorting every track by random()
+RANDOM_TRACK_IDS_KEY = "random_track_ids"
+RANDOM_TRACK_IDS_BATCH_SIZE = 10000
+
+
+def filter_random_track_candidates(query):
+    return query.filter(
+        Track.is_current == True,
+        Track.is_delete == False,
+        Track.is_unlisted == False,
+        Track.stem_of == None,
+    )
+
+
+def rebuild_random_track_ids(session, redis):
+    """Replaces the set of track ids to sample from"""
+    tmp_key = f"{RANDOM_TRACK_IDS_KEY}:tmp"
+    redis.delete(tmp_key)
+
+    track_ids = filter_random_track_candidates(session.query(Track.track_id)).yield_per(
+        RANDOM_TRACK_IDS_BATCH_SIZE
+    )
+    batch: List[int] = []
+    num_track_ids = 0
+    for (track_id,) in track_ids:
+        batch.append(track_id)
+        if len(batch) == RANDOM_TRACK_IDS_BATCH_SIZE:
+            redis.sadd(tmp_key, *batch)
+            num_track_ids += len(batch)
+            batch = []
+    if batch:
+        redis.sadd(tmp_key, *batch)
+        num_track_ids += len(batch)
+
+    if num_track_ids:
+        redis.rename(tmp_key, RANDOM_TRACK_IDS_KEY)
+    else:
+        redis.delete(RANDOM_TRACK_IDS_KEY)
+    logger.info(
+        f"get_random_tracks.py | rebuilt random track ids with {num_track_ids} tracks"
+    )
+
+
+def update_random_track_ids(session, redis, min_blocknumber, max_blocknumber):
+    """Adds or removes the tracks updated in (min_blocknumber, max_blocknumber]"""
+    updated_tracks = (
+        session.query(
+            Track.track_id,
+            and_(
+                Track.is_delete == False,
+                Track.is_unlisted == False,
+                Track.stem_of == None,
+            ).label("is_candidate"),
+        )
+        .filter(
+            Track.is_current == True,
+            Track.blocknumber > min_blocknumber,
+            Track.blocknumber <= max_blocknumber,
+        )
+        .all()
+    )
+    add_ids = [track_id for track_id, is_candidate in updated_tracks if is_candidate]
+    remove_ids = [
+        track_id for track_id, is_candidate in updated_tracks if not is_candidate
+    ]
+
+    pipe = redis.pipeline()
+    if add_ids:
+        pipe.sadd(RANDOM_TRACK_IDS_KEY, *add_ids)
+    if remove_ids:
+        pipe.srem(RANDOM_TRACK_IDS_KEY, *remove_ids)
+    pipe.execute()
+
+
+def get_random_track_ids(redis, limit) -> Optional[List[int]]:
+    """Samples up to `limit` distinct track ids, or None if the set isn't built"""
+    track_ids = redis.srandmember(RANDOM_TRACK_IDS_KEY, limit)
+    if not track_ids:
+        return None
+    return [int(track_id) for track_id in track_ids]
+
 
 def get_random_tracks(args):
 
@@ -15,24 +103,29 @@ def get_random_tracks(args):
 
     current_user_id = args.get("user_id")
     db = get_db_read_replica()
+    redis = redis_connection.get_redis()
     with db.scoped_session() as session:
-        # Query for random tracks
-        tracks_query = (
-            session.query(
-                Track,
+        track_ids = get_random_track_ids(redis, limit)
+        if track_ids is None:
+            # Query for random tracks
+            tracks_query = (
+                filter_random_track_candidates(session.query(Track))
+                .order_by(func.random())
+                .limit(limit)
             )
-            .filter(
-                Track.is_current == True,
-                Track.is_delete == False,
-                Track.is_unlisted == False,
-                Track.stem_of == None,
+        else:
+            # The sampled tracks are checked again in case they changed since
+            # the set was last updated
+            tracks_query = filter_random_track_candidates(
+                session.query(Track).filter(Track.track_id.in_(track_ids))
             )
-            .order_by(func.random())
-            .limit(limit)
-        )
 
         tracks_query_results = tracks_query.all()
         tracks = helpers.query_result_to_list(tracks_query_results)
+        if track_ids is not None:
+            # keep the sampled order rather than the order of the query
+            position = {track_id: i for i, track_id in enumerate(track_ids)}
+            tracks.sort(key=lambda track: position[track["track_id"]])
         track_ids = list(map(lambda track: track["track_id"], tracks))
 
         # bundle peripheral info into track results
@@ -21,7 +21,7 @@ def get_saves(save_type, user_id):
     save_results = []
     db = get_db_read_replica()
     with db.scoped_session() as session:
-        query = session.query(Save).filter(
+        query = session.query(*Save.__table__.columns).filter(
             Save.user_id == user_id,
             Save.is_current == True,
             Save.is_delete == False,
@@ -53,6 +53,6 @@ def get_saves(save_type, user_id):
         query = query.order_by(Save.blocknumber.desc(), Save.save_item_id.desc())
 
         query_results = paginate_query(query).all()
-        save_results = helpers.query_result_to_list(query_results)
+        save_results = helpers.query_rows_to_list(query_results, Save)
 
     return save_results
@@ -1,15 +1,20 @@
+import gzip
+import io
+import json
 import logging
 import urllib.parse
-from typing import List, Tuple
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
 
-from lxml import etree
+from redis import Redis
 from sqlalchemy import asc, func
+from sqlalchemy.orm.query import Query
 from sqlalchemy.orm.session import Session
 from src.models.playlists.playlist import Playlist
 from src.models.playlists.playlist_route import PlaylistRoute
 from src.models.tracks.track import Track
 from src.models.tracks.track_route import TrackRoute
-from src.models.users.aggregate_user import AggregateUser
 from src.models.users.user import User
 from src.utils.get_all_other_nodes import get_node_endpoint
 
@@ -70,75 +75,68 @@ default_routes = [
 # The max number of urls that can be in a single sitemap
 LIMIT = 50_000
 
+SITEMAP_XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+SITEMAP_TYPES = ["track", "playlist", "user"]
+
+# Cached sitemaps are refreshed by the update_sitemaps task; the ttl only
+# bounds how long stale sitemaps survive if the task stops running
+SITEMAP_CACHE_TTL_SEC = 24 * 60 * 60
+
+
+def stream_xml(root_tag: str, child_tag: str, locs: Iterable[str]) -> Iterator[bytes]:
+    """
+    Streams a sitemap document of `<child_tag><loc>` entries without building it in memory.
+    The output is byte-for-byte identical to pretty printing the equivalent lxml tree.
+    """
+    locs = iter(locs)
+    first = next(locs, None)
+    if first is None:
+        yield f'<{root_tag} xmlns="{SITEMAP_XMLNS}"/>\n'.encode()
+        return
+    yield f'<{root_tag} xmlns="{SITEMAP_XMLNS}">\n'.encode()
+    for loc in chain([first], locs):
+        yield f"  <{child_tag}>\n    <loc>{escape(loc)}</loc>\n  </{child_tag}>\n".encode()
+    yield f"</{root_tag}>\n".encode()
+
 
 def build_default():
-    root = etree.Element("urlset", xmlns="http://www.sitemaps.org/schemas/sitemap/0.9")
-    for site_map_route in default_routes:
-        sitemap_el = etree.Element("url")
-        loc = etree.Element("loc")
-        loc.text = create_client_url(site_map_route)
-        sitemap_el.append(loc)
-        root.append(sitemap_el)
-
-    # pretty string
-    return etree.tostring(root, pretty_print=True)
-
-
-def get_max_track_count(session: Session) -> int:
-    max = (
-        session.query(func.count(Track.track_id))
-        .filter(Track.is_current == True, Track.stem_of == None)
-        .one()
-    )
-    return max[0]
+    return b"".join(stream_xml("urlset", "url", map(create_client_url, default_routes)))
 
 
-def get_max_user_count(session: Session) -> int:
-    max = session.query(func.count(AggregateUser.user_id)).one()
-    return max[0]
+def gzip_chunks(chunks: Iterable[bytes]) -> bytes:
+    """Compresses a stream of chunks, so only the compressed document is held in memory"""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as gzip_file:
+        for chunk in chunks:
+            gzip_file.write(chunk)
+    return buffer.getvalue()
 
 
-def get_max_playlist_count(session: Session) -> int:
-    max = (
-        session.query(func.count(Playlist.playlist_id))
-        .filter(
-            Playlist.is_current == True,
-            Playlist.is_private == False,
-            Playlist.is_delete == False,
-        )
-        .one()
-    )
-    return max[0]
+def get_num_pages(max: int, limit: int = LIMIT) -> int:
+    return (max // limit) + 1 if max % limit != 0 else int(max / limit)
 
 
-def get_dynamic_root(max: int, base_route: str, limit: int = LIMIT):
-    num_pages = (max // limit) + 1 if max % limit != 0 else int(max / limit)
-    root = etree.Element(
-        "sitemapindex", xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+def stream_dynamic_root(num_pages: int, base_route: str) -> Iterator[bytes]:
+    return stream_xml(
+        "sitemapindex",
+        "sitemap",
+        (
+            create_xml_url(f"sitemaps/{base_route}/{num+1}.xml")
+            for num in range(num_pages)
+        ),
     )
-    for num in range(num_pages):
-        sitemap_el = etree.Element("sitemap")
-        loc = etree.Element("loc")
-        loc.text = create_xml_url(f"sitemaps/{base_route}/{num+1}.xml")
-        sitemap_el.append(loc)
-        root.append(sitemap_el)
 
-    return etree.tostring(root, pretty_print=True)
+
+def get_dynamic_root(max: int, base_route: str, limit: int = LIMIT):
+    return b"".join(stream_dynamic_root(get_num_pages(max, limit), base_route))
 
 
-def get_entity_page(slugs: List[str]):
-    root = etree.Element("urlset", xmlns="http://www.sitemaps.org/schemas/sitemap/0.9")
-    for slug in slugs:
-        sitemap_url = etree.Element("url")
-        loc = etree.Element("loc")
-        loc.text = create_client_url(slug)
-        sitemap_url.append(loc)
-        root.append(sitemap_url)
-    return etree.tostring(root, pretty_print=True)
+def get_entity_page(slugs: Iterable[str]):
+    return b"".join(stream_xml("urlset", "url", map(create_client_url, slugs)))
 
 
-def get_track_slugs(session: Session, limit: int, offset: int):
-    slugs: List[str] = (
+def track_slugs_query(session: Session) -> Query:
+    return (
         session.query(User.handle_lc, TrackRoute.slug)
         .join(Track, TrackRoute.track_id == Track.track_id)
         .join(User, TrackRoute.owner_id == User.user_id)
@@ -148,17 +146,11 @@ def get_track_slugs(session: Session, limit: int, offset: int):
             User.is_current == True,
             TrackRoute.is_current == True,
         )
-        .order_by(asc(Track.track_id))
-        .limit(limit)
-        .offset(offset)
-        .all()
     )
 
-    return [f"{slug[0]}/{slug[1]}" for slug in slugs]
 
-
-def get_playlist_slugs(session: Session, limit: int, offset: int):
-    slugs: List[Tuple[str, str, bool]] = (
+def playlist_slugs_query(session: Session) -> Query:
+    return (
         session.query(User.handle_lc, PlaylistRoute.slug, Playlist.is_album)
         .join(User, User.user_id == PlaylistRoute.owner_id)
         .join(Playlist, PlaylistRoute.playlist_id == Playlist.playlist_id)
@@ -168,61 +160,190 @@ def get_playlist_slugs(session: Session, limit: int, offset: int):
             Playlist.is_current == True,
             Playlist.is_private == False,
         )
-        .order_by(asc(Playlist.playlist_id))
-        .limit(limit)
-        .offset(offset)
+    )
+
+
+def user_slugs_query(session: Session) -> Query:
+    return session.query(User.handle_lc).filter(
+        User.is_current == True,
+        User.is_deactivated == False,
+        User.handle_lc != None,
+    )
+
+
+# For each sitemap type: (query for its slug rows, the id column it is paginated by,
+# formatter from slug row to route)
+SITEMAP_ENTITIES: Dict[str, Tuple[Callable[[Session], Query], Any, Callable]] = {
+    "track": (
+        track_slugs_query,
+        Track.track_id,
+        lambda slug: f"{slug[0]}/{slug[1]}",
+    ),
+    "playlist": (
+        playlist_slugs_query,
+        Playlist.playlist_id,
+        lambda slug: f"{slug[0]}/{'album' if slug[2] else 'playlist'}/{slug[1]}",
+    ),
+    "user": (
+        user_slugs_query,
+        User.user_id,
+        lambda slug: slug[0],
+    ),
+}
+
+
+def get_page_boundaries(session: Session, type: str, limit: int = LIMIT) -> List[int]:
+    """
+    Returns the first id of each sitemap page in a single pass over the ids,
+    so that pages can be fetched with keyset pagination instead of OFFSET
+    """
+    slugs_query, id_column, _ = SITEMAP_ENTITIES[type]
+    ordered_ids = (
+        slugs_query(session)
+        .with_entities(
+            id_column.label("id"),
+            func.row_number().over(order_by=asc(id_column)).label("row_number"),
+        )
+        .subquery()
+    )
+    boundaries = (
+        session.query(ordered_ids.c.id)
+        .filter((ordered_ids.c.row_number - 1) % limit == 0)
+        .order_by(asc(ordered_ids.c.id))
         .all()
     )
-    return [
-        f"{slug[0]}/{'album' if slug[2] else 'playlist'}/{slug[1]}" for slug in slugs
-    ]
+    return [boundary[0] for boundary in boundaries]
 
 
-def get_user_slugs(session: Session, limit: int, offset: int):
+def get_slugs(session: Session, type: str, limit: int, start_id: int) -> Iterator[str]:
+    slugs_query, id_column, format_slug = SITEMAP_ENTITIES[type]
     slugs = (
-        session.query(User.handle_lc)
-        .filter(
-            User.is_current == True,
-            User.is_deactivated == False,
-            User.handle_lc != None,
-        )
-        .order_by(asc(User.user_id))
+        slugs_query(session)
+        .filter(id_column >= start_id)
+        .order_by(asc(id_column))
         .limit(limit)
-        .offset(offset)
-        .all()
+        .yield_per(1000)
     )
+    return map(format_slug, slugs)
+
 
-    return [slug[0] for slug in slugs]
+def get_track_slugs(session: Session, limit: int, start_id: int):
+    return list(get_slugs(session, "track", limit, start_id))
+
+
+def get_playlist_slugs(session: Session, limit: int, start_id: int):
+    return list(get_slugs(session, "playlist", limit, start_id))
+
+
+def get_user_slugs(session: Session, limit: int, start_id: int):
+    return list(get_slugs(session, "user", limit, start_id))
+
+
+def stream_entity_page(
+    session: Session, type: str, page: int, boundaries: List[int], limit: int = LIMIT
+) -> Iterator[bytes]:
+    slugs: Iterable[str] = (
+        get_slugs(session, type, limit, boundaries[page - 1])
+        if 0 < page <= len(boundaries)
+        else []
+    )
+    return stream_xml("urlset", "url", map(create_client_url, slugs))
 
 
 def get_track_root(session: Session, limit: int = LIMIT):
-    max_track_count = get_max_track_count(session)
-    return get_dynamic_root(max_track_count, "track", limit)
+    boundaries = get_page_boundaries(session, "track", limit)
+    return b"".join(stream_dynamic_root(len(boundaries), "track"))
 
 
 def get_playlist_root(session: Session, limit: int = LIMIT):
-    max_track_count = get_max_playlist_count(session)
-    return get_dynamic_root(max_track_count, "playlist", limit)
+    boundaries = get_page_boundaries(session, "playlist", limit)
+    return b"".join(stream_dynamic_root(len(boundaries), "playlist"))
 
 
 def get_user_root(session: Session, limit: int = LIMIT):
-    max_user_count = get_max_user_count(session)
-    return get_dynamic_root(max_user_count, "user", limit)
+    boundaries = get_page_boundaries(session, "user", limit)
+    return b"".join(stream_dynamic_root(len(boundaries), "user"))
 
 
 def get_track_page(session: Session, page: int, limit: int = LIMIT):
-    offset = (page - 1) * limit
-    slugs = get_track_slugs(session, limit, offset)
-    return get_entity_page(slugs)
+    boundaries = get_page_boundaries(session, "track", limit)
+    return b"".join(stream_entity_page(session, "track", page, boundaries, limit))
 
 
 def get_playlist_page(session: Session, page: int, limit: int = LIMIT):
-    offset = (page - 1) * limit
-    slugs = get_playlist_slugs(session, limit, offset)
-    return get_entity_page(slugs)
+    boundaries = get_page_boundaries(session, "playlist", limit)
+    return b"".join(stream_entity_page(session, "playlist", page, boundaries, limit))
 
 
 def get_user_page(session: Session, page: int, limit: int = LIMIT):
-    offset = (page - 1) * limit
-    slugs = get_user_slugs(session, limit, offset)
-    return get_entity_page(slugs)
+    boundaries = get_page_boundaries(session, "user", limit)
+    return b"".join(stream_entity_page(session, "user", page, boundaries, limit))
+
+
+# Cached sitemaps
+
+
+def get_sitemap_cache_key(type: str, name: str) -> str:
+    return f"sitemap:{type}:{name}"
+
+
+def get_cached_page_boundaries(session: Session, redis: Redis, type: str) -> List[int]:
+    key = get_sitemap_cache_key(type, "boundaries")
+    cached_boundaries = redis.get(key)
+    if cached_boundaries:
+        return json.loads(cached_boundaries)
+    boundaries = get_page_boundaries(session, type)
+    redis.set(key, json.dumps(boundaries), ex=SITEMAP_CACHE_TTL_SEC)
+    return boundaries
+
+
+def get_cached_root(session: Session, redis: Redis, type: str) -> bytes:
+    """Returns the gzipped sitemap index for a type, building and caching it on a miss"""
+    key = get_sitemap_cache_key(type, "index")
+    cached_root: Optional[bytes] = redis.get(key)
+    if cached_root:
+        return cached_root
+    boundaries = get_cached_page_boundaries(session, redis, type)
+    root = gzip_chunks(stream_dynamic_root(len(boundaries), type))
+    redis.set(key, root, ex=SITEMAP_CACHE_TTL_SEC)
+    return root
+
+
+def get_cached_page(session: Session, redis: Redis, type: str, page: int) -> bytes:
+    """Returns a gzipped sitemap page, building and caching it on a miss"""
+    key = get_sitemap_cache_key(type, str(page))
+    cached_page: Optional[bytes] = redis.get(key)
+    if cached_page:
+        return cached_page
+    boundaries = get_cached_page_boundaries(session, redis, type)
+    page_xml = gzip_chunks(stream_entity_page(session, type, page, boundaries))
+    if 0 < page <= len(boundaries):
+        redis.set(key, page_xml, ex=SITEMAP_CACHE_TTL_SEC)
+    return page_xml
+
+
+def refresh_sitemaps(session: Session, redis: Redis):
+    """Recomputes page boundaries and rebuilds every cached sitemap"""
+    for type in SITEMAP_TYPES:
+        boundaries = get_page_boundaries(session, type)
+        redis.set(
+            get_sitemap_cache_key(type, "boundaries"),
+            json.dumps(boundaries),
+            ex=SITEMAP_CACHE_TTL_SEC,
+        )
+        redis.set(
+            get_sitemap_cache_key(type, "index"),
+            gzip_chunks(stream_dynamic_root(len(boundaries), type)),
+            ex=SITEMAP_CACHE_TTL_SEC,
+        )
+        for page in range(1, len(boundaries) + 1):
+            redis.set(
+                get_sitemap_cache_key(type, str(page)),
+                gzip_chunks(stream_entity_page(session, type, page, boundaries)),
+                ex=SITEMAP_CACHE_TTL_SEC,
+            )
+        # Drop pages past the end if the number of pages shrank
+        page = len(boundaries) + 1
+        while redis.delete(get_sitemap_cache_key(type, str(page))):
+            page += 1
+        logger.info(f"get_sitemap.py | refreshed {len(boundaries)} {type} sitemaps")
@@ -0,0 +1,109 @@
+import logging
+from array import array
+from typing import Iterable, Optional, Set
+
+from src.models.indexing.block import Block
+from src.models.social.follow import Follow
+from src.models.social.repost import Repost, RepostType
+from src.models.social.save import Save, SaveType
+
+logger = logging.getLogger(__name__)
+
+# Per-user followee and save/repost item sets, stored as packed sorted uint32
+# arrays in one redis hash per user. The indexer invalidates a user's hash when
+# they follow, save or repost, the TTL bounds staleness and memory for idle users
+SOCIAL_GRAPH_TTL_SEC = 60 * 60
+# Field holding the block that last invalidated the hash. Sets read from a replica
+# that has not indexed it yet are returned but not cached, so they can't outlive
+# the replica lag
+INVALIDATED_AT_BLOCK_FIELD = "invalidated_at_block"
+# Sets larger than this are not cached, callers fall back to querying
+SOCIAL_GRAPH_MAX_SET_SIZE = 10000
+# A packed array is always a multiple of 4 bytes, so this can't collide
+OVERFLOW_MARKER = b"-"
+
+
+def get_social_graph_key(user_id):
+    return f"social_graph:{user_id}"
+
+
+def pack_ids(ids: Iterable[int]) -> bytes:
+    return array("I", sorted(ids)).tobytes()
+
+
+def unpack_ids(packed: bytes) -> Set[int]:
+    ids = array("I")
+    ids.frombytes(packed)
+    return set(ids)
+
+
+def _get_cached_id_set(redis, user_id: int, field: str, query) -> Optional[Set[int]]:
+    key = get_social_graph_key(user_id)
+    cached, invalidated_at_block = redis.hmget(key, field, INVALIDATED_AT_BLOCK_FIELD)
+    if cached is not None:
+        return None if cached == OVERFLOW_MARKER else unpack_ids(cached)
+
+    ids = [row[0] for row in query.limit(SOCIAL_GRAPH_MAX_SET_SIZE + 1).all()]
+    is_overflow = len(ids) > SOCIAL_GRAPH_MAX_SET_SIZE
+    if invalidated_at_block is not None:
+        latest_block = (
+            query.session.query(Block.number).filter(Block.is_current == True).scalar()
+        )
+        if latest_block is None or latest_block < int(invalidated_at_block):
+            return None if is_overflow else set(ids)
+
+    pipe = redis.pipeline()
+    pipe.hset(key, field, OVERFLOW_MARKER if is_overflow else pack_ids(ids))
+    pipe.expire(key, SOCIAL_GRAPH_TTL_SEC)
+    pipe.execute()
+    return None if is_overflow else set(ids)
+
+
+def get_followee_ids(session, redis, user_id: int) -> Optional[Set[int]]:
+    """Returns the ids of users followed by `user_id`, or None if too many to cache"""
+    query = session.query(Follow.followee_user_id).filter(
+        Follow.follower_user_id == user_id,
+        Follow.is_current == True,
+        Follow.is_delete == False,
+    )
+    return _get_cached_id_set(redis, user_id, "followees", query)
+
+
+def get_saved_item_ids(
+    session, redis, user_id: int, save_type: SaveType
+) -> Optional[Set[int]]:
+    """Returns the ids of items of `save_type` saved by `user_id`, or None if too many to cache"""
+    query = session.query(Save.save_item_id).filter(
+        Save.user_id == user_id,
+        Save.save_type == save_type,
+        Save.is_current == True,
+        Save.is_delete == False,
+    )
+    return _get_cached_id_set(redis, user_id, f"saves:{save_type.value}", query)
+
+
+def get_reposted_item_ids(
+    session, redis, user_id: int, repost_type: RepostType
+) -> Optional[Set[int]]:
+    """Returns the ids of items of `repost_type` reposted by `user_id`, or None if too many to cache"""
+    query = session.query(Repost.repost_item_id).filter(
+        Repost.user_id == user_id,
+        Repost.repost_type == repost_type,
+        Repost.is_current == True,
+        Repost.is_delete == False,
+    )
+    return _get_cached_id_set(redis, user_id, f"reposts:{repost_type.value}", query)
+
+
+def invalidate_social_graph(redis, user_ids: Iterable[int], blocknumber: int):
+    """
+    Drops the cached social graph of users whose follows, saves or reposts changed
+    in `blocknumber`, and keeps the block so stale replicas don't refill it
+    """
+    pipe = redis.pipeline()
+    for user_id in user_ids:
+        key = get_social_graph_key(user_id)
+        pipe.delete(key)
+        pipe.hset(key, INVALIDATED_AT_BLOCK_FIELD, blocknumber)
+        pipe.expire(key, SOCIAL_GRAPH_TTL_SEC)
+    pipe.execute()
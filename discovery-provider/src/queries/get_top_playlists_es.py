@@ -2,12 +2,7 @@ import time
 
 from src.api.v1.helpers import extend_playlist
 from src.queries.query_helpers import get_current_user_id
-from src.utils.elasticdsl import (
-    ES_PLAYLISTS,
-    ES_USERS,
-    esclient,
-    populate_user_metadata_es,
-)
+from src.utils.elasticdsl import ES_PLAYLISTS, ES_USERS, esclient, fetch_users_es
 
 
 def get_top_playlists_es(kind, args):
@@ -76,14 +71,11 @@ def get_top_playlists_es(kind, args):
         playlists.append(p)
 
     # with users behavior
-    user_id_set = set([str(p["playlist_owner_id"]) for p in playlists])
-    user_list = esclient.mget(index=ES_USERS, ids=list(user_id_set))
-    user_by_id = {d["_id"]: d["_source"] for d in user_list["docs"] if d["found"]}
+    # omit current_user because top playlists are cached across users
+    (user_by_id, _) = fetch_users_es([p["playlist_owner_id"] for p in playlists])
 
     for p in playlists:
-        u = user_by_id[str(p["playlist_owner_id"])]
-        # omit current_user because top playlists are cached across users
-        p["user"] = populate_user_metadata_es(u, None)
+        p["user"] = user_by_id[str(p["playlist_owner_id"])]
         extend_playlist(p)
 
     return playlists
@@ -0,0 +1,169 @@
+import logging
+from typing import Dict, Iterable, Optional, Tuple, TypedDict
+
+from src.models.indexing.block import Block
+from src.models.tracks.track import Track
+from src.models.users.user import User
+from src.utils import redis_connection
+from src.utils.db_session import get_db_read_replica
+from src.utils.redis_cache import get_json_cached_key, set_json_cached_key
+
+logger = logging.getLogger(__name__)
+
+# The indexer invalidates entries as tracks and users change,
+# the TTL bounds staleness from missed invalidations and replica lag
+TRACK_STREAM_INFO_TTL_SEC = 60 * 10
+# Keys holding the block that last invalidated a track or owner. Info read from a
+# replica that has not indexed it yet is returned but not cached, so a lagging
+# replica can't put the old row back for the whole TTL
+INVALIDATED_AT_BLOCK_KEY_SUFFIX = "invalidated_at_block"
+
+
+class TrackStreamInfo(TypedDict):
+    track_id: int
+    owner_id: int
+    track_cid: Optional[str]
+    is_delete: bool
+    is_premium: bool
+    premium_conditions: Optional[Dict]
+    creator_node_endpoint: Optional[str]
+    is_deactivated: bool
+
+
+def get_track_stream_info_key(track_id):
+    return f"track:stream:{track_id}"
+
+
+def get_user_stream_info_key(user_id):
+    return f"user:stream:{user_id}"
+
+
+def get_invalidated_at_block_key(stream_info_key):
+    return f"{stream_info_key}:{INVALIDATED_AT_BLOCK_KEY_SUFFIX}"
+
+
+def _query_track_stream_info(
+    track_id: int,
+) -> Tuple[Optional[TrackStreamInfo], Optional[int]]:
+    """Returns the track's stream info and the latest block of the replica read from"""
+    db = get_db_read_replica()
+    with db.scoped_session() as session:
+        row = (
+            session.query(
+                Track.track_id,
+                Track.owner_id,
+                Track.track_cid,
+                Track.is_delete,
+                Track.is_premium,
+                Track.premium_conditions,
+                User.creator_node_endpoint,
+                User.is_deactivated,
+            )
+            .join(User, User.user_id == Track.owner_id)
+            .filter(
+                Track.track_id == track_id,
+                Track.is_current == True,
+                User.is_current == True,
+            )
+            .first()
+        )
+        latest_block = (
+            session.query(Block.number).filter(Block.is_current == True).scalar()
+        )
+        if not row:
+            return None, latest_block
+        stream_info: TrackStreamInfo = {
+            "track_id": row.track_id,
+            "owner_id": row.owner_id,
+            "track_cid": row.track_cid,
+            "is_delete": row.is_delete,
+            "is_premium": row.is_premium,
+            "premium_conditions": row.premium_conditions,
+            "creator_node_endpoint": row.creator_node_endpoint,
+            "is_deactivated": row.is_deactivated,
+        }
+        return stream_info, latest_block
+
+
+def _is_behind_invalidation(redis, keys, latest_block: Optional[int]) -> bool:
+    invalidated_at_blocks = [
+        int(block)
+        for block in redis.mget([get_invalidated_at_block_key(key) for key in keys])
+        if block is not None
+    ]
+    if not invalidated_at_blocks:
+        return False
+    return latest_block is None or latest_block < max(invalidated_at_blocks)
+
+
+def get_track_stream_info(track_id: int) -> Optional[TrackStreamInfo]:
+    """
+    Returns the minimal set of fields needed to resolve a track stream.
+
+    Track and owner fields are cached separately so that an owner's replica
+    set or deactivation change only needs to invalidate a single key.
+    """
+    redis = redis_connection.get_redis()
+    track_info = get_json_cached_key(redis, get_track_stream_info_key(track_id))
+    if track_info:
+        user_info = get_json_cached_key(
+            redis, get_user_stream_info_key(track_info["owner_id"])
+        )
+        if user_info:
+            return {**track_info, **user_info}
+
+    stream_info, latest_block = _query_track_stream_info(track_id)
+    if not stream_info:
+        return None
+
+    track_key = get_track_stream_info_key(track_id)
+    user_key = get_user_stream_info_key(stream_info["owner_id"])
+    if _is_behind_invalidation(redis, [track_key, user_key], latest_block):
+        return stream_info
+
+    pipe = redis.pipeline()
+    set_json_cached_key(
+        pipe,
+        track_key,
+        {
+            "track_id": stream_info["track_id"],
+            "owner_id": stream_info["owner_id"],
+            "track_cid": stream_info["track_cid"],
+            "is_delete": stream_info["is_delete"],
+            "is_premium": stream_info["is_premium"],
+            "premium_conditions": stream_info["premium_conditions"],
+        },
+        TRACK_STREAM_INFO_TTL_SEC,
+    )
+    set_json_cached_key(
+        pipe,
+        user_key,
+        {
+            "creator_node_endpoint": stream_info["creator_node_endpoint"],
+            "is_deactivated": stream_info["is_deactivated"],
+        },
+        TRACK_STREAM_INFO_TTL_SEC,
+    )
+    pipe.execute()
+    return stream_info
+
+
+def invalidate_track_stream_info(
+    redis, track_ids: Iterable[int], user_ids: Iterable[int], blocknumber: int
+):
+    """
+    Drops cached stream info for tracks and owners changed by the indexer in
+    `blocknumber`, and keeps the block so stale replicas don't refill it
+    """
+    keys = [get_track_stream_info_key(track_id) for track_id in track_ids] + [
+        get_user_stream_info_key(user_id) for user_id in user_ids
+    ]
+    if not keys:
+        return
+    pipe = redis.pipeline()
+    pipe.delete(*keys)
+    for key in keys:
+        pipe.set(
+            get_invalidated_at_block_key(key), blocknumber, ex=TRACK_STREAM_INFO_TTL_SEC
+        )
+    pipe.execute()
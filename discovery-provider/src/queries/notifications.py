@@ -3,7 +3,9 @@ from collections import defaultdict
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Tuple, TypedDict
 
-from flask import Blueprint, request
+from flask import Blueprint, Response
+from flask import json as flask_json
+from flask import request, stream_with_context
 from redis import Redis
 from sqlalchemy import desc
 from sqlalchemy.orm.session import Session
@@ -28,6 +30,7 @@ from src.queries.get_prev_track_entries import get_prev_track_entries
 from src.utils import helpers, web3_provider
 from src.utils.config import shared_config
 from src.utils.db_session import get_db_read_replica
+from src.utils.redis_cache import get_json_cached_key
 from src.utils.redis_connection import get_redis
 from src.utils.redis_constants import (
     latest_sol_aggregate_tips_slot_key,
@@ -43,7 +46,44 @@ max_block_diff = int(shared_config["discprov"]["notifications_max_block_diff"])
 max_slot_diff = int(shared_config["discprov"]["notifications_max_slot_diff"])
 
 
-# pylint: disable=R0911
+def get_owner_ids(session, entity_type, entity_ids) -> Dict[int, int]:
+    """
+    Fetches the owner user ids of the requested entity_type/entity_ids in one query
+
+    Args:
+        session: (obj) The db session
+        entity_type: (string) Must be either 'track' | 'album' | 'playlist
+        entity_ids: (List<int>) The ids of the 'entity_type'
+
+    Returns:
+        owner_ids: (Dict<int, int>) Mapping of entity id to owner user id for the
+            entities that exist and are not deleted
+    """
+    entity_ids = list(set(entity_ids))
+    if not entity_ids:
+        return {}
+
+    if entity_type == "track":
+        owner_id_query = session.query(Track.track_id, Track.owner_id).filter(
+            Track.track_id.in_(entity_ids),
+            Track.is_delete == False,
+            Track.is_current == True,
+        )
+    elif entity_type in ("album", "playlist"):
+        owner_id_query = session.query(
+            Playlist.playlist_id, Playlist.playlist_owner_id
+        ).filter(
+            Playlist.playlist_id.in_(entity_ids),
+            Playlist.is_delete == False,
+            Playlist.is_current == True,
+            Playlist.is_album == (entity_type == "album"),
+        )
+    else:
+        return {}
+
+    return dict(owner_id_query.all())
+
+
 def get_owner_id(session, entity_type, entity_id):
     """
     Fetches the owner user id of the requested entity_type/entity_id
@@ -56,54 +96,7 @@ def get_owner_id(session, entity_type, entity_id):
     Returns:
         owner_id: (int | None) The user id of the owner of the entity_type/entity_id
     """
-    if entity_type == "track":
-        owner_id_query = (
-            session.query(Track.owner_id)
-            .filter(
-                Track.track_id == entity_id,
-                Track.is_delete == False,
-                Track.is_current == True,
-            )
-            .all()
-        )
-        if not owner_id_query:
-            return None
-        owner_id = owner_id_query[0][0]
-        return owner_id
-
-    if entity_type == "album":
-        owner_id_query = (
-            session.query(Playlist.playlist_owner_id)
-            .filter(
-                Playlist.playlist_id == entity_id,
-                Playlist.is_delete == False,
-                Playlist.is_current == True,
-                Playlist.is_album == True,
-            )
-            .all()
-        )
-        if not owner_id_query:
-            return None
-        owner_id = owner_id_query[0][0]
-        return owner_id
-
-    if entity_type == "playlist":
-        owner_id_query = (
-            session.query(Playlist.playlist_owner_id)
-            .filter(
-                Playlist.playlist_id == entity_id,
-                Playlist.is_delete == False,
-                Playlist.is_current == True,
-                Playlist.is_album == False,
-            )
-            .all()
-        )
-        if not owner_id_query:
-            return None
-        owner_id = owner_id_query[0][0]
-        return owner_id
-
-    return None
+    return get_owner_ids(session, entity_type, [entity_id]).get(entity_id)
 
 
 def get_cosign_remix_notifications(session, max_block_number, remix_tracks):
@@ -277,359 +270,403 @@ def get_milestone_info(
     return milestone_info
 
 
-@bp.route("/notifications", methods=("GET",))
-# pylint: disable=R0915
-def notifications():
-    """
-    Fetches the notifications events that occurred between the given block numbers
+class BlockRangeNotifications(TypedDict):
+    notifications: List[Dict]
+    milestones: MilestoneInfo
+    owners: Dict[str, Dict[int, int]]
 
-    URL Params:
-        min_block_number: (int) The start block number for querying for notifications
-        max_block_number?: (int) The end block number for querying for notifications
-        track_id?: (Array<int>) Array of track id for fetching the track's owner id
-            and adding the track id to owner user id mapping to the `owners` response field
-            NOTE: this is added for notification for listen counts
 
-    Response - Json object w/ the following fields
-        notifications: Array of notifications of shape:
-            type: 'Follow' | 'Favorite' | 'Repost' | 'Create' | 'RemixCreate' | 'RemixCosign' | 'PlaylistUpdate'
-            blocknumber: (int) blocknumber of notification
-            timestamp: (string) timestamp of notification
-            initiator: (int) the user id that caused this notification
-            metadata?: (any) additional information about the notification
-                entity_id?: (int) the id of the target entity (ie. playlist id of a playlist that is reposted)
-                entity_type?: (string) the type of the target entity
-                entity_owner_id?: (int) the id of the target entity's owner (if applicable)
-                playlist_update_timestamp?: (string) timestamp of last update of a given playlist
-                playlist_update_users?: (array<int>) user ids which favorited a given playlist
+def get_block_range_notifications(
+    session: Session, web3, min_block_number: int, max_block_number: int
+) -> BlockRangeNotifications:
+    """
+    Computes the notifications for the blocks in (min_block_number, max_block_number]
+    sorted by blocknumber, along with the milestones reached and the owners of the
+    entities referenced in them
+    """
+    # Cache owner info for network entities and pass in w/results
+    owner_info: Dict[str, Dict[int, int]] = {
+        const.tracks: {},
+        const.albums: {},
+        const.playlists: {},
+    }
 
-        info: Dictionary of metadata w/ min_block_number & max_block_number fields
+    start_time = datetime.now()
 
-        milestones: Dictionary mapping of follows/reposts/favorites (processed within the blocks params)
-            Root fields:
-                follower_counts: Contains a dictionary of user id => follower count (up to the max_block_number)
-                repost_counts: Contains a dictionary tracks/albums/playlists of id to repost count
-                favorite_counts: Contains a dictionary tracks/albums/playlists of id to favorite count
+    # List of notifications generated from current protocol state
+    notifications_unsorted: List[Dict] = []
+
+    #
+    # Query relevant follow information
+    #
+    follow_query = session.query(Follow)
+
+    # Impose min block number restriction
+    follow_query = follow_query.filter(
+        Follow.is_current == True,
+        Follow.is_delete == False,
+        Follow.blocknumber > min_block_number,
+        Follow.blocknumber <= max_block_number,
+    )
 
-        owners: Dictionary containing the mapping for track id / playlist id / album -> owner user id
-            The root keys are 'tracks', 'playlists', 'albums' and each contains the id to owner id mapping
-    """
+    follow_results = follow_query.all()
+    # Represents all follow notifications
+    follow_notifications = []
+    for entry in follow_results:
+        follow_notif = {
+            const.notification_type: const.notification_type_follow,
+            const.notification_blocknumber: entry.blocknumber,
+            const.notification_timestamp: entry.created_at,
+            const.notification_initiator: entry.follower_user_id,
+            const.notification_metadata: {
+                const.notification_follower_id: entry.follower_user_id,
+                const.notification_followee_id: entry.followee_user_id,
+            },
+        }
+        follow_notifications.append(follow_notif)
 
-    db = get_db_read_replica()
-    web3 = web3_provider.get_web3()
-    min_block_number = request.args.get("min_block_number", type=int)
-    max_block_number = request.args.get("max_block_number", type=int)
+    notifications_unsorted.extend(follow_notifications)
 
-    track_ids_to_owner = []
-    try:
-        track_ids_str_list = request.args.getlist("track_id")
-        track_ids_to_owner = [int(y) for y in track_ids_str_list]
-    except Exception as e:
-        logger.error(f"Failed to retrieve track list {e}")
+    logger.info(f"notifications.py | followers at {datetime.now() - start_time}")
 
-    # Max block number is not explicitly required (yet)
-    if not min_block_number and min_block_number != 0:
-        return api_helpers.error_response({"msg": "Missing min block number"}, 400)
+    #
+    # Query relevant favorite information
+    #
+    favorites_query = session.query(Save)
+    favorites_query = favorites_query.filter(
+        Save.is_current == True,
+        Save.is_delete == False,
+        Save.blocknumber > min_block_number,
+        Save.blocknumber <= max_block_number,
+    )
+    favorite_results = favorites_query.all()
+
+    # ID lists to query count aggregates
+    favorited_track_ids = []
+    favorited_album_ids = []
+    favorited_playlist_ids = []
+
+    # List of favorite notifications
+    favorite_notifications = []
+    favorite_remix_tracks = []
+
+    # Fetch the owners of every favorited entity up front
+    favorite_owner_ids = {
+        save_type: get_owner_ids(
+            session,
+            save_type,
+            [
+                entry.save_item_id
+                for entry in favorite_results
+                if entry.save_type == save_type
+            ],
+        )
+        for save_type in (SaveType.track, SaveType.album, SaveType.playlist)
+    }
 
-    if not max_block_number:
-        max_block_number = min_block_number + max_block_diff
-    elif (max_block_number - min_block_number) > max_block_diff:
-        max_block_number = min_block_number + max_block_diff
+    for entry in favorite_results:
+        favorite_notif = {
+            const.notification_type: const.notification_type_favorite,
+            const.notification_blocknumber: entry.blocknumber,
+            const.notification_timestamp: entry.created_at,
+            const.notification_initiator: entry.user_id,
+        }
+        save_type = entry.save_type
+        save_item_id = entry.save_item_id
+        metadata = {
+            const.notification_entity_type: save_type,
+            const.notification_entity_id: save_item_id,
+        }
 
-    with db.scoped_session() as session:
-        current_block_query = session.query(Block).filter_by(is_current=True)
-        current_block_query_results = current_block_query.all()
-        current_block = current_block_query_results[0]
-        current_max_block_num = current_block.number
-        if current_max_block_num < max_block_number:
-            max_block_number = current_max_block_num
+        # NOTE if deleted, the favorite can still exist
+        if save_type == SaveType.track:
+            owner_id = favorite_owner_ids[SaveType.track].get(save_item_id)
+            if not owner_id:
+                continue
+            metadata[const.notification_entity_owner_id] = owner_id
+            favorited_track_ids.append(save_item_id)
+            owner_info[const.tracks][save_item_id] = owner_id
 
-    notification_metadata = {
-        "min_block_number": min_block_number,
-        "max_block_number": max_block_number,
-    }
+            favorite_remix_tracks.append(
+                {
+                    const.notification_blocknumber: entry.blocknumber,
+                    const.notification_timestamp: entry.created_at,
+                    "user_id": entry.user_id,
+                    "item_owner_id": owner_id,
+                    "item_id": save_item_id,
+                }
+            )
 
-    # Retrieve milestones statistics
-    milestone_info = {}
+        elif save_type == SaveType.album:
+            owner_id = favorite_owner_ids[SaveType.album].get(save_item_id)
+            if not owner_id:
+                continue
+            metadata[const.notification_entity_owner_id] = owner_id
+            favorited_album_ids.append(save_item_id)
+            owner_info[const.albums][save_item_id] = owner_id
 
-    # Cache owner info for network entities and pass in w/results
-    owner_info = {const.tracks: {}, const.albums: {}, const.playlists: {}}
+        elif save_type == SaveType.playlist:
+            owner_id = favorite_owner_ids[SaveType.playlist].get(save_item_id)
+            if not owner_id:
+                continue
+            metadata[const.notification_entity_owner_id] = owner_id
+            favorited_playlist_ids.append(save_item_id)
+            owner_info[const.playlists][save_item_id] = owner_id
 
-    start_time = datetime.now()
-    logger.info(f"notifications.py | start_time ${start_time}")
+        favorite_notif[const.notification_metadata] = metadata
+        favorite_notifications.append(favorite_notif)
+    notifications_unsorted.extend(favorite_notifications)
 
-    # List of notifications generated from current protocol state
-    notifications_unsorted = []
-    with db.scoped_session() as session:
-        #
-        # Query relevant follow information
-        #
-        follow_query = session.query(Follow)
-
-        # Impose min block number restriction
-        follow_query = follow_query.filter(
-            Follow.is_current == True,
-            Follow.is_delete == False,
-            Follow.blocknumber > min_block_number,
-            Follow.blocknumber <= max_block_number,
+    if favorited_track_ids:
+        favorite_remix_notifications = get_cosign_remix_notifications(
+            session, max_block_number, favorite_remix_tracks
         )
+        notifications_unsorted.extend(favorite_remix_notifications)
+
+    logger.info(f"notifications.py | favorites at {datetime.now() - start_time}")
+
+    #
+    # Query relevant tier change information
+    #
+    balance_change_query = session.query(UserBalanceChange)
 
-        follow_results = follow_query.all()
-        # Represents all follow notifications
-        follow_notifications = []
-        for entry in follow_results:
-            follow_notif = {
-                const.notification_type: const.notification_type_follow,
+    # Impose min block number restriction
+    balance_change_query = balance_change_query.filter(
+        UserBalanceChange.blocknumber > min_block_number,
+        UserBalanceChange.blocknumber <= max_block_number,
+    )
+
+    balance_change_results = balance_change_query.all()
+    tier_change_notifications = []
+
+    for entry in balance_change_results:
+        prev = int(entry.previous_balance)
+        current = int(entry.current_balance)
+        # Check for a tier change and add to tier_change_notification
+        tier = None
+        if prev < 100000 <= current:
+            tier = "platinum"
+        elif prev < 10000 <= current:
+            tier = "gold"
+        elif prev < 100 <= current:
+            tier = "silver"
+        elif prev < 10 <= current:
+            tier = "bronze"
+
+        if tier is not None:
+            tier_change_notif = {
+                const.notification_type: const.notification_type_tier_change,
                 const.notification_blocknumber: entry.blocknumber,
-                const.notification_timestamp: entry.created_at,
-                const.notification_initiator: entry.follower_user_id,
+                const.notification_timestamp: datetime.now(),
+                const.notification_initiator: entry.user_id,
                 const.notification_metadata: {
-                    const.notification_follower_id: entry.follower_user_id,
-                    const.notification_followee_id: entry.followee_user_id,
+                    const.notification_tier: tier,
                 },
             }
-            follow_notifications.append(follow_notif)
+            tier_change_notifications.append(tier_change_notif)
 
-        notifications_unsorted.extend(follow_notifications)
+    notifications_unsorted.extend(tier_change_notifications)
 
-        logger.info(f"notifications.py | followers at {datetime.now() - start_time}")
+    logger.info(f"notifications.py | balance change at {datetime.now() - start_time}")
 
-        #
-        # Query relevant favorite information
-        #
-        favorites_query = session.query(Save)
-        favorites_query = favorites_query.filter(
-            Save.is_current == True,
-            Save.is_delete == False,
-            Save.blocknumber > min_block_number,
-            Save.blocknumber <= max_block_number,
+    #
+    # Query relevant repost information
+    #
+    repost_query = session.query(Repost)
+    repost_query = repost_query.filter(
+        Repost.is_current == True,
+        Repost.is_delete == False,
+        Repost.blocknumber > min_block_number,
+        Repost.blocknumber <= max_block_number,
+    )
+    repost_results = repost_query.all()
+
+    # ID lists to query counts
+    reposted_track_ids = []
+    reposted_album_ids = []
+    reposted_playlist_ids = []
+
+    # List of repost notifications
+    repost_notifications = []
+
+    # List of repost notifications
+    repost_remix_notifications = []
+    repost_remix_tracks = []
+
+    # Fetch the owners of every reposted entity up front
+    repost_owner_ids = {
+        repost_type: get_owner_ids(
+            session,
+            repost_type,
+            [
+                entry.repost_item_id
+                for entry in repost_results
+                if entry.repost_type == repost_type
+            ],
         )
-        favorite_results = favorites_query.all()
-
-        # ID lists to query count aggregates
-        favorited_track_ids = []
-        favorited_album_ids = []
-        favorited_playlist_ids = []
+        for repost_type in (RepostType.track, RepostType.album, RepostType.playlist)
+    }
 
-        # List of favorite notifications
-        favorite_notifications = []
-        favorite_remix_tracks = []
+    for entry in repost_results:
+        repost_notif = {
+            const.notification_type: const.notification_type_repost,
+            const.notification_blocknumber: entry.blocknumber,
+            const.notification_timestamp: entry.created_at,
+            const.notification_initiator: entry.user_id,
+        }
+        repost_type = entry.repost_type
+        repost_item_id = entry.repost_item_id
+        metadata = {
+            const.notification_entity_type: repost_type,
+            const.notification_entity_id: repost_item_id,
+        }
+        if repost_type == RepostType.track:
+            owner_id = repost_owner_ids[RepostType.track].get(repost_item_id)
+            if not owner_id:
+                continue
+            metadata[const.notification_entity_owner_id] = owner_id
+            reposted_track_ids.append(repost_item_id)
+            owner_info[const.tracks][repost_item_id] = owner_id
+            repost_remix_tracks.append(
+                {
+                    const.notification_blocknumber: entry.blocknumber,
+                    const.notification_timestamp: entry.created_at,
+                    "user_id": entry.user_id,
+                    "item_owner_id": owner_id,
+                    "item_id": repost_item_id,
+                }
+            )
 
-        for entry in favorite_results:
-            favorite_notif = {
-                const.notification_type: const.notification_type_favorite,
-                const.notification_blocknumber: entry.blocknumber,
-                const.notification_timestamp: entry.created_at,
-                const.notification_initiator: entry.user_id,
-            }
-            save_type = entry.save_type
-            save_item_id = entry.save_item_id
-            metadata = {
-                const.notification_entity_type: save_type,
-                const.notification_entity_id: save_item_id,
-            }
+        elif repost_type == RepostType.album:
+            owner_id = repost_owner_ids[RepostType.album].get(repost_item_id)
+            if not owner_id:
+                continue
+            metadata[const.notification_entity_owner_id] = owner_id
+            reposted_album_ids.append(repost_item_id)
+            owner_info[const.albums][repost_item_id] = owner_id
 
-            # NOTE if deleted, the favorite can still exist
-            # TODO: Can we aggregate all owner queries and perform at once...?
-            if save_type == SaveType.track:
-                owner_id = get_owner_id(session, "track", save_item_id)
-                if not owner_id:
-                    continue
-                metadata[const.notification_entity_owner_id] = owner_id
-                favorited_track_ids.append(save_item_id)
-                owner_info[const.tracks][save_item_id] = owner_id
-
-                favorite_remix_tracks.append(
-                    {
-                        const.notification_blocknumber: entry.blocknumber,
-                        const.notification_timestamp: entry.created_at,
-                        "user_id": entry.user_id,
-                        "item_owner_id": owner_id,
-                        "item_id": save_item_id,
-                    }
-                )
+        elif repost_type == RepostType.playlist:
+            owner_id = repost_owner_ids[RepostType.playlist].get(repost_item_id)
+            if not owner_id:
+                continue
+            metadata[const.notification_entity_owner_id] = owner_id
+            reposted_playlist_ids.append(repost_item_id)
+            owner_info[const.playlists][repost_item_id] = owner_id
 
-            elif save_type == SaveType.album:
-                owner_id = get_owner_id(session, "album", save_item_id)
-                if not owner_id:
-                    continue
-                metadata[const.notification_entity_owner_id] = owner_id
-                favorited_album_ids.append(save_item_id)
-                owner_info[const.albums][save_item_id] = owner_id
-
-            elif save_type == SaveType.playlist:
-                owner_id = get_owner_id(session, "playlist", save_item_id)
-                if not owner_id:
-                    continue
-                metadata[const.notification_entity_owner_id] = owner_id
-                favorited_playlist_ids.append(save_item_id)
-                owner_info[const.playlists][save_item_id] = owner_id
-
-            favorite_notif[const.notification_metadata] = metadata
-            favorite_notifications.append(favorite_notif)
-        notifications_unsorted.extend(favorite_notifications)
-
-        if favorited_track_ids:
-            favorite_remix_notifications = get_cosign_remix_notifications(
-                session, max_block_number, favorite_remix_tracks
-            )
-            notifications_unsorted.extend(favorite_remix_notifications)
+        repost_notif[const.notification_metadata] = metadata
+        repost_notifications.append(repost_notif)
 
-        logger.info(f"notifications.py | favorites at {datetime.now() - start_time}")
+    # Append repost notifications
+    notifications_unsorted.extend(repost_notifications)
 
-        #
-        # Query relevant tier change information
-        #
-        balance_change_query = session.query(UserBalanceChange)
-
-        # Impose min block number restriction
-        balance_change_query = balance_change_query.filter(
-            UserBalanceChange.blocknumber > min_block_number,
-            UserBalanceChange.blocknumber <= max_block_number,
+    # Aggregate repost counts for relevant fields
+    # Used to notify users of entity-specific milestones
+    if reposted_track_ids:
+        repost_remix_notifications = get_cosign_remix_notifications(
+            session, max_block_number, repost_remix_tracks
         )
-
-        balance_change_results = balance_change_query.all()
-        tier_change_notifications = []
-
-        for entry in balance_change_results:
-            prev = int(entry.previous_balance)
-            current = int(entry.current_balance)
-            # Check for a tier change and add to tier_change_notification
-            tier = None
-            if prev < 100000 <= current:
-                tier = "platinum"
-            elif prev < 10000 <= current:
-                tier = "gold"
-            elif prev < 100 <= current:
-                tier = "silver"
-            elif prev < 10 <= current:
-                tier = "bronze"
-
-            if tier is not None:
-                tier_change_notif = {
-                    const.notification_type: const.notification_type_tier_change,
+        notifications_unsorted.extend(repost_remix_notifications)
+
+    # Query relevant created entity notification - tracks/albums/playlists
+    created_notifications = []
+
+    logger.info(f"notifications.py | reposts at {datetime.now() - start_time}")
+
+    #
+    # Query relevant created tracks for remix information
+    #
+    remix_created_notifications = []
+
+    # Aggregate track notifs
+    tracks_query = session.query(Track)
+    # TODO: Is it valid to use Track.is_current here? Might not be the right info...
+    tracks_query = tracks_query.filter(
+        Track.is_unlisted == False,
+        Track.is_delete == False,
+        Track.stem_of == None,
+        Track.blocknumber > min_block_number,
+        Track.blocknumber <= max_block_number,
+    )
+    tracks_query = tracks_query.filter(Track.created_at == Track.updated_at)
+    track_results = tracks_query.all()
+    for entry in track_results:
+        track_notif = {
+            const.notification_type: const.notification_type_create,
+            const.notification_blocknumber: entry.blocknumber,
+            const.notification_timestamp: entry.created_at,
+            const.notification_initiator: entry.owner_id,
+            # TODO: is entity owner id necessary for tracks?
+            const.notification_metadata: {
+                const.notification_entity_type: "track",
+                const.notification_entity_id: entry.track_id,
+                const.notification_entity_owner_id: entry.owner_id,
+            },
+        }
+        created_notifications.append(track_notif)
+
+        if entry.remix_of:
+            # Add notification to remix track owner
+            parent_remix_tracks = [
+                t["parent_track_id"] for t in entry.remix_of["tracks"]
+            ]
+            remix_track_parents = (
+                session.query(Track.owner_id, Track.track_id)
+                .filter(
+                    Track.track_id.in_(parent_remix_tracks),
+                    Track.is_unlisted == False,
+                    Track.is_delete == False,
+                    Track.is_current == True,
+                )
+                .all()
+            )
+            for remix_track_parent in remix_track_parents:
+                [
+                    remix_track_parent_owner,
+                    remix_track_parent_id,
+                ] = remix_track_parent
+                remix_notif = {
+                    const.notification_type: const.notification_type_remix_create,
                     const.notification_blocknumber: entry.blocknumber,
-                    const.notification_timestamp: datetime.now(),
-                    const.notification_initiator: entry.user_id,
+                    const.notification_timestamp: entry.created_at,
+                    const.notification_initiator: entry.owner_id,
+                    # TODO: is entity owner id necessary for tracks?
                     const.notification_metadata: {
-                        const.notification_tier: tier,
+                        const.notification_entity_type: "track",
+                        const.notification_entity_id: entry.track_id,
+                        const.notification_entity_owner_id: entry.owner_id,
+                        const.notification_remix_parent_track_user_id: remix_track_parent_owner,
+                        const.notification_remix_parent_track_id: remix_track_parent_id,
                     },
                 }
-                tier_change_notifications.append(tier_change_notif)
+                remix_created_notifications.append(remix_notif)
+
+    logger.info(f"notifications.py | remixes at {datetime.now() - start_time}")
+
+    # Handle track update notifications
+    # TODO: Consider switching blocknumber for updated at?
+    updated_tracks_query = session.query(Track)
+    updated_tracks_query = updated_tracks_query.filter(
+        Track.is_unlisted == False,
+        Track.stem_of == None,
+        Track.created_at != Track.updated_at,
+        Track.blocknumber > min_block_number,
+        Track.blocknumber <= max_block_number,
+    )
+    updated_tracks = updated_tracks_query.all()
 
-        notifications_unsorted.extend(tier_change_notifications)
+    prev_tracks = get_prev_track_entries(session, updated_tracks)
 
+    for prev_entry in prev_tracks:
+        entry = next(t for t in updated_tracks if t.track_id == prev_entry.track_id)
         logger.info(
-            f"notifications.py | balance change at {datetime.now() - start_time}"
-        )
-
-        #
-        # Query relevant repost information
-        #
-        repost_query = session.query(Repost)
-        repost_query = repost_query.filter(
-            Repost.is_current == True,
-            Repost.is_delete == False,
-            Repost.blocknumber > min_block_number,
-            Repost.blocknumber <= max_block_number,
+            f"notifications.py | single track update {entry.track_id} {entry.blocknumber} {datetime.now() - start_time}"
         )
-        repost_results = repost_query.all()
-
-        # ID lists to query counts
-        reposted_track_ids = []
-        reposted_album_ids = []
-        reposted_playlist_ids = []
-
-        # List of repost notifications
-        repost_notifications = []
-
-        # List of repost notifications
-        repost_remix_notifications = []
-        repost_remix_tracks = []
-
-        for entry in repost_results:
-            repost_notif = {
-                const.notification_type: const.notification_type_repost,
-                const.notification_blocknumber: entry.blocknumber,
-                const.notification_timestamp: entry.created_at,
-                const.notification_initiator: entry.user_id,
-            }
-            repost_type = entry.repost_type
-            repost_item_id = entry.repost_item_id
-            metadata = {
-                const.notification_entity_type: repost_type,
-                const.notification_entity_id: repost_item_id,
-            }
-            if repost_type == RepostType.track:
-                owner_id = get_owner_id(session, "track", repost_item_id)
-                if not owner_id:
-                    continue
-                metadata[const.notification_entity_owner_id] = owner_id
-                reposted_track_ids.append(repost_item_id)
-                owner_info[const.tracks][repost_item_id] = owner_id
-                repost_remix_tracks.append(
-                    {
-                        const.notification_blocknumber: entry.blocknumber,
-                        const.notification_timestamp: entry.created_at,
-                        "user_id": entry.user_id,
-                        "item_owner_id": owner_id,
-                        "item_id": repost_item_id,
-                    }
-                )
 
-            elif repost_type == RepostType.album:
-                owner_id = get_owner_id(session, "album", repost_item_id)
-                if not owner_id:
-                    continue
-                metadata[const.notification_entity_owner_id] = owner_id
-                reposted_album_ids.append(repost_item_id)
-                owner_info[const.albums][repost_item_id] = owner_id
-
-            elif repost_type == RepostType.playlist:
-                owner_id = get_owner_id(session, "playlist", repost_item_id)
-                if not owner_id:
-                    continue
-                metadata[const.notification_entity_owner_id] = owner_id
-                reposted_playlist_ids.append(repost_item_id)
-                owner_info[const.playlists][repost_item_id] = owner_id
-
-            repost_notif[const.notification_metadata] = metadata
-            repost_notifications.append(repost_notif)
-
-        # Append repost notifications
-        notifications_unsorted.extend(repost_notifications)
-
-        # Aggregate repost counts for relevant fields
-        # Used to notify users of entity-specific milestones
-        if reposted_track_ids:
-            repost_remix_notifications = get_cosign_remix_notifications(
-                session, max_block_number, repost_remix_tracks
+        # Tracks that were unlisted and turned to public
+        if prev_entry.is_unlisted == True:
+            logger.info(
+                f"notifications.py | single track update to public {datetime.now() - start_time}"
             )
-            notifications_unsorted.extend(repost_remix_notifications)
-
-        # Query relevant created entity notification - tracks/albums/playlists
-        created_notifications = []
-
-        logger.info(f"notifications.py | reposts at {datetime.now() - start_time}")
-
-        #
-        # Query relevant created tracks for remix information
-        #
-        remix_created_notifications = []
-
-        # Aggregate track notifs
-        tracks_query = session.query(Track)
-        # TODO: Is it valid to use Track.is_current here? Might not be the right info...
-        tracks_query = tracks_query.filter(
-            Track.is_unlisted == False,
-            Track.is_delete == False,
-            Track.stem_of == None,
-            Track.blocknumber > min_block_number,
-            Track.blocknumber <= max_block_number,
-        )
-        tracks_query = tracks_query.filter(Track.created_at == Track.updated_at)
-        track_results = tracks_query.all()
-        for entry in track_results:
             track_notif = {
                 const.notification_type: const.notification_type_create,
                 const.notification_blocknumber: entry.blocknumber,
@@ -644,71 +681,32 @@ def notifications():
             }
             created_notifications.append(track_notif)
 
-            if entry.remix_of:
-                # Add notification to remix track owner
-                parent_remix_tracks = [
-                    t["parent_track_id"] for t in entry.remix_of["tracks"]
-                ]
-                remix_track_parents = (
-                    session.query(Track.owner_id, Track.track_id)
-                    .filter(
-                        Track.track_id.in_(parent_remix_tracks),
-                        Track.is_unlisted == False,
-                        Track.is_delete == False,
-                        Track.is_current == True,
-                    )
-                    .all()
+        # Tracks that were not remixes and turned into remixes
+        if not prev_entry.remix_of and entry.remix_of:
+            # Add notification to remix track owner
+            parent_remix_tracks = [
+                t["parent_track_id"] for t in entry.remix_of["tracks"]
+            ]
+            remix_track_parents = (
+                session.query(Track.owner_id, Track.track_id)
+                .filter(
+                    Track.track_id.in_(parent_remix_tracks),
+                    Track.is_unlisted == False,
+                    Track.is_delete == False,
+                    Track.is_current == True,
                 )
-                for remix_track_parent in remix_track_parents:
-                    [
-                        remix_track_parent_owner,
-                        remix_track_parent_id,
-                    ] = remix_track_parent
-                    remix_notif = {
-                        const.notification_type: const.notification_type_remix_create,
-                        const.notification_blocknumber: entry.blocknumber,
-                        const.notification_timestamp: entry.created_at,
-                        const.notification_initiator: entry.owner_id,
-                        # TODO: is entity owner id necessary for tracks?
-                        const.notification_metadata: {
-                            const.notification_entity_type: "track",
-                            const.notification_entity_id: entry.track_id,
-                            const.notification_entity_owner_id: entry.owner_id,
-                            const.notification_remix_parent_track_user_id: remix_track_parent_owner,
-                            const.notification_remix_parent_track_id: remix_track_parent_id,
-                        },
-                    }
-                    remix_created_notifications.append(remix_notif)
-
-        logger.info(f"notifications.py | remixes at {datetime.now() - start_time}")
-
-        # Handle track update notifications
-        # TODO: Consider switching blocknumber for updated at?
-        updated_tracks_query = session.query(Track)
-        updated_tracks_query = updated_tracks_query.filter(
-            Track.is_unlisted == False,
-            Track.stem_of == None,
-            Track.created_at != Track.updated_at,
-            Track.blocknumber > min_block_number,
-            Track.blocknumber <= max_block_number,
-        )
-        updated_tracks = updated_tracks_query.all()
-
-        prev_tracks = get_prev_track_entries(session, updated_tracks)
-
-        for prev_entry in prev_tracks:
-            entry = next(t for t in updated_tracks if t.track_id == prev_entry.track_id)
+                .all()
+            )
             logger.info(
-                f"notifications.py | single track update {entry.track_id} {entry.blocknumber} {datetime.now() - start_time}"
+                f"notifications.py | single track update parents {remix_track_parents} {datetime.now() - start_time}"
             )
-
-            # Tracks that were unlisted and turned to public
-            if prev_entry.is_unlisted == True:
-                logger.info(
-                    f"notifications.py | single track update to public {datetime.now() - start_time}"
-                )
-                track_notif = {
-                    const.notification_type: const.notification_type_create,
+            for remix_track_parent in remix_track_parents:
+                [
+                    remix_track_parent_owner,
+                    remix_track_parent_id,
+                ] = remix_track_parent
+                remix_notif = {
+                    const.notification_type: const.notification_type_remix_create,
                     const.notification_blocknumber: entry.blocknumber,
                     const.notification_timestamp: entry.created_at,
                     const.notification_initiator: entry.owner_id,
@@ -717,72 +715,73 @@ def notifications():
                         const.notification_entity_type: "track",
                         const.notification_entity_id: entry.track_id,
                         const.notification_entity_owner_id: entry.owner_id,
+                        const.notification_remix_parent_track_user_id: remix_track_parent_owner,
+                        const.notification_remix_parent_track_id: remix_track_parent_id,
                     },
                 }
-                created_notifications.append(track_notif)
+                remix_created_notifications.append(remix_notif)
 
-            # Tracks that were not remixes and turned into remixes
-            if not prev_entry.remix_of and entry.remix_of:
-                # Add notification to remix track owner
-                parent_remix_tracks = [
-                    t["parent_track_id"] for t in entry.remix_of["tracks"]
-                ]
-                remix_track_parents = (
-                    session.query(Track.owner_id, Track.track_id)
-                    .filter(
-                        Track.track_id.in_(parent_remix_tracks),
-                        Track.is_unlisted == False,
-                        Track.is_delete == False,
-                        Track.is_current == True,
-                    )
-                    .all()
-                )
-                logger.info(
-                    f"notifications.py | single track update parents {remix_track_parents} {datetime.now() - start_time}"
-                )
-                for remix_track_parent in remix_track_parents:
-                    [
-                        remix_track_parent_owner,
-                        remix_track_parent_id,
-                    ] = remix_track_parent
-                    remix_notif = {
-                        const.notification_type: const.notification_type_remix_create,
-                        const.notification_blocknumber: entry.blocknumber,
-                        const.notification_timestamp: entry.created_at,
-                        const.notification_initiator: entry.owner_id,
-                        # TODO: is entity owner id necessary for tracks?
-                        const.notification_metadata: {
-                            const.notification_entity_type: "track",
-                            const.notification_entity_id: entry.track_id,
-                            const.notification_entity_owner_id: entry.owner_id,
-                            const.notification_remix_parent_track_user_id: remix_track_parent_owner,
-                            const.notification_remix_parent_track_id: remix_track_parent_id,
-                        },
-                    }
-                    remix_created_notifications.append(remix_notif)
+    notifications_unsorted.extend(remix_created_notifications)
 
-        notifications_unsorted.extend(remix_created_notifications)
+    logger.info(f"notifications.py | track updates at {datetime.now() - start_time}")
 
-        logger.info(
-            f"notifications.py | track updates at {datetime.now() - start_time}"
-        )
+    # Aggregate playlist/album notifs
+    collection_query = session.query(Playlist)
+    # TODO: Is it valid to use is_current here? Might not be the right info...
+    collection_query = collection_query.filter(
+        Playlist.is_delete == False,
+        Playlist.is_private == False,
+        Playlist.blocknumber > min_block_number,
+        Playlist.blocknumber <= max_block_number,
+    )
+    collection_query = collection_query.filter(
+        Playlist.created_at == Playlist.updated_at
+    )
+    collection_results = collection_query.all()
+
+    for entry in collection_results:
+        collection_notif = {
+            const.notification_type: const.notification_type_create,
+            const.notification_blocknumber: entry.blocknumber,
+            const.notification_timestamp: entry.created_at,
+            const.notification_initiator: entry.playlist_owner_id,
+        }
+        metadata = {
+            const.notification_entity_id: entry.playlist_id,
+            const.notification_entity_owner_id: entry.playlist_owner_id,
+            const.notification_collection_content: entry.playlist_contents,
+        }
 
-        # Aggregate playlist/album notifs
-        collection_query = session.query(Playlist)
-        # TODO: Is it valid to use is_current here? Might not be the right info...
-        collection_query = collection_query.filter(
-            Playlist.is_delete == False,
-            Playlist.is_private == False,
-            Playlist.blocknumber > min_block_number,
-            Playlist.blocknumber <= max_block_number,
-        )
-        collection_query = collection_query.filter(
-            Playlist.created_at == Playlist.updated_at
+        if entry.is_album:
+            metadata[const.notification_entity_type] = "album"
+        else:
+            metadata[const.notification_entity_type] = "playlist"
+        collection_notif[const.notification_metadata] = metadata
+        created_notifications.append(collection_notif)
+
+    # Playlists that were private and turned to public aka 'published'
+    # TODO: Consider switching blocknumber for updated at?
+    publish_playlists_query = session.query(Playlist)
+    publish_playlists_query = publish_playlists_query.filter(
+        Playlist.is_private == False,
+        Playlist.created_at != Playlist.updated_at,
+        Playlist.blocknumber > min_block_number,
+        Playlist.blocknumber <= max_block_number,
+    )
+    publish_playlist_results = publish_playlists_query.all()
+    for entry in publish_playlist_results:
+        prev_entry_query = (
+            session.query(Playlist)
+            .filter(
+                Playlist.playlist_id == entry.playlist_id,
+                Playlist.blocknumber < entry.blocknumber,
+            )
+            .order_by(desc(Playlist.blocknumber))
         )
-        collection_results = collection_query.all()
-
-        for entry in collection_results:
-            collection_notif = {
+        # Previous private entry indicates transition to public, triggering a notification
+        prev_entry = prev_entry_query.first()
+        if prev_entry.is_private == True:
+            publish_playlist_notif = {
                 const.notification_type: const.notification_type_create,
                 const.notification_blocknumber: entry.blocknumber,
                 const.notification_timestamp: entry.created_at,
@@ -792,251 +791,200 @@ def notifications():
                 const.notification_entity_id: entry.playlist_id,
                 const.notification_entity_owner_id: entry.playlist_owner_id,
                 const.notification_collection_content: entry.playlist_contents,
+                const.notification_entity_type: "playlist",
             }
-
-            if entry.is_album:
-                metadata[const.notification_entity_type] = "album"
-            else:
-                metadata[const.notification_entity_type] = "playlist"
-            collection_notif[const.notification_metadata] = metadata
-            created_notifications.append(collection_notif)
-
-        # Playlists that were private and turned to public aka 'published'
-        # TODO: Consider switching blocknumber for updated at?
-        publish_playlists_query = session.query(Playlist)
-        publish_playlists_query = publish_playlists_query.filter(
-            Playlist.is_private == False,
-            Playlist.created_at != Playlist.updated_at,
-            Playlist.blocknumber > min_block_number,
-            Playlist.blocknumber <= max_block_number,
-        )
-        publish_playlist_results = publish_playlists_query.all()
-        for entry in publish_playlist_results:
-            prev_entry_query = (
-                session.query(Playlist)
-                .filter(
-                    Playlist.playlist_id == entry.playlist_id,
-                    Playlist.blocknumber < entry.blocknumber,
-                )
-                .order_by(desc(Playlist.blocknumber))
-            )
-            # Previous private entry indicates transition to public, triggering a notification
-            prev_entry = prev_entry_query.first()
-            if prev_entry.is_private == True:
-                publish_playlist_notif = {
-                    const.notification_type: const.notification_type_create,
+            publish_playlist_notif[const.notification_metadata] = metadata
+            created_notifications.append(publish_playlist_notif)
+
+    # Playlists that had tracks added to them
+    # Get all playlists that were modified over this range
+    playlist_track_added_query = session.query(Playlist).filter(
+        Playlist.is_current == True,
+        Playlist.is_delete == False,
+        Playlist.is_private == False,
+        Playlist.blocknumber > min_block_number,
+        Playlist.blocknumber <= max_block_number,
+    )
+    playlist_track_added_results = playlist_track_added_query.all()
+    # Loop over all playlist updates and determine if there were tracks added
+    # within the notification block range
+    track_added_to_playlist_notifications = []
+    track_ids = []
+    min_block = None
+    max_block = None
+    for entry in playlist_track_added_results:
+        # Get the track_ids from entry["playlist_contents"]
+        if not entry.playlist_contents["track_ids"]:
+            # skip empty playlists
+            continue
+        playlist_contents = entry.playlist_contents
+
+        # The range's block timestamps are the same for every playlist
+        if min_block is None or max_block is None:
+            chain_min_block_number = min_block_number
+            chain_max_block_number = max_block_number
+            final_poa_block = helpers.get_final_poa_block(shared_config)
+            if final_poa_block:
+                chain_min_block_number -= final_poa_block
+                chain_max_block_number -= final_poa_block
+
+            min_block = web3.eth.get_block(chain_min_block_number)
+            max_block = web3.eth.get_block(chain_max_block_number)
+
+        for track in playlist_contents["track_ids"]:
+            track_id = track["track"]
+            track_timestamp = track["time"]
+            # We know that this track was added to the playlist at this specific update
+            if (
+                min_block.timestamp < track_timestamp
+                and track_timestamp <= max_block.timestamp
+            ):
+                track_ids.append(track_id)
+                track_added_to_playlist_notification = {
+                    const.notification_type: const.notification_type_add_track_to_playlist,
                     const.notification_blocknumber: entry.blocknumber,
-                    const.notification_timestamp: entry.created_at,
+                    const.notification_timestamp: datetime.fromtimestamp(
+                        track_timestamp
+                    ),
                     const.notification_initiator: entry.playlist_owner_id,
                 }
                 metadata = {
-                    const.notification_entity_id: entry.playlist_id,
-                    const.notification_entity_owner_id: entry.playlist_owner_id,
-                    const.notification_collection_content: entry.playlist_contents,
-                    const.notification_entity_type: "playlist",
+                    const.playlist_id: entry.playlist_id,
+                    const.track_id: track_id,
                 }
-                publish_playlist_notif[const.notification_metadata] = metadata
-                created_notifications.append(publish_playlist_notif)
+                track_added_to_playlist_notification[
+                    const.notification_metadata
+                ] = metadata
+                track_added_to_playlist_notifications.append(
+                    track_added_to_playlist_notification
+                )
 
-        # Playlists that had tracks added to them
-        # Get all playlists that were modified over this range
-        playlist_track_added_query = session.query(Playlist).filter(
-            Playlist.is_current == True,
-            Playlist.is_delete == False,
-            Playlist.is_private == False,
-            Playlist.blocknumber > min_block_number,
-            Playlist.blocknumber <= max_block_number,
+    tracks = (
+        session.query(Track.owner_id, Track.track_id)
+        .filter(
+            Track.track_id.in_(track_ids),
+            Track.is_unlisted == False,
+            Track.is_delete == False,
+            Track.is_current == True,
         )
-        playlist_track_added_results = playlist_track_added_query.all()
-        # Loop over all playlist updates and determine if there were tracks added
-        # within the notification block range
-        track_added_to_playlist_notifications = []
-        track_ids = []
-        for entry in playlist_track_added_results:
-            # Get the track_ids from entry["playlist_contents"]
-            if not entry.playlist_contents["track_ids"]:
-                # skip empty playlists
-                continue
-            playlist_contents = entry.playlist_contents
+        .all()
+    )
+    track_owner_map = {}
+    for track in tracks:
+        owner_id, track_id = track
+        track_owner_map[track_id] = owner_id
+
+    # Loop over notifications and populate their metadata
+    for notification in track_added_to_playlist_notifications:
+        track_id = notification[const.notification_metadata][const.track_id]
+        if track_id not in track_owner_map:
+            # Note: if track_id not in track_owner_map, it's because the track is either deleted, unlisted, or doesn't exist
+            # In that case, it should not trigger a notification
+            continue
+        else:
+            track_owner_id = track_owner_map[track_id]
+            if track_owner_id != notification[const.notification_initiator]:
+                # add tracks that don't belong to the playlist owner
+                notification[const.notification_metadata][
+                    const.track_owner_id
+                ] = track_owner_id
+                created_notifications.append(notification)
+
+    notifications_unsorted.extend(created_notifications)
+
+    logger.info(f"notifications.py | playlists at {datetime.now() - start_time}")
+
+    # Get playlist updates
+    today = date.today()
+    thirty_days_ago = today - timedelta(days=30)
+    thirty_days_ago_time = datetime(
+        thirty_days_ago.year, thirty_days_ago.month, thirty_days_ago.day, 0, 0, 0
+    )
+    playlist_update_query = session.query(Playlist)
+    playlist_update_query = playlist_update_query.filter(
+        Playlist.is_current == True,
+        Playlist.is_delete == False,
+        Playlist.last_added_to >= thirty_days_ago_time,
+        Playlist.blocknumber > min_block_number,
+        Playlist.blocknumber <= max_block_number,
+    )
 
-            final_poa_block = helpers.get_final_poa_block(shared_config)
-            if final_poa_block:
-                min_block_number -= final_poa_block
-                max_block_number -= final_poa_block
-
-            min_block = web3.eth.get_block(min_block_number)
-            max_block = web3.eth.get_block(max_block_number)
-
-            for track in playlist_contents["track_ids"]:
-                track_id = track["track"]
-                track_timestamp = track["time"]
-                # We know that this track was added to the playlist at this specific update
-                if (
-                    min_block.timestamp < track_timestamp
-                    and track_timestamp <= max_block.timestamp
-                ):
-                    track_ids.append(track_id)
-                    track_added_to_playlist_notification = {
-                        const.notification_type: const.notification_type_add_track_to_playlist,
-                        const.notification_blocknumber: entry.blocknumber,
-                        const.notification_timestamp: datetime.fromtimestamp(
-                            track_timestamp
-                        ),
-                        const.notification_initiator: entry.playlist_owner_id,
-                    }
-                    metadata = {
-                        const.playlist_id: entry.playlist_id,
-                        const.track_id: track_id,
-                    }
-                    track_added_to_playlist_notification[
-                        const.notification_metadata
-                    ] = metadata
-                    track_added_to_playlist_notifications.append(
-                        track_added_to_playlist_notification
-                    )
-
-        tracks = (
-            session.query(Track.owner_id, Track.track_id)
-            .filter(
-                Track.track_id.in_(track_ids),
-                Track.is_unlisted == False,
-                Track.is_delete == False,
-                Track.is_current == True,
-            )
-            .all()
-        )
-        track_owner_map = {}
-        for track in tracks:
-            owner_id, track_id = track
-            track_owner_map[track_id] = owner_id
-
-        # Loop over notifications and populate their metadata
-        for notification in track_added_to_playlist_notifications:
-            track_id = notification[const.notification_metadata][const.track_id]
-            if track_id not in track_owner_map:
-                # Note: if track_id not in track_owner_map, it's because the track is either deleted, unlisted, or doesn't exist
-                # In that case, it should not trigger a notification
-                continue
-            else:
-                track_owner_id = track_owner_map[track_id]
-                if track_owner_id != notification[const.notification_initiator]:
-                    # add tracks that don't belong to the playlist owner
-                    notification[const.notification_metadata][
-                        const.track_owner_id
-                    ] = track_owner_id
-                    created_notifications.append(notification)
-
-        notifications_unsorted.extend(created_notifications)
-
-        logger.info(f"notifications.py | playlists at {datetime.now() - start_time}")
-
-        # Get additional owner info as requested for listen counts
-        tracks_owner_query = session.query(Track).filter(
-            Track.is_current == True, Track.track_id.in_(track_ids_to_owner)
-        )
-        track_owner_results = tracks_owner_query.all()
-        for entry in track_owner_results:
-            owner = entry.owner_id
-            track_id = entry.track_id
-            owner_info[const.tracks][track_id] = owner
+    playlist_update_results = playlist_update_query.all()
 
-        logger.info(
-            f"notifications.py | owner info at {datetime.now() - start_time}, owners {len(track_owner_results)}"
-        )
-
-        # Get playlist updates
-        today = date.today()
-        thirty_days_ago = today - timedelta(days=30)
-        thirty_days_ago_time = datetime(
-            thirty_days_ago.year, thirty_days_ago.month, thirty_days_ago.day, 0, 0, 0
-        )
-        playlist_update_query = session.query(Playlist)
-        playlist_update_query = playlist_update_query.filter(
-            Playlist.is_current == True,
-            Playlist.is_delete == False,
-            Playlist.last_added_to >= thirty_days_ago_time,
-            Playlist.blocknumber > min_block_number,
-            Playlist.blocknumber <= max_block_number,
-        )
+    logger.info(
+        f"notifications.py | get playlist updates at {datetime.now() - start_time}, playlist updates {len(playlist_update_results)}"
+    )
 
-        playlist_update_results = playlist_update_query.all()
+    # Represents all playlist update notifications
+    playlist_update_notifications = []
+    playlist_update_notifs_by_playlist_id = {}
+    for entry in playlist_update_results:
+        playlist_update_notifs_by_playlist_id[entry.playlist_id] = {
+            const.notification_type: const.notification_type_playlist_update,
+            const.notification_blocknumber: entry.blocknumber,
+            const.notification_timestamp: entry.created_at,
+            const.notification_initiator: entry.playlist_owner_id,
+            const.notification_metadata: {
+                const.notification_entity_id: entry.playlist_id,
+                const.notification_entity_type: "playlist",
+                const.notification_playlist_update_timestamp: entry.last_added_to,
+            },
+        }
 
-        logger.info(
-            f"notifications.py | get playlist updates at {datetime.now() - start_time}, playlist updates {len(playlist_update_results)}"
-        )
+    # get all favorited playlists
+    # playlists may have been favorited outside the blocknumber bounds
+    # e.g. before the min_block_number
+    playlist_favorites_query = session.query(Save)
+    playlist_favorites_query = playlist_favorites_query.filter(
+        Save.is_current == True,
+        Save.is_delete == False,
+        Save.save_type == SaveType.playlist,
+        Save.save_item_id.in_(playlist_update_notifs_by_playlist_id.keys()),
+    )
+    playlist_favorites_results = playlist_favorites_query.all()
 
-        # Represents all playlist update notifications
-        playlist_update_notifications = []
-        playlist_update_notifs_by_playlist_id = {}
-        for entry in playlist_update_results:
-            playlist_update_notifs_by_playlist_id[entry.playlist_id] = {
-                const.notification_type: const.notification_type_playlist_update,
-                const.notification_blocknumber: entry.blocknumber,
-                const.notification_timestamp: entry.created_at,
-                const.notification_initiator: entry.playlist_owner_id,
-                const.notification_metadata: {
-                    const.notification_entity_id: entry.playlist_id,
-                    const.notification_entity_type: "playlist",
-                    const.notification_playlist_update_timestamp: entry.last_added_to,
-                },
-            }
+    logger.info(
+        f"notifications.py | get playlist favorites {datetime.now() - start_time}, playlist favorites {len(playlist_favorites_results)}"
+    )
 
-        # get all favorited playlists
-        # playlists may have been favorited outside the blocknumber bounds
-        # e.g. before the min_block_number
-        playlist_favorites_query = session.query(Save)
-        playlist_favorites_query = playlist_favorites_query.filter(
-            Save.is_current == True,
-            Save.is_delete == False,
-            Save.save_type == SaveType.playlist,
-            Save.save_item_id.in_(playlist_update_notifs_by_playlist_id.keys()),
-        )
-        playlist_favorites_results = playlist_favorites_query.all()
+    # dictionary of playlist id => users that favorited said playlist
+    # e.g. { playlist1: [user1, user2, ...], ... }
+    # we need this dictionary to know which users need to be notified of a playlist update
+    users_that_favorited_playlists_dict = {}
+    for result in playlist_favorites_results:
+        if result.save_item_id in users_that_favorited_playlists_dict:
+            users_that_favorited_playlists_dict[result.save_item_id].append(
+                result.user_id
+            )
+        else:
+            users_that_favorited_playlists_dict[result.save_item_id] = [result.user_id]
 
-        logger.info(
-            f"notifications.py | get playlist favorites {datetime.now() - start_time}, playlist favorites {len(playlist_favorites_results)}"
-        )
+    logger.info(
+        f"notifications.py | computed users that favorited dict {datetime.now() - start_time}"
+    )
 
-        # dictionary of playlist id => users that favorited said playlist
-        # e.g. { playlist1: [user1, user2, ...], ... }
-        # we need this dictionary to know which users need to be notified of a playlist update
-        users_that_favorited_playlists_dict = {}
-        for result in playlist_favorites_results:
-            if result.save_item_id in users_that_favorited_playlists_dict:
-                users_that_favorited_playlists_dict[result.save_item_id].append(
-                    result.user_id
-                )
-            else:
-                users_that_favorited_playlists_dict[result.save_item_id] = [
-                    result.user_id
+    for playlist_id in users_that_favorited_playlists_dict:
+        # TODO: We probably do not need this check because we are filtering
+        # playlist_favorites_query to only matching ids
+        if playlist_id not in playlist_update_notifs_by_playlist_id:
+            continue
+        playlist_update_notif = playlist_update_notifs_by_playlist_id[playlist_id]
+        playlist_update_notif[const.notification_metadata].update(
+            {
+                const.notification_playlist_update_users: users_that_favorited_playlists_dict[
+                    playlist_id
                 ]
-
-        logger.info(
-            f"notifications.py | computed users that favorited dict {datetime.now() - start_time}"
+            }
         )
+        playlist_update_notifications.append(playlist_update_notif)
 
-        for playlist_id in users_that_favorited_playlists_dict:
-            # TODO: We probably do not need this check because we are filtering
-            # playlist_favorites_query to only matching ids
-            if playlist_id not in playlist_update_notifs_by_playlist_id:
-                continue
-            playlist_update_notif = playlist_update_notifs_by_playlist_id[playlist_id]
-            playlist_update_notif[const.notification_metadata].update(
-                {
-                    const.notification_playlist_update_users: users_that_favorited_playlists_dict[
-                        playlist_id
-                    ]
-                }
-            )
-            playlist_update_notifications.append(playlist_update_notif)
-
-        notifications_unsorted.extend(playlist_update_notifications)
+    notifications_unsorted.extend(playlist_update_notifications)
 
-        logger.info(
-            f"notifications.py | all playlist updates at {datetime.now() - start_time}"
-        )
+    logger.info(
+        f"notifications.py | all playlist updates at {datetime.now() - start_time}"
+    )
 
-        milestone_info = get_milestone_info(session, min_block_number, max_block_number)
+    milestone_info = get_milestone_info(session, min_block_number, max_block_number)
 
     # Final sort - TODO: can we sort by timestamp?
     sorted_notifications = sorted(
@@ -1049,6 +997,224 @@ def notifications():
         f"notifications.py | sorted notifications {datetime.now() - start_time}"
     )
 
+    return {
+        "notifications": sorted_notifications,
+        "milestones": milestone_info,
+        "owners": owner_info,
+    }
+
+
+# A poll spans at most max_block_diff blocks, so it covers at most two chunks
+NOTIFICATIONS_BLOCK_CHUNK_SIZE = max_block_diff
+# Chunks are computed from current rows, so unfollows, deletes and playlist updates
+# made after a chunk is cached only show when it is re-polled once it expires
+NOTIFICATIONS_CHUNK_CACHE_TTL_SEC = 60
+
+
+def get_notifications_chunk_cache_key(min_block_number, max_block_number):
+    return f"notifications:blocks:{min_block_number}-{max_block_number}"
+
+
+def get_block_chunks(
+    min_block_number, max_block_number, chunk_size=NOTIFICATIONS_BLOCK_CHUNK_SIZE
+) -> List[Tuple[int, int]]:
+    """
+    Splits (min_block_number, max_block_number] into ranges aligned to chunk_size,
+    so that overlapping polls share the same chunks
+    """
+    chunks = []
+    start = min_block_number
+    while start < max_block_number:
+        end = min((start // chunk_size + 1) * chunk_size, max_block_number)
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def get_cached_block_range_notifications(
+    session: Session,
+    redis: Redis,
+    web3,
+    min_block_number: int,
+    max_block_number: int,
+    current_block_number: int,
+) -> BlockRangeNotifications:
+    """
+    Gets the notifications for a block chunk. Chunks behind the current block are
+    fully indexed, so they are computed once and served from redis afterwards.
+
+    Results are returned JSON encoded the same way as the response so cached and
+    computed chunks can be merged together.
+    """
+    cacheable = max_block_number < current_block_number
+    key = get_notifications_chunk_cache_key(min_block_number, max_block_number)
+    if cacheable:
+        cached = get_json_cached_key(redis, key)
+        if cached:
+            return cached
+
+    serialized = flask_json.dumps(
+        get_block_range_notifications(session, web3, min_block_number, max_block_number)
+    )
+    if cacheable:
+        redis.set(key, serialized, NOTIFICATIONS_CHUNK_CACHE_TTL_SEC)
+    return flask_json.loads(serialized)
+
+
+def merge_milestone_info(milestone_info: MilestoneInfo, other: MilestoneInfo):
+    milestone_info["follower_counts"].update(other["follower_counts"])
+    for counts in ("repost_counts", "favorite_counts"):
+        for entity_type in ("tracks", "albums", "playlists"):
+            milestone_info[counts][entity_type].update(  # type: ignore
+                other[counts][entity_type]  # type: ignore
+            )
+
+
+@bp.route("/notifications", methods=("GET",))
+def notifications():
+    """
+    Fetches the notifications events that occurred between the given block numbers
+
+    URL Params:
+        min_block_number: (int) The start block number for querying for notifications
+        max_block_number?: (int) The end block number for querying for notifications
+        track_id?: (Array<int>) Array of track id for fetching the track's owner id
+            and adding the track id to owner user id mapping to the `owners` response field
+            NOTE: this is added for notification for listen counts
+        format?: (string) 'ndjson' streams the notifications back one per line as
+            they are computed, followed by a final line with the info, milestones
+            and owners fields
+
+    Response - Json object w/ the following fields
+        notifications: Array of notifications of shape:
+            type: 'Follow' | 'Favorite' | 'Repost' | 'Create' | 'RemixCreate' | 'RemixCosign' | 'PlaylistUpdate'
+            blocknumber: (int) blocknumber of notification
+            timestamp: (string) timestamp of notification
+            initiator: (int) the user id that caused this notification
+            metadata?: (any) additional information about the notification
+                entity_id?: (int) the id of the target entity (ie. playlist id of a playlist that is reposted)
+                entity_type?: (string) the type of the target entity
+                entity_owner_id?: (int) the id of the target entity's owner (if applicable)
+                playlist_update_timestamp?: (string) timestamp of last update of a given playlist
+                playlist_update_users?: (array<int>) user ids which favorited a given playlist
+
+        info: Dictionary of metadata w/ min_block_number & max_block_number fields
+
+        milestones: Dictionary mapping of follows/reposts/favorites (processed within the blocks params)
+            Root fields:
+                follower_counts: Contains a dictionary of user id => follower count (up to the max_block_number)
+                repost_counts: Contains a dictionary tracks/albums/playlists of id to repost count
+                favorite_counts: Contains a dictionary tracks/albums/playlists of id to favorite count
+
+        owners: Dictionary containing the mapping for track id / playlist id / album -> owner user id
+            The root keys are 'tracks', 'playlists', 'albums' and each contains the id to owner id mapping
+    """
+
+    db = get_db_read_replica()
+    redis = get_redis()
+    web3 = web3_provider.get_web3()
+    min_block_number = request.args.get("min_block_number", type=int)
+    max_block_number = request.args.get("max_block_number", type=int)
+    stream = request.args.get("format") == "ndjson"
+
+    track_ids_to_owner = []
+    try:
+        track_ids_str_list = request.args.getlist("track_id")
+        track_ids_to_owner = [int(y) for y in track_ids_str_list]
+    except Exception as e:
+        logger.error(f"Failed to retrieve track list {e}")
+
+    # Max block number is not explicitly required (yet)
+    if not min_block_number and min_block_number != 0:
+        return api_helpers.error_response({"msg": "Missing min block number"}, 400)
+
+    if not max_block_number:
+        max_block_number = min_block_number + max_block_diff
+    elif (max_block_number - min_block_number) > max_block_diff:
+        max_block_number = min_block_number + max_block_diff
+
+    with db.scoped_session() as session:
+        current_block_query = session.query(Block).filter_by(is_current=True)
+        current_block_query_results = current_block_query.all()
+        current_block = current_block_query_results[0]
+        current_max_block_num = current_block.number
+        if current_max_block_num < max_block_number:
+            max_block_number = current_max_block_num
+
+    notification_metadata = {
+        "min_block_number": min_block_number,
+        "max_block_number": max_block_number,
+    }
+
+    # Retrieve milestones statistics
+    milestone_info: MilestoneInfo = {
+        "follower_counts": {},
+        "repost_counts": {"tracks": {}, "albums": {}, "playlists": {}},
+        "favorite_counts": {"tracks": {}, "albums": {}, "playlists": {}},
+    }
+
+    # Cache owner info for network entities and pass in w/results
+    owner_info: Dict[str, Dict] = {
+        const.tracks: {},
+        const.albums: {},
+        const.playlists: {},
+    }
+
+    def generate_notifications():
+        start_time = datetime.now()
+        logger.info(f"notifications.py | start_time ${start_time}")
+
+        with db.scoped_session() as session:
+            # Chunks are in block order and each chunk is sorted by blocknumber
+            for chunk_min_block_number, chunk_max_block_number in get_block_chunks(
+                min_block_number, max_block_number
+            ):
+                chunk = get_cached_block_range_notifications(
+                    session,
+                    redis,
+                    web3,
+                    chunk_min_block_number,
+                    chunk_max_block_number,
+                    current_max_block_num,
+                )
+                merge_milestone_info(milestone_info, chunk["milestones"])
+                for entity_type, owners in chunk["owners"].items():
+                    owner_info[entity_type].update(owners)
+                yield from chunk["notifications"]
+
+            # Get additional owner info as requested for listen counts
+            tracks_owner_query = session.query(Track).filter(
+                Track.is_current == True, Track.track_id.in_(track_ids_to_owner)
+            )
+            track_owner_results = tracks_owner_query.all()
+            for entry in track_owner_results:
+                owner = entry.owner_id
+                track_id = entry.track_id
+                owner_info[const.tracks][str(track_id)] = owner
+
+            logger.info(
+                f"notifications.py | owner info at {datetime.now() - start_time}, owners {len(track_owner_results)}"
+            )
+
+    if stream:
+
+        def generate_lines():
+            for notification in generate_notifications():
+                yield flask_json.dumps(notification) + "\n"
+            yield flask_json.dumps(
+                {
+                    "info": notification_metadata,
+                    "milestones": milestone_info,
+                    "owners": owner_info,
+                }
+            ) + "\n"
+
+        return Response(
+            stream_with_context(generate_lines()), mimetype="application/x-ndjson"
+        )
+
+    sorted_notifications = list(generate_notifications())
+
     return api_helpers.success_response(
         {
             "notifications": sorted_notifications,
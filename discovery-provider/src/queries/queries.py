@@ -1,3 +1,4 @@
+import gzip
 import logging  # pylint: disable=C0302
 import re
 
@@ -26,13 +27,10 @@ from src.queries.get_savers_for_playlist import get_savers_for_playlist
 from src.queries.get_savers_for_track import get_savers_for_track
 from src.queries.get_saves import get_saves
 from src.queries.get_sitemap import (
+    SITEMAP_TYPES,
     build_default,
-    get_playlist_page,
-    get_playlist_root,
-    get_track_page,
-    get_track_root,
-    get_user_page,
-    get_user_root,
+    get_cached_page,
+    get_cached_root,
 )
 from src.queries.get_sol_plays import (
     get_sol_play,
@@ -54,7 +52,8 @@ from src.queries.get_user_history import get_user_history
 from src.queries.get_users import get_users
 from src.queries.get_users_account import get_users_account
 from src.queries.query_helpers import get_current_user_id, get_pagination_vars
-from src.utils.db_session import get_db_read_replica
+from src.utils.db_session import get_db_read_replica, read_replica_max_lag
+from src.utils.redis_connection import get_redis
 from src.utils.redis_metrics import record_metrics
 
 logger = logging.getLogger(__name__)
@@ -398,6 +397,7 @@ def get_saves_route(save_type):
 # be consolidated later in the client
 @bp.route("/users/account", methods=("GET",))
 @record_metrics
+@read_replica_max_lag(5)
 def get_users_account_route():
     try:
         user = get_users_account(to_dict(request.args))
@@ -684,24 +684,28 @@ def get_base_sitemap():
         return api_helpers.error_response(str(e), 400)
 
 
+def sitemap_response(gzipped_xml: bytes) -> Response:
+    # quality is 0 when gzip is not listed or is refused with q=0
+    if request.accept_encodings["gzip"] > 0:
+        response = Response(gzipped_xml, mimetype="text/xml")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(gzip.decompress(gzipped_xml), mimetype="text/xml")
+    response.vary.add("Accept-Encoding")
+    return response
+
+
 @bp.route("/sitemaps/<string:type>/index.xml", methods=("GET",))
 def get_type_base_sitemap(type):
     try:
+        if type not in SITEMAP_TYPES:
+            return api_helpers.error_response(
+                f"Invalid sitemap type {type}, should be one of playlist, track, user",
+                400,
+            )
         db = get_db_read_replica()
         with db.scoped_session() as session:
-            xml = ""
-            if type == "playlist":
-                xml = get_playlist_root(session)
-            elif type == "track":
-                xml = get_track_root(session)
-            elif type == "user":
-                xml = get_user_root(session)
-            else:
-                return api_helpers.error_response(
-                    f"Invalid sitemap type {type}, should be one of playlist, track, user",
-                    400,
-                )
-            return Response(xml, mimetype="text/xml")
+            return sitemap_response(get_cached_root(session, get_redis(), type))
     except exceptions.ArgumentError as e:
         return api_helpers.error_response(str(e), 400)
 
@@ -715,20 +719,15 @@ def get_type_sitemap_page(type: str, file_name: str):
                 f"Invalid filepath {file_name}, should be of format <integer>.xml", 400
             )
         page_number = int(number.group(1))
+        if type not in SITEMAP_TYPES:
+            return api_helpers.error_response(
+                f"Invalid sitemap type {type}, should be one of playlist, track, user",
+                400,
+            )
         db = get_db_read_replica()
         with db.scoped_session() as session:
-            xml = ""
-            if type == "playlist":
-                xml = get_playlist_page(session, page_number)
-            elif type == "track":
-                xml = get_track_page(session, page_number)
-            elif type == "user":
-                xml = get_user_page(session, page_number)
-            else:
-                return api_helpers.error_response(
-                    f"Invalid sitemap type {type}, should be one of playlist, track, user",
-                    400,
-                )
-            return Response(xml, mimetype="text/xml")
+            return sitemap_response(
+                get_cached_page(session, get_redis(), type, page_number)
+            )
     except exceptions.ArgumentError as e:
         return api_helpers.error_response(str(e), 400)
@@ -3,31 +3,36 @@ import enum
 import logging
 from typing import Tuple
 
-from flask import request
+from flask import g, has_request_context, request
 from sqlalchemy import Integer, and_, bindparam, cast, desc, func, text
 from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.expression import or_
 from src import exceptions
 from src.models.playlists.aggregate_playlist import AggregatePlaylist
 from src.models.playlists.playlist import Playlist
+from src.models.social.aggregate_karma import AggregateKarma
 from src.models.social.follow import Follow
 from src.models.social.repost import Repost, RepostType
 from src.models.social.save import Save, SaveType
-from src.models.tracks.aggregate_track import AggregateTrack
 from src.models.tracks.remix import Remix
 from src.models.tracks.track import Track
 from src.models.users.aggregate_user import AggregateUser
 from src.models.users.user import User
-from src.models.users.user_bank import UserBankAccount
 from src.premium_content.premium_content_access_checker import (
     premium_content_access_checker,
 )
-from src.premium_content.signature import get_premium_content_signature_for_user
+from src.premium_content.signature import get_premium_content_signatures_for_user
 from src.queries import response_name_constants
 from src.queries.get_balances import get_balances
+from src.queries.get_social_graph import (
+    get_followee_ids,
+    get_reposted_item_ids,
+    get_saved_item_ids,
+)
 from src.queries.get_unpopulated_users import get_unpopulated_users
 from src.trending_strategies.trending_type_and_version import TrendingVersion
 from src.utils import helpers, redis_connection
+from src.utils.update_indexing_checkpoints import get_last_indexed_checkpoint
 
 logger = logging.getLogger(__name__)
 
@@ -134,170 +139,142 @@ class SortDirection(str, enum.Enum):
 # given list of user ids and corresponding users, populates each user object with:
 #   track_count, playlist_count, album_count, follower_count, followee_count, repost_count, supporter_count, supporting_count
 #   if current_user_id available, populates does_current_user_follow, followee_follows
-def populate_user_metadata(
-    session, user_ids, users, current_user_id, with_track_save_count=False
-):
-    aggregate_user = (
-        session.query(
-            AggregateUser.user_id,
-            AggregateUser.track_count,
-            AggregateUser.playlist_count,
-            AggregateUser.album_count,
-            AggregateUser.follower_count,
-            AggregateUser.following_count,
-            AggregateUser.repost_count,
-            AggregateUser.track_save_count,
-            AggregateUser.supporter_count,
-            AggregateUser.supporting_count,
-        )
-        .filter(AggregateUser.user_id.in_(user_ids))
-        .all()
-    )
-
-    # build a dict of user (eth) wallet -> user bank
-    user_banks = session.query(
-        UserBankAccount.ethereum_address, UserBankAccount.bank_account
-    ).filter(UserBankAccount.ethereum_address.in_(user["wallet"] for user in users))
-    user_banks_dict = dict(user_banks)
-
-    # build dict of user id --> track/playlist/album/follower/followee/repost/track save/supporting/supporter counts
-    count_dict = {
-        user_id: {
-            response_name_constants.track_count: track_count,
-            response_name_constants.playlist_count: playlist_count,
-            response_name_constants.album_count: album_count,
-            response_name_constants.follower_count: follower_count,
-            response_name_constants.followee_count: following_count,
-            response_name_constants.repost_count: repost_count,
-            response_name_constants.track_save_count: track_save_count,
-            response_name_constants.supporter_count: supporter_count,
-            response_name_constants.supporting_count: supporting_count,
-        }
-        for (
-            user_id,
-            track_count,
-            playlist_count,
-            album_count,
-            follower_count,
-            following_count,
-            repost_count,
-            track_save_count,
-            supporter_count,
-            supporting_count,
-        ) in aggregate_user
-    }
+POPULATE_USER_METADATA_QUERY = text(
+    """
+    SELECT
+        ids.user_id,
+        au.track_count,
+        au.playlist_count,
+        au.album_count,
+        au.follower_count,
+        au.following_count,
+        au.repost_count,
+        au.track_save_count,
+        au.supporter_count,
+        au.supporting_count,
+        (
+            SELECT max(t.blocknumber)
+            FROM tracks t
+            WHERE t.owner_id = ids.user_id
+            AND t.is_current IS TRUE
+            AND t.is_delete IS FALSE
+        ) AS track_blocknumber,
+        (
+            SELECT b.bank_account
+            FROM user_bank_accounts b
+            WHERE b.ethereum_address = ids.wallet
+            LIMIT 1
+        ) AS spl_wallet,
+        EXISTS (
+            SELECT 1
+            FROM follows f
+            WHERE f.follower_user_id = ids.user_id
+            AND f.followee_user_id = :current_user_id
+            AND f.is_current IS TRUE
+            AND f.is_delete IS FALSE
+        ) AS does_follow_current_user,
+        (
+            SELECT count(*)
+            FROM follows f
+            WHERE f.followee_user_id = ids.user_id
+            AND f.follower_user_id = ANY(CAST(:followee_ids AS integer[]))
+            AND f.is_current IS TRUE
+            AND f.is_delete IS FALSE
+        ) AS current_user_followee_follow_count
+    FROM unnest(
+        CAST(:user_ids AS integer[]), CAST(:wallets AS varchar[])
+    ) AS ids(user_id, wallet)
+    LEFT JOIN aggregate_user au ON au.user_id = ids.user_id
+    """
+)
 
-    # build dict of user id --> track blocknumber
-    track_blocknumbers = (
-        session.query(Track.owner_id, func.max(Track.blocknumber))
-        .filter(
-            Track.is_current == True,
-            Track.is_delete == False,
-            Track.owner_id.in_(user_ids),
-        )
-        .group_by(Track.owner_id)
-        .all()
-    )
-    track_blocknumber_dict = dict(track_blocknumbers)
 
-    follows_current_user_set = set()
-    current_user_followed_user_ids = {}
-    current_user_followee_follow_count_dict = {}
-    if current_user_id:
-        # collect all incoming and outgoing follow edges for current user.
-        current_user_follow_rows = (
-            session.query(Follow.follower_user_id, Follow.followee_user_id)
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                or_(
-                    and_(
-                        Follow.followee_user_id.in_(user_ids),
-                        Follow.follower_user_id == current_user_id,
-                    ),
-                    and_(
-                        Follow.followee_user_id == current_user_id,
-                        Follow.follower_user_id.in_(user_ids),
-                    ),
-                ),
-            )
-            .all()
-        )
-        for follower_id, following_id in current_user_follow_rows:
-            if follower_id == current_user_id:
-                current_user_followed_user_ids[following_id] = True
-            else:
-                follows_current_user_set.add(follower_id)
-
-        # build dict of user id --> followee follow count
-        current_user_followees = (
+def get_current_user_followee_ids(session, current_user_id):
+    """
+    Returns the set of user ids followed by the current user.
+    Backed by the social graph cache, and kept on the request context
+    since every populate helper needs it.
+    """
+    if not current_user_id:
+        return set()
+
+    cache = None
+    if has_request_context():
+        cache = g.setdefault("current_user_followee_ids", {})
+        if current_user_id in cache:
+            return cache[current_user_id]
+
+    followee_ids = get_followee_ids(session, redis, current_user_id)
+    if followee_ids is None:
+        # too many followees to keep in the social graph cache
+        followees = (
             session.query(Follow.followee_user_id)
             .filter(
                 Follow.is_current == True,
                 Follow.is_delete == False,
                 Follow.follower_user_id == current_user_id,
             )
-            .subquery()
-        )
-
-        current_user_followee_follow_counts = (
-            session.query(Follow.followee_user_id, func.count(Follow.followee_user_id))
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.follower_user_id.in_(current_user_followees),
-                Follow.followee_user_id.in_(user_ids),
-            )
-            .group_by(Follow.followee_user_id)
             .all()
         )
-        current_user_followee_follow_count_dict = dict(
-            current_user_followee_follow_counts
-        )
+        followee_ids = {followee_id for (followee_id,) in followees}
+    if cache is not None:
+        cache[current_user_id] = followee_ids
+    return followee_ids
+
+
+def populate_user_metadata(
+    session, user_ids, users, current_user_id, with_track_save_count=False
+):
+    if not users:
+        return users
+
+    current_user_followee_ids = get_current_user_followee_ids(session, current_user_id)
+
+    # aggregates, latest track blocknumber, user bank and current user follow edges
+    # for all users in one round trip
+    rows = session.execute(
+        POPULATE_USER_METADATA_QUERY,
+        {
+            "user_ids": [user["user_id"] for user in users],
+            "wallets": [user["wallet"] for user in users],
+            "current_user_id": current_user_id,
+            "followee_ids": list(current_user_followee_ids),
+        },
+    ).fetchall()
+    metadata_dict = {row["user_id"]: row for row in rows}
 
     balance_dict = get_balances(session, redis, user_ids)
 
     for user in users:
         user_id = user["user_id"]
         user_balance = balance_dict.get(user_id, {})
-        user[response_name_constants.track_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.track_count, 0
-        )
-        user[response_name_constants.playlist_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.playlist_count, 0
-        )
-        user[response_name_constants.album_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.album_count, 0
-        )
-        user[response_name_constants.follower_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.follower_count, 0
-        )
-        user[response_name_constants.followee_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.followee_count, 0
-        )
-        user[response_name_constants.repost_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.repost_count, 0
-        )
-        user[response_name_constants.track_blocknumber] = track_blocknumber_dict.get(
-            user_id, -1
+        metadata = metadata_dict[user_id]
+        user[response_name_constants.track_count] = metadata["track_count"] or 0
+        user[response_name_constants.playlist_count] = metadata["playlist_count"] or 0
+        user[response_name_constants.album_count] = metadata["album_count"] or 0
+        user[response_name_constants.follower_count] = metadata["follower_count"] or 0
+        user[response_name_constants.followee_count] = metadata["following_count"] or 0
+        user[response_name_constants.repost_count] = metadata["repost_count"] or 0
+        user[response_name_constants.track_blocknumber] = (
+            metadata["track_blocknumber"]
+            if metadata["track_blocknumber"] is not None
+            else -1
         )
         if with_track_save_count:
-            user[response_name_constants.track_save_count] = count_dict.get(
-                user_id, {}
-            ).get(response_name_constants.track_save_count, 0)
-        user[response_name_constants.supporter_count] = count_dict.get(user_id, {}).get(
-            response_name_constants.supporter_count, 0
+            user[response_name_constants.track_save_count] = (
+                metadata["track_save_count"] or 0
+            )
+        user[response_name_constants.supporter_count] = metadata["supporter_count"] or 0
+        user[response_name_constants.supporting_count] = (
+            metadata["supporting_count"] or 0
         )
-        user[response_name_constants.supporting_count] = count_dict.get(
-            user_id, {}
-        ).get(response_name_constants.supporting_count, 0)
         # current user specific
-        user[
-            response_name_constants.does_current_user_follow
-        ] = current_user_followed_user_ids.get(user_id, False)
-        user[
-            response_name_constants.current_user_followee_follow_count
-        ] = current_user_followee_follow_count_dict.get(user_id, 0)
+        user[response_name_constants.does_current_user_follow] = (
+            user_id in current_user_followee_ids
+        )
+        user[response_name_constants.current_user_followee_follow_count] = metadata[
+            "current_user_followee_follow_count"
+        ]
         user[response_name_constants.balance] = user_balance.get(
             "owner_wallet_balance", "0"
         )
@@ -313,12 +290,10 @@ def populate_user_metadata(
         user[response_name_constants.waudio_balance] = user_balance.get(
             "waudio_balance", "0"
         )
-        user[response_name_constants.spl_wallet] = user_banks_dict.get(
-            user["wallet"], None
-        )
-        user[response_name_constants.does_follow_current_user] = (
-            user_id in follows_current_user_set
-        )
+        user[response_name_constants.spl_wallet] = metadata["spl_wallet"]
+        user[response_name_constants.does_follow_current_user] = metadata[
+            "does_follow_current_user"
+        ]
 
     return users
 
@@ -340,6 +315,38 @@ def get_track_play_count_dict(session, track_ids):
     return track_play_dict
 
 
+POPULATE_TRACK_METADATA_QUERY = text(
+    """
+    SELECT
+        ids.track_id,
+        coalesce(at.repost_count, 0) AS repost_count,
+        coalesce(at.save_count, 0) AS save_count,
+        coalesce(ap.count, 0) AS play_count,
+        EXISTS (
+            SELECT 1
+            FROM reposts r
+            WHERE r.repost_item_id = ids.track_id
+            AND r.repost_type = 'track'
+            AND r.user_id = :current_user_id
+            AND r.is_current IS TRUE
+            AND r.is_delete IS FALSE
+        ) AS has_current_user_reposted,
+        EXISTS (
+            SELECT 1
+            FROM saves s
+            WHERE s.save_item_id = ids.track_id
+            AND s.save_type = 'track'
+            AND s.user_id = :current_user_id
+            AND s.is_current IS TRUE
+            AND s.is_delete IS FALSE
+        ) AS has_current_user_saved
+    FROM unnest(CAST(:track_ids AS integer[])) AS ids(track_id)
+    LEFT JOIN aggregate_track at ON at.track_id = ids.track_id
+    LEFT JOIN aggregate_plays ap ON ap.play_item_id = ids.track_id
+    """
+)
+
+
 # given list of track ids and corresponding tracks, populates each track object with:
 #   repost_count, save_count
 #   if remix: remix users, has_remix_author_reposted, has_remix_author_saved
@@ -348,101 +355,75 @@ def get_track_play_count_dict(session, track_ids):
 def populate_track_metadata(
     session, track_ids, tracks, current_user_id, track_has_aggregates=False
 ):
-    if not track_has_aggregates:
-        # build dict of track id --> repost count
-        counts = (
-            session.query(
-                AggregateTrack.track_id,
-                AggregateTrack.repost_count,
-                AggregateTrack.save_count,
-            )
-            .filter(
-                AggregateTrack.track_id.in_(track_ids),
-            )
-            .all()
+    # current user reposts/saves come from the cached social graph,
+    # falling back to the query below for users with too many to cache
+    user_reposted_track_ids = None
+    user_saved_track_ids = None
+    if current_user_id:
+        user_reposted_track_ids = get_reposted_item_ids(
+            session, redis, current_user_id, RepostType.track
         )
+        user_saved_track_ids = get_saved_item_ids(
+            session, redis, current_user_id, SaveType.track
+        )
+    query_current_user_flags = bool(current_user_id) and (
+        user_reposted_track_ids is None or user_saved_track_ids is None
+    )
 
-        count_dict = {
-            track_id: {
-                response_name_constants.repost_count: repost_count,
-                response_name_constants.save_count: save_count,
-            }
-            for (track_id, repost_count, save_count) in counts
-        }
-
-        play_count_dict = get_track_play_count_dict(session, track_ids)
+    metadata_dict = {}
+    if track_ids and (query_current_user_flags or not track_has_aggregates):
+        # aggregates and current user reposts/saves for all tracks in one round trip
+        rows = session.execute(
+            POPULATE_TRACK_METADATA_QUERY,
+            {
+                "track_ids": list(track_ids),
+                "current_user_id": current_user_id
+                if query_current_user_flags
+                else None,
+            },
+        ).fetchall()
+        metadata_dict = {row["track_id"]: row for row in rows}
 
     remixes = get_track_remix_metadata(session, tracks, current_user_id)
 
-    user_reposted_track_dict = {}
-    user_saved_track_dict = {}
     followee_track_repost_dict = {}
     followee_track_save_dict = {}
     if current_user_id:
-        # has current user reposted any of requested track ids
-        user_reposted = (
-            session.query(Repost.repost_item_id)
-            .filter(
+        # Get current user's followees.
+        followees = get_current_user_followee_ids(session, current_user_id)
+
+        if followees:
+            # build dict of track id --> followee reposts
+            followee_track_reposts = session.query(Repost).filter(
                 Repost.is_current == True,
                 Repost.is_delete == False,
                 Repost.repost_item_id.in_(track_ids),
                 Repost.repost_type == RepostType.track,
-                Repost.user_id == current_user_id,
+                Repost.user_id.in_(list(followees)),
             )
-            .all()
-        )
-        user_reposted_track_dict = {repost[0]: True for repost in user_reposted}
-
-        # has current user saved any of requested track ids
-        user_saved_tracks_query = (
-            session.query(Save.save_item_id)
-            .filter(
+            followee_track_reposts = helpers.query_result_to_list(
+                followee_track_reposts
+            )
+            for track_repost in followee_track_reposts:
+                if track_repost["repost_item_id"] not in followee_track_repost_dict:
+                    followee_track_repost_dict[track_repost["repost_item_id"]] = []
+                followee_track_repost_dict[track_repost["repost_item_id"]].append(
+                    track_repost
+                )
+
+            # Build dict of track id --> followee saves.
+            followee_track_saves = session.query(Save).filter(
                 Save.is_current == True,
                 Save.is_delete == False,
-                Save.user_id == current_user_id,
                 Save.save_item_id.in_(track_ids),
                 Save.save_type == SaveType.track,
+                Save.user_id.in_(list(followees)),
             )
-            .all()
-        )
-        user_saved_track_dict = {save[0]: True for save in user_saved_tracks_query}
-
-        # Get current user's followees.
-        followees = session.query(Follow.followee_user_id).filter(
-            Follow.follower_user_id == current_user_id,
-            Follow.is_current == True,
-            Follow.is_delete == False,
-        )
-
-        # build dict of track id --> followee reposts
-        followee_track_reposts = session.query(Repost).filter(
-            Repost.is_current == True,
-            Repost.is_delete == False,
-            Repost.repost_item_id.in_(track_ids),
-            Repost.repost_type == RepostType.track,
-            Repost.user_id.in_(followees),
-        )
-        followee_track_reposts = helpers.query_result_to_list(followee_track_reposts)
-        for track_repost in followee_track_reposts:
-            if track_repost["repost_item_id"] not in followee_track_repost_dict:
-                followee_track_repost_dict[track_repost["repost_item_id"]] = []
-            followee_track_repost_dict[track_repost["repost_item_id"]].append(
-                track_repost
-            )
-
-        # Build dict of track id --> followee saves.
-        followee_track_saves = session.query(Save).filter(
-            Save.is_current == True,
-            Save.is_delete == False,
-            Save.save_item_id.in_(track_ids),
-            Save.save_type == SaveType.track,
-            Save.user_id.in_(followees),
-        )
-        followee_track_saves = helpers.query_result_to_list(followee_track_saves)
-        for track_save in followee_track_saves:
-            if track_save["save_item_id"] not in followee_track_save_dict:
-                followee_track_save_dict[track_save["save_item_id"]] = []
-            followee_track_save_dict[track_save["save_item_id"]].append(track_save)
+            followee_track_saves = helpers.query_result_to_list(followee_track_saves)
+            for track_save in followee_track_saves:
+                if track_save["save_item_id"] not in followee_track_save_dict:
+                    followee_track_save_dict[track_save["save_item_id"]] = []
+                followee_track_save_dict[track_save["save_item_id"]].append(track_save)
 
         # has current user unlocked premium tracks
         # if so, also populate corresponding signatures
@@ -450,6 +431,7 @@ def populate_track_metadata(
 
     for track in tracks:
         track_id = track["track_id"]
+        metadata = metadata_dict.get(track_id)
 
         if track_has_aggregates:
             aggregate_track = track.get("aggregate_track")
@@ -464,13 +446,15 @@ def populate_track_metadata(
                 aggregate_play[0].get("count", 0) if aggregate_play else 0
             )
         else:
-            track[response_name_constants.repost_count] = count_dict.get(
-                track_id, {}
-            ).get(response_name_constants.repost_count, 0)
-            track[response_name_constants.save_count] = count_dict.get(
-                track_id, {}
-            ).get(response_name_constants.save_count, 0)
-            track[response_name_constants.play_count] = play_count_dict.get(track_id, 0)
+            track[response_name_constants.repost_count] = (
+                metadata["repost_count"] if metadata else 0
+            )
+            track[response_name_constants.save_count] = (
+                metadata["save_count"] if metadata else 0
+            )
+            track[response_name_constants.play_count] = (
+                metadata["play_count"] if metadata else 0
+            )
         # current user specific
         track[
             response_name_constants.followee_reposts
@@ -478,12 +462,20 @@ def populate_track_metadata(
         track[response_name_constants.followee_saves] = followee_track_save_dict.get(
             track_id, []
         )
-        track[
-            response_name_constants.has_current_user_reposted
-        ] = user_reposted_track_dict.get(track_id, False)
-        track[
-            response_name_constants.has_current_user_saved
-        ] = user_saved_track_dict.get(track["track_id"], False)
+        if query_current_user_flags:
+            track[response_name_constants.has_current_user_reposted] = (
+                bool(metadata["has_current_user_reposted"]) if metadata else False
+            )
+            track[response_name_constants.has_current_user_saved] = (
+                bool(metadata["has_current_user_saved"]) if metadata else False
+            )
+        else:
+            track[response_name_constants.has_current_user_reposted] = (
+                track_id in user_reposted_track_ids if current_user_id else False
+            )
+            track[response_name_constants.has_current_user_saved] = (
+                track_id in user_saved_track_ids if current_user_id else False
+            )
 
         # Populate the remix_of tracks w/ the parent track's user and if that user saved/reposted the child
         if (
@@ -536,9 +528,9 @@ def _populate_premium_track_metadata(session, tracks, current_user_id):
         session, premium_content_access_args
     )
 
+    tracks_with_access = []
     for track in premium_tracks:
         track_id = track["track_id"]
-        track_cid = track["track_cid"]
         does_user_have_track_access = (
             current_user_id in premium_content_access["track"]
             and track_id in premium_content_access["track"][current_user_id]
@@ -547,17 +539,22 @@ def _populate_premium_track_metadata(session, tracks, current_user_id):
             ]
         )
         if does_user_have_track_access:
-            track[
-                response_name_constants.premium_content_signature
-            ] = get_premium_content_signature_for_user(
-                {
-                    "track_id": track_id,
-                    "track_cid": track_cid,
-                    "type": "track",
-                    "user_wallet": current_user_wallet[0],
-                    "is_premium": True,
-                }
-            )
+            tracks_with_access.append(track)
+
+    signatures = get_premium_content_signatures_for_user(
+        [
+            {
+                "track_id": track["track_id"],
+                "track_cid": track["track_cid"],
+                "type": "track",
+                "user_wallet": current_user_wallet[0],
+                "is_premium": True,
+            }
+            for track in tracks_with_access
+        ]
+    )
+    for track, signature in zip(tracks_with_access, signatures):
+        track[response_name_constants.premium_content_signature] = signature
 
 
 def get_track_remix_metadata(session, tracks, current_user_id):
@@ -728,47 +725,66 @@ def populate_playlist_metadata(
     followee_playlist_repost_dict = {}
     followee_playlist_save_dict = {}
     if current_user_id:
-        # has current user reposted any of requested playlist ids
-        current_user_playlist_reposts = (
-            session.query(Repost.repost_item_id)
-            .filter(
-                Repost.is_current == True,
-                Repost.is_delete == False,
-                Repost.repost_item_id.in_(playlist_ids),
-                Repost.repost_type.in_(repost_types),
-                Repost.user_id == current_user_id,
+        # has current user reposted or saved any of requested playlist ids,
+        # from the cached social graph when the user's sets are small enough
+        reposted_id_sets = [
+            get_reposted_item_ids(
+                session, redis, current_user_id, RepostType(repost_type)
             )
-            .all()
-        )
-        user_reposted_playlist_dict = {
-            r[0]: True for r in current_user_playlist_reposts
-        }
+            for repost_type in repost_types
+        ]
+        saved_id_sets = [
+            get_saved_item_ids(session, redis, current_user_id, SaveType(save_type))
+            for save_type in save_types
+        ]
+
+        if all(id_set is not None for id_set in reposted_id_sets):
+            user_reposted_playlist_dict = {
+                playlist_id: True
+                for playlist_id in playlist_ids
+                if any(playlist_id in id_set for id_set in reposted_id_sets)
+            }
+        else:
+            current_user_playlist_reposts = (
+                session.query(Repost.repost_item_id)
+                .filter(
+                    Repost.is_current == True,
+                    Repost.is_delete == False,
+                    Repost.repost_item_id.in_(playlist_ids),
+                    Repost.repost_type.in_(repost_types),
+                    Repost.user_id == current_user_id,
+                )
+                .all()
+            )
+            user_reposted_playlist_dict = {
+                r[0]: True for r in current_user_playlist_reposts
+            }
 
-        # has current user saved any of requested playlist ids
-        user_saved_playlists_query = (
-            session.query(Save.save_item_id)
-            .filter(
-                Save.is_current == True,
-                Save.is_delete == False,
-                Save.user_id == current_user_id,
-                Save.save_item_id.in_(playlist_ids),
-                Save.save_type.in_(save_types),
+        if all(id_set is not None for id_set in saved_id_sets):
+            user_saved_playlist_dict = {
+                playlist_id: True
+                for playlist_id in playlist_ids
+                if any(playlist_id in id_set for id_set in saved_id_sets)
+            }
+        else:
+            user_saved_playlists_query = (
+                session.query(Save.save_item_id)
+                .filter(
+                    Save.is_current == True,
+                    Save.is_delete == False,
+                    Save.user_id == current_user_id,
+                    Save.save_item_id.in_(playlist_ids),
+                    Save.save_type.in_(save_types),
+                )
+                .all()
             )
-            .all()
-        )
-        user_saved_playlist_dict = {
-            save[0]: True for save in user_saved_playlists_query
-        }
+            user_saved_playlist_dict = {
+                save[0]: True for save in user_saved_playlists_query
+            }
 
         # Get current user's followees.
-        followee_user_ids = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.follower_user_id == current_user_id,
-                Follow.is_current == True,
-                Follow.is_delete == False,
-            )
-            .all()
+        followee_user_ids = list(
+            get_current_user_followee_ids(session, current_user_id)
         )
 
         # Build dict of playlist id --> followee reposts.
@@ -937,6 +953,26 @@ def get_karma(
 ):
     """Gets the total karma for provided ids (track or playlist)"""
 
+    # read the maintained aggregate once the index_aggregate_karma task built it
+    if get_last_indexed_checkpoint(session, AggregateKarma.__tablename__):
+        return get_aggregate_karma(session, ids, time, is_playlist, xf)
+
+    window_start = f"NOW() - interval '1 {time}'" if time is not None else None
+    return get_karma_query(session, ids, is_playlist, xf, window_start).all()
+
+
+def get_karma_query(
+    session: Session,
+    ids: Tuple[int],
+    is_playlist: bool = False,
+    xf: bool = False,
+    window_start: str = None,
+    window_end: str = None,
+):
+    """
+    Sums the follower counts of the users who saved or reposted the provided ids
+    within [window_start, window_end), given as sql expressions
+    """
     repost_type = RepostType.playlist if is_playlist else RepostType.track
     save_type = SaveType.playlist if is_playlist else SaveType.track
 
@@ -957,10 +993,12 @@ def get_karma(
         Save.is_delete == False,
         Save.save_type == save_type,
     )
-    if time is not None:
-        interval = f"NOW() - interval '1 {time}'"
-        savers = savers.filter(Save.created_at >= text(interval))
-        reposters = reposters.filter(Repost.created_at >= text(interval))
+    if window_start is not None:
+        savers = savers.filter(Save.created_at >= text(window_start))
+        reposters = reposters.filter(Repost.created_at >= text(window_start))
+    if window_end is not None:
+        savers = savers.filter(Save.created_at < text(window_end))
+        reposters = reposters.filter(Repost.created_at < text(window_end))
 
     saves_and_reposts = reposters.union_all(savers).subquery()
     if xf:
@@ -990,7 +1028,45 @@ def get_karma(
         .group_by(saves_and_reposts.c.item_id)
     )
 
-    return query.all()
+    return query
+
+
+def get_aggregate_karma(
+    session: Session,
+    ids: Tuple[int],
+    time: str = None,
+    is_playlist: bool = False,
+    xf: bool = False,
+):
+    """
+    Sums the karma buckets of the provided ids within the time window.
+    Buckets are whole days, so the first day of the window, which the window only
+    partially covers, is queried on demand to match the karma of `get_karma`
+    """
+    item_type = RepostType.playlist.value if is_playlist else RepostType.track.value
+    karma = AggregateKarma.xf_karma if xf else AggregateKarma.karma
+
+    query = session.query(
+        AggregateKarma.item_id, cast(func.sum(karma), Integer)
+    ).filter(
+        AggregateKarma.item_id.in_(ids),
+        AggregateKarma.item_type == item_type,
+        karma != None,
+    )
+    if time is None:
+        return query.group_by(AggregateKarma.item_id).all()
+
+    window_start = f"NOW() - interval '1 {time}'"
+    first_day_end = f"({window_start})::date + 1"
+    query = query.filter(AggregateKarma.timestamp >= text(first_day_end))
+
+    karma_by_id = dict(query.group_by(AggregateKarma.item_id).all())
+    first_day_karma = get_karma_query(
+        session, ids, is_playlist, xf, window_start, first_day_end
+    ).all()
+    for item_id, item_karma in first_day_karma:
+        karma_by_id[item_id] = karma_by_id.get(item_id, 0) + item_karma
+    return list(karma_by_id.items())
 
 
 def get_save_counts_query(
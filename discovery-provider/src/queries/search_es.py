@@ -4,20 +4,58 @@ from typing import Any, Dict, Optional
 
 from src.api.v1.helpers import extend_playlist, extend_track, extend_user
 from src.queries.get_feed_es import fetch_followed_saves_and_reposts, item_key
+from src.utils import redis_connection
 from src.utils.elasticdsl import (
+    ES_ITEM_PERSONALIZATION_FIELDS,
+    ES_PLAYLIST_QUERY_ONLY_FIELDS,
     ES_PLAYLISTS,
     ES_TRACKS,
+    ES_USER_PERSONALIZATION_FIELDS,
+    ES_USER_QUERY_ONLY_FIELDS,
     ES_USERS,
     esclient,
+    fetch_users_es,
     pluck_hits,
     populate_track_or_playlist_metadata_es,
     populate_user_metadata_es,
 )
+from src.utils.redis_cache import get_json_cached_key, set_json_cached_key
 
 logger = logging.getLogger(__name__)
 
+# Search results are cached briefly so that bursts of identical queries
+# (e.g. autocomplete) are served without hitting elasticsearch
+SEARCH_ES_CACHE_TTL_SEC = 30
+
+
+def get_search_es_cache_key(args: dict):
+    # anonymous searches share a bucket, personalized results are cached per user
+    user_bucket = args.get("current_user_id") or "anon"
+    return ":".join(
+        [
+            "search_es",
+            str(user_bucket),
+            str(args.get("kind", "all")),
+            str(args.get("limit", 10)),
+            str(args.get("offset", 0)),
+            str(int(bool(args.get("only_downloadable")))),
+            str(int(bool(args.get("is_auto_complete")))),
+            str(args.get("query")),
+        ]
+    )
+
 
 def search_es_full(args: dict):
+    redis = redis_connection.get_redis()
+    key = get_search_es_cache_key(args)
+    response = get_json_cached_key(redis, key)
+    if response is None:
+        response = search_es_full_uncached(args)
+        set_json_cached_key(redis, key, response, SEARCH_ES_CACHE_TTL_SEC)
+    return response
+
+
+def search_es_full_uncached(args: dict):
     if not esclient:
         raise Exception("esclient is None")
 
@@ -120,6 +158,7 @@ def search_es_full(args: dict):
             )
 
     mdsl_limit_offset(mdsl, limit, offset)
+    mdsl_source_excludes(mdsl, current_user_id)
     mfound = esclient.msearch(searches=mdsl)
 
     response: Dict = {
@@ -233,6 +272,26 @@ def mdsl_limit_offset(mdsl, limit, offset):
             dsl["size"] = limit + 5
 
 
+def mdsl_source_excludes(mdsl, current_user_id):
+    """Trims the returned documents down to the fields used in the response"""
+    index_name = ""
+    for dsl in mdsl:
+        if "index" in dsl:
+            index_name = dsl["index"]
+            continue
+        excludes = []
+        if index_name == ES_USERS:
+            excludes.extend(ES_USER_QUERY_ONLY_FIELDS)
+            if not current_user_id:
+                excludes.extend(ES_USER_PERSONALIZATION_FIELDS)
+        else:
+            if index_name == ES_PLAYLISTS:
+                excludes.extend(ES_PLAYLIST_QUERY_ONLY_FIELDS)
+            if not current_user_id:
+                excludes.extend(ES_ITEM_PERSONALIZATION_FIELDS)
+        dsl["_source"] = {"excludes": excludes}
+
+
 def finalize_response(
     response: Dict,
     limit: int,
@@ -248,8 +307,6 @@ def finalize_response(
     # hydrate users, saves, reposts
     items = []
     user_ids = set()
-    if current_user_id:
-        user_ids.add(current_user_id)
 
     # collect keys for fetching
     for docs in response.values():
@@ -257,18 +314,8 @@ def finalize_response(
             items.append(item)
             user_ids.add(item.get("owner_id", item.get("playlist_owner_id")))
 
-    # fetch users
-    users_by_id = {}
-    current_user = None
-
-    if user_ids:
-        ids = [str(id) for id in user_ids]
-        users_mget = esclient.mget(index=ES_USERS, ids=ids)
-        users_by_id = {d["_id"]: d["_source"] for d in users_mget["docs"] if d["found"]}
-        if current_user_id:
-            current_user = users_by_id.get(str(current_user_id))
-        for id, user in users_by_id.items():
-            users_by_id[id] = populate_user_metadata_es(user, current_user)
+    # fetch users along with the current user
+    (users_by_id, current_user) = fetch_users_es(user_ids, current_user_id)
 
     # fetch followed saves + reposts
     if not is_auto_complete:
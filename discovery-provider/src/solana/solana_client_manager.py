@@ -3,7 +3,7 @@ import random
 import signal
 import time
 from contextlib import contextmanager
-from typing import Optional, Union
+from typing import List, Optional, Union
 
 from solana.keypair import Keypair
 from solana.publickey import PublicKey
@@ -213,6 +213,38 @@ class SolanaClientManager:
             "solana_client_manager.py | get_account_info | All requests failed to fetch",
         )
 
+    def get_multiple_accounts(
+        self, accounts: List[PublicKey], retries=DEFAULT_MAX_RETRIES
+    ):
+        """Fetches up to 100 account infos in a single getMultipleAccounts request."""
+
+        def _get_multiple_accounts(client: Client, index):
+            endpoint = self.endpoints[index]
+            num_retries = retries
+            while num_retries > 0:
+                try:
+                    response = client.get_multiple_accounts(accounts)
+                    return response["result"]
+                except Exception as e:
+                    logger.error(
+                        f"solana_client_manager.py | get_multiple_accounts, {e}",
+                        exc_info=True,
+                    )
+                num_retries -= 1
+                time.sleep(DELAY_SECONDS)
+                logger.error(
+                    f"solana_client_manager.py | get_multiple_accounts | Retrying with endpoint {endpoint}"
+                )
+            raise Exception(
+                f"solana_client_manager.py | get_multiple_accounts | Failed with endpoint {endpoint}"
+            )
+
+        return _try_all(
+            self.clients,
+            _get_multiple_accounts,
+            "solana_client_manager.py | get_multiple_accounts | All requests failed to fetch",
+        )
+
 
 @contextmanager
 def timeout(time):
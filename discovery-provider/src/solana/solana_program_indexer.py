@@ -0,0 +1,401 @@
+import concurrent.futures
+import logging
+import time
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypedDict,
+    TypeVar,
+)
+
+from sqlalchemy.orm.session import Session
+from src.solana.constants import (
+    FETCH_TX_SIGNATURES_BATCH_SIZE,
+    TX_SIGNATURES_MAX_BATCHES,
+    TX_SIGNATURES_RESIZE_LENGTH,
+)
+from src.solana.solana_client_manager import SolanaClientManager
+from src.solana.solana_transaction_types import ConfirmedSignatureForAddressResult
+from src.utils.helpers import split_list
+from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
+from src.utils.session_manager import SessionManager
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_signature_checkpoint,
+    save_indexed_signature_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of signatures requested on the first page, most runs only need a few
+INITIAL_FETCH_SIZE = 10
+# Number of signatures that are fetched from RPC and written at once
+TX_SIGNATURES_PROCESSING_SIZE = 100
+# Number of transactions fetched from RPC in parallel
+TX_FETCH_MAX_WORKERS = 10
+# Seconds to wait for a batch of transactions to be fetched and parsed
+TX_FETCH_TIMEOUT_SEC = 45
+# Number of transactions in each independently resumable backfill range
+BACKFILL_RANGE_SIZE = 10000
+
+ParsedTx = TypeVar("ParsedTx")
+
+# Returns the highest slot committed for the program, None if nothing is indexed yet
+GetLatestSlot = Callable[[Session], Optional[int]]
+# Returns the subset of the given signatures that are already in the DB
+GetExistingSignatures = Callable[[Session, List[str]], Set[str]]
+# Fetches and parses a single transaction, safe to call from worker threads
+ParseTx = Callable[[ConfirmedSignatureForAddressResult], Optional[ParsedTx]]
+# Writes a batch of parsed transactions, ordered oldest to newest
+PersistTxs = Callable[
+    [Session, List[ConfirmedSignatureForAddressResult], List[ParsedTx]], Any
+]
+
+
+class BackfillRange(TypedDict):
+    # Signatures bounding the range, both exclusive
+    until: str
+    before: Optional[str]
+    start_slot: int
+    end_slot: int
+
+
+class SolanaProgramIndexer(Generic[ParsedTx]):
+    """Traverses the signatures of a solana program and indexes new transactions
+
+    Each run pages back from the tip of the program until it reaches the
+    checkpoint returned by `get_latest_slot`. Signatures at or below the
+    checkpoint slot are checked against the DB a page at a time with
+    `get_existing_signatures` so txs sharing the checkpoint slot are not missed.
+    New transactions are then fetched in parallel with `parse_tx` and written
+    oldest first with `persist_txs`, one session per processing batch.
+
+    With a `checkpoint_name`, the (slot, signature) of the newest tx in each
+    batch is saved to indexing_checkpoints in the same session as the batch.
+    Later runs then only list signatures newer than that exact tx, so the
+    work per run is proportional to new txs and a run that fails part way
+    resumes after the last committed batch. Until the first checkpoint is
+    written the indexer falls back to traversing back to `get_latest_slot`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        program: str,
+        solana_client_manager: SolanaClientManager,
+        db: SessionManager,
+        get_latest_slot: GetLatestSlot,
+        parse_tx: ParseTx,
+        persist_txs: PersistTxs,
+        get_existing_signatures: Optional[GetExistingSignatures] = None,
+        min_slot: Optional[int] = None,
+        initial_fetch_size: int = INITIAL_FETCH_SIZE,
+        processing_size: int = TX_SIGNATURES_PROCESSING_SIZE,
+        max_workers: int = TX_FETCH_MAX_WORKERS,
+        parse_retries: int = 0,
+        checkpoint_name: Optional[str] = None,
+    ):
+        self.name = name
+        self.program = program
+        self.solana_client_manager = solana_client_manager
+        self.db = db
+        self.get_latest_slot = get_latest_slot
+        self.parse_tx = parse_tx
+        self.persist_txs = persist_txs
+        self.get_existing_signatures = get_existing_signatures
+        self.min_slot = min_slot
+        self.initial_fetch_size = initial_fetch_size
+        self.processing_size = processing_size
+        self.max_workers = max_workers
+        self.parse_retries = parse_retries
+        self.checkpoint_name = checkpoint_name
+
+    def get_checkpoint(self) -> Optional[int]:
+        with self.db.scoped_session() as session:
+            return self.get_latest_slot(session)
+
+    def get_signature_checkpoint(
+        self, checkpoint_name: Optional[str] = None
+    ) -> Optional[Tuple[int, str]]:
+        checkpoint_name = checkpoint_name or self.checkpoint_name
+        if not checkpoint_name:
+            return None
+        with self.db.scoped_session() as session:
+            return get_last_indexed_signature_checkpoint(session, checkpoint_name)
+
+    def _filter_page(
+        self,
+        session: Session,
+        page: List[ConfirmedSignatureForAddressResult],
+        latest_processed_slot: Optional[int],
+    ):
+        """Returns the new txs of a page and whether the checkpoint was reached"""
+        if latest_processed_slot is None:
+            # Nothing indexed yet, start from the tip
+            return page, True
+
+        new_txs = []
+        for index, tx in enumerate(page):
+            if tx["slot"] > latest_processed_slot:
+                new_txs.append(tx)
+                continue
+            if self.get_existing_signatures is None or (
+                self.min_slot is not None and tx["slot"] <= self.min_slot
+            ):
+                return new_txs, True
+
+            # Re-traverse the checkpoint slot, stopping at the first indexed tx
+            remaining = page[index:]
+            existing = self.get_existing_signatures(
+                session, [remaining_tx["signature"] for remaining_tx in remaining]
+            )
+            for remaining_tx in remaining:
+                if remaining_tx["signature"] in existing or (
+                    self.min_slot is not None and remaining_tx["slot"] <= self.min_slot
+                ):
+                    return new_txs, True
+                new_txs.append(remaining_tx)
+            return new_txs, False
+        return new_txs, False
+
+    def _filter_page_until(
+        self,
+        page: List[ConfirmedSignatureForAddressResult],
+        checkpoint_slot: Optional[int],
+        until: str,
+    ):
+        """Returns the txs of a page newer than `until` and whether it was reached"""
+        new_txs = []
+        for tx in page:
+            # The slot guard bounds traversal if the RPC does not know `until`
+            if tx["signature"] == until or (
+                checkpoint_slot is not None and tx["slot"] < checkpoint_slot
+            ):
+                return new_txs, True
+            new_txs.append(tx)
+        return new_txs, False
+
+    def get_transaction_signatures(
+        self,
+        latest_processed_slot: Optional[int],
+        before: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[List[ConfirmedSignatureForAddressResult]]:
+        """Pages back from `before` until the checkpoint, returning batches oldest first
+
+        When `until` is given, traversal stops at that exact signature instead
+        of checking signatures around `latest_processed_slot` against the DB
+        """
+        transaction_signatures: List[List[ConfirmedSignatureForAddressResult]] = []
+        intersection_found = False
+        fetch_size = self.initial_fetch_size
+        page_count = 0
+
+        with self.db.scoped_session() as session:
+            while not intersection_found:
+                logger.info(
+                    f"solana_program_indexer.py | {self.name} | Requesting {fetch_size} transactions before {before}"
+                )
+                page = self.solana_client_manager.get_signatures_for_address(
+                    self.program, before=before, until=until, limit=fetch_size
+                )["result"]
+                fetch_size = FETCH_TX_SIGNATURES_BATCH_SIZE
+                page_count += 1
+                if not page:
+                    # No further history for this program
+                    break
+
+                if until:
+                    new_txs, intersection_found = self._filter_page_until(
+                        page, latest_processed_slot, until
+                    )
+                else:
+                    new_txs, intersection_found = self._filter_page(
+                        session, page, latest_processed_slot
+                    )
+                if new_txs:
+                    transaction_signatures.append(new_txs)
+
+                # Restart at the end of this page
+                before = page[-1]["signature"]
+
+                # Ensure processing does not grow unbounded, keep the oldest batches
+                # With a checkpoint the newest batches are picked up by the next run
+                if len(transaction_signatures) > TX_SIGNATURES_MAX_BATCHES:
+                    transaction_signatures = transaction_signatures[
+                        -TX_SIGNATURES_RESIZE_LENGTH:
+                    ]
+
+        logger.info(
+            f"solana_program_indexer.py | {self.name} | traversed {page_count} pages, latest_processed_slot={latest_processed_slot}"
+        )
+        # Pages are newest first, process the oldest transactions first
+        transaction_signatures.reverse()
+        for batch in transaction_signatures:
+            batch.reverse()
+        return transaction_signatures
+
+    def parse_transactions(
+        self, txs: List[ConfirmedSignatureForAddressResult], retries: int = 0
+    ) -> List[Optional[ParsedTx]]:
+        """Fetches and parses txs in parallel, returning results in the order of `txs`
+
+        The whole batch is retried up to `retries` times if any tx fails or
+        does not complete within the alloted time
+        """
+        # Not used as a context manager, leaving it would wait on hung requests
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = [executor.submit(self.parse_tx, tx) for tx in txs]
+        try:
+            concurrent.futures.wait(futures, timeout=TX_FETCH_TIMEOUT_SEC)
+            return [future.result(timeout=0) for future in futures]
+        except Exception as e:
+            logger.error(
+                f"solana_program_indexer.py | {self.name} | Error parsing transactions: {e}"
+            )
+            if retries <= 0:
+                raise e
+        finally:
+            # Drop queued work and don't wait on in flight requests
+            executor.shutdown(wait=False, cancel_futures=True)
+        return self.parse_transactions(txs, retries - 1)
+
+    def process_batch(
+        self,
+        txs: List[ConfirmedSignatureForAddressResult],
+        checkpoint_name: Optional[str] = None,
+    ):
+        """Fetches, parses and writes a batch of txs ordered oldest to newest"""
+        fetch_metric = PrometheusMetric(
+            PrometheusMetricNames.INDEX_SOLANA_DURATION_SECONDS
+        )
+        parsed_txs = [
+            parsed
+            for parsed in self.parse_transactions(txs, self.parse_retries)
+            if parsed is not None
+        ]
+        fetch_metric.save_time({"indexer": self.name, "scope": "fetch"})
+
+        persist_metric = PrometheusMetric(
+            PrometheusMetricNames.INDEX_SOLANA_DURATION_SECONDS
+        )
+        with self.db.scoped_session() as session:
+            result = self.persist_txs(session, txs, parsed_txs)
+            if checkpoint_name and txs:
+                save_indexed_signature_checkpoint(
+                    session, checkpoint_name, txs[-1]["slot"], txs[-1]["signature"]
+                )
+        persist_metric.save_time({"indexer": self.name, "scope": "persist"})
+        return result
+
+    def _process_batches(
+        self,
+        transaction_signatures: List[List[ConfirmedSignatureForAddressResult]],
+        checkpoint_name: Optional[str],
+    ) -> Optional[ConfirmedSignatureForAddressResult]:
+        last_tx: Optional[ConfirmedSignatureForAddressResult] = None
+        num_txs = 0
+        for batch in transaction_signatures:
+            for txs in split_list(batch, self.processing_size):
+                batch_start_time = time.time()
+                self.process_batch(txs, checkpoint_name)
+                last_tx = txs[-1]
+                num_txs += len(txs)
+                logger.info(
+                    f"solana_program_indexer.py | {self.name} | processed batch {len(txs)} txs in {time.time() - batch_start_time}s"
+                )
+
+        PrometheusMetric(PrometheusMetricNames.INDEX_SOLANA_TRANSACTIONS_LATEST).save(
+            num_txs, {"indexer": self.name}
+        )
+        return last_tx
+
+    def process(self) -> Optional[ConfirmedSignatureForAddressResult]:
+        """Indexes every tx since the checkpoint, returning the newest tx processed"""
+        metric = PrometheusMetric(PrometheusMetricNames.INDEX_SOLANA_DURATION_SECONDS)
+        signature_checkpoint = self.get_signature_checkpoint()
+        if signature_checkpoint:
+            checkpoint_slot, checkpoint_signature = signature_checkpoint
+            transaction_signatures = self.get_transaction_signatures(
+                checkpoint_slot, until=checkpoint_signature
+            )
+        else:
+            transaction_signatures = self.get_transaction_signatures(
+                self.get_checkpoint()
+            )
+        metric.save_time({"indexer": self.name, "scope": "traverse"})
+
+        last_tx = self._process_batches(transaction_signatures, self.checkpoint_name)
+        metric.save_time({"indexer": self.name, "scope": "full"})
+        return last_tx
+
+    def get_backfill_ranges(
+        self,
+        until: str,
+        before: Optional[str] = None,
+        range_size: int = BACKFILL_RANGE_SIZE,
+    ) -> List[BackfillRange]:
+        """Splits the txs between `until` and `before` into ranges of `range_size` txs
+
+        Only signatures are listed here, the ranges can then be indexed in
+        parallel with `backfill`. Ranges are returned oldest first.
+        """
+        ranges: List[BackfillRange] = []
+        num_txs = 0
+        page_before = before
+        prev_signature = before
+        while True:
+            page = self.solana_client_manager.get_signatures_for_address(
+                self.program,
+                before=page_before,
+                until=until,
+                limit=FETCH_TX_SIGNATURES_BATCH_SIZE,
+            )["result"]
+            if not page:
+                break
+            for tx in page:
+                if num_txs % range_size == 0:
+                    if ranges:
+                        ranges[-1]["until"] = tx["signature"]
+                    ranges.append(
+                        {
+                            "until": until,
+                            "before": prev_signature,
+                            "start_slot": tx["slot"],
+                            "end_slot": tx["slot"],
+                        }
+                    )
+                ranges[-1]["start_slot"] = tx["slot"]
+                prev_signature = tx["signature"]
+                num_txs += 1
+            page_before = page[-1]["signature"]
+
+        ranges.reverse()
+        return ranges
+
+    def backfill(
+        self, backfill_range: BackfillRange
+    ) -> Optional[ConfirmedSignatureForAddressResult]:
+        """Indexes every tx in a range, resuming from the range's own checkpoint"""
+        start_slot = backfill_range["start_slot"]
+        end_slot = backfill_range["end_slot"]
+        checkpoint_name = (
+            f"{self.checkpoint_name or self.name}:backfill:{start_slot}-{end_slot}"
+        )
+        last_tx = None
+        while True:
+            signature_checkpoint = self.get_signature_checkpoint(checkpoint_name)
+            checkpoint_slot, until = signature_checkpoint or (
+                backfill_range["start_slot"],
+                backfill_range["until"],
+            )
+            transaction_signatures = self.get_transaction_signatures(
+                checkpoint_slot, before=backfill_range["before"], until=until
+            )
+            if not transaction_signatures:
+                return last_tx
+            last_tx = self._process_batches(transaction_signatures, checkpoint_name)
@@ -0,0 +1,161 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from src.solana.solana_program_indexer import SolanaProgramIndexer
+
+
+def make_tx(signature, slot):
+    return {
+        "signature": signature,
+        "slot": slot,
+        "blockTime": slot,
+        "err": None,
+        "memo": None,
+        "confirmationStatus": "finalized",
+    }
+
+
+# Signatures are returned newest first, like get_signatures_for_address
+history = [
+    make_tx("sig6", 105),
+    make_tx("sig5", 104),
+    make_tx("sig4", 103),
+    make_tx("sig3", 102),
+    make_tx("sig2", 102),
+    make_tx("sig1", 101),
+]
+
+
+def get_signatures_for_address(_, before=None, until=None, limit=10):
+    signatures = [tx["signature"] for tx in history]
+    start = signatures.index(before) + 1 if before else 0
+    end = signatures.index(until) if until else len(history)
+    return {"result": history[start:end][:limit]}
+
+
+def make_indexer(
+    db_mock, latest_slot, existing_signatures=None, persisted=None, checkpoint_name=None
+):
+    solana_client_manager = mock.Mock()
+    solana_client_manager.get_signatures_for_address.side_effect = (
+        get_signatures_for_address
+    )
+
+    def get_existing_signatures(_, sigs):
+        return existing_signatures & set(sigs)
+
+    return SolanaProgramIndexer(
+        name="test",
+        program="program",
+        solana_client_manager=solana_client_manager,
+        db=db_mock,
+        get_latest_slot=lambda _: latest_slot,
+        get_existing_signatures=(
+            get_existing_signatures if existing_signatures is not None else None
+        ),
+        parse_tx=lambda tx: tx["signature"] if tx["slot"] != 104 else None,
+        persist_txs=lambda _, txs, parsed: persisted.append(
+            ([tx["signature"] for tx in txs], parsed)
+        ),
+        initial_fetch_size=2,
+        processing_size=2,
+        checkpoint_name=checkpoint_name,
+    )
+
+
+def test_get_transaction_signatures(db_mock):
+    def get_signatures(indexer, latest_slot):
+        return [
+            [tx["signature"] for tx in batch]
+            for batch in indexer.get_transaction_signatures(latest_slot)
+        ]
+
+    # without a signature check, traversal stops at the checkpoint slot
+    indexer = make_indexer(db_mock, 102)
+    assert get_signatures(indexer, 102) == [["sig4"], ["sig5", "sig6"]]
+
+    # txs at the checkpoint slot are re-traversed until an indexed one is found
+    indexer = make_indexer(db_mock, 102, {"sig2"})
+    assert get_signatures(indexer, 102) == [["sig3", "sig4"], ["sig5", "sig6"]]
+
+    # nothing indexed yet, only the first page is indexed
+    assert get_signatures(indexer, None) == [["sig5", "sig6"]]
+
+    # traversal stops at the exact checkpoint signature
+    transaction_signatures = indexer.get_transaction_signatures(102, until="sig3")
+    assert [[tx["signature"] for tx in batch] for batch in transaction_signatures] == [
+        ["sig4"],
+        ["sig5", "sig6"],
+    ]
+
+
+def test_process(db_mock):
+    persisted = []
+    indexer = make_indexer(db_mock, 101, {"sig1"}, persisted)
+    last_tx = indexer.process()
+
+    assert last_tx["signature"] == "sig6"
+    # txs are persisted oldest first and unparseable txs are dropped
+    assert persisted == [
+        (["sig2", "sig3"], ["sig2", "sig3"]),
+        (["sig4"], ["sig4"]),
+        (["sig5", "sig6"], ["sig6"]),
+    ]
+
+
+def test_process_from_signature_checkpoint(db_mock):
+    persisted = []
+    checkpoints = {"test": (102, "sig3")}
+
+    def save_checkpoint(_, name, slot, signature):
+        checkpoints[name] = (slot, signature)
+
+    indexer = make_indexer(db_mock, 0, set(), persisted, "test")
+    with mock.patch(
+        "src.solana.solana_program_indexer.get_last_indexed_signature_checkpoint",
+        side_effect=lambda _, name: checkpoints.get(name),
+    ), mock.patch(
+        "src.solana.solana_program_indexer.save_indexed_signature_checkpoint",
+        side_effect=save_checkpoint,
+    ):
+        last_tx = indexer.process()
+        assert last_tx["signature"] == "sig6"
+        assert persisted == [(["sig4"], ["sig4"]), (["sig5", "sig6"], ["sig6"])]
+        assert checkpoints["test"] == (105, "sig6")
+
+        # nothing new since the checkpoint
+        assert indexer.process() is None
+
+        ranges = indexer.get_backfill_ranges("sig1", range_size=2)
+        assert ranges == [
+            {"until": "sig1", "before": "sig3", "start_slot": 102, "end_slot": 102},
+            {"until": "sig2", "before": "sig5", "start_slot": 102, "end_slot": 103},
+            {"until": "sig4", "before": None, "start_slot": 104, "end_slot": 105},
+        ]
+
+        persisted.clear()
+        last_tx = indexer.backfill(ranges[1])
+        assert last_tx["signature"] == "sig4"
+        assert persisted == [(["sig3", "sig4"], ["sig3", "sig4"])]
+        assert checkpoints["test:backfill:102-103"] == (103, "sig4")
+
+        # a completed range is not indexed again
+        persisted.clear()
+        assert indexer.backfill(ranges[1]) is None
+        assert persisted == []
+
+
+def test_parse_transactions_does_not_wait_on_hung_requests(db_mock):
+    released = threading.Event()
+    indexer = make_indexer(db_mock, 101)
+    indexer.parse_tx = lambda tx: released.wait(5) and tx["signature"]
+
+    start = time.time()
+    with mock.patch(
+        "src.solana.solana_program_indexer.TX_FETCH_TIMEOUT_SEC", 0.1
+    ), pytest.raises(Exception):
+        indexer.parse_transactions(history[:2])
+    assert time.time() - start < 1
+    released.set()
@@ -17,6 +17,9 @@ from src.models.social.subscription import Subscription
 from src.models.tracks.track import Track
 from src.models.tracks.track_route import TrackRoute
 from src.models.users.user import User
+from src.queries.get_feed_cache import invalidate_feed_cache
+from src.queries.get_social_graph import invalidate_social_graph
+from src.queries.get_track_stream_info import invalidate_track_stream_info
 from src.tasks.entity_manager.notification import (
     create_notification,
     view_notification,
@@ -48,6 +51,7 @@ from src.tasks.entity_manager.utils import (
     get_record_key,
 )
 from src.utils import helpers
+from src.utils.auth_middleware import invalidate_wallet_user_ids
 from src.utils.prometheus_metric import PrometheusMetric, PrometheusMetricNames
 
 logger = logging.getLogger(__name__)
@@ -56,6 +60,31 @@ logger = logging.getLogger(__name__)
 ENABLE_DEVELOPMENT_FEATURES = True
 
 
+# entity types whose ids are returned for cache invalidation after commit
+entity_types_to_invalidate = {EntityType.PLAYLIST, EntityType.TRACK, EntityType.USER}
+social_types_to_invalidate = {EntityType.FOLLOW, EntityType.SAVE, EntityType.REPOST}
+
+
+def invalidate_changed_entity_caches(
+    redis, changed_entity_ids: Dict[str, Set[int]], blocknumber: int
+):
+    """Clears caches of entities changed by a block, called once it is committed"""
+    track_ids = changed_entity_ids.get(EntityType.TRACK, set())
+    user_ids = changed_entity_ids.get(EntityType.USER, set())
+    invalidate_track_stream_info(redis, track_ids, user_ids, blocknumber)
+    invalidate_wallet_user_ids(redis, user_ids, blocknumber)
+    invalidate_social_graph(
+        redis,
+        set().union(
+            *(changed_entity_ids.get(t, set()) for t in social_types_to_invalidate)
+        ),
+        blocknumber,
+    )
+    invalidate_feed_cache(
+        redis, changed_entity_ids.get(EntityType.FOLLOW, set()), blocknumber
+    )
+
+
 def get_record_columns(record) -> List[str]:
     columns = [str(m.key) for m in record.__table__.columns]
     return columns
@@ -239,6 +268,12 @@ def entity_manager_update(
                 if "is_current" in get_record_columns(records[-1]):
                     records[-1].is_current = True
                 records_to_save.extend(records)
+                if record_type in entity_types_to_invalidate:
+                    changed_entity_ids[record_type].add(entity_id)
+                elif record_type in social_types_to_invalidate:
+                    # social records are keyed by (user_id, entity_type, entity_id),
+                    # return the acting user whose social graph changed
+                    changed_entity_ids[record_type].add(entity_id[0])
 
                 # invalidate original record if it already existed in the DB
                 if (
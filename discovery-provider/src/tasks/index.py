@@ -4,9 +4,10 @@ import concurrent.futures
 import json
 import logging
 import time
+from collections import defaultdict
 from datetime import datetime
 from operator import itemgetter, or_
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Set, Tuple
 
 from sqlalchemy.orm.session import Session
 from src.app import get_contract_addresses
@@ -34,7 +35,10 @@ from src.queries.get_skipped_transactions import (
 )
 from src.queries.skipped_transactions import add_network_level_skipped_transaction
 from src.tasks.celery_app import celery
-from src.tasks.entity_manager.entity_manager import entity_manager_update
+from src.tasks.entity_manager.entity_manager import (
+    entity_manager_update,
+    invalidate_changed_entity_caches,
+)
 from src.tasks.entity_manager.utils import Action, EntityType
 from src.tasks.sort_block_transactions import sort_block_transactions
 from src.utils import helpers
@@ -357,6 +361,7 @@ def process_state_changes(
         "number", "hash", "timestamp"
     )(block)
 
+    changed_entity_ids: Dict[str, Set[int]] = defaultdict(set)
     for tx_type, bulk_processor in TX_TYPE_TO_HANDLER_MAP.items():
 
         txs_to_process = tx_type_to_grouped_lists_map[tx_type]
@@ -373,14 +378,18 @@ def process_state_changes(
 
         (
             total_changes_for_tx_type,
-            _,
+            changed_entity_ids_for_tx_type,
         ) = bulk_processor(*tx_processing_args)
+        for entity_type, entity_ids in changed_entity_ids_for_tx_type.items():
+            changed_entity_ids[entity_type].update(entity_ids)
 
         logger.info(
             f"index.py | {bulk_processor.__name__} completed"
             f" {tx_type}_state_changed={total_changes_for_tx_type > 0} for block={block_number}"
         )
 
+    return changed_entity_ids
+
 
 cid_types = ["track", "user", "playlist_data"]
 UPSERT_CID_METADATA_QUERY = """
@@ -446,6 +455,7 @@ def index_blocks(self, db, blocks_list):
         with db.scoped_session() as session, challenge_bus.use_scoped_dispatch_queue():
             skip_tx_hash = get_tx_hash_to_skip(session, redis)
             skip_whole_block = skip_tx_hash == "commit"  # db tx failed at commit level
+            changed_entity_ids: Dict[str, Set[int]] = {}
             if skip_whole_block:
                 logger.info(
                     f"index.py | Skipping all txs in block {block.hash} {block.number}"
@@ -558,7 +568,7 @@ def index_blocks(self, db, blocks_list):
                     # bulk process operations once all tx's for block have been parsed
                     # and get changed entity IDs for cache clearing
                     # after session commit
-                    process_state_changes(
+                    changed_entity_ids = process_state_changes(
                         self,
                         session,
                         cid_metadata,
@@ -629,6 +639,17 @@ def index_blocks(self, db, blocks_list):
                     f"index.py | Error in calling update trending challenge {e}",
                     exc_info=True,
                 )
+            try:
+                # Clear caches of entities changed in this block now that they are committed
+                invalidate_changed_entity_caches(
+                    redis, changed_entity_ids, block_number
+                )
+            except Exception as e:
+                # Do not throw error, cached entries expire on their own
+                logger.error(
+                    f"index.py | Error invalidating caches {e}",
+                    exc_info=True,
+                )
             if skip_tx_hash:
                 clear_indexing_error(redis)
 
@@ -0,0 +1,196 @@
+import logging
+import time
+from typing import List, Tuple
+
+from sqlalchemy import func, text
+from src.models.indexing.block import Block
+from src.models.social.aggregate_karma import AggregateKarma
+from src.tasks.celery_app import celery
+from src.utils.prometheus_metric import save_duration_metric
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_KARMA_TABLE_NAME = AggregateKarma.__tablename__
+INDEX_AGGREGATE_KARMA_LOCK = "index_aggregate_karma_lock"
+AGGREGATE_KARMA_BATCH_SIZE = 1000
+
+# KARMA_BUCKETS_QUERY
+# Sum the follower counts of the users who saved or reposted each item, grouped
+# by the day of the save or repost so that windowed karma is a sum of buckets.
+# xf_karma only counts users with a cover photo, profile picture and bio.
+KARMA_BUCKETS_QUERY = """
+    select
+        sr.item_id,
+        sr.item_type,
+        sr.created_at::date as timestamp,
+        sum(coalesce(au.follower_count, 0)) as karma,
+        sum(coalesce(au.follower_count, 0)) filter (
+            where u.user_id is not null
+        ) as xf_karma
+    from (
+        select
+            user_id,
+            repost_item_id as item_id,
+            repost_type::text as item_type,
+            created_at
+        from reposts
+        where is_current and not is_delete {repost_filter}
+        union all
+        select
+            user_id,
+            save_item_id as item_id,
+            save_type::text as item_type,
+            created_at
+        from saves
+        where is_current and not is_delete {save_filter}
+    ) sr
+    join aggregate_user au on au.user_id = sr.user_id
+    left join users u on u.user_id = sr.user_id
+        and u.is_current
+        and (u.cover_photo is not null or u.cover_photo_sizes is not null)
+        and (u.profile_picture is not null or u.profile_picture_sizes is not null)
+        and u.bio is not null
+    group by sr.item_id, sr.item_type, sr.created_at::date
+    """
+
+INSERT_AGGREGATE_KARMA_QUERY = """
+    insert into aggregate_karma (item_id, item_type, timestamp, karma, xf_karma)
+    {karma_buckets}
+    """
+
+CHANGED_ITEMS_FILTER = """
+    select * from unnest(
+        cast(:item_ids as integer[]), cast(:item_types as varchar[])
+    )
+    """
+
+DELETE_AGGREGATE_KARMA_QUERY = f"""
+    delete from aggregate_karma
+    where (item_id, item_type) in ({CHANGED_ITEMS_FILTER})
+    """
+
+UPDATE_AGGREGATE_KARMA_QUERY = INSERT_AGGREGATE_KARMA_QUERY.format(
+    karma_buckets=KARMA_BUCKETS_QUERY.format(
+        repost_filter=f"and (repost_item_id, repost_type::text) in ({CHANGED_ITEMS_FILTER})",
+        save_filter=f"and (save_item_id, save_type::text) in ({CHANGED_ITEMS_FILTER})",
+    )
+)
+
+REBUILD_AGGREGATE_KARMA_QUERY = INSERT_AGGREGATE_KARMA_QUERY.format(
+    karma_buckets=KARMA_BUCKETS_QUERY.format(repost_filter="", save_filter="")
+)
+
+# CHANGED_KARMA_ITEMS_QUERY
+# Karma changes for items that were saved, reposted, unsaved or unreposted in
+# the block range, and for every item saved or reposted by a user whose
+# follower count or profile changed in the block range
+CHANGED_KARMA_ITEMS_QUERY = """
+    with changed_users as (
+        select followee_user_id as user_id
+        from follows
+        where blocknumber > :prev_blocknumber and blocknumber <= :blocknumber
+        union
+        select user_id
+        from users
+        where blocknumber > :prev_blocknumber and blocknumber <= :blocknumber
+    )
+    select repost_item_id, repost_type::text
+    from reposts
+    where blocknumber > :prev_blocknumber and blocknumber <= :blocknumber
+    union
+    select save_item_id, save_type::text
+    from saves
+    where blocknumber > :prev_blocknumber and blocknumber <= :blocknumber
+    union
+    select r.repost_item_id, r.repost_type::text
+    from reposts r
+    join changed_users cu on cu.user_id = r.user_id
+    where r.is_current and not r.is_delete
+    union
+    select s.save_item_id, s.save_type::text
+    from saves s
+    join changed_users cu on cu.user_id = s.user_id
+    where s.is_current and not s.is_delete
+    """
+
+
+def rebuild_aggregate_karma(session):
+    session.execute(text("delete from aggregate_karma"))
+    session.execute(text(REBUILD_AGGREGATE_KARMA_QUERY))
+
+
+def update_aggregate_karma(session, items: List[Tuple[int, str]]):
+    """Recomputes the karma buckets of the given (item id, item type)"""
+    for i in range(0, len(items), AGGREGATE_KARMA_BATCH_SIZE):
+        batch = items[i : i + AGGREGATE_KARMA_BATCH_SIZE]
+        params = {
+            "item_ids": [item_id for item_id, _ in batch],
+            "item_types": [item_type for _, item_type in batch],
+        }
+        session.execute(text(DELETE_AGGREGATE_KARMA_QUERY), params)
+        session.execute(text(UPDATE_AGGREGATE_KARMA_QUERY), params)
+
+
+def _index_aggregate_karma(session):
+    prev_blocknumber = get_last_indexed_checkpoint(session, AGGREGATE_KARMA_TABLE_NAME)
+    latest_blocknumber = session.query(func.max(Block.number)).scalar()
+    if not latest_blocknumber:
+        return
+
+    if not prev_blocknumber:
+        logger.info("index_aggregate_karma.py | Rebuilding aggregate_karma")
+        rebuild_aggregate_karma(session)
+    elif latest_blocknumber > prev_blocknumber:
+        changed_items = session.execute(
+            text(CHANGED_KARMA_ITEMS_QUERY),
+            {
+                "prev_blocknumber": prev_blocknumber,
+                "blocknumber": latest_blocknumber,
+            },
+        ).fetchall()
+        update_aggregate_karma(session, [tuple(item) for item in changed_items])
+        logger.info(
+            f"index_aggregate_karma.py | Updated karma of {len(changed_items)} items"
+        )
+    else:
+        return
+
+    save_indexed_checkpoint(session, AGGREGATE_KARMA_TABLE_NAME, latest_blocknumber)
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="index_aggregate_karma", bind=True)
+@save_duration_metric(metric_group="celery_task")
+def index_aggregate_karma(self):
+    """Keeps the karma aggregates read by get_karma up to date"""
+
+    db = index_aggregate_karma.db
+    redis = index_aggregate_karma.redis
+
+    have_lock = False
+    update_lock = redis.lock(INDEX_AGGREGATE_KARMA_LOCK, timeout=60 * 10)
+
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+
+        if have_lock:
+            start_time = time.time()
+            with db.scoped_session() as session:
+                _index_aggregate_karma(session)
+            logger.info(
+                f"index_aggregate_karma.py | Finished in {time.time() - start_time} seconds"
+            )
+        else:
+            logger.info("index_aggregate_karma.py | Failed to acquire lock")
+    except Exception as e:
+        logger.error(
+            "index_aggregate_karma.py | Fatal error in main loop", exc_info=True
+        )
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
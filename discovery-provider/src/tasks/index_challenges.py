@@ -9,10 +9,14 @@ logger = logging.getLogger(__name__)
 index_challenges_last_event_key = ""
 
 
-def index_challenges(event_bus, db, redis):
+def get_index_challenges_lock_key(shard: int) -> str:
+    return f"index_challenges_lock:{shard}"
+
+
+def index_challenges(event_bus, db, redis, shard=None):
     with db.scoped_session() as session:
-        num_processed = event_bus.process_events(session)
-        if num_processed:
+        (num_processed, _) = event_bus.process_events(session, shard=shard)
+        if num_processed > 0:
             redis.set(challenges_last_processed_event_redis_key, int(time.time()))
 
 
@@ -22,17 +26,24 @@ def index_challenges_task(self):
     db = index_challenges_task.db
     redis = index_challenges_task.redis
     event_bus = index_challenges_task.challenge_event_bus
-    have_lock = False
-    update_lock = redis.lock("index_challenges_lock", timeout=7200)
-    try:
-        have_lock = update_lock.acquire(blocking=False)
-        if have_lock:
-            index_challenges(event_bus, db, redis)
-        else:
-            logger.info("index_challenges.py | Failed to acquire index challenges lock")
-    except Exception as e:
-        logger.error("index_challenges.py | Fatal error in main loop", exc_info=True)
-        raise e
-    finally:
-        if have_lock:
-            update_lock.release()
+    # Each shard of the event stream has its own lock so that concurrently running
+    # tasks consume disjoint shards in parallel.
+    for shard in range(event_bus.num_shards):
+        have_lock = False
+        update_lock = redis.lock(get_index_challenges_lock_key(shard), timeout=7200)
+        try:
+            have_lock = update_lock.acquire(blocking=False)
+            if have_lock:
+                index_challenges(event_bus, db, redis, shard)
+            else:
+                logger.info(
+                    f"index_challenges.py | Failed to acquire index challenges lock for shard {shard}"
+                )
+        except Exception as e:
+            logger.error(
+                "index_challenges.py | Fatal error in main loop", exc_info=True
+            )
+            raise e
+        finally:
+            if have_lock:
+                update_lock.release()
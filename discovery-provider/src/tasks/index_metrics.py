@@ -22,6 +22,7 @@ from src.utils.prometheus_metric import (
 from src.utils.redis_metrics import (
     METRICS_INTERVAL,
     datetime_format_secondary,
+    get_redis_metrics,
     get_rounded_date_time,
     get_summed_unique_metrics,
     merge_app_metrics,
@@ -225,31 +226,12 @@ def consolidate_metrics_from_other_nodes(self, db, redis):
     summed_unique_monthly_count = summed_unique_metrics["monthly"]
 
     # Merge & persist metrics for our personal node
-    personal_route_metrics_str = redis.get(personal_route_metrics)
-    personal_route_metrics_dict = (
-        json.loads(personal_route_metrics_str) if personal_route_metrics_str else {}
+    new_personal_route_metrics = get_redis_metrics(
+        redis, one_iteration_ago, personal_route_metrics
     )
-    new_personal_route_metrics = {}
-    for timestamp, metrics in personal_route_metrics_dict.items():
-        if timestamp > one_iteration_ago_str:
-            for ip, count in metrics.items():
-                if ip in new_personal_route_metrics:
-                    new_personal_route_metrics[ip] += count
-                else:
-                    new_personal_route_metrics[ip] = count
-
-    personal_app_metrics_str = redis.get(personal_app_metrics)
-    personal_app_metrics_dict = (
-        json.loads(personal_app_metrics_str) if personal_app_metrics_str else {}
+    new_personal_app_metrics = get_redis_metrics(
+        redis, one_iteration_ago, personal_app_metrics
     )
-    new_personal_app_metrics = {}
-    for timestamp, metrics in personal_app_metrics_dict.items():
-        if timestamp > one_iteration_ago_str:
-            for app_name, count in metrics.items():
-                if app_name in new_personal_app_metrics:
-                    new_personal_app_metrics[app_name] += count
-                else:
-                    new_personal_app_metrics[app_name] = count
 
     merge_route_metrics(new_personal_route_metrics, end_time, db)
     merge_app_metrics(new_personal_app_metrics, end_time, db)
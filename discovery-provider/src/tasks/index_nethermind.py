@@ -4,9 +4,10 @@ import concurrent.futures
 import logging
 import os
 import time
+from collections import defaultdict
 from datetime import datetime
 from operator import itemgetter, or_
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Set, Tuple
 
 from src.challenges.challenge_event_bus import ChallengeEventBus
 from src.challenges.trending_challenge import should_trending_challenge_update
@@ -31,7 +32,10 @@ from src.queries.get_skipped_transactions import (
 )
 from src.queries.skipped_transactions import add_network_level_skipped_transaction
 from src.tasks.celery_app import celery
-from src.tasks.entity_manager.entity_manager import entity_manager_update
+from src.tasks.entity_manager.entity_manager import (
+    entity_manager_update,
+    invalidate_changed_entity_caches,
+)
 from src.tasks.entity_manager.utils import Action, EntityType
 from src.tasks.index import save_cid_metadata
 from src.tasks.sort_block_transactions import sort_block_transactions
@@ -72,7 +76,6 @@ TX_TYPE_TO_HANDLER_MAP = {
 BLOCKS_PER_DAY = (24 * 60 * 60) / 5
 
 logger = logging.getLogger(__name__)
-web3 = web3_provider.get_nethermind_web3()
 
 # HELPER FUNCTIONS
 
@@ -105,6 +108,7 @@ def get_latest_block(db: SessionManager, final_poa_block: int):
             current_block_number + block_processing_window - final_poa_block
         )
 
+        web3 = web3_provider.get_nethermind_web3()
         latest_block_from_chain = web3.eth.get_block("latest", True)
         if os.getenv("audius_discprov_env") != "dev":
             # index 1 block behind to avoid reverting
@@ -128,6 +132,7 @@ def get_latest_block(db: SessionManager, final_poa_block: int):
 
 
 def update_latest_block_redis():
+    web3 = web3_provider.get_nethermind_web3()
     latest_block_from_chain = web3.eth.get_block("latest", True)
     default_indexing_interval_seconds = int(
         update_task.shared_config["discprov"]["block_processing_interval_sec"]
@@ -157,6 +162,7 @@ def fetch_tx_receipt(transaction):
 
 
 def fetch_tx_receipts(self, block):
+    web3 = web3_provider.get_nethermind_web3()
     block_hash = web3.toHex(block.hash)
     block_number = block.number
     block_transactions = block.transactions
@@ -192,6 +198,7 @@ def fetch_tx_receipts(self, block):
 
 
 def fetch_cid_metadata(db, entity_manager_txs):
+    web3 = web3_provider.get_nethermind_web3()
     start_time = datetime.now()
     entity_manager_contract = update_task.entity_manager_contract
 
@@ -365,6 +372,7 @@ def process_state_changes(
         "number", "hash", "timestamp"
     )(block)
 
+    changed_entity_ids: Dict[str, Set[int]] = defaultdict(set)
     for tx_type, bulk_processor in TX_TYPE_TO_HANDLER_MAP.items():
 
         txs_to_process = tx_type_to_grouped_lists_map[tx_type]
@@ -381,14 +389,18 @@ def process_state_changes(
 
         (
             total_changes_for_tx_type,
-            _,
+            changed_entity_ids_for_tx_type,
         ) = bulk_processor(*tx_processing_args)
+        for entity_type, entity_ids in changed_entity_ids_for_tx_type.items():
+            changed_entity_ids[entity_type].update(entity_ids)
 
         logger.info(
             f"index_nethermind.py | {bulk_processor.__name__} completed"
             f" {tx_type}_state_changed={total_changes_for_tx_type > 0} for block={block_number}"
         )
 
+    return changed_entity_ids
+
 
 def create_and_raise_indexing_error(err, redis):
     logger.info(
@@ -432,6 +444,7 @@ def index_blocks(self, db, blocks_list):
         with db.scoped_session() as session, challenge_bus.use_scoped_dispatch_queue():
             skip_tx_hash = get_tx_hash_to_skip(session, redis)
             skip_whole_block = skip_tx_hash == "commit"  # db tx failed at commit level
+            changed_entity_ids: Dict[str, Set[int]] = {}
             if skip_whole_block:
                 logger.info(
                     f"index_nethermind.py | Skipping all txs in block {block.hash} {block.number}"
@@ -548,7 +561,7 @@ def index_blocks(self, db, blocks_list):
                     # bulk process operations once all tx's for block have been parsed
                     # and get changed entity IDs for cache clearing
                     # after session commit
-                    process_state_changes(
+                    changed_entity_ids = process_state_changes(
                         self,
                         session,
                         cid_metadata,
@@ -619,6 +632,17 @@ def index_blocks(self, db, blocks_list):
                     f"index_nethermind.py | Error in calling update trending challenge {e}",
                     exc_info=True,
                 )
+            try:
+                # Clear caches of entities changed in this block now that they are committed
+                invalidate_changed_entity_caches(
+                    redis, changed_entity_ids, block_number
+                )
+            except Exception as e:
+                # Do not throw error, cached entries expire on their own
+                logger.error(
+                    f"index_nethermind.py | Error invalidating caches {e}",
+                    exc_info=True,
+                )
             if skip_tx_hash:
                 clear_indexing_error(redis)
 
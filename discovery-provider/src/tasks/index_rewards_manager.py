@@ -1,9 +1,8 @@
-import concurrent.futures
 import datetime
 import logging
-import time
 from decimal import Decimal
-from typing import Callable, Dict, List, Optional, TypedDict
+from functools import partial
+from typing import Dict, List, Optional, Set, TypedDict
 
 import base58
 from redis import Redis
@@ -21,18 +20,15 @@ from src.models.users.audio_transactions_history import (
 from src.models.users.user import User
 from src.models.users.user_bank import UserBankAccount
 from src.queries.get_balances import enqueue_immediate_balance_refresh
-from src.solana.constants import (
-    FETCH_TX_SIGNATURES_BATCH_SIZE,
-    TX_SIGNATURES_MAX_BATCHES,
-    TX_SIGNATURES_RESIZE_LENGTH,
-)
 from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_parser import (
     InstructionFormat,
     SolanaInstructionType,
     parse_instruction_data,
 )
+from src.solana.solana_program_indexer import SolanaProgramIndexer
 from src.solana.solana_transaction_types import (
+    ConfirmedSignatureForAddressResult,
     ResultMeta,
     TransactionInfoResult,
     TransactionMessage,
@@ -58,10 +54,10 @@ logger = logging.getLogger(__name__)
 REWARDS_MANAGER_PROGRAM = shared_config["solana"]["rewards_manager_program_address"]
 REWARDS_MANAGER_ACCOUNT = shared_config["solana"]["rewards_manager_account"]
 MIN_SLOT = int(shared_config["solana"]["rewards_manager_min_slot"])
+REWARDS_MANAGER_CHECKPOINT = "solana_rewards_manager"
 
 # Used to find the correct accounts for sender/receiver in the transaction
 TRANSFER_RECEIVER_ACCOUNT_INDEX = 4
-INITIAL_FETCH_SIZE = 10
 
 
 def check_valid_rewards_manager_program():
@@ -414,172 +410,30 @@ def get_latest_reward_disbursment_slot(session: Session):
     return latest_slot
 
 
-def get_tx_in_db(session: Session, tx_sig: str) -> bool:
-    """Checks if the transaction signature already exists for Challenge Disburements"""
-    tx_sig_db_count = (
-        session.query(RewardManagerTransaction).filter(
-            RewardManagerTransaction.signature == tx_sig
-        )
-    ).count()
-    exists = tx_sig_db_count > 0
-    return exists
-
-
-def get_transaction_signatures(
-    solana_client_manager: SolanaClientManager,
-    db: SessionManager,
-    program: str,
-    get_latest_slot: Callable[[Session], int],
-    check_tx_exists: Callable[[Session, str], bool],
-    min_slot=None,
-) -> List[List[str]]:
-    """Fetches next batch of transaction signature offset from the previous latest processed slot
-
-    Fetches the latest processed slot for the rewards manager program
-    Iterates backwards from the current tx until an intersection is found with the latest processed slot
-    Returns the next set of transaction signature from the current offset slot to process
-    """
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures = []
-
-    last_tx_signature = None
-
-    # Loop exit condition
-    intersection_found = False
-    is_initial_fetch = True
-
-    # Query for solana transactions until an intersection is found
-    with db.scoped_session() as session:
-        latest_processed_slot = get_latest_slot(session)
-        while not intersection_found:
-            fetch_size = (
-                INITIAL_FETCH_SIZE
-                if is_initial_fetch
-                else FETCH_TX_SIGNATURES_BATCH_SIZE
-            )
-            logger.info(
-                f"index_rewards_manager.py | Requesting {fetch_size} transactions"
-            )
-            transactions_history = solana_client_manager.get_signatures_for_address(
-                program, before=last_tx_signature, limit=fetch_size
-            )
-            is_initial_fetch = False
+def get_txs_in_db(session: Session, tx_sigs: List[str]) -> Set[str]:
+    """Returns the transaction signatures that already exist for Challenge Disburements"""
+    txs_in_db = session.query(RewardManagerTransaction.signature).filter(
+        RewardManagerTransaction.signature.in_(tx_sigs)
+    )
+    return {tx_sig for [tx_sig] in txs_in_db}
 
-            transactions_array = transactions_history["result"]
-            if not transactions_array:
-                intersection_found = True
-                logger.info(
-                    f"index_rewards_manager.py | No transactions found before {last_tx_signature}"
-                )
-            else:
-                # Current batch of transactions
-                transaction_signature_batch = []
-                for tx_info in transactions_array:
-                    tx_sig = tx_info["signature"]
-                    tx_slot = tx_info["slot"]
-                    logger.debug(
-                        f"index_rewards_manager.py | Processing tx={tx_sig} | slot={tx_slot}"
-                    )
-                    if tx_info["slot"] > latest_processed_slot:
-                        transaction_signature_batch.append(tx_sig)
-                    elif tx_info["slot"] <= latest_processed_slot and (
-                        min_slot is None or tx_info["slot"] > min_slot
-                    ):
-                        # Check the tx signature for any txs in the latest batch,
-                        # and if not present in DB, add to processing
-                        logger.info(
-                            f"index_rewards_manager.py | Latest slot re-traversal\
-                            slot={tx_slot}, sig={tx_sig},\
-                            latest_processed_slot(db)={latest_processed_slot}"
-                        )
-                        exists = check_tx_exists(session, tx_sig)
-                        if exists:
-                            intersection_found = True
-                            break
-                        # Ensure this transaction is still processed
-                        transaction_signature_batch.append(tx_sig)
-
-                # Restart processing at the end of this transaction signature batch
-                last_tx = transactions_array[-1]
-                last_tx_signature = last_tx["signature"]
-
-                # Append batch of processed signatures
-                if transaction_signature_batch:
-                    transaction_signatures.append(transaction_signature_batch)
-
-                # Ensure processing does not grow unbounded
-                if len(transaction_signatures) > TX_SIGNATURES_MAX_BATCHES:
-                    # Only take the oldest transaction from the transaction_signatures array
-                    # transaction_signatures is sorted from newest to oldest
-                    transaction_signatures = transaction_signatures[
-                        -TX_SIGNATURES_RESIZE_LENGTH:
-                    ]
-
-    # Reverse batches aggregated so oldest transactions are processed first
-    transaction_signatures.reverse()
-    return transaction_signatures
-
-
-def process_transaction_signatures(
-    solana_client_manager: SolanaClientManager,
-    db: SessionManager,
+
+def persist_reward_manager_txs(
     redis: Redis,
-    transaction_signatures: List[List[str]],
+    session: Session,
+    tx_sigs: List[ConfirmedSignatureForAddressResult],
+    reward_manager_txs: List[RewardManagerTransactionInfo],
 ):
-    """Concurrently processes the transactions to update the DB state for reward transfer instructions"""
-    last_tx_sig: Optional[str] = None
-    last_tx: Optional[RewardManagerTransactionInfo] = None
-    if transaction_signatures and transaction_signatures[-1]:
-        last_tx_sig = transaction_signatures[-1][0]
-
-    for tx_sig_batch in transaction_signatures:
-        logger.info(f"index_rewards_manager.py | processing {tx_sig_batch}")
-        batch_start_time = time.time()
-
-        transfer_instructions: List[RewardManagerTransactionInfo] = []
-        # Process each batch in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            parse_sol_tx_futures = {
-                executor.submit(
-                    fetch_and_parse_sol_rewards_transfer_instruction,
-                    solana_client_manager,
-                    tx_sig,
-                ): tx_sig
-                for tx_sig in tx_sig_batch
-            }
-            for future in concurrent.futures.as_completed(parse_sol_tx_futures):
-                try:
-                    # No return value expected here so we just ensure all futures are resolved
-                    parsed_solana_transfer_instruction = future.result()
-                    if parsed_solana_transfer_instruction is not None:
-                        transfer_instructions.append(parsed_solana_transfer_instruction)
-                        if (
-                            last_tx_sig
-                            and last_tx_sig
-                            == parsed_solana_transfer_instruction["tx_sig"]
-                        ):
-                            last_tx = parsed_solana_transfer_instruction
-                except Exception as exc:
-                    logger.error(f"index_rewards_manager.py | {exc}")
-                    raise exc
-        with db.scoped_session() as session:
-            process_batch_sol_reward_manager_txs(session, transfer_instructions, redis)
-        batch_end_time = time.time()
-        batch_duration = batch_end_time - batch_start_time
-        logger.info(
-            f"index_rewards_manager.py | processed batch {len(tx_sig_batch)} txs in {batch_duration}s"
-        )
-
-    if last_tx:
-        cache_latest_sol_rewards_manager_db_tx(
-            redis,
-            {
-                "signature": last_tx["tx_sig"],
-                "slot": last_tx["slot"],
-                "timestamp": last_tx["timestamp"],
-            },
-        )
-    return last_tx
+    process_batch_sol_reward_manager_txs(session, reward_manager_txs, redis)
+    last_tx = tx_sigs[-1]
+    cache_latest_sol_rewards_manager_db_tx(
+        redis,
+        {
+            "signature": last_tx["signature"],
+            "slot": last_tx["slot"],
+            "timestamp": last_tx["blockTime"],
+        },
+    )
 
 
 def process_solana_rewards_manager(
@@ -601,20 +455,21 @@ def process_solana_rewards_manager(
     except:
         logger.error("index_rewards_manager.py | Failed to get slot")
 
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures = get_transaction_signatures(
-        solana_client_manager,
-        db,
-        REWARDS_MANAGER_PROGRAM,
-        get_latest_reward_disbursment_slot,
-        get_tx_in_db,
-        MIN_SLOT,
-    )
-    logger.info(f"index_rewards_manager.py | {transaction_signatures}")
-
-    last_tx = process_transaction_signatures(
-        solana_client_manager, db, redis, transaction_signatures
+    indexer: SolanaProgramIndexer[RewardManagerTransactionInfo] = SolanaProgramIndexer(
+        name="rewards_manager",
+        program=REWARDS_MANAGER_PROGRAM,
+        solana_client_manager=solana_client_manager,
+        db=db,
+        get_latest_slot=get_latest_reward_disbursment_slot,
+        get_existing_signatures=get_txs_in_db,
+        parse_tx=lambda tx: fetch_and_parse_sol_rewards_transfer_instruction(
+            solana_client_manager, tx["signature"]
+        ),
+        persist_txs=partial(persist_reward_manager_txs, redis),
+        min_slot=MIN_SLOT,
+        checkpoint_name=REWARDS_MANAGER_CHECKPOINT,
     )
+    last_tx = indexer.process()
     if last_tx:
         redis.set(latest_sol_rewards_manager_slot_key, last_tx["slot"])
     elif latest_global_slot is not None:
@@ -1,18 +1,19 @@
-import concurrent.futures
 import json
 import logging
 import time
 from datetime import datetime
-from typing import Dict, Tuple, TypedDict, Union
+from functools import partial
+from typing import Dict, List, Set, Tuple, TypedDict, Union
 
 import base58
 from redis import Redis
 from sqlalchemy import desc
+from sqlalchemy.orm.session import Session
 from src.challenges.challenge_event import ChallengeEvent
 from src.challenges.challenge_event_bus import ChallengeEventBus
 from src.models.social.play import Play
-from src.solana.constants import FETCH_TX_SIGNATURES_BATCH_SIZE
 from src.solana.solana_client_manager import SolanaClientManager
+from src.solana.solana_program_indexer import SolanaProgramIndexer
 from src.solana.solana_transaction_types import ConfirmedSignatureForAddressResult
 from src.tasks.celery_app import celery
 from src.utils.cache_solana_program import (
@@ -21,7 +22,6 @@ from src.utils.cache_solana_program import (
     fetch_and_cache_latest_program_tx_redis,
 )
 from src.utils.config import shared_config
-from src.utils.helpers import split_list
 from src.utils.prometheus_metric import save_duration_metric
 from src.utils.redis_constants import (
     latest_sol_play_db_tx_key,
@@ -33,13 +33,10 @@ TRACK_LISTEN_PROGRAM = shared_config["solana"]["track_listen_count_address"]
 SIGNER_GROUP = shared_config["solana"]["signer_group_address"]
 SECP_PROGRAM = "KeccakSecp256k11111111111111111111111111111"
 
-REDIS_TX_CACHE_QUEUE_PREFIX = "plays-tx-cache-queue"
-
-# Number of signatures that are fetched from RPC and written at once
-# For example, in a batch of 1000 only 100 will be fetched and written in parallel
-# Intended to relieve RPC and DB pressure
-TX_SIGNATURES_PROCESSING_SIZE = 100
 INITIAL_FETCH_SIZE = 30
+SOLANA_PLAYS_CHECKPOINT = "solana_plays"
+# Number of times a batch of plays is re-fetched if any transaction fails
+PARSE_RETRIES = 10
 
 logger = logging.getLogger(__name__)
 
@@ -229,18 +226,17 @@ def parse_sol_play_transaction(solana_client_manager: SolanaClientManager, tx_si
 
 
 # Query the highest traversed solana slot
-def get_latest_slot(db):
+def get_latest_slot(session: Session):
     latest_slot = None
-    with db.scoped_session() as session:
-        highest_slot_query = (
-            session.query(Play)
-            .filter(Play.slot != None)
-            .filter(Play.signature != None)
-            .order_by(desc(Play.slot))
-        ).first()
-        # Can be None prior to first write operations
-        if highest_slot_query is not None:
-            latest_slot = highest_slot_query.slot
+    highest_slot_query = (
+        session.query(Play.slot)
+        .filter(Play.slot != None)
+        .filter(Play.signature != None)
+        .order_by(desc(Play.slot))
+    ).first()
+    # Can be None prior to first write operations
+    if highest_slot_query is not None:
+        latest_slot = highest_slot_query[0]
 
     # If no slots have yet been recorded, assume all are valid
     if latest_slot is None:
@@ -250,13 +246,10 @@ def get_latest_slot(db):
     return latest_slot
 
 
-# Query a tx signature and confirm its existence
-def get_tx_in_db(session, tx_sig):
-    exists = False
-    tx_sig_db_count = (session.query(Play).filter(Play.signature == tx_sig)).count()
-    exists = tx_sig_db_count > 0
-    logger.info(f"index_solana_plays.py | {tx_sig} exists={exists}")
-    return exists
+# Query tx signatures and return the ones that exist
+def get_txs_in_db(session: Session, tx_sigs: List[str]) -> Set[str]:
+    txs_in_db = session.query(Play.signature).filter(Play.signature.in_(tx_sigs))
+    return {tx_sig for [tx_sig] in txs_in_db}
 
 
 # pylint: disable=W0105
@@ -340,108 +333,53 @@ is found - these limiting parameters are defined as TX_SIGNATURES_MAX_BATCHES, T
 """
 
 
-def parse_sol_tx_batch(
-    db, solana_client_manager, redis, tx_sig_batch_records, retries=10
+def persist_plays(
+    redis: Redis,
+    challenge_bus: ChallengeEventBus,
+    session: Session,
+    tx_sig_batch_records: List[ConfirmedSignatureForAddressResult],
+    parsed_plays: List[Tuple],
 ):
-    """
-    Parse a batch of solana transactions in parallel by calling parse_sol_play_transaction
-    with a ThreaPoolExecutor
-
-    This function also has a recursive retry upto a certain limit in case a future doesn't complete
-    within the alloted time. It clears the futures thread queue and the batch is retried
-    """
-    batch_start_time = time.time()
+    """Writes the plays parsed from a batch of transactions and dispatches listen events"""
     challenge_bus_events = []
-    plays = []
+    plays: List[PlayInfo] = []
 
     # Last record in this batch to be cached
-    # Important to note that the batch records are in time DESC order
-    last_tx_in_batch = tx_sig_batch_records[0]
-    challenge_bus = index_solana_plays.challenge_event_bus
-
-    # Process each batch in parallel
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        parse_sol_tx_futures = {
-            executor.submit(
-                parse_sol_play_transaction,
-                solana_client_manager,
-                tx_sig,
-            ): tx_sig
-            for tx_sig in tx_sig_batch_records
+    # Batch records are ordered oldest to newest
+    last_tx_in_batch = tx_sig_batch_records[-1]["signature"]
+
+    for (
+        user_id,
+        track_id,
+        created_at,
+        source,
+        location,
+        slot,
+        tx_sig,
+    ) in parsed_plays:
+        play: PlayInfo = {
+            "user_id": user_id,
+            "play_item_id": track_id,
+            "created_at": created_at,
+            "updated_at": datetime.now(),
+            "source": source,
+            "city": location.get("city"),
+            "region": location.get("region"),
+            "country": location.get("country"),
+            "slot": slot,
+            "signature": tx_sig,
         }
-        try:
-            for future in concurrent.futures.as_completed(
-                parse_sol_tx_futures, timeout=45
-            ):
-                # Returns the properties for a Play object to be created in the db
-                # can be None so check the value exists
-                result = future.result()
-                if result:
-                    (
-                        user_id,
-                        track_id,
-                        created_at,
-                        source,
-                        location,
-                        slot,
-                        tx_sig,
-                    ) = result
-
-                    # Append plays to a list that will be written if all plays are successfully retrieved
-                    # from the rpc pool
-                    play: PlayInfo = {
-                        "user_id": user_id,
-                        "play_item_id": track_id,
-                        "created_at": created_at,
-                        "updated_at": datetime.now(),
-                        "source": source,
-                        "city": location.get("city"),
-                        "region": location.get("region"),
-                        "country": location.get("country"),
-                        "slot": slot,
-                        "signature": tx_sig,
-                    }
-                    plays.append(play)
-                    # Only enqueue a challenge event if it's *not*
-                    # an anonymous listen
-                    if user_id is not None:
-                        challenge_bus_events.append(
-                            {
-                                "slot": slot,
-                                "user_id": user_id,
-                                "created_at": created_at.timestamp(),
-                            }
-                        )
-
-        except Exception as exc:
-            logger.error(
-                f"index_solana_plays.py | Error parsing sol play transaction: {exc}"
+        plays.append(play)
+        # Only enqueue a challenge event if it's *not*
+        # an anonymous listen
+        if user_id is not None:
+            challenge_bus_events.append(
+                {
+                    "slot": slot,
+                    "user_id": user_id,
+                    "created_at": created_at.timestamp(),
+                }
             )
-            # timeout in a ThreadPoolExecutor doesn't actually stop execution of the underlying thread
-            # in order to do that we need to actually clear the queue which we do here to force this
-            # task to stop execution
-            executor._threads.clear()
-            concurrent.futures.thread._threads_queues.clear()
-
-            # if we have retries left, recursively call this function again
-            if retries > 0:
-                return parse_sol_tx_batch(
-                    db, solana_client_manager, redis, tx_sig_batch_records, retries - 1
-                )
-
-            # if no more retries, raise
-            raise exc
-
-        # if the thread pool executor completes successfully without raising an exception
-        # the data is successfully fetched so we can add it to the db session and dispatch
-        # events to challenge bus
-
-    # In the case where an entire batch is comprised of errors, wipe the cache to avoid a future find intersection loop
-    # For example, if the transactions between the latest cached value and database tail are entirely errors, no Play record will be inserted.
-    # This means every subsequent run will continue to no-op on error transactions and the cache will never be updated
-    if tx_sig_batch_records and not plays:
-        logger.info("index_solana_plays.py | Clearing redis cache")
-        redis.delete(REDIS_TX_CACHE_QUEUE_PREFIX)
 
     # Cache the latest play from this batch
     # This reflects the ordering from chain
@@ -455,29 +393,15 @@ def parse_sol_tx_batch(
             cache_latest_sol_play_db_tx(redis, most_recent_db_play)
             break
 
-    db_save_start = time.time()
-    logger.info(
-        f"index_solana_plays.py | DB | Saving test to DB, fetched batch tx details in {db_save_start - batch_start_time}"
-    )
-
     if plays:
-        with db.scoped_session() as session:
-            logger.info(
-                f"index_solana_plays.py | DB | Acquired session in {time.time() - db_save_start}"
-            )
-            session_execute_start = time.time()
-            # Save in bulk
-            session.execute(Play.__table__.insert().values(plays))
-            logger.info(
-                f"index_solana_plays.py | DB | Session execute completed in {time.time() - session_execute_start}"
-            )
-
+        db_save_start = time.time()
+        # Save in bulk
+        session.execute(Play.__table__.insert().values(plays))
         logger.info(
-            f"index_solana_plays.py | DB | Saved to DB in {time.time() - db_save_start}"
+            f"index_solana_plays.py | DB | Session execute completed in {time.time() - db_save_start}"
         )
 
         logger.info("index_solana_plays.py | Dispatching listen events")
-        listen_dispatch_start = time.time()
         for event in challenge_bus_events:
             challenge_bus.dispatch(
                 ChallengeEvent.track_listen,
@@ -485,51 +409,6 @@ def parse_sol_tx_batch(
                 event.get("user_id"),
                 {"created_at": event.get("created_at")},
             )
-        listen_dispatch_end = time.time()
-        listen_dispatch_diff = listen_dispatch_end - listen_dispatch_start
-        logger.info(
-            f"index_solana_plays.py | Dispatched listen events in {listen_dispatch_diff}"
-        )
-
-    batch_end_time = time.time()
-    batch_duration = batch_end_time - batch_start_time
-    logger.info(
-        f"index_solana_plays.py | processed batch {len(tx_sig_batch_records)} txs in {batch_duration}s"
-    )
-    return None
-
-
-# Push to head of array containing seen transactions
-# Used to avoid re-traversal from chain tail when slot diff > certain number
-def cache_traversed_tx(redis: Redis, tx: ConfirmedSignatureForAddressResult):
-    redis.lpush(REDIS_TX_CACHE_QUEUE_PREFIX, json.dumps(tx))
-
-
-# Fetch the cached transaction from redis queue
-# Eliminates transactions one by one if they are < latest db slot
-def fetch_traversed_tx_from_cache(redis: Redis, latest_db_slot: int):
-    cached_offset_tx_found = False
-    while not cached_offset_tx_found:
-        last_cached_tx_raw = redis.lrange(REDIS_TX_CACHE_QUEUE_PREFIX, 0, 1)
-        if last_cached_tx_raw:
-            last_cached_tx: ConfirmedSignatureForAddressResult = json.loads(
-                last_cached_tx_raw[0]
-            )
-            logger.info(
-                f"index_solana_plays.py | processing cached tx = {last_cached_tx}, latest_db_slot = {latest_db_slot}"
-            )
-            redis.ltrim(REDIS_TX_CACHE_QUEUE_PREFIX, 1, -1)
-            # If a single element is remaining, clear the list to avoid dupe processing
-            if redis.llen(REDIS_TX_CACHE_QUEUE_PREFIX) == 1:
-                redis.delete(REDIS_TX_CACHE_QUEUE_PREFIX)
-            # Return if a valid signature is found
-            if last_cached_tx["slot"] > latest_db_slot:
-                cached_offset_tx_found = True
-                last_tx_signature = last_cached_tx["signature"]
-                return last_tx_signature
-        else:
-            break
-    return None
 
 
 def process_solana_plays(solana_client_manager: SolanaClientManager, redis: Redis):
@@ -543,129 +422,37 @@ def process_solana_plays(solana_client_manager: SolanaClientManager, redis: Redi
         return
 
     db = index_solana_plays.db
-
-    # Highest currently processed slot in the DB
-    latest_processed_slot = get_latest_slot(db)
-    logger.info(f"index_solana_plays.py | latest used slot: {latest_processed_slot}")
-
-    # Utilize the cached tx to offset
-    cached_offset_tx = fetch_traversed_tx_from_cache(redis, latest_processed_slot)
-
-    # The 'before' value from where we start querying transactions
-    last_tx_signature = cached_offset_tx
-
-    # Loop exit condition
-    intersection_found = False
-
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures = []
-
-    # Current batch of transactions
-    transaction_signature_batch = []
-
-    # Current batch
-    page_count = 0
-
-    # The last transaction processed
-    last_tx = None
-
-    # The latest play slot to be processed
-    latest_play_slot = None
-    is_initial_fetch = True
+    challenge_bus: ChallengeEventBus = index_solana_plays.challenge_event_bus
 
     # Get the latests slot available globally before fetching txs to keep track of indexing progress
+    latest_global_slot = None
     try:
         latest_global_slot = solana_client_manager.get_slot()
     except:
         logger.error("index_solana_plays.py | Failed to get block height")
 
-    # Traverse recent records until an intersection is found with existing Plays table
-    while not intersection_found:
-        fetch_size = (
-            INITIAL_FETCH_SIZE if is_initial_fetch else FETCH_TX_SIGNATURES_BATCH_SIZE
-        )
-        logger.info(
-            f"index_solana_plays.py | Requesting {fetch_size} transactions before {last_tx_signature}"
-        )
-        transactions_history = solana_client_manager.get_signatures_for_address(
-            TRACK_LISTEN_PROGRAM, before=last_tx_signature, limit=fetch_size
-        )
-        is_initial_fetch = False
-
-        logger.info(
-            f"index_solana_plays.py | Retrieved transactions before {last_tx_signature}"
-        )
-        transactions_array = transactions_history["result"]
-        if not transactions_array:
-            # This is considered an 'intersection' since there are no further transactions to process but
-            # really represents the end of known history for this ProgramId
-            intersection_found = True
-            logger.info(
-                f"index_solana_plays.py | No transactions found before {last_tx_signature}"
-            )
-        else:
-            with db.scoped_session() as read_session:
-                for tx in transactions_array:
-                    tx_sig = tx["signature"]
-                    slot = tx["slot"]
-                    if tx["slot"] > latest_processed_slot:
-                        transaction_signature_batch.append(tx_sig)
-                    elif tx["slot"] <= latest_processed_slot:
-                        # Check the tx signature for any txs in the latest batch,
-                        # and if not present in DB, add to processing
-                        logger.info(
-                            f"index_solana_plays.py | Latest slot re-traversal\
-                            slot={slot}, sig={tx_sig},\
-                            latest_processed_slot(db)={latest_processed_slot}"
-                        )
-                        exists = get_tx_in_db(read_session, tx_sig)
-                        if exists:
-                            # Exit loop and set terminal condition since this tx has been found in DB
-                            # Transactions are returned with most recently committed first, so we can assume
-                            # subsequent transactions in this batch have already been processed
-                            intersection_found = True
-                            break
-                        # Otherwise, ensure this transaction is still processed
-                        transaction_signature_batch.append(tx_sig)
-                # Restart processing at the end of this transaction signature batch
-
-                # get latest play slot from the first fetch
-                if transaction_signature_batch and not latest_play_slot:
-                    latest_play_slot = transactions_array[0]["slot"]
-
-                last_tx = transactions_array[-1]
-                last_tx_signature = last_tx["signature"]
-
-                # Append to recently seen cache
-                cache_traversed_tx(redis, last_tx)
-
-                # Append batch of processed signatures
-                if transaction_signature_batch:
-                    transaction_signatures.append(transaction_signature_batch)
-
-                # Reset batch state
-                transaction_signature_batch = []
-
-        logger.info(
-            f"index_solana_plays.py | intersection_found={intersection_found},\
-            last_tx_signature={last_tx_signature},\
-            page_count={page_count}"
-        )
-        page_count = page_count + 1
-
-    transaction_signatures.reverse()
-
-    for tx_sig_batch in transaction_signatures:
-        for tx_sig_batch_records in split_list(
-            tx_sig_batch, TX_SIGNATURES_PROCESSING_SIZE
-        ):
-            parse_sol_tx_batch(db, solana_client_manager, redis, tx_sig_batch_records)
+    indexer: SolanaProgramIndexer[Tuple] = SolanaProgramIndexer(
+        name="plays",
+        program=TRACK_LISTEN_PROGRAM,
+        solana_client_manager=solana_client_manager,
+        db=db,
+        get_latest_slot=get_latest_slot,
+        get_existing_signatures=get_txs_in_db,
+        parse_tx=lambda tx: parse_sol_play_transaction(
+            solana_client_manager, tx["signature"]
+        ),
+        persist_txs=partial(persist_plays, redis, challenge_bus),
+        initial_fetch_size=INITIAL_FETCH_SIZE,
+        parse_retries=PARSE_RETRIES,
+        checkpoint_name=SOLANA_PLAYS_CHECKPOINT,
+    )
+    last_tx = indexer.process()
 
-    if latest_play_slot:
+    if last_tx:
         logger.info(
-            f"index_solana_plays.py | Setting latest plays slot {latest_play_slot}"
+            f"index_solana_plays.py | Setting latest plays slot {last_tx['slot']}"
         )
-        redis.set(latest_sol_plays_slot_key, latest_play_slot)
+        redis.set(latest_sol_plays_slot_key, last_tx["slot"])
 
     elif latest_global_slot is not None:
         logger.info(
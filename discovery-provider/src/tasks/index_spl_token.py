@@ -1,14 +1,13 @@
-import concurrent.futures
 import datetime
-import json
 import logging
-import time
 from decimal import Decimal
+from functools import partial
 from typing import Any, List, Optional, Set, TypedDict
 
 import base58
 from redis import Redis
 from solana.publickey import PublicKey
+from sqlalchemy.orm.session import Session
 from src.exceptions import SolanaTransactionFetchError
 from src.models.indexing.spl_token_transaction import SPLTokenTransaction
 from src.models.users.associated_wallet import AssociatedWallet, WalletChain
@@ -20,17 +19,10 @@ from src.models.users.audio_transactions_history import (
 from src.models.users.user import User
 from src.models.users.user_bank import UserBankAccount
 from src.queries.get_balances import enqueue_immediate_balance_refresh
-from src.solana.constants import (
-    FETCH_TX_SIGNATURES_BATCH_SIZE,
-    TX_SIGNATURES_MAX_BATCHES,
-    TX_SIGNATURES_RESIZE_LENGTH,
-)
 from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_helpers import SPL_TOKEN_ID, get_base_address
-from src.solana.solana_transaction_types import (
-    ConfirmedSignatureForAddressResult,
-    ConfirmedTransaction,
-)
+from src.solana.solana_program_indexer import SolanaProgramIndexer
+from src.solana.solana_transaction_types import ConfirmedSignatureForAddressResult
 from src.tasks.celery_app import celery
 from src.utils.cache_solana_program import (
     CachedProgramTxInfo,
@@ -60,12 +52,7 @@ USER_BANK_PUBKEY = PublicKey(USER_BANK_ADDRESS) if USER_BANK_ADDRESS else None
 PURCHASE_AUDIO_MEMO_PROGRAM = "Memo1UhkJRfHyvLMcVucJwxXeuD728EqVDDwQDxFMNo"
 TRANSFER_CHECKED_INSTRUCTION = "Program log: Instruction: TransferChecked"
 
-REDIS_TX_CACHE_QUEUE_PREFIX = "spl-token-tx-cache-queue"
-
-# Number of signatures that are fetched from RPC and written at once
-# For example, in a batch of 1000 only 100 will be fetched and written in parallel
-# Intended to relieve RPC and DB pressure
-TX_SIGNATURES_PROCESSING_SIZE = 100
+SPL_TOKEN_CHECKPOINT = "solana_spl_token"
 
 # Index of memo instruction in instructions list
 MEMO_INSTRUCTION_INDEX = 4
@@ -76,7 +63,6 @@ RECEIVER_ACCOUNT_INDEX = 2
 # Though we don't index transfers from the sender's side in this task, we must still
 # enqueue the sender's accounts for balance refreshes if they are Audius accounts.
 SENDER_ACCOUNT_INDEX = 0
-INITIAL_FETCH_SIZE = 10
 
 purchase_vendor_map = {
     "Link by Stripe": TransactionType.purchase_stripe,
@@ -272,188 +258,142 @@ def process_spl_token_transactions(
 
 
 # Query the highest traversed solana slot
-def get_latest_slot(db):
+def get_latest_slot(session: Session) -> Optional[int]:
     latest_slot = None
-    with db.scoped_session() as session:
-        highest_slot_query = session.query(
-            SPLTokenTransaction.last_scanned_slot
-        ).first()
-        # Can be None prior to first write operations
-        if highest_slot_query is not None:
-            latest_slot = highest_slot_query[0]
+    highest_slot_query = session.query(SPLTokenTransaction.last_scanned_slot).first()
+    # Can be None prior to first write operations
+    if highest_slot_query is not None:
+        latest_slot = highest_slot_query[0]
 
     # Return None if not yet cached
     return latest_slot
 
 
-def parse_sol_tx_batch(
-    db: SessionManager,
-    solana_client_manager: SolanaClientManager,
+def persist_spl_token_txs(
     redis: Redis,
-    tx_sig_batch_records: List[ConfirmedSignatureForAddressResult],
     solana_logger: SolanaIndexingLogger,
+    session: Session,
+    tx_sig_batch_records: List[ConfirmedSignatureForAddressResult],
+    spl_token_txs: List[SplTokenTransactionInfo],
 ):
-    """
-    Parse a batch of solana transactions in parallel by calling parse_spl_token_transaction
-    with a ThreaPoolExecutor
-
-    This function also has a recursive retry upto a certain limit in case a future doesn't complete
-    within the alloted time. It clears the futures thread queue and the batch is retried
-    """
-    batch_start_time = time.time()
-    # Last record in this batch to be cached
-    # Important to note that the batch records are in time DESC order
+    """Writes the spl token transfers of a batch and advances the last scanned slot"""
     updated_root_accounts: Set[str] = set()
     updated_token_accounts: Set[str] = set()
-    spl_token_txs: List[ConfirmedTransaction] = []
-    # Process each batch in parallel
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        parse_sol_tx_futures = {
-            executor.submit(
-                parse_spl_token_transaction,
-                solana_client_manager,
-                tx_sig,
-            ): tx_sig
-            for tx_sig in tx_sig_batch_records
-        }
-        try:
-            for future in concurrent.futures.as_completed(
-                parse_sol_tx_futures, timeout=45
-            ):
-                tx_info = future.result()
-                if not tx_info:
-                    continue
-                updated_root_accounts.update(tx_info["root_accounts"])
-                updated_token_accounts.update(tx_info["token_accounts"])
-                spl_token_txs.append(tx_info)
-
-        except Exception as exc:
-            logger.error(
-                f"index_spl_token.py | Error parsing sol spl token transaction: {exc}"
-            )
-            raise exc
+    for tx_info in spl_token_txs:
+        updated_root_accounts.update(tx_info["root_accounts"])
+        updated_token_accounts.update(tx_info["token_accounts"])
 
     update_user_ids: Set[int] = set()
-    with db.scoped_session() as session:
-        if updated_token_accounts:
-            user_result = (
-                session.query(User.user_id, UserBankAccount.bank_account)
-                .join(UserBankAccount, UserBankAccount.ethereum_address == User.wallet)
-                .filter(
-                    UserBankAccount.bank_account.in_(list(updated_token_accounts)),
-                    User.is_current == True,
-                )
-                .all()
+    if updated_token_accounts:
+        user_result = (
+            session.query(User.user_id, UserBankAccount.bank_account)
+            .join(UserBankAccount, UserBankAccount.ethereum_address == User.wallet)
+            .filter(
+                UserBankAccount.bank_account.in_(list(updated_token_accounts)),
+                User.is_current == True,
             )
-            user_set = {user[0] for user in user_result}
-            user_bank_set = {user[1] for user in user_result}
-            update_user_ids.update(user_set)
-
-            audio_txs = process_spl_token_transactions(spl_token_txs, user_bank_set)
-            session.bulk_save_objects(audio_txs)
-
-        if updated_root_accounts:
-            # Remove the user bank owner
-            user_bank_owner, _ = get_base_address(SPL_TOKEN_PUBKEY, USER_BANK_PUBKEY)
-            updated_root_accounts.discard(str(user_bank_owner))
-
-            associated_wallet_result = (
-                session.query(AssociatedWallet.user_id).filter(
-                    AssociatedWallet.is_current == True,
-                    AssociatedWallet.is_delete == False,
-                    AssociatedWallet.chain == WalletChain.sol,
-                    AssociatedWallet.wallet.in_(list(updated_root_accounts)),
-                )
-            ).all()
-            associated_wallet_set = {user_id for [user_id] in associated_wallet_result}
-            update_user_ids.update(associated_wallet_set)
-
-        user_ids = list(update_user_ids)
-        if user_ids:
-            logger.info(
-                f"index_spl_token.py | Enqueueing user ids {user_ids} to immediate balance refresh queue"
+            .all()
+        )
+        user_set = {user[0] for user in user_result}
+        user_bank_set = {user[1] for user in user_result}
+        update_user_ids.update(user_set)
+
+        audio_txs = process_spl_token_transactions(spl_token_txs, user_bank_set)
+        session.bulk_save_objects(audio_txs)
+
+    if updated_root_accounts:
+        # Remove the user bank owner
+        user_bank_owner, _ = get_base_address(SPL_TOKEN_PUBKEY, USER_BANK_PUBKEY)
+        updated_root_accounts.discard(str(user_bank_owner))
+
+        associated_wallet_result = (
+            session.query(AssociatedWallet.user_id).filter(
+                AssociatedWallet.is_current == True,
+                AssociatedWallet.is_delete == False,
+                AssociatedWallet.chain == WalletChain.sol,
+                AssociatedWallet.wallet.in_(list(updated_root_accounts)),
             )
-            enqueue_immediate_balance_refresh(redis, user_ids)
-
-        if tx_sig_batch_records:
-            last_tx = tx_sig_batch_records[0]
+        ).all()
+        associated_wallet_set = {user_id for [user_id] in associated_wallet_result}
+        update_user_ids.update(associated_wallet_set)
+
+    user_ids = list(update_user_ids)
+    if user_ids:
+        logger.info(
+            f"index_spl_token.py | Enqueueing user ids {user_ids} to immediate balance refresh queue"
+        )
+        enqueue_immediate_balance_refresh(redis, user_ids)
 
-            last_scanned_slot = last_tx["slot"]
-            last_scanned_signature = last_tx["signature"]
-            solana_logger.add_log(
-                f"Updating last_scanned_slot to {last_scanned_slot} and signature to {last_scanned_signature}"
-            )
-            cache_latest_spl_audio_db_tx(
-                redis,
-                {
-                    "signature": last_scanned_signature,
-                    "slot": last_scanned_slot,
-                    "timestamp": last_tx["blockTime"],
-                },
-            )
+    if tx_sig_batch_records:
+        # Batch records are ordered oldest to newest
+        last_tx = tx_sig_batch_records[-1]
 
-            record = session.query(SPLTokenTransaction).first()
-            if record:
-                record.last_scanned_slot = last_scanned_slot
-                record.signature = last_scanned_signature
-            else:
-                record = SPLTokenTransaction(
-                    last_scanned_slot=last_scanned_slot,
-                    signature=last_scanned_signature,
-                )
-            session.add(record)
+        last_scanned_slot = last_tx["slot"]
+        last_scanned_signature = last_tx["signature"]
+        solana_logger.add_log(
+            f"Updating last_scanned_slot to {last_scanned_slot} and signature to {last_scanned_signature}"
+        )
+        cache_latest_spl_audio_db_tx(
+            redis,
+            {
+                "signature": last_scanned_signature,
+                "slot": last_scanned_slot,
+                "timestamp": last_tx["blockTime"],
+            },
+        )
 
-    batch_end_time = time.time()
-    batch_duration = batch_end_time - batch_start_time
-    solana_logger.add_log(
-        f"processed batch {len(tx_sig_batch_records)} txs in {batch_duration}s"
-    )
+        record = session.query(SPLTokenTransaction).first()
+        if record:
+            record.last_scanned_slot = last_scanned_slot
+            record.signature = last_scanned_signature
+        else:
+            record = SPLTokenTransaction(
+                last_scanned_slot=last_scanned_slot,
+                signature=last_scanned_signature,
+            )
+        session.add(record)
 
     return (update_user_ids, updated_root_accounts, updated_token_accounts)
 
 
-def split_list(list, n):
-    for i in range(0, len(list), n):
-        yield list[i : i + n]
-
-
-# Push to head of array containing seen transactions
-# Used to avoid re-traversal from chain tail when slot diff > certain number
-def cache_traversed_tx(redis: Redis, tx: ConfirmedSignatureForAddressResult):
-    redis.lpush(REDIS_TX_CACHE_QUEUE_PREFIX, json.dumps(tx))
+def get_spl_token_indexer(
+    solana_client_manager: SolanaClientManager,
+    db: SessionManager,
+    redis: Redis,
+    solana_logger: SolanaIndexingLogger,
+    persist_txs=None,
+) -> SolanaProgramIndexer[SplTokenTransactionInfo]:
+    return SolanaProgramIndexer(
+        name="spl_token",
+        program=SPL_TOKEN_PROGRAM,
+        solana_client_manager=solana_client_manager,
+        db=db,
+        get_latest_slot=get_latest_slot,
+        parse_tx=partial(parse_spl_token_transaction, solana_client_manager),
+        persist_txs=persist_txs or partial(persist_spl_token_txs, redis, solana_logger),
+        checkpoint_name=SPL_TOKEN_CHECKPOINT,
+    )
 
 
-# Fetch the cached transaction from redis queue
-# Eliminates transactions one by one if they are < latest db slot
-def fetch_traversed_tx_from_cache(redis: Redis, latest_db_slot: Optional[int]):
-    if latest_db_slot is None:
-        return None
-    cached_offset_tx_found = False
-    while not cached_offset_tx_found:
-        last_cached_tx_raw = redis.lrange(REDIS_TX_CACHE_QUEUE_PREFIX, 0, 1)
-        if last_cached_tx_raw:
-            last_cached_tx: ConfirmedSignatureForAddressResult = json.loads(
-                last_cached_tx_raw[0]
-            )
-            redis.ltrim(REDIS_TX_CACHE_QUEUE_PREFIX, 1, -1)
-            # If a single element is remaining, clear the list to avoid dupe processing
-            if redis.llen(REDIS_TX_CACHE_QUEUE_PREFIX) == 1:
-                redis.delete(REDIS_TX_CACHE_QUEUE_PREFIX)
-            # Return if a valid signature is found
-            if last_cached_tx["slot"] > latest_db_slot:
-                cached_offset_tx_found = True
-                last_tx_signature = last_cached_tx["signature"]
-                return last_tx_signature
-        else:
-            break
-    return None
+def parse_sol_tx_batch(
+    db: SessionManager,
+    solana_client_manager: SolanaClientManager,
+    redis: Redis,
+    tx_sig_batch_records: List[ConfirmedSignatureForAddressResult],
+    solana_logger: SolanaIndexingLogger,
+):
+    """
+    Parse a batch of solana transactions in parallel by calling parse_spl_token_transaction
+    and write the results, records are ordered oldest to newest
+    """
+    indexer = get_spl_token_indexer(solana_client_manager, db, redis, solana_logger)
+    return indexer.process_batch(tx_sig_batch_records)
 
 
 def process_spl_token_tx(
     solana_client_manager: SolanaClientManager, db: SessionManager, redis: Redis
 ):
     solana_logger = SolanaIndexingLogger("index_spl_token")
-    solana_logger.start_time("fetch_batches")
     try:
         base58.b58decode(SPL_TOKEN_PROGRAM)
     except ValueError:
@@ -463,109 +403,23 @@ def process_spl_token_tx(
         )
         return
 
-    # Highest currently processed slot in the DB
-    latest_processed_slot = get_latest_slot(db)
-    solana_logger.add_log(f"latest used slot: {latest_processed_slot}")
-
-    # Utilize the cached tx to offset
-    cached_offset_tx = fetch_traversed_tx_from_cache(redis, latest_processed_slot)
-
-    # The 'before' value from where we start querying transactions
-    last_tx_signature = cached_offset_tx
-
-    # Loop exit condition
-    intersection_found = False
-
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures: List[ConfirmedSignatureForAddressResult] = []
-
-    # Current batch of transactions
-    transaction_signature_batch = []
-
-    # Current batch
-    page_count = 0
-    is_initial_fetch = True
-
-    # Traverse recent records until an intersection is found with latest slot
-    while not intersection_found:
-        fetch_size = (
-            INITIAL_FETCH_SIZE if is_initial_fetch else FETCH_TX_SIGNATURES_BATCH_SIZE
-        )
-        solana_logger.add_log(
-            f"Requesting {fetch_size} transactions before {last_tx_signature}"
-        )
-        transactions_history = solana_client_manager.get_signatures_for_address(
-            SPL_TOKEN_PROGRAM,
-            before=last_tx_signature,
-            limit=fetch_size,
-        )
-        is_initial_fetch = False
-        solana_logger.add_log(f"Retrieved transactions before {last_tx_signature}")
-        transactions_array = transactions_history["result"]
-        if not transactions_array:
-            # This is considered an 'intersection' since there are no further transactions to process but
-            # really represents the end of known history for this ProgramId
-            intersection_found = True
-            solana_logger.add_log(f"No transactions found before {last_tx_signature}")
-        else:
-            # handle initial case where no there is no stored latest processed slot and start from current
-            if latest_processed_slot is None:
-                logger.debug("index_spl_token.py | setting from none")
-                transaction_signature_batch = transactions_array
-                intersection_found = True
-            else:
-                for tx in transactions_array:
-                    if tx["slot"] > latest_processed_slot:
-                        transaction_signature_batch.append(tx)
-                    elif tx["slot"] <= latest_processed_slot:
-                        intersection_found = True
-                        break
-            # Restart processing at the end of this transaction signature batch
-            last_tx = transactions_array[-1]
-            last_tx_signature = last_tx["signature"]
-
-            # Append to recently seen cache
-            cache_traversed_tx(redis, last_tx)
-
-            # Append batch of processed signatures
-            if transaction_signature_batch:
-                transaction_signatures.append(transaction_signature_batch)
-
-            # Ensure processing does not grow unbounded
-            if len(transaction_signatures) > TX_SIGNATURES_MAX_BATCHES:
-                solana_logger.add_log(
-                    f"slicing tx_sigs from {len(transaction_signatures)} entries"
-                )
-                transaction_signatures = transaction_signatures[
-                    -TX_SIGNATURES_RESIZE_LENGTH:
-                ]
-
-            # Reset batch state
-            transaction_signature_batch = []
+    totals = {"user_ids": 0, "root_accts": 0, "token_accts": 0}
 
-        solana_logger.add_log(
-            f"intersection_found={intersection_found},\
-            last_tx_signature={last_tx_signature},\
-            page_count={page_count}"
+    def persist_txs(session, tx_sig_batch_records, spl_token_txs):
+        user_ids, root_accounts, token_accounts = persist_spl_token_txs(
+            redis, solana_logger, session, tx_sig_batch_records, spl_token_txs
         )
-        page_count = page_count + 1
+        totals["user_ids"] += len(user_ids)
+        totals["root_accts"] += len(root_accounts)
+        totals["token_accts"] += len(token_accounts)
 
-    transaction_signatures.reverse()
-    totals = {"user_ids": 0, "root_accts": 0, "token_accts": 0}
-    solana_logger.end_time("fetch_batches")
-    solana_logger.start_time("parse_batches")
-    for tx_sig_batch in transaction_signatures:
-        for tx_sig_batch_records in split_list(
-            tx_sig_batch, TX_SIGNATURES_PROCESSING_SIZE
-        ):
-            user_ids, root_accounts, token_accounts = parse_sol_tx_batch(
-                db, solana_client_manager, redis, tx_sig_batch_records, solana_logger
-            )
-            totals["user_ids"] += len(user_ids)
-            totals["root_accts"] += len(root_accounts)
-            totals["token_accts"] += len(token_accounts)
+    indexer = get_spl_token_indexer(
+        solana_client_manager, db, redis, solana_logger, persist_txs
+    )
 
-    solana_logger.end_time("parse_batches")
+    solana_logger.start_time("process")
+    indexer.process()
+    solana_logger.end_time("process")
     solana_logger.add_context("total_user_ids_updated", totals["user_ids"])
     solana_logger.add_context("total_root_accts_updated", totals["root_accts"])
     solana_logger.add_context("total_token_accts_updated", totals["token_accts"])
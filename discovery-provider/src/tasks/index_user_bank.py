@@ -1,10 +1,9 @@
-import concurrent.futures
 import datetime
 import logging
 import re
-import time
 from decimal import Decimal
-from typing import List, Optional, TypedDict
+from functools import partial
+from typing import List, Optional, Set, Tuple, TypedDict
 
 import base58
 from redis import Redis
@@ -22,11 +21,6 @@ from src.models.users.user import User
 from src.models.users.user_bank import UserBankAccount, UserBankTx
 from src.models.users.user_tip import UserTip
 from src.queries.get_balances import enqueue_immediate_balance_refresh
-from src.solana.constants import (
-    FETCH_TX_SIGNATURES_BATCH_SIZE,
-    TX_SIGNATURES_MAX_BATCHES,
-    TX_SIGNATURES_RESIZE_LENGTH,
-)
 from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_helpers import SPL_TOKEN_ID_PK, get_address_pair
 from src.solana.solana_parser import (
@@ -34,7 +28,9 @@ from src.solana.solana_parser import (
     SolanaInstructionType,
     parse_instruction_data,
 )
+from src.solana.solana_program_indexer import SolanaProgramIndexer
 from src.solana.solana_transaction_types import (
+    ConfirmedSignatureForAddressResult,
     ConfirmedTransaction,
     ResultMeta,
     TransactionInfoResult,
@@ -69,7 +65,7 @@ WAUDIO_MINT_PUBKEY = PublicKey(WAUDIO_MINT) if WAUDIO_MINT else None
 
 # Used to limit tx history if needed
 MIN_SLOT = int(shared_config["solana"]["user_bank_min_slot"])
-INITIAL_FETCH_SIZE = 10
+USER_BANK_CHECKPOINT = "solana_user_bank"
 
 # Used to find the correct accounts for sender/receiver in the transaction
 TRANSFER_SENDER_ACCOUNT_INDEX = 1
@@ -106,14 +102,12 @@ def cache_latest_sol_user_bank_db_tx(redis: Redis, tx):
     cache_latest_sol_db_tx(redis, latest_sol_user_bank_db_tx_key, tx)
 
 
-# Query a tx signature and confirm its existence
-def get_tx_in_db(session: Session, tx_sig: str) -> bool:
-    exists = False
-    tx_sig_db_count = (
-        session.query(UserBankTx).filter(UserBankTx.signature == tx_sig)
-    ).count()
-    exists = tx_sig_db_count > 0
-    return exists
+# Query tx signatures and return the ones that exist
+def get_txs_in_db(session: Session, tx_sigs: List[str]) -> Set[str]:
+    txs_in_db = session.query(UserBankTx.signature).filter(
+        UserBankTx.signature.in_(tx_sigs)
+    )
+    return {tx_sig for [tx_sig] in txs_in_db}
 
 
 def refresh_user_balances(session: Session, redis: Redis, accts=List[str]):
@@ -369,14 +363,19 @@ def process_user_bank_tx_details(
         )
 
 
+def fetch_user_bank_transaction(
+    solana_client_manager: SolanaClientManager, tx_sig: str
+) -> Tuple[str, ConfirmedTransaction]:
+    return tx_sig, solana_client_manager.get_sol_tx_info(tx_sig)
+
+
 def parse_user_bank_transaction(
     session: Session,
-    solana_client_manager: SolanaClientManager,
-    tx_sig,
-    redis,
+    tx_sig: str,
+    tx_info: ConfirmedTransaction,
+    redis: Redis,
     challenge_event_bus: ChallengeEventBus,
 ):
-    tx_info = solana_client_manager.get_sol_tx_info(tx_sig)
     tx_slot = tx_info["result"]["slot"]
     timestamp = tx_info["result"]["blockTime"]
     parsed_timestamp = datetime.datetime.utcfromtimestamp(timestamp)
@@ -390,7 +389,29 @@ def parse_user_bank_transaction(
         session, redis, tx_info, tx_sig, parsed_timestamp, challenge_event_bus
     )
     session.add(UserBankTx(signature=tx_sig, slot=tx_slot, created_at=parsed_timestamp))
-    return (tx_info["result"], tx_sig)
+
+
+def persist_user_bank_txs(
+    redis: Redis,
+    challenge_event_bus: ChallengeEventBus,
+    session: Session,
+    tx_sigs: List[ConfirmedSignatureForAddressResult],
+    user_bank_txs: List[Tuple[str, ConfirmedTransaction]],
+):
+    # Transactions are applied in chain order so balances settle correctly
+    for tx_sig, tx_info in user_bank_txs:
+        parse_user_bank_transaction(
+            session, tx_sig, tx_info, redis, challenge_event_bus
+        )
+    last_tx = tx_sigs[-1]
+    cache_latest_sol_user_bank_db_tx(
+        redis,
+        {
+            "signature": last_tx["signature"],
+            "slot": last_tx["slot"],
+            "timestamp": last_tx["blockTime"],
+        },
+    )
 
 
 def process_user_bank_txs():
@@ -408,144 +429,29 @@ def process_user_bank_txs():
         )
         return
 
-    # List of signatures that will be populated as we traverse recent operations
-    transaction_signatures = []
-
-    last_tx_signature = None
-
-    # Loop exit condition
-    intersection_found = False
-    is_initial_fetch = True
-
     # Get the latests slot available globally before fetching txs to keep track of indexing progress
     try:
         latest_global_slot = solana_client_manager.get_slot()
     except:
         logger.error("index_user_bank.py | Failed to get block height")
 
-    # Query for solana transactions until an intersection is found
-    with db.scoped_session() as session:
-        latest_processed_slot = get_highest_user_bank_tx_slot(session)
-        logger.info(f"index_user_bank.py | high tx = {latest_processed_slot}")
-        while not intersection_found:
-            fetch_size = (
-                INITIAL_FETCH_SIZE
-                if is_initial_fetch
-                else FETCH_TX_SIGNATURES_BATCH_SIZE
-            )
-            logger.info(f"index_user_bank.py | Requesting {fetch_size} transactions")
-            transactions_history = solana_client_manager.get_signatures_for_address(
-                USER_BANK_ADDRESS, before=last_tx_signature, limit=fetch_size
-            )
-            is_initial_fetch = False
-            transactions_array = transactions_history["result"]
-            if not transactions_array:
-                intersection_found = True
-                logger.info(
-                    f"index_user_bank.py | No transactions found before {last_tx_signature}"
-                )
-            else:
-                # Current batch of transactions
-                transaction_signature_batch = []
-                for tx_info in transactions_array:
-                    tx_sig = tx_info["signature"]
-                    tx_slot = tx_info["slot"]
-                    logger.debug(
-                        f"index_user_bank.py | Processing tx={tx_sig} | slot={tx_slot}"
-                    )
-                    if tx_info["slot"] > latest_processed_slot:
-                        transaction_signature_batch.append(tx_sig)
-                    elif (
-                        tx_info["slot"] <= latest_processed_slot
-                        and tx_info["slot"] > MIN_SLOT
-                    ):
-                        # Check the tx signature for any txs in the latest batch,
-                        # and if not present in DB, add to processing
-                        logger.info(
-                            f"index_user_bank.py | Latest slot re-traversal\
-                            slot={tx_slot}, sig={tx_sig},\
-                            latest_processed_slot(db)={latest_processed_slot}"
-                        )
-                        exists = get_tx_in_db(session, tx_sig)
-                        if exists:
-                            intersection_found = True
-                            break
-                        # Ensure this transaction is still processed
-                        transaction_signature_batch.append(tx_sig)
-
-                # Restart processing at the end of this transaction signature batch
-                last_tx = transactions_array[-1]
-                last_tx_signature = last_tx["signature"]
-
-                # Append batch of processed signatures
-                if transaction_signature_batch:
-                    transaction_signatures.append(transaction_signature_batch)
-
-                # Ensure processing does not grow unbounded
-                if len(transaction_signatures) > TX_SIGNATURES_MAX_BATCHES:
-                    prev_len = len(transaction_signatures)
-                    # Only take the oldest transaction from the transaction_signatures array
-                    # transaction_signatures is sorted from newest to oldest
-                    transaction_signatures = transaction_signatures[
-                        -TX_SIGNATURES_RESIZE_LENGTH:
-                    ]
-                    logger.info(
-                        f"index_user_bank.py | sliced tx_sigs from {prev_len} to {len(transaction_signatures)} entries"
-                    )
-
-    # Reverse batches aggregated so oldest transactions are processed first
-    transaction_signatures.reverse()
-
-    last_tx_sig: Optional[str] = None
-    last_tx = None
-    if transaction_signatures and transaction_signatures[-1]:
-        last_tx_sig = transaction_signatures[-1][0]
-
-    num_txs_processed = 0
-    for tx_sig_batch in transaction_signatures:
-        logger.info(f"index_user_bank.py | processing {tx_sig_batch}")
-        batch_start_time = time.time()
-        # Process each batch in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            with db.scoped_session() as session:
-                parse_sol_tx_futures = {
-                    executor.submit(
-                        parse_user_bank_transaction,
-                        session,
-                        solana_client_manager,
-                        tx_sig,
-                        redis,
-                        challenge_bus,
-                    ): tx_sig
-                    for tx_sig in tx_sig_batch
-                }
-                for future in concurrent.futures.as_completed(parse_sol_tx_futures):
-                    try:
-                        # No return value expected here so we just ensure all futures are resolved
-                        tx_info, tx_sig = future.result()
-                        if tx_info and last_tx_sig and last_tx_sig == tx_sig:
-                            last_tx = tx_info
-
-                        num_txs_processed += 1
-                    except Exception as exc:
-                        logger.error(f"index_user_bank.py | error {exc}", exc_info=True)
-                        raise
-
-        batch_end_time = time.time()
-        batch_duration = batch_end_time - batch_start_time
-        logger.info(
-            f"index_user_bank.py | processed batch {len(tx_sig_batch)} txs in {batch_duration}s"
-        )
-
-    if last_tx and last_tx_sig:
-        cache_latest_sol_user_bank_db_tx(
-            redis,
-            {
-                "signature": last_tx_sig,
-                "slot": last_tx["slot"],
-                "timestamp": last_tx["blockTime"],
-            },
-        )
+    indexer: SolanaProgramIndexer[
+        Tuple[str, ConfirmedTransaction]
+    ] = SolanaProgramIndexer(
+        name="user_bank",
+        program=USER_BANK_ADDRESS,
+        solana_client_manager=solana_client_manager,
+        db=db,
+        get_latest_slot=get_highest_user_bank_tx_slot,
+        get_existing_signatures=get_txs_in_db,
+        parse_tx=lambda tx: fetch_user_bank_transaction(
+            solana_client_manager, tx["signature"]
+        ),
+        persist_txs=partial(persist_user_bank_txs, redis, challenge_bus),
+        min_slot=MIN_SLOT,
+        checkpoint_name=USER_BANK_CHECKPOINT,
+    )
+    last_tx = indexer.process()
     if last_tx:
         redis.set(latest_sol_user_bank_slot_key, last_tx["slot"])
     elif latest_global_slot is not None:
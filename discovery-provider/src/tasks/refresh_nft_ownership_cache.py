@@ -0,0 +1,42 @@
+import logging
+import time
+
+from src.queries.get_premium_track_signatures import refresh_hot_nft_holders
+from src.tasks.celery_app import celery
+from src.utils.prometheus_metric import save_duration_metric
+
+logger = logging.getLogger(__name__)
+
+REFRESH_NFT_OWNERSHIP_CACHE_LOCK = "refresh_nft_ownership_cache_lock"
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="refresh_nft_ownership_cache", bind=True)
+@save_duration_metric(metric_group="celery_task")
+def refresh_nft_ownership_cache(self):
+    """Keeps the nft ownership of recently checked wallets cached for nft-gated tracks"""
+
+    redis = refresh_nft_ownership_cache.redis
+
+    have_lock = False
+    update_lock = redis.lock(REFRESH_NFT_OWNERSHIP_CACHE_LOCK, timeout=60 * 10)
+
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+
+        if have_lock:
+            start_time = time.time()
+            num_refreshed = refresh_hot_nft_holders(redis)
+            logger.info(
+                f"refresh_nft_ownership_cache.py | Refreshed {num_refreshed} wallets in {time.time() - start_time} seconds"
+            )
+        else:
+            logger.info("refresh_nft_ownership_cache.py | Failed to acquire lock")
+    except Exception as e:
+        logger.error(
+            "refresh_nft_ownership_cache.py | Fatal error in main loop", exc_info=True
+        )
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
@@ -0,0 +1,79 @@
+import logging
+import time
+
+from sqlalchemy import func
+from src.models.indexing.block import Block
+from src.queries.get_feed_cache import (
+    FEED_FANOUT_BLOCK_KEY,
+    fan_out_feed_items,
+    get_feed_items,
+)
+from src.tasks.celery_app import celery
+from src.utils.prometheus_metric import save_duration_metric
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+FEED_CACHE_CHECKPOINT = "feed_cache"
+UPDATE_FEED_CACHE_LOCK = "update_feed_cache_lock"
+# blocks fanned out per run, bounds the work done when catching up
+FEED_FANOUT_MAX_BLOCKS = 1000
+
+
+def _update_feed_cache(session, redis):
+    prev_blocknumber = get_last_indexed_checkpoint(session, FEED_CACHE_CHECKPOINT)
+    latest_blocknumber = session.query(func.max(Block.number)).scalar()
+    if not latest_blocknumber or latest_blocknumber <= prev_blocknumber:
+        return
+
+    # feeds are materialized from the db when read, so on the first run
+    # there is nothing to catch up on
+    if prev_blocknumber:
+        latest_blocknumber = min(
+            latest_blocknumber, prev_blocknumber + FEED_FANOUT_MAX_BLOCKS
+        )
+        items = get_feed_items(
+            session,
+            min_blocknumber=prev_blocknumber,
+            max_blocknumber=latest_blocknumber,
+        )
+        if items:
+            fan_out_feed_items(session, redis, items)
+
+    redis.set(FEED_FANOUT_BLOCK_KEY, latest_blocknumber)
+    save_indexed_checkpoint(session, FEED_CACHE_CHECKPOINT, latest_blocknumber)
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="update_feed_cache", bind=True)
+@save_duration_metric(metric_group="celery_task")
+def update_feed_cache(self):
+    """Fans newly indexed tracks, playlists and reposts out to cached home feeds"""
+
+    db = update_feed_cache.db
+    redis = update_feed_cache.redis
+
+    have_lock = False
+    update_lock = redis.lock(UPDATE_FEED_CACHE_LOCK, timeout=60 * 10)
+
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+
+        if have_lock:
+            start_time = time.time()
+            with db.scoped_session() as session:
+                _update_feed_cache(session, redis)
+            logger.info(
+                f"update_feed_cache.py | Finished in {time.time() - start_time} seconds"
+            )
+        else:
+            logger.info("update_feed_cache.py | Failed to acquire lock")
+    except Exception as e:
+        logger.error("update_feed_cache.py | Fatal error in main loop", exc_info=True)
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
@@ -0,0 +1,72 @@
+import logging
+import time
+
+from sqlalchemy import func
+from src.models.indexing.block import Block
+from src.queries.get_random_tracks import (
+    RANDOM_TRACK_IDS_KEY,
+    rebuild_random_track_ids,
+    update_random_track_ids,
+)
+from src.tasks.celery_app import celery
+from src.utils.prometheus_metric import save_duration_metric
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+RANDOM_TRACK_IDS_CHECKPOINT = "random_track_ids"
+UPDATE_RANDOM_TRACK_IDS_LOCK = "update_random_track_ids_lock"
+
+
+def _update_random_track_ids(session, redis):
+    prev_blocknumber = get_last_indexed_checkpoint(session, RANDOM_TRACK_IDS_CHECKPOINT)
+    latest_blocknumber = session.query(func.max(Block.number)).scalar()
+    if not latest_blocknumber:
+        return
+
+    # the set is rebuilt from scratch on the first run or if redis lost it
+    if not prev_blocknumber or not redis.exists(RANDOM_TRACK_IDS_KEY):
+        rebuild_random_track_ids(session, redis)
+    elif latest_blocknumber > prev_blocknumber:
+        update_random_track_ids(session, redis, prev_blocknumber, latest_blocknumber)
+    else:
+        return
+
+    save_indexed_checkpoint(session, RANDOM_TRACK_IDS_CHECKPOINT, latest_blocknumber)
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="update_random_track_ids", bind=True)
+@save_duration_metric(metric_group="celery_task")
+def update_random_track_ids_task(self):
+    """Keeps the set of track ids sampled by get_random_tracks up to date"""
+
+    db = update_random_track_ids_task.db
+    redis = update_random_track_ids_task.redis
+
+    have_lock = False
+    update_lock = redis.lock(UPDATE_RANDOM_TRACK_IDS_LOCK, timeout=60 * 10)
+
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+
+        if have_lock:
+            start_time = time.time()
+            with db.scoped_session() as session:
+                _update_random_track_ids(session, redis)
+            logger.info(
+                f"update_random_track_ids.py | Finished in {time.time() - start_time} seconds"
+            )
+        else:
+            logger.info("update_random_track_ids.py | Failed to acquire lock")
+    except Exception as e:
+        logger.error(
+            "update_random_track_ids.py | Fatal error in main loop", exc_info=True
+        )
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
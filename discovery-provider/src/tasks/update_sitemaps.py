@@ -0,0 +1,41 @@
+import logging
+import time
+
+from src.queries.get_sitemap import refresh_sitemaps
+from src.tasks.celery_app import celery
+from src.utils.prometheus_metric import save_duration_metric
+
+logger = logging.getLogger(__name__)
+
+UPDATE_SITEMAPS_LOCK = "update_sitemaps_lock"
+
+
+@celery.task(name="update_sitemaps", bind=True)
+@save_duration_metric(metric_group="celery_task")
+def update_sitemaps(self):
+    """Rebuilds the cached, gzipped sitemaps served by the sitemap routes"""
+
+    db = update_sitemaps.db_read_replica
+    redis = update_sitemaps.redis
+
+    have_lock = False
+    update_lock = redis.lock(UPDATE_SITEMAPS_LOCK, timeout=7200)
+
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+
+        if have_lock:
+            start_time = time.time()
+            with db.scoped_session() as session:
+                refresh_sitemaps(session, redis)
+            logger.info(
+                f"update_sitemaps.py | Finished in {time.time() - start_time} seconds"
+            )
+        else:
+            logger.info("update_sitemaps.py | Failed to acquire lock")
+    except Exception as e:
+        logger.error("update_sitemaps.py | Fatal error in main loop", exc_info=True)
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
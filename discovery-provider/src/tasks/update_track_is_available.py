@@ -1,10 +1,12 @@
+import concurrent.futures
 import logging
 from datetime import datetime, timezone
-from typing import Any, List, Tuple, TypedDict, Union
+from typing import Any, Dict, List, Set, Tuple, TypedDict, Union
 
 import requests
 from redis import Redis
 from sqlalchemy.orm.session import Session
+from sqlalchemy.sql import text
 from src.models.tracks.track import Track
 from src.models.users.user import User
 from src.tasks.celery_app import celery
@@ -30,6 +32,15 @@ UPDATE_TRACK_IS_AVAILABLE_LOCK = "update_track_is_available_lock"
 BATCH_SIZE = 1000
 DEFAULT_LOCK_TIMEOUT_SECONDS = 30  # 30 seconds
 REQUESTS_TIMEOUT_SECONDS = 300  # 5 minutes
+MAX_CONCURRENT_REQUESTS = 10
+
+MARK_TRACKS_UNAVAILABLE_QUERY = text(
+    """
+    UPDATE tracks
+    SET is_available = false, is_delete = true
+    WHERE is_current = true AND track_id = ANY(:track_ids);
+    """
+)
 
 
 class ContentNodeInfo(TypedDict):
@@ -52,20 +63,32 @@ def fetch_unavailable_track_ids_in_network(
     # Clear redis for existing data
     redis.delete(ALL_UNAVAILABLE_TRACKS_REDIS_KEY)
 
-    for node in content_nodes:
-        # Keep mapping of spId to set of unavailable tracks
-        unavailable_track_ids = fetch_unavailable_track_ids(node["endpoint"])
-        spID_unavailable_tracks_key = get_unavailable_tracks_redis_key(node["spID"])
-
-        # Clear redis for existing data
-        redis.delete(spID_unavailable_tracks_key)
-
-        for i in range(0, len(unavailable_track_ids), BATCH_SIZE):
-            unavailable_track_ids_batch = unavailable_track_ids[i : i + BATCH_SIZE]
-            redis.sadd(spID_unavailable_tracks_key, *unavailable_track_ids_batch)
-
-            # Aggregate a set of unavailable tracks
-            redis.sadd(ALL_UNAVAILABLE_TRACKS_REDIS_KEY, *unavailable_track_ids_batch)
+    # Poll all content nodes concurrently
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_REQUESTS
+    ) as executor:
+        fetch_futures = {
+            executor.submit(fetch_unavailable_track_ids, node["endpoint"]): node
+            for node in content_nodes
+        }
+        for future in concurrent.futures.as_completed(fetch_futures):
+            node = fetch_futures[future]
+            # Keep mapping of spId to set of unavailable tracks
+            unavailable_track_ids = future.result()
+            spID_unavailable_tracks_key = get_unavailable_tracks_redis_key(node["spID"])
+
+            pipe = redis.pipeline()
+            # Clear redis for existing data
+            pipe.delete(spID_unavailable_tracks_key)
+            for i in range(0, len(unavailable_track_ids), BATCH_SIZE):
+                unavailable_track_ids_batch = unavailable_track_ids[i : i + BATCH_SIZE]
+                pipe.sadd(spID_unavailable_tracks_key, *unavailable_track_ids_batch)
+
+                # Aggregate a set of unavailable tracks
+                pipe.sadd(
+                    ALL_UNAVAILABLE_TRACKS_REDIS_KEY, *unavailable_track_ids_batch
+                )
+            pipe.execute()
 
 
 def update_tracks_is_available_status(db: SessionManager, redis: Redis) -> None:
@@ -74,6 +97,9 @@ def update_tracks_is_available_status(db: SessionManager, redis: Redis) -> None:
         redis, ALL_UNAVAILABLE_TRACKS_REDIS_KEY
     )
 
+    # Unavailable track ids per spID, loaded from redis once per run
+    spID_unavailable_track_ids: Dict[int, Set[int]] = {}
+
     for i in range(0, len(all_unavailable_track_ids), BATCH_SIZE):
         unavailable_track_ids_batch = all_unavailable_track_ids[i : i + BATCH_SIZE]
         try:
@@ -82,40 +108,40 @@ def update_tracks_is_available_status(db: SessionManager, redis: Redis) -> None:
                     session, unavailable_track_ids_batch
                 )
 
-                track_id_to_is_available_status = {}
-
-                for entry in track_ids_to_replica_set:
-                    track_id = entry[0]
-
-                    # Some users are do not have primary_ids or secondary_ids
-                    # If these values are not null, check if track is available
-                    # Else, default to track as available
-                    if (
-                        entry[1] is not None  # primary_id
-                        and entry[2][0] is not None  # secondary_id 1
-                        and entry[2][1] is not None  # secondary_id 2
-                    ):
-
-                        spID_replica_set = [entry[1], *entry[2]]
-                        is_available = check_track_is_available(
-                            redis=redis,
-                            track_id=track_id,
-                            spID_replica_set=spID_replica_set,
-                        )
-                    else:
-                        is_available = True
-
-                    track_id_to_is_available_status[track_id] = is_available
-
-                # Update tracks with is_available status
-                tracks = query_tracks_by_track_ids(session, unavailable_track_ids_batch)
-                for track in tracks:
-                    is_available = track_id_to_is_available_status[track.track_id]
-
-                    # If track is not available, also flip 'is_delete' flag to True
-                    if not is_available:
-                        track.is_available = False
-                        track.is_delete = True
+                # Some users are do not have primary_ids or secondary_ids
+                # If these values are not null, check if track is available
+                # Else, default to track as available
+                replica_set_entries = [
+                    (entry[0], [entry[1], *entry[2]])
+                    for entry in track_ids_to_replica_set
+                    if entry[1] is not None  # primary_id
+                    and entry[2][0] is not None  # secondary_id 1
+                    and entry[2][1] is not None  # secondary_id 2
+                ]
+                _load_unavailable_track_ids(
+                    redis,
+                    spID_unavailable_track_ids,
+                    {
+                        spID
+                        for _, replica_set in replica_set_entries
+                        for spID in replica_set
+                    },
+                )
+
+                unavailable_track_ids = [
+                    track_id
+                    for track_id, spID_replica_set in replica_set_entries
+                    if not is_track_available_in_replica_set(
+                        spID_unavailable_track_ids, track_id, spID_replica_set
+                    )
+                ]
+
+                # If track is not available, also flip 'is_delete' flag to True
+                if unavailable_track_ids:
+                    session.execute(
+                        MARK_TRACKS_UNAVAILABLE_QUERY,
+                        {"track_ids": unavailable_track_ids},
+                    )
 
         except Exception as e:
             logger.warn(
@@ -123,6 +149,37 @@ def update_tracks_is_available_status(db: SessionManager, redis: Redis) -> None:
             )
 
 
+def _load_unavailable_track_ids(
+    redis: Redis, spID_unavailable_track_ids: Dict[int, Set[int]], spIDs: Set[int]
+) -> None:
+    """Fetches the unavailable track ids of any spIDs not yet loaded in a single round trip"""
+    missing_spIDs = [spID for spID in spIDs if spID not in spID_unavailable_track_ids]
+    if not missing_spIDs:
+        return
+
+    pipe = redis.pipeline(transaction=False)
+    for spID in missing_spIDs:
+        pipe.smembers(get_unavailable_tracks_redis_key(spID))
+    for spID, values in zip(missing_spIDs, pipe.execute()):
+        spID_unavailable_track_ids[spID] = {int(value.decode()) for value in values}
+
+
+def is_track_available_in_replica_set(
+    spID_unavailable_track_ids: Dict[int, Set[int]],
+    track_id: int,
+    spID_replica_set: List[int],
+) -> bool:
+    """
+    Checks if a track is available in the replica set, using the unavailable track
+    ids loaded by `_load_unavailable_track_ids`. A track only needs to be available
+    on one node of its replica set to be marked as available.
+    """
+    return any(
+        track_id not in spID_unavailable_track_ids.get(spID, set())
+        for spID in spID_replica_set
+    )
+
+
 def fetch_unavailable_track_ids(node: str) -> List[int]:
     """Fetches unavailable tracks from Content Node. Returns empty list if request fails"""
     unavailable_track_ids = []
@@ -161,20 +218,6 @@ def query_replica_set_by_track_id(
     return track_ids_and_replica_sets
 
 
-def query_tracks_by_track_ids(session: Session, track_ids: List[int]) -> List[Any]:
-    """Returns a list of Track objects that has a track id in `track_ids`"""
-    tracks = (
-        session.query(Track)
-        .filter(
-            Track.is_current == True,
-            Track.track_id.in_(track_ids),
-        )
-        .all()
-    )
-
-    return tracks
-
-
 def query_registered_content_node_info(
     eth_web3: Web3, redis: Redis, eth_abi_values: Any
 ) -> List[ContentNodeInfo]:
@@ -191,32 +234,6 @@ def query_registered_content_node_info(
     return list(map(create_node_info_response, registered_content_nodes))
 
 
-def check_track_is_available(
-    redis: Redis, track_id: int, spID_replica_set: List[int]
-) -> bool:
-    """
-    Checks if a track is available in the replica set. Needs to only be available
-    on one replica set node to be marked as available.
-        redis: redis instance
-        track_id: the observed track id
-        spID_replica_set: an array of the SP IDs that are associated with track
-    """
-
-    i = 0
-    while i < len(spID_replica_set):
-        spID_unavailable_tracks_key = get_unavailable_tracks_redis_key(
-            spID_replica_set[i]
-        )
-        is_available_on_sp = not redis.sismember(spID_unavailable_tracks_key, track_id)
-
-        if is_available_on_sp:
-            return True
-
-        i = i + 1
-
-    return False
-
-
 def get_unavailable_tracks_redis_key(spID: int) -> str:
     """Returns the redis key used to store the unavailable tracks on a sp"""
     return f"update_track_is_available:unavailable_tracks_{spID}"
@@ -1,16 +1,194 @@
 import functools
 import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
 
 from eth_account.messages import encode_defunct
 from flask.globals import request
+from src.models.indexing.block import Block
 from src.models.users.user import User
-from src.utils import db_session, web3_provider
+from src.utils import db_session, redis_connection, web3_provider
 
 logger = logging.getLogger(__name__)
 
 MESSAGE_HEADER = "Encoded-Data-Message"
 SIGNATURE_HEADER = "Encoded-Data-Signature"
 
+# Verified signatures are reused until this long after the time they were signed at
+VERIFIED_SIGNATURE_MAX_AGE_SEC = 60 * 60 * 24
+# Signed messages without a trailing unix timestamp are only reused briefly
+VERIFIED_SIGNATURE_DEFAULT_TTL_SEC = 60 * 5
+VERIFIED_SIGNATURE_CACHE_SIZE = 10000
+
+# The indexer invalidates wallet entries of updated users,
+# the TTL bounds staleness from missed invalidations
+WALLET_USER_ID_TTL_SEC = 60 * 60
+# Wallets without a user are cached briefly, as the indexer can't invalidate
+# them by user id when the wallet signs up
+WALLET_NO_USER_TTL_SEC = 10
+NO_USER_MARKER = b"-"
+# Keys holding the block that last invalidated a wallet or user. Entries read from
+# a replica that has not indexed it yet are returned but not cached, so a lagging
+# replica can't map a wallet back to its previous owner
+INVALIDATED_AT_BLOCK_KEY_SUFFIX = "invalidated_at_block"
+
+signed_timestamp_pattern = re.compile(r"(\d{10,})\s*$")
+
+
+def get_signed_message_expiry(message: str, now: float) -> float:
+    """
+    Returns when a verified signature for `message` should stop being reused.
+    Clients sign messages ending in the unix timestamp (sec) they were signed at.
+    """
+    match = signed_timestamp_pattern.search(message)
+    if not match:
+        return now + VERIFIED_SIGNATURE_DEFAULT_TTL_SEC
+    signed_at = int(match.group(1))
+    # guard against millisecond timestamps and clock skew
+    if signed_at > now + VERIFIED_SIGNATURE_MAX_AGE_SEC:
+        return now + VERIFIED_SIGNATURE_DEFAULT_TTL_SEC
+    return signed_at + VERIFIED_SIGNATURE_MAX_AGE_SEC
+
+
+class VerifiedSignatureCache:
+    """
+    Bounded LRU of (message, signature) -> recovered wallet.
+    Entries expire relative to the timestamp in the signed message.
+    """
+
+    def __init__(self, max_size=VERIFIED_SIGNATURE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, message: str, signature: str) -> Optional[str]:
+        key = (message, signature)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            wallet, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return wallet
+
+    def set(self, message: str, signature: str, wallet: str):
+        now = time.time()
+        expires_at = get_signed_message_expiry(message, now)
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[(message, signature)] = (wallet, expires_at)
+            self._entries.move_to_end((message, signature))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+verified_signature_cache = VerifiedSignatureCache()
+
+
+def recover_signer_wallet(message: str, signature: str) -> str:
+    """Returns the checksum wallet that signed `message`, cached for repeat pairs"""
+    wallet = verified_signature_cache.get(message, signature)
+    if wallet:
+        return wallet
+    web3 = web3_provider.get_web3()
+    encoded_to_recover = encode_defunct(text=message)
+    wallet = web3.eth.account.recover_message(encoded_to_recover, signature=signature)
+    verified_signature_cache.set(message, signature, wallet)
+    return wallet
+
+
+def get_wallet_user_id_key(wallet: str):
+    return f"user:wallet:{wallet.lower()}"
+
+
+def get_user_id_wallet_key(user_id: int):
+    return f"user:wallet_of:{user_id}"
+
+
+def get_invalidated_at_block_key(key: str):
+    return f"{key}:{INVALIDATED_AT_BLOCK_KEY_SUFFIX}"
+
+
+def get_user_id_for_wallet(wallet: str) -> Optional[int]:
+    """
+    Returns the id of the user owning `wallet`, backed by a redis wallet index.
+    A reverse user_id -> wallet key lets the indexer invalidate by user id.
+    """
+    redis = redis_connection.get_redis()
+    wallet_key = get_wallet_user_id_key(wallet)
+    cached_user_id = redis.get(wallet_key)
+    if cached_user_id == NO_USER_MARKER:
+        return None
+    if cached_user_id:
+        return int(cached_user_id)
+
+    db = db_session.get_db_read_replica()
+    with db.scoped_session() as session:
+        user = (
+            session.query(User.user_id)
+            .filter(
+                # Convert checksum wallet to lowercase
+                User.wallet == wallet.lower(),
+                User.is_current == True,
+            )
+            # In the case that multiple wallets match (not enforced on the data layer),
+            # pick the user that was created first.
+            .order_by(User.created_at.asc())
+            .first()
+        )
+        latest_block = (
+            session.query(Block.number).filter(Block.is_current == True).scalar()
+        )
+    if not user:
+        redis.set(wallet_key, NO_USER_MARKER, WALLET_NO_USER_TTL_SEC)
+        return None
+
+    reverse_key = get_user_id_wallet_key(user.user_id)
+    invalidated_at_blocks = [
+        int(block)
+        for block in redis.mget(
+            get_invalidated_at_block_key(wallet_key),
+            get_invalidated_at_block_key(reverse_key),
+        )
+        if block is not None
+    ]
+    if invalidated_at_blocks and (
+        latest_block is None or latest_block < max(invalidated_at_blocks)
+    ):
+        return user.user_id
+
+    pipe = redis.pipeline()
+    pipe.set(wallet_key, user.user_id, WALLET_USER_ID_TTL_SEC)
+    pipe.set(reverse_key, wallet.lower(), WALLET_USER_ID_TTL_SEC)
+    pipe.execute()
+    return user.user_id
+
+
+def invalidate_wallet_user_ids(redis, user_ids: Iterable[int], blocknumber: int):
+    """
+    Drops wallet index entries of users changed by the indexer in `blocknumber`,
+    and keeps the block so stale replicas don't refill them
+    """
+    reverse_keys = [get_user_id_wallet_key(user_id) for user_id in user_ids]
+    if not reverse_keys:
+        return
+    wallets = redis.mget(reverse_keys)
+    wallet_keys = [
+        get_wallet_user_id_key(wallet.decode()) for wallet in wallets if wallet
+    ]
+    pipe = redis.pipeline()
+    pipe.delete(*reverse_keys, *wallet_keys)
+    for key in reverse_keys + wallet_keys:
+        pipe.set(get_invalidated_at_block_key(key), blocknumber, WALLET_USER_ID_TTL_SEC)
+    pipe.execute()
+
 
 def auth_middleware(**kwargs):
     """
@@ -39,30 +217,12 @@ def auth_middleware(**kwargs):
 
             authed_user_id = None
             if message and signature:
-                web3 = web3_provider.get_web3()
-                encoded_to_recover = encode_defunct(text=message)
-                wallet = web3.eth.account.recover_message(
-                    encoded_to_recover, signature=signature
-                )
-                db = db_session.get_db_read_replica()
-                with db.scoped_session() as session:
-                    user = (
-                        session.query(User.user_id)
-                        .filter(
-                            # Convert checksum wallet to lowercase
-                            User.wallet == wallet.lower(),
-                            User.is_current == True,
-                        )
-                        # In the case that multiple wallets match (not enforced on the data layer),
-                        # pick the user that was created first.
-                        .order_by(User.created_at.asc())
-                        .first()
+                wallet = recover_signer_wallet(message, signature)
+                authed_user_id = get_user_id_for_wallet(wallet)
+                if authed_user_id:
+                    logger.info(
+                        f"auth_middleware.py | authed_user_id: {authed_user_id}"
                     )
-                    if user:
-                        authed_user_id = user.user_id
-                        logger.info(
-                            f"auth_middleware.py | authed_user_id: {authed_user_id}"
-                        )
             return func(*args, **kwargs, authed_user_id=authed_user_id)
 
         return inner_wrap
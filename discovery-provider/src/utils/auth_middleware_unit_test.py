@@ -0,0 +1,76 @@
+from unittest import mock
+
+from src.utils.auth_middleware import (
+    VERIFIED_SIGNATURE_DEFAULT_TTL_SEC,
+    VERIFIED_SIGNATURE_MAX_AGE_SEC,
+    VerifiedSignatureCache,
+    get_invalidated_at_block_key,
+    get_signed_message_expiry,
+    get_user_id_wallet_key,
+    get_wallet_user_id_key,
+    invalidate_wallet_user_ids,
+)
+
+
+def test_get_signed_message_expiry():
+    now = 1670000000
+    message = f"Click sign to authenticate with identity service: {now - 60}"
+    assert get_signed_message_expiry(message, now) == (
+        now - 60 + VERIFIED_SIGNATURE_MAX_AGE_SEC
+    )
+    # messages without a timestamp, or with one far in the future, expire soon
+    assert get_signed_message_expiry("no timestamp", now) == (
+        now + VERIFIED_SIGNATURE_DEFAULT_TTL_SEC
+    )
+    assert get_signed_message_expiry(f"signed at {now * 1000}", now) == (
+        now + VERIFIED_SIGNATURE_DEFAULT_TTL_SEC
+    )
+
+
+def test_verified_signature_cache():
+    now = 1670000000
+    cache = VerifiedSignatureCache(max_size=2)
+    with mock.patch("src.utils.auth_middleware.time.time", return_value=now):
+        cache.set(f"message: {now}", "sig1", "0xwallet1")
+        cache.set(f"message: {now}", "sig2", "0xwallet2")
+        assert cache.get(f"message: {now}", "sig1") == "0xwallet1"
+        # least recently used entry is evicted
+        cache.set(f"message: {now}", "sig3", "0xwallet3")
+        assert cache.get(f"message: {now}", "sig2") is None
+        assert cache.get(f"message: {now}", "sig1") == "0xwallet1"
+        assert cache.get(f"message: {now}", "sig3") == "0xwallet3"
+
+        # signatures older than the max age are not cached
+        expired = now - VERIFIED_SIGNATURE_MAX_AGE_SEC
+        cache.set(f"message: {expired}", "sig4", "0xwallet4")
+        assert cache.get(f"message: {expired}", "sig4") is None
+
+    with mock.patch(
+        "src.utils.auth_middleware.time.time",
+        return_value=now + VERIFIED_SIGNATURE_MAX_AGE_SEC,
+    ):
+        assert cache.get(f"message: {now}", "sig1") is None
+
+
+def test_invalidate_wallet_user_ids(redis_mock):
+    redis_mock.set(get_wallet_user_id_key("0xABC"), 1)
+    redis_mock.set(get_user_id_wallet_key(1), "0xabc")
+    redis_mock.set(get_wallet_user_id_key("0xdef"), 2)
+    redis_mock.set(get_user_id_wallet_key(2), "0xdef")
+
+    invalidate_wallet_user_ids(redis_mock, [1, 3], 10)
+
+    assert redis_mock.get(get_wallet_user_id_key("0xabc")) is None
+    assert redis_mock.get(get_user_id_wallet_key(1)) is None
+    assert redis_mock.get(get_wallet_user_id_key("0xdef")) == b"2"
+    assert redis_mock.get(get_user_id_wallet_key(2)) == b"0xdef"
+    # the invalidating block is kept so stale replicas don't refill the entries
+    for key in [
+        get_wallet_user_id_key("0xabc"),
+        get_user_id_wallet_key(1),
+        get_user_id_wallet_key(3),
+    ]:
+        assert redis_mock.get(get_invalidated_at_block_key(key)) == b"10"
+    assert (
+        redis_mock.get(get_invalidated_at_block_key(get_user_id_wallet_key(2))) is None
+    )
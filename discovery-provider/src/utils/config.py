@@ -127,15 +127,29 @@ except (KeyError, RuntimeError) as e:
     """
     ) from e
 
-try:
-    # get latitude longitude and country
-    ip_info_url = "https://ipinfo.io"
-    ip_info_response = requests.get(ip_info_url)
-    response_data = ip_info_response.json()
-    shared_config["serviceLocation"]["serviceCountry"] = response_data["country"]
-    latitude, longitude = response_data["loc"].split(",")
-    shared_config["serviceLocation"]["serviceLatitude"] = latitude
-    shared_config["serviceLocation"]["serviceLongitude"] = longitude
+is_service_location_loaded = False
 
-except (KeyError, RuntimeError) as e:
-    logger.error(f"""Failed to get latitude and/or longitude : {e}""")
+
+def load_service_location():
+    """
+    Gets the latitude, longitude and country of the service the first time it
+    is needed rather than on import, which every process does at startup
+    """
+    # pylint: disable=W0603
+    global is_service_location_loaded
+    if is_service_location_loaded:
+        return
+    is_service_location_loaded = True
+
+    try:
+        # get latitude longitude and country
+        ip_info_url = "https://ipinfo.io"
+        ip_info_response = requests.get(ip_info_url, timeout=5)
+        response_data = ip_info_response.json()
+        shared_config["serviceLocation"]["serviceCountry"] = response_data["country"]
+        latitude, longitude = response_data["loc"].split(",")
+        shared_config["serviceLocation"]["serviceLatitude"] = latitude
+        shared_config["serviceLocation"]["serviceLongitude"] = longitude
+
+    except (KeyError, RuntimeError, requests.exceptions.RequestException) as e:
+        logger.error(f"""Failed to get latitude and/or longitude : {e}""")
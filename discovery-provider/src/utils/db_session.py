@@ -1,4 +1,6 @@
-from flask import current_app
+import functools
+
+from flask import current_app, g, has_request_context, request
 
 
 def get_db():
@@ -10,8 +12,33 @@ def get_db():
 
 
 def get_db_read_replica():
-    """Connect to the configured database. The connection
-    is unique for each request and will be reused if this is called
-    again.
+    """Connect to a read replica, or the primary if no replica is recent enough.
+    During a request, the replica is within the route's read_replica_max_lag
+    and has indexed the request's min_block_number so clients read their writes.
     """
-    return current_app.db_read_replica_session_manager
+    router = getattr(current_app, "db_session_router", None)
+    if not router:
+        return current_app.db_read_replica_session_manager
+    if not has_request_context():
+        return router.get_read_session_manager()
+    # the queries of a request all read from the same database
+    if "db_read_replica" not in g:
+        g.db_read_replica = router.get_read_session_manager(
+            max_lag_sec=g.get("read_replica_max_lag_sec"),
+            min_blocknumber=request.args.get("min_block_number", type=int),
+        )
+    return g.db_read_replica
+
+
+def read_replica_max_lag(max_lag_sec):
+    """Bounds how far behind the primary the read replicas used by a route may be"""
+
+    def outer_wrap(func):
+        @functools.wraps(func)
+        def inner_wrap(*args, **kwargs):
+            g.read_replica_max_lag_sec = max_lag_sec
+            return func(*args, **kwargs)
+
+        return inner_wrap
+
+    return outer_wrap
@@ -20,6 +20,13 @@ ES_INDEXES = [ES_PLAYLISTS, ES_REPOSTS, ES_SAVES, ES_TRACKS, ES_USERS]
 
 STALE_THRESHOLD_SECONDS = 4 * 60 * 60  # 4 hours
 
+# indexed fields that are only used in queries and never returned
+ES_USER_QUERY_ONLY_FIELDS = ["follower_ids", "tracks"]
+ES_PLAYLIST_QUERY_ONLY_FIELDS = ["tracks"]
+# fields only needed to personalize results for the current user
+ES_USER_PERSONALIZATION_FIELDS = ["following_ids"]
+ES_ITEM_PERSONALIZATION_FIELDS = ["saved_by", "reposted_by"]
+
 
 def listify(things):
     if isinstance(things, list):
@@ -39,6 +46,35 @@ def pluck_hits(found):
     return res
 
 
+def fetch_users_es(user_ids, current_user_id=None):
+    """
+    Fetches users along with the current user in a single mget and populates
+    their metadata. The current user's following ids are converted to a set
+    once so the per-user membership checks are O(1).
+    Returns (users by string id, current user)
+    """
+    ids = {str(id) for id in user_ids}
+    if current_user_id:
+        ids.add(str(current_user_id))
+    if not ids:
+        return ({}, None)
+
+    found = esclient.mget(
+        index=ES_USERS, ids=list(ids), source_excludes=ES_USER_QUERY_ONLY_FIELDS
+    )
+    users_by_id = {d["_id"]: d["_source"] for d in found["docs"] if d["found"]}
+
+    current_user = None
+    if current_user_id:
+        current_user = users_by_id.get(str(current_user_id))
+    if current_user:
+        current_user["following_ids"] = set(current_user.get("following_ids") or [])
+
+    for id, user in users_by_id.items():
+        users_by_id[id] = populate_user_metadata_es(user, current_user)
+    return (users_by_id, current_user)
+
+
 def populate_user_metadata_es(user, current_user):
     user["total_balance"] = str(
         int(user.get("balance", "0") or "0")
@@ -0,0 +1,49 @@
+"""
+Support for serving the API from gunicorn's eventlet workers
+(audius_gunicorn_worker_class=eventlet), where a request waiting on the network
+yields to other requests instead of holding a worker thread.
+
+gunicorn monkey patches the standard library before loading the app, which
+covers redis, requests (web3, identity, content nodes) and elasticsearch.
+psycopg2 talks to postgres from C, so it needs a wait callback to cooperate.
+"""
+import logging
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+def is_eventlet_patched() -> bool:
+    """Whether the process is running on monkey patched eventlet sockets"""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched("socket")
+
+
+def eventlet_wait_callback(conn, timeout=None):
+    """Waits for a psycopg2 connection by yielding to the eventlet hub"""
+    from eventlet.hubs import trampoline
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state}")
+
+
+def patch_psycopg():
+    """Makes psycopg2 cooperative when running under eventlet, a no-op otherwise"""
+    if not is_eventlet_patched():
+        return False
+    extensions.set_wait_callback(eventlet_wait_callback)
+    logger.info("green.py | psycopg2 wait callback set for eventlet")
+    return True
@@ -0,0 +1,37 @@
+from unittest import mock
+
+import pytest
+from psycopg2 import OperationalError, extensions
+from src.utils.green import eventlet_wait_callback, patch_psycopg
+
+
+def test_eventlet_wait_callback():
+    conn = mock.Mock()
+    conn.fileno.return_value = 7
+    conn.poll.side_effect = [
+        extensions.POLL_WRITE,
+        extensions.POLL_READ,
+        extensions.POLL_OK,
+    ]
+    with mock.patch("eventlet.hubs.trampoline") as trampoline:
+        eventlet_wait_callback(conn)
+    assert trampoline.call_args_list == [
+        mock.call(7, write=True),
+        mock.call(7, read=True),
+    ]
+
+    conn.poll.side_effect = [-1]
+    with pytest.raises(OperationalError):
+        eventlet_wait_callback(conn)
+
+
+def test_patch_psycopg_without_eventlet():
+    with mock.patch("src.utils.green.is_eventlet_patched", return_value=False):
+        with mock.patch.object(extensions, "set_wait_callback") as set_wait_callback:
+            assert not patch_psycopg()
+    set_wait_callback.assert_not_called()
+
+    with mock.patch("src.utils.green.is_eventlet_patched", return_value=True):
+        with mock.patch.object(extensions, "set_wait_callback") as set_wait_callback:
+            assert patch_psycopg()
+    set_wait_callback.assert_called_once_with(eventlet_wait_callback)
@@ -8,13 +8,13 @@ import re
 import time
 from functools import reduce
 from json.encoder import JSONEncoder
-from typing import Optional, cast
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, cast
 
 import requests
 from flask import g, request
 from hashids import Hashids
 from jsonformatter import JsonFormatter
-from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import instance_state
 from src import exceptions
 from src.solana.solana_transaction_types import (
     ResultMeta,
@@ -85,6 +85,50 @@ def query_result_to_list(query_result):
     return results
 
 
+class ModelKeys(NamedTuple):
+    # keys copied by model_to_dictionary
+    columns: Tuple[str, ...]
+    properties: Tuple[str, ...]
+    relationships: Tuple[str, ...]
+    # keys that may be passed in `exclude_keys`
+    excludable: FrozenSet[str]
+
+
+@functools.lru_cache(maxsize=None)
+def get_model_keys(model_class) -> ModelKeys:
+    """Collects the columns, relationships and properties of a mapped class.
+    Computed once per class since walking `dir` is too slow to do per row.
+    """
+    columns = model_class.__table__.columns.keys()
+    relationships = model_class.__mapper__.relationships.keys()
+    properties = []
+    for key in dir(model_class):
+        if key in columns or key in relationships:
+            continue
+        attr = getattr(model_class, key, None)
+        if not callable(attr) and isinstance(attr, property):
+            properties.append(key)
+
+    def public(keys):
+        return tuple(key for key in keys if not key.startswith("_"))
+
+    return ModelKeys(
+        columns=public(columns),
+        properties=public(properties),
+        relationships=public(relationships),
+        excludable=frozenset(properties).union(columns),
+    )
+
+
+def query_rows_to_list(rows, model):
+    """Converts rows selecting the columns of `model` into dictionaries without
+    constructing ORM entities. Only includes columns, so is meant for models
+    whose properties and relationships are not serialized.
+    """
+    columns = get_model_keys(model).columns
+    return [{key: getattr(row, key) for key in columns} for row in rows]
+
+
 def model_to_dictionary(model, exclude_keys=None):
     """Converts the given SQLAlchemy model into a dictionary, primarily used
     for serialization to JSON.
@@ -96,41 +140,32 @@ def model_to_dictionary(model, exclude_keys=None):
     - Excludes any property or attribute with a leading underscore.
     - Excludes unloaded properties expressed in relationships.
     """
-    state = inspect(model)
-    # Collect the model members that are unloaded so we do not
-    # unintentionally cause them to load
-    unloaded = state.unloaded
+    model_keys = get_model_keys(type(model))
+    # Read loaded values straight from the instance state. Relationships
+    # missing from it are unloaded and we do not unintentionally load them
+    loaded = instance_state(model).dict
     model_dict = {}
 
-    columns = model.__table__.columns.keys()
-    relationships = model.__mapper__.relationships.keys()
-    properties = []
-    for key in list(set(dir(model)) - set(columns) - set(relationships)):
-        if hasattr(type(model), key):
-            attr = getattr(type(model), key)
-            if not callable(attr) and isinstance(attr, property):
-                properties.append(key)
-
     if exclude_keys is None:
         exclude_keys = []
     if hasattr(model, "exclude_keys"):
         exclude_keys.extend(model.exclude_keys)
 
-    assert set(exclude_keys).issubset(set(properties).union(columns))
+    assert model_keys.excludable.issuperset(exclude_keys)
 
-    for key in columns:
-        if key not in exclude_keys and not key.startswith("_"):
-            model_dict[key] = getattr(model, key)
+    for key in model_keys.columns:
+        if key not in exclude_keys:
+            model_dict[key] = loaded[key] if key in loaded else getattr(model, key)
 
-    for key in properties:
-        if key not in exclude_keys and not key.startswith("_"):
+    for key in model_keys.properties:
+        if key not in exclude_keys:
             model_dict[key] = getattr(model, key)
 
-    for key in relationships:
-        if key not in exclude_keys and not key.startswith("_"):
-            if key in unloaded:
+    for key in model_keys.relationships:
+        if key not in exclude_keys:
+            if key not in loaded:
                 continue
-            attr = getattr(model, key)
+            attr = loaded[key]
             if isinstance(attr, list):
                 model_dict[key] = query_result_to_list(attr)
             else:
@@ -303,14 +338,27 @@ HASH_SALT = "azowernasdfoia"
 
 hashids = Hashids(min_length=5, salt=HASH_SALT)
 
+# Number of ids memoized by encode_int_id and decode_string_id. Enough to keep
+# the tracks, users and playlists that show up across most responses
+HASH_ID_CACHE_SIZE = 50000
+
+
+@functools.lru_cache(maxsize=HASH_ID_CACHE_SIZE)
+def _encode_int_id(id: int) -> str:
+    return cast(str, hashids.encode(id))
+
 
 def encode_int_id(id: int):
     # if id is already a string, assume it has already been encoded
     if isinstance(id, str):
         return id
-    return cast(str, hashids.encode(id))
+    # only memoize ints, since e.g. True and 1.0 hash the same as 1
+    if type(id) is not int:
+        return cast(str, hashids.encode(id))
+    return _encode_int_id(id)
 
 
+@functools.lru_cache(maxsize=HASH_ID_CACHE_SIZE)
 def decode_string_id(id: str) -> Optional[int]:
     # Returns a tuple
     decoded = hashids.decode(id)
@@ -319,6 +367,15 @@ def decode_string_id(id: str) -> Optional[int]:
     return decoded[0]
 
 
+def encode_int_ids(ids: Iterable[int]) -> List[str]:
+    """Encodes all the ids of a response, repeated ids are served from the memo"""
+    return [encode_int_id(id) for id in ids]
+
+
+def decode_string_ids(ids: Iterable[str]) -> List[Optional[int]]:
+    return [decode_string_id(id) for id in ids]
+
+
 def create_track_route_id(title, handle):
     """
     Constructs a track's route_id from an unsanitized title and handle.
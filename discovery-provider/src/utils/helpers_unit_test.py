@@ -1,4 +1,42 @@
-from src.utils.helpers import is_fqdn, sanitize_slug
+import random
+import string
+from collections import namedtuple
+
+from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
+from src.utils.helpers import (
+    decode_string_id,
+    decode_string_ids,
+    encode_int_id,
+    encode_int_ids,
+    get_model_keys,
+    hashids,
+    is_fqdn,
+    model_to_dictionary,
+    query_rows_to_list,
+    sanitize_slug,
+)
+
+ModelBase = declarative_base()
+
+
+class Artist(ModelBase):
+    __tablename__ = "artist"
+    artist_id = Column(Integer, primary_key=True)
+    name = Column(String)
+    _secret = Column(String)
+    songs = relationship("Song")
+
+    @property
+    def display_name(self):
+        return self.name.upper()
+
+
+class Song(ModelBase):
+    __tablename__ = "song"
+    song_id = Column(Integer, primary_key=True)
+    artist_id = Column(Integer, ForeignKey("artist.artist_id"))
 
 
 def test_create_track_slug_normal_title():
@@ -61,3 +99,63 @@ def test_is_fqdn_url():
     assert is_fqdn("http://validurl2.subdomain.domain.com") == True
     assert is_fqdn("http://cn2_creator-node_1:4001") == True
     assert is_fqdn("http://www.example.$com\and%26here.html") == False
+
+
+def test_get_model_keys():
+    keys = get_model_keys(Artist)
+    assert keys.columns == ("artist_id", "name")
+    assert keys.properties == ("display_name",)
+    assert keys.relationships == ("songs",)
+    assert get_model_keys(Artist) is keys
+
+
+def test_model_to_dictionary():
+    artist = Artist(artist_id=1, name="radiohead")
+    # unloaded relationships are skipped
+    assert model_to_dictionary(artist) == {
+        "artist_id": 1,
+        "name": "radiohead",
+        "display_name": "RADIOHEAD",
+    }
+    assert model_to_dictionary(artist, ["display_name"]) == {
+        "artist_id": 1,
+        "name": "radiohead",
+    }
+
+    artist.songs = [Song(song_id=2, artist_id=1)]
+    assert model_to_dictionary(artist)["songs"] == [{"song_id": 2, "artist_id": 1}]
+
+
+def test_query_rows_to_list():
+    Row = namedtuple("Row", ["artist_id", "name", "_secret"])
+    assert query_rows_to_list([Row(1, "radiohead", "x")], Artist) == [
+        {"artist_id": 1, "name": "radiohead"}
+    ]
+
+
+def test_encode_int_id_matches_hashids():
+    rng = random.Random(42)
+    ids = [0, 1, 2**31, 2**63] + [rng.randrange(0, 2**40) for _ in range(1000)]
+    for id in ids:
+        assert encode_int_id(id) == hashids.encode(id)
+        # memoized results are identical too
+        assert encode_int_id(id) == hashids.encode(id)
+    assert encode_int_ids(ids) == [hashids.encode(id) for id in ids]
+    assert encode_int_id("7eP5n") == "7eP5n"
+    assert encode_int_id(-1) == hashids.encode(-1)
+    assert encode_int_id(1.0) == hashids.encode(1.0)
+
+
+def test_decode_string_id_matches_hashids():
+    rng = random.Random(42)
+    ids = [hashids.encode(rng.randrange(0, 2**40)) for _ in range(1000)]
+    # random strings are mostly invalid ids
+    alphabet = string.ascii_letters + string.digits
+    ids += ["".join(rng.choices(alphabet, k=rng.randint(0, 8))) for _ in range(1000)]
+    for id in ids:
+        decoded = hashids.decode(id)
+        expected = decoded[0] if decoded else None
+        assert decode_string_id(id) == expected
+        assert decode_string_id(id) == expected
+    assert decode_string_ids(ids) == [decode_string_id(id) for id in ids]
+    assert decode_string_id(encode_int_id(15633)) == 15633
@@ -0,0 +1,48 @@
+import threading
+from typing import Callable, Generic, TypeVar
+
+from src.utils.config import shared_config
+
+T = TypeVar("T")
+
+
+def is_lazy_init_enabled() -> bool:
+    """Whether heavy clients are created on first use rather than at startup"""
+    return shared_config["discprov"].getboolean("lazy_init", fallback=False)
+
+
+class Lazy(Generic[T]):
+    """Holds a value that is created by `factory` the first time it is used"""
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._created = False
+        self._value: T
+
+    @property
+    def created(self) -> bool:
+        return self._created
+
+    def get(self) -> T:
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    self._value = self._factory()
+                    self._created = True
+        return self._value
+
+
+def init_lazy(factory: Callable[[], T]) -> Lazy[T]:
+    """Wraps `factory` in a Lazy value, created right away unless lazy_init is on"""
+    value = Lazy(factory)
+    if not is_lazy_init_enabled():
+        value.get()
+    return value
+
+
+def resolve(value):
+    """Gets the value held by a Lazy, or the value itself"""
+    if isinstance(value, Lazy):
+        return value.get()
+    return value
@@ -0,0 +1,28 @@
+from unittest import mock
+
+from src.utils.lazy import Lazy, init_lazy, resolve
+
+
+def test_lazy_creates_value_once():
+    factory = mock.Mock(return_value="client")
+    value = Lazy(factory)
+    assert not value.created
+    factory.assert_not_called()
+
+    assert value.get() == "client"
+    assert value.get() == "client"
+    assert value.created
+    factory.assert_called_once()
+
+
+def test_init_lazy():
+    factory = mock.Mock(return_value="client")
+    with mock.patch("src.utils.lazy.is_lazy_init_enabled", return_value=True):
+        value = init_lazy(factory)
+    factory.assert_not_called()
+    assert resolve(value) == "client"
+
+    with mock.patch("src.utils.lazy.is_lazy_init_enabled", return_value=False):
+        value = init_lazy(factory)
+    assert value.created
+    assert resolve("client") == "client"
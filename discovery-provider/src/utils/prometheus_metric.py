@@ -98,10 +98,13 @@ class PrometheusMetricNames:
     CELERY_TASK_ACTIVE_DURATION_SECONDS = "celery_task_active_duration_seconds"
     CELERY_TASK_DURATION_SECONDS = "celery_task_duration_seconds"
     CELERY_TASK_LAST_DURATION_SECONDS = "celery_task_last_duration_seconds"
+    CHALLENGE_EVENT_QUEUE = "challenge_event_queue"
     FLASK_ROUTE_DURATION_SECONDS = "flask_route_duration_seconds"
     HEALTH_CHECK = "health_check"
     INDEX_BLOCKS_DURATION_SECONDS = "index_blocks_duration_seconds"
     INDEX_METRICS_DURATION_SECONDS = "index_metrics_duration_seconds"
+    INDEX_SOLANA_DURATION_SECONDS = "index_solana_duration_seconds"
+    INDEX_SOLANA_TRANSACTIONS_LATEST = "index_solana_transactions_latest"
     INDEX_TRENDING_DURATION_SECONDS = "index_trending_duration_seconds"
     UPDATE_AGGREGATE_TABLE_DURATION_SECONDS = "update_aggregate_table_duration_seconds"
     UPDATE_TRACK_IS_AVAILABLE_DURATION_SECONDS = (
@@ -166,6 +169,12 @@ PrometheusRegistry = {
             "success",
         ),
     ),
+    PrometheusMetricNames.CHALLENGE_EVENT_QUEUE: Gauge(
+        f"{METRIC_PREFIX}_{PrometheusMetricNames.CHALLENGE_EVENT_QUEUE}",
+        "Backlog of the challenge event streams (length, pending, lag, age, dead letters)",
+        ("key",),
+        multiprocess_mode="liveall",
+    ),
     PrometheusMetricNames.FLASK_ROUTE_DURATION_SECONDS: Histogram(
         f"{METRIC_PREFIX}_{PrometheusMetricNames.FLASK_ROUTE_DURATION_SECONDS}",
         "Runtimes for flask routes",
@@ -190,6 +199,19 @@ PrometheusRegistry = {
         "Runtimes for src.task.index_metrics:celery.task()",
         ("task_name",),
     ),
+    PrometheusMetricNames.INDEX_SOLANA_DURATION_SECONDS: Histogram(
+        f"{METRIC_PREFIX}_{PrometheusMetricNames.INDEX_SOLANA_DURATION_SECONDS}",
+        "Runtimes for src.solana.solana_program_indexer:SolanaProgramIndexer.process()",
+        (
+            "indexer",
+            "scope",
+        ),
+    ),
+    PrometheusMetricNames.INDEX_SOLANA_TRANSACTIONS_LATEST: Histogram(
+        f"{METRIC_PREFIX}_{PrometheusMetricNames.INDEX_SOLANA_TRANSACTIONS_LATEST}",
+        "Number of transactions indexed per run by solana indexer",
+        ("indexer",),
+    ),
     PrometheusMetricNames.INDEX_TRENDING_DURATION_SECONDS: Histogram(
         f"{METRIC_PREFIX}_{PrometheusMetricNames.INDEX_TRENDING_DURATION_SECONDS}",
         "Runtimes for src.task.index_trending:index_trending()",
@@ -1,7 +1,14 @@
+import atexit
 import functools
 import json
 import logging  # pylint: disable=C0302
+import os
+import random
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
+from fnmatch import fnmatch
 
 import redis
 from flask import Response as fResponse
@@ -43,6 +50,9 @@ SYNCHRONIZE_METRICS_INTERVAL = 60
 # Redis Key Convention:
 # API_METRICS:routes:<date>:<hour>
 # API_METRICS:application:<date>:<hour>
+# personal_(route|app)_metrics:<date>:<hour>:<minute> -> hash of ip/app name to count
+# (daily|monthly)_(route|app)_metrics:<date> -> hash of ip/app name to count
+# summed_unique_(daily|monthly)_metrics:<date> -> HyperLogLog of ips
 
 metrics_prefix = "API_METRICS"
 metrics_routes = "routes"
@@ -69,11 +79,49 @@ datetime_format = "%Y/%m/%d:%H"
 datetime_format_secondary = "%Y/%m/%d:%H:%M"
 day_format = datetime_format_secondary.split(":", maxsplit=1)[0]
 
+# how long per-minute personal metrics buckets are retained
+PERSONAL_METRICS_TTL_SEC = (METRICS_INTERVAL * 2 + 1) * 60
+# how long daily and monthly metrics are retained after their last update
+DAILY_METRICS_TTL_SEC = 2 * 24 * 60 * 60
+MONTHLY_METRICS_TTL_SEC = 32 * 24 * 60 * 60
+
+# interval in seconds for flushing buffered request metrics to redis
+METRICS_FLUSH_INTERVAL_SEC = int(
+    shared_config["discprov"]["metrics_flush_interval_sec"]
+)
+
+
+def parse_sample_rates(sample_rates_str):
+    """
+    Parses sample rates of the form "<route glob>=<rate>,<route glob>=<rate>"
+    ie: "/v1/tracks/*/stream=0.1" records 1 in 10 requests to the stream route
+    """
+    sample_rates = []
+    for entry in sample_rates_str.split(","):
+        if not entry.strip():
+            continue
+        pattern, rate = entry.rsplit("=", 1)
+        sample_rates.append((pattern.strip(), min(max(float(rate), 0.0001), 1.0)))
+    return sample_rates
+
+
+METRICS_SAMPLE_RATES = parse_sample_rates(
+    shared_config["discprov"]["metrics_sample_rates"]
+)
+
 
 def get_rounded_date_time():
     return datetime.utcnow().replace(minute=0, second=0, microsecond=0)
 
 
+def get_bucket_key(metric_type, timestamp):
+    return f"{metric_type}:{timestamp}"
+
+
+def get_month_str(day_str):
+    return f"{day_str[:7]}/01"
+
+
 def format_ip(ip):
     # Replace the `:` character with an `_`  because we use : as the redis key delimiter
     return ip.strip().replace(":", "_")
@@ -112,7 +160,7 @@ def persist_summed_unique_counts(
     db, timestamp, summed_unique_daily_count, summed_unique_monthly_count
 ):
     day_str = timestamp.split(":")[0]
-    month_str = f"{day_str[:7]}/01"
+    month_str = get_month_str(day_str)
     day = datetime.strptime(day_str, day_format).date()
     month = datetime.strptime(month_str, day_format).date()
     with db.scoped_session() as session:
@@ -330,22 +378,14 @@ def merge_metrics(metrics, end_time, metric_type, db):
     """
     logger.debug(f"about to merge {metric_type} metrics: {len(metrics)} new entries")
     day = end_time.split(":")[0]
-    month = f"{day[:7]}/01"
+    month = get_month_str(day)
 
-    daily_key = daily_route_metrics if metric_type == "route" else daily_app_metrics
-    daily_metrics_str = REDIS.get(daily_key)
-    daily_metrics = json.loads(daily_metrics_str) if daily_metrics_str else {}
-
-    monthly_key = (
-        monthly_route_metrics if metric_type == "route" else monthly_app_metrics
+    daily_key = get_bucket_key(
+        daily_route_metrics if metric_type == "route" else daily_app_metrics, day
+    )
+    monthly_key = get_bucket_key(
+        monthly_route_metrics if metric_type == "route" else monthly_app_metrics, month
     )
-    monthly_metrics_str = REDIS.get(monthly_key)
-    monthly_metrics = json.loads(monthly_metrics_str) if monthly_metrics_str else {}
-
-    if day not in daily_metrics:
-        daily_metrics[day] = {}
-    if month not in monthly_metrics:
-        monthly_metrics[month] = {}
 
     # only relevant for unique users metrics
     unique_daily_count = 0
@@ -357,49 +397,27 @@ def merge_metrics(metrics, end_time, metric_type, db):
     # update daily and monthly metrics, which could be route metrics or app metrics
     # if route metrics, new_value and new_count would be an IP and the number of requests from it
     # otherwise, new_value and new_count would be an app and the number of requests from it
-    for new_value, new_count in metrics.items():
-        if metric_type == "route" and new_value not in daily_metrics[day]:
+    new_metrics = [
+        (new_value, new_count) for new_value, new_count in metrics.items() if new_count
+    ]
+    pipe = REDIS.pipeline(transaction=False)
+    for new_value, new_count in new_metrics:
+        pipe.hincrby(daily_key, new_value, new_count)
+        pipe.hincrby(monthly_key, new_value, new_count)
+    pipe.expire(daily_key, DAILY_METRICS_TTL_SEC)
+    pipe.expire(monthly_key, MONTHLY_METRICS_TTL_SEC)
+    results = pipe.execute()
+
+    for i, (new_value, new_count) in enumerate(new_metrics):
+        # HINCRBY returns the increment itself iff the value was not yet present
+        daily_total, monthly_total = results[2 * i], results[2 * i + 1]
+        if metric_type == "route" and daily_total == new_count:
             unique_daily_count += 1
-        if metric_type == "route" and new_value not in monthly_metrics[month]:
+        if metric_type == "route" and monthly_total == new_count:
             unique_monthly_count += 1
         if metric_type == "app":
             app_count[new_value] = new_count
-        daily_metrics[day][new_value] = (
-            daily_metrics[day][new_value] + new_count
-            if new_value in daily_metrics[day]
-            else new_count
-        )
-        monthly_metrics[month][new_value] = (
-            monthly_metrics[month][new_value] + new_count
-            if new_value in monthly_metrics[month]
-            else new_count
-        )
-
-    # clean up metrics METRICS_INTERVAL after the end of the day from daily_metrics
-    yesterday_str = (datetime.utcnow() - timedelta(days=1)).strftime(
-        datetime_format_secondary
-    )
-    daily_metrics = {
-        timestamp: metrics
-        for timestamp, metrics in daily_metrics.items()
-        if timestamp > yesterday_str
-    }
-    if daily_metrics:
-        REDIS.set(daily_key, json.dumps(daily_metrics))
-    logger.info(f"updated cached daily {metric_type} metrics")
-
-    # clean up metrics METRICS_INTERVAL after the end of the month from monthly_metrics
-    thirty_one_days_ago = (datetime.utcnow() - timedelta(days=31)).strftime(
-        datetime_format_secondary
-    )
-    monthly_metrics = {
-        timestamp: metrics
-        for timestamp, metrics in monthly_metrics.items()
-        if timestamp > thirty_one_days_ago
-    }
-    if monthly_metrics:
-        REDIS.set(monthly_key, json.dumps(monthly_metrics))
-    logger.info(f"updated cached monthly {metric_type} metrics")
+    logger.info(f"updated cached daily and monthly {metric_type} metrics")
 
     # persist aggregated metrics from other nodes
     day_obj = datetime.strptime(day, day_format).date()
@@ -426,19 +444,32 @@ def merge_app_metrics(metrics, end_time, db):
 
 
 def get_redis_metrics(redis_handle, start_time, metric_type):
-    redis_metrics_str = redis_handle.get(metric_type)
-    metrics = json.loads(redis_metrics_str) if redis_metrics_str else {}
-    if not metrics:
-        return {}
+    # personal metrics are bucketed by minute and expire after PERSONAL_METRICS_TTL_SEC,
+    # so only buckets after start_time within that window need to be fetched
+    now = datetime.utcnow()
+    earliest = max(
+        start_time, now - timedelta(seconds=PERSONAL_METRICS_TTL_SEC)
+    ).replace(second=0, microsecond=0)
+    timestamps = []
+    bucket = earliest
+    while bucket <= now:
+        if bucket > start_time:
+            timestamps.append(bucket.strftime(datetime_format_secondary))
+        bucket += timedelta(minutes=1)
+
+    pipe = redis_handle.pipeline(transaction=False)
+    for timestamp in timestamps:
+        pipe.hgetall(get_bucket_key(metric_type, timestamp))
 
     # if route metrics, value and count would be an IP and the number of requests from it
     # otherwise, value and count would be an app and the number of requests from it
     result = {}
-    for datetime_str, value_counts in metrics.items():
-        datetime_obj = datetime.strptime(datetime_str, datetime_format_secondary)
-        if datetime_obj > start_time:
-            for value, count in value_counts.items():
-                result[value] = result[value] + count if value in result else count
+    for value_counts in pipe.execute():
+        for value_bstr, count in value_counts.items():
+            value = value_bstr.decode("utf-8")
+            result[value] = (
+                result[value] + int(count) if value in result else int(count)
+            )
 
     return result
 
@@ -453,31 +484,12 @@ def get_redis_app_metrics(start_time):
 
 def get_summed_unique_metrics(start_time):
     day = start_time.strftime(day_format)
-    month = f"{day[:7]}/01"
+    month = get_month_str(day)
 
-    summed_unique_daily_metrics_str = REDIS.get(summed_unique_daily_metrics)
-    summed_unique_daily_metrics_obj = (
-        json.loads(summed_unique_daily_metrics_str)
-        if summed_unique_daily_metrics_str
-        else {}
-    )
-    summed_unique_daily_count = (
-        len(summed_unique_daily_metrics_obj[day])
-        if day in summed_unique_daily_metrics_obj
-        else 0
-    )
-
-    summed_unique_monthly_metrics_str = REDIS.get(summed_unique_monthly_metrics)
-    summed_unique_monthly_metrics_obj = (
-        json.loads(summed_unique_monthly_metrics_str)
-        if summed_unique_monthly_metrics_str
-        else {}
-    )
-    summed_unique_monthly_count = (
-        len(summed_unique_monthly_metrics_obj[month])
-        if month in summed_unique_monthly_metrics_obj
-        else 0
-    )
+    pipe = REDIS.pipeline(transaction=False)
+    pipe.pfcount(get_bucket_key(summed_unique_daily_metrics, day))
+    pipe.pfcount(get_bucket_key(summed_unique_monthly_metrics, month))
+    summed_unique_daily_count, summed_unique_monthly_count = pipe.execute()
 
     return {"daily": summed_unique_daily_count, "monthly": summed_unique_monthly_count}
 
@@ -526,96 +538,130 @@ def extract_route_key():
     return (route_key, route)
 
 
-def update_personal_metrics(key, old_timestamp, timestamp, value, metric_type):
-    values_str = REDIS.get(key)
-    values = json.loads(values_str) if values_str else {}
-    if timestamp in values:
-        values[timestamp][value] = (
-            values[timestamp][value] + 1 if value in values[timestamp] else 1
-        )
-    else:
-        values[timestamp] = {value: 1}
-
-    # clean up and update cached metrics
-    updated_metrics = {
-        timestamp: metrics
-        for timestamp, metrics in values.items()
-        if timestamp > old_timestamp
-    }
-    if updated_metrics:
-        REDIS.set(key, json.dumps(updated_metrics))
-    logger.debug(f"updated cached personal {metric_type} metrics")
-
-
-def update_summed_unique_metrics(now, ip):
-    thirty_one_days_ago = now - timedelta(days=31)
-    thirty_one_days_ago_str = thirty_one_days_ago.strftime(day_format)
-    yesterday = now - timedelta(days=1)
-    yesterday_str = yesterday.strftime(day_format)
+def update_personal_metrics(pipe, key, timestamp, value):
+    bucket_key = get_bucket_key(key, timestamp)
+    pipe.hincrby(bucket_key, value, 1)
+    pipe.expire(bucket_key, PERSONAL_METRICS_TTL_SEC)
+
+
+def update_summed_unique_metrics(pipe, now, ip):
     today_str = now.strftime(day_format)
-    this_month_str = f"{today_str[:7]}/01"
+    this_month_str = get_month_str(today_str)
 
-    summed_unique_daily_metrics_str = REDIS.get(summed_unique_daily_metrics)
-    summed_unique_daily_metrics_obj = (
-        json.loads(summed_unique_daily_metrics_str)
-        if summed_unique_daily_metrics_str
-        else {}
-    )
-    if today_str not in summed_unique_daily_metrics_obj:
-        summed_unique_daily_metrics_obj[today_str] = [ip]
-    elif ip not in summed_unique_daily_metrics_obj[today_str]:
-        summed_unique_daily_metrics_obj[today_str] = summed_unique_daily_metrics_obj[
-            today_str
-        ] + [ip]
-    summed_unique_daily_metrics_obj = {
-        timestamp: ips
-        for timestamp, ips in summed_unique_daily_metrics_obj.items()
-        if timestamp >= yesterday_str
-    }
-    REDIS.set(summed_unique_daily_metrics, json.dumps(summed_unique_daily_metrics_obj))
-
-    summed_unique_monthly_metrics_str = REDIS.get(summed_unique_monthly_metrics)
-    summed_unique_monthly_metrics_obj = (
-        json.loads(summed_unique_monthly_metrics_str)
-        if summed_unique_monthly_metrics_str
-        else {}
-    )
-    if this_month_str not in summed_unique_monthly_metrics_obj:
-        summed_unique_monthly_metrics_obj[this_month_str] = [ip]
-    elif ip not in summed_unique_monthly_metrics_obj[this_month_str]:
-        summed_unique_monthly_metrics_obj[
-            this_month_str
-        ] = summed_unique_monthly_metrics_obj[this_month_str] + [ip]
-    summed_unique_monthly_metrics_obj = {
-        timestamp: ips
-        for timestamp, ips in summed_unique_monthly_metrics_obj.items()
-        if timestamp >= thirty_one_days_ago_str
-    }
-    REDIS.set(
-        summed_unique_monthly_metrics,
-        json.dumps(summed_unique_monthly_metrics_obj),
-    )
+    daily_key = get_bucket_key(summed_unique_daily_metrics, today_str)
+    pipe.pfadd(daily_key, ip)
+    pipe.expire(daily_key, DAILY_METRICS_TTL_SEC)
+
+    monthly_key = get_bucket_key(summed_unique_monthly_metrics, this_month_str)
+    pipe.pfadd(monthly_key, ip)
+    pipe.expire(monthly_key, MONTHLY_METRICS_TTL_SEC)
 
 
-def record_aggregate_metrics():
+def record_aggregate_metrics(pipe):
     now = datetime.utcnow()
     timestamp = now.strftime(datetime_format_secondary)
-    old_timestamp = (now - timedelta(minutes=METRICS_INTERVAL * 2)).strftime(
-        datetime_format_secondary
-    )
     ip = get_request_ip(request)
 
-    update_summed_unique_metrics(now, ip)
+    update_summed_unique_metrics(pipe, now, ip)
 
-    update_personal_metrics(
-        personal_route_metrics, old_timestamp, timestamp, ip, "route"
-    )
+    update_personal_metrics(pipe, personal_route_metrics, timestamp, ip)
 
     application_name = request.args.get(app_name_param, type=str, default=None)
     if application_name:
-        update_personal_metrics(
-            personal_app_metrics, old_timestamp, timestamp, application_name, "app"
-        )
+        update_personal_metrics(pipe, personal_app_metrics, timestamp, application_name)
+
+
+class MetricsCollector:
+    """
+    Buffers metrics counters in memory and flushes them to redis in batches
+    from a background thread, so that recording metrics stays off the request path.
+
+    Exposes the subset of the redis pipeline interface used to record metrics
+    (hincrby, pfadd, expire), so it can be passed anywhere a pipeline is expected.
+    Each process (ie. gunicorn worker) gets its own buffer and flusher thread.
+    """
+
+    def __init__(self, redis_handle, flush_interval_sec, sample_rates=None):
+        self._redis = redis_handle
+        self._flush_interval_sec = flush_interval_sec
+        self._sample_rates = sample_rates or []
+        self._lock = threading.Lock()
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self._hash_increments = defaultdict(lambda: defaultdict(int))
+        self._hll_values = defaultdict(set)
+        self._expirations = {}
+
+    def get_sample_rate(self, path):
+        for pattern, rate in self._sample_rates:
+            if fnmatch(path, pattern):
+                return rate
+        return 1.0
+
+    def hincrby(self, key, field, amount=1):
+        self._ensure_flusher()
+        with self._lock:
+            self._hash_increments[key][field] += amount
+
+    def pfadd(self, key, *values):
+        self._ensure_flusher()
+        with self._lock:
+            self._hll_values[key].update(values)
+
+    def expire(self, key, ttl_sec):
+        with self._lock:
+            self._expirations[key] = ttl_sec
+
+    def flush(self):
+        """Writes all buffered counters to redis in a single pipelined round trip"""
+        with self._lock:
+            hash_increments = self._hash_increments
+            hll_values = self._hll_values
+            expirations = self._expirations
+            self._reset()
+        if not hash_increments and not hll_values:
+            return
+
+        pipe = self._redis.pipeline(transaction=False)
+        for key, field_increments in hash_increments.items():
+            for field, amount in field_increments.items():
+                pipe.hincrby(key, field, amount)
+        for key, values in hll_values.items():
+            pipe.pfadd(key, *values)
+        for key, ttl_sec in expirations.items():
+            pipe.expire(key, ttl_sec)
+        pipe.execute()
+
+    def _ensure_flusher(self):
+        # Checked against the pid so a forked worker starts its own flusher
+        # instead of sharing the parent's buffer
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._reset()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self._flush_safely)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self._flush_interval_sec)
+            self._flush_safely()
+
+    def _flush_safely(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Error while flushing metrics: %s", e)
+
+
+metrics_collector = MetricsCollector(
+    REDIS, METRICS_FLUSH_INTERVAL_SEC, METRICS_SAMPLE_RATES
+)
 
 
 # Metrics decorator.
@@ -623,7 +669,12 @@ def record_metrics(func):
     """
     The metrics decorator records each time a route is hit in redis
     The number of times a route is hit and an app_name query param are used are recorded.
-    A redis a redis hash map is used to store each of these values.
+    A redis hash map is used to store each of these values. Counters are buffered by
+    `metrics_collector` and flushed to redis in the background.
+
+    Routes configured in `metrics_sample_rates` only have a sample of their per-route
+    counts recorded, scaled up by the inverse of the rate; ip and app name counts are
+    always recorded so unique user counts stay exact.
 
     NOTE: This must be placed before the cache decorator in order for the redis incr to occur
     """
@@ -632,14 +683,17 @@ def record_metrics(func):
     def wrap(*args, **kwargs):
         try:
             application_key, application_name = extract_app_name_key()
-            route_key, route = extract_route_key()
-            REDIS.hincrby(route_key, route, 1)
             if application_name:
-                REDIS.hincrby(application_key, application_name, 1)
+                metrics_collector.hincrby(application_key, application_name, 1)
+
+            sample_rate = metrics_collector.get_sample_rate(request.path)
+            if sample_rate >= 1 or random.random() < sample_rate:
+                route_key, route = extract_route_key()
+                metrics_collector.hincrby(route_key, route, round(1 / sample_rate))
 
-            record_aggregate_metrics()
+            record_aggregate_metrics(metrics_collector)
         except Exception as e:
-            logger.error("Error while recording metrics: %s", e.message)
+            logger.error("Error while recording metrics: %s", e)
 
         metric = PrometheusMetric(PrometheusMetricNames.FLASK_ROUTE_DURATION_SECONDS)
 
@@ -660,7 +714,7 @@ def record_metrics(func):
                 e,
             )
 
-        route = route.split("?")[0]
+        route = request.path
         if "/v1/full/search/autocomplete" in route:
             route = "/".join(route.split("/")[:5])
         elif "/v1/full/" in route or "/users/intersection/" in route:
@@ -0,0 +1,35 @@
+from src.utils.redis_metrics import MetricsCollector, parse_sample_rates
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("") == []
+    assert parse_sample_rates("/v1/tracks/*/stream=0.1, /v1/full/*=1") == [
+        ("/v1/tracks/*/stream", 0.1),
+        ("/v1/full/*", 1.0),
+    ]
+
+
+def test_metrics_collector_buffers_until_flush(redis_mock):
+    collector = MetricsCollector(
+        redis_mock, flush_interval_sec=3600, sample_rates=[("/v1/tracks/*/stream", 0.5)]
+    )
+    collector.hincrby("routes", "/v1/tracks/trending", 1)
+    collector.hincrby("routes", "/v1/tracks/trending", 2)
+    collector.pfadd("unique", "1.2.3.4")
+    collector.pfadd("unique", "1.2.3.4", "5.6.7.8")
+    collector.expire("unique", 60)
+
+    # nothing is written to redis until the buffer is flushed
+    assert not redis_mock.exists("routes")
+
+    collector.flush()
+    assert redis_mock.hget("routes", "/v1/tracks/trending") == b"3"
+    assert redis_mock.pfcount("unique") == 2
+    assert 0 < redis_mock.ttl("unique") <= 60
+
+    # the buffer is emptied by the flush
+    collector.flush()
+    assert redis_mock.hget("routes", "/v1/tracks/trending") == b"3"
+
+    assert collector.get_sample_rate("/v1/tracks/D7KyD/stream") == 0.5
+    assert collector.get_sample_rate("/v1/tracks/trending") == 1.0
@@ -62,6 +62,11 @@ class SessionManager:
         cursor = dbapi_conn.cursor()
         cursor.close()
 
+    def checked_out_connections(self) -> int:
+        """Number of pooled connections currently in use"""
+        checkedout = getattr(self._engine.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
     def session(self):
         """
         Get a session for direct management/use. Use not recommended unless absolutely
@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+from src.utils.redis_constants import most_recent_indexed_block_redis_key
+from src.utils.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# How far behind the primary a replica is in seconds, and the latest block it has
+# indexed. A replica that has replayed all the wal it received is caught up even
+# if nothing was written for a while, and a database that is not a replica has no lag.
+REPLICA_STATE_QUERY = """
+    select
+        case
+            when not pg_is_in_recovery() then 0
+            when pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() then 0
+            else extract(epoch from now() - pg_last_xact_replay_timestamp())
+        end as lag_sec,
+        (select number from blocks where is_current = true limit 1) as blocknumber
+    """
+
+LATEST_BLOCKNUMBER_QUERY = "select number from blocks where is_current = true limit 1"
+# Bounds the state queries so a struggling replica can't hold up the refresh
+STATE_QUERY_STATEMENT_TIMEOUT_MS = 1000
+SET_STATEMENT_TIMEOUT_QUERY = (
+    f"SET LOCAL statement_timeout = {STATE_QUERY_STATEMENT_TIMEOUT_MS}"
+)
+# Bounds connecting to a replica, so an unreachable one is skipped quickly
+READ_REPLICA_CONNECT_TIMEOUT_SEC = 5
+# How often the background thread checks the replicas for the latest block a
+# request could not find on them, so clients polling for their write don't wait
+# for the next full refresh or query the replicas themselves
+BLOCKNUMBER_CHECK_INTERVAL_SEC = 1
+
+
+def with_connect_timeout(engine_args: dict) -> dict:
+    """Adds the read replica connect timeout to the engine args of a replica"""
+    connect_args = dict(engine_args.get("connect_args", {}))
+    connect_args["connect_timeout"] = READ_REPLICA_CONNECT_TIMEOUT_SEC
+    return {**engine_args, "connect_args": connect_args}
+
+
+class ReplicaState:
+    def __init__(self, session_manager: SessionManager):
+        self.session_manager = session_manager
+        # None until measured, or when the replica could not be reached
+        self.lag_sec: Optional[float] = None
+        self.blocknumber: Optional[int] = None
+
+    @property
+    def load(self) -> int:
+        """Number of connections currently checked out of the replica's pool"""
+        return self.session_manager.checked_out_connections()
+
+
+class SessionRouter:
+    """
+    Picks the session manager that a read should use: the least loaded read replica
+    whose replication lag is within the read's staleness bound and which has indexed
+    the block the client last wrote in. Falls back to the primary when no replica
+    qualifies, unless the primary has not indexed the client's block either.
+    Once the primary has `max_primary_load` connections checked out, the fallback
+    reads are shed to the least lagged replica instead.
+
+    Replica states are measured before the first read of each process, and then
+    refreshed by a background thread, so later requests never wait on a slow or
+    unreachable replica.
+    """
+
+    def __init__(
+        self,
+        primary: SessionManager,
+        replicas: List[SessionManager],
+        max_lag_sec: float,
+        refresh_interval_sec: float = 5,
+        redis=None,
+        max_primary_load: Optional[int] = None,
+    ):
+        self.primary = primary
+        # holds the latest block indexed into the primary
+        self.redis = redis
+        self.replicas = [ReplicaState(replica) for replica in replicas]
+        self.max_lag_sec = max_lag_sec
+        self.refresh_interval_sec = refresh_interval_sec
+        self.max_primary_load = max_primary_load
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        # latest block a request could not find on the replicas since the last check
+        self._wanted_blocknumber: Optional[int] = None
+
+    def refresh_replica_states(self):
+        for replica in self.replicas:
+            try:
+                with replica.session_manager.scoped_session() as session:
+                    session.execute(text(SET_STATEMENT_TIMEOUT_QUERY))
+                    lag_sec, blocknumber = session.execute(
+                        text(REPLICA_STATE_QUERY)
+                    ).fetchone()
+                replica.lag_sec = float(lag_sec) if lag_sec is not None else None
+                replica.blocknumber = blocknumber
+            except Exception as e:
+                logger.warning(
+                    f"session_router.py | Could not get read replica state: {e}"
+                )
+                replica.lag_sec = None
+                replica.blocknumber = None
+
+    def refresh_replica_blocknumbers(self):
+        """Checks the replicas that had not indexed the block a request wanted"""
+        wanted_blocknumber, self._wanted_blocknumber = self._wanted_blocknumber, None
+        if wanted_blocknumber is None:
+            return
+        for replica in self.replicas:
+            if replica.lag_sec is None or (
+                replica.blocknumber is not None
+                and replica.blocknumber >= wanted_blocknumber
+            ):
+                continue
+            try:
+                with replica.session_manager.scoped_session() as session:
+                    session.execute(text(SET_STATEMENT_TIMEOUT_QUERY))
+                    replica.blocknumber = session.execute(
+                        text(LATEST_BLOCKNUMBER_QUERY)
+                    ).scalar()
+            except Exception as e:
+                logger.warning(
+                    f"session_router.py | Could not get read replica blocknumber: {e}"
+                )
+
+    def _refresh_replica_states_forever(self):
+        # the first refresh is run before the thread is started
+        refreshed_at = time.time()
+        while True:
+            time.sleep(BLOCKNUMBER_CHECK_INTERVAL_SEC)
+            try:
+                if time.time() - refreshed_at >= self.refresh_interval_sec:
+                    refreshed_at = time.time()
+                    self.refresh_replica_states()
+                else:
+                    self.refresh_replica_blocknumbers()
+            except Exception as e:
+                logger.error(
+                    f"session_router.py | Could not refresh read replica states: {e}",
+                    exc_info=True,
+                )
+
+    def _ensure_refresh_thread(self):
+        # started on first use rather than in the constructor,
+        # so that each forked worker process runs its own
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        with self._refresh_lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            # so the first reads of the process don't all fall back to the primary,
+            # bounded by the connect and statement timeouts
+            self.refresh_replica_states()
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_replica_states_forever,
+                name="session_router_refresh",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def get_read_session_manager(
+        self,
+        max_lag_sec: Optional[float] = None,
+        min_blocknumber: Optional[int] = None,
+    ) -> SessionManager:
+        self._ensure_refresh_thread()
+
+        if max_lag_sec is None:
+            max_lag_sec = self.max_lag_sec
+        candidates = sorted(
+            (
+                replica
+                for replica in self.replicas
+                if replica.lag_sec is not None and replica.lag_sec <= max_lag_sec
+            ),
+            key=lambda replica: replica.load,
+        )
+        if not min_blocknumber:
+            return candidates[0].session_manager if candidates else self._fallback()
+
+        for replica in candidates:
+            if (
+                replica.blocknumber is not None
+                and replica.blocknumber >= min_blocknumber
+            ):
+                return replica.session_manager
+        # when the primary has not indexed the block either, no database has it
+        # and the client is only polling for it
+        if candidates and not self._primary_has_indexed(min_blocknumber):
+            return candidates[0].session_manager
+        # the states may predate the client's write, have the background thread
+        # check the replicas again before the client's next read
+        self._wanted_blocknumber = max(self._wanted_blocknumber or 0, min_blocknumber)
+        return self._fallback()
+
+    def _fallback(self) -> SessionManager:
+        """The primary, or the least lagged reachable replica when the primary is busy"""
+        if (
+            self.max_primary_load is None
+            or self.primary.checked_out_connections() < self.max_primary_load
+        ):
+            return self.primary
+        reachable = [
+            replica for replica in self.replicas if replica.lag_sec is not None
+        ]
+        if not reachable:
+            return self.primary
+        return min(reachable, key=lambda replica: replica.lag_sec).session_manager
+
+    def _primary_has_indexed(self, blocknumber: int) -> bool:
+        if not self.redis:
+            return True
+        try:
+            latest_indexed_block = self.redis.get(most_recent_indexed_block_redis_key)
+        except Exception as e:
+            logger.warning(
+                f"session_router.py | Could not get latest indexed block: {e}"
+            )
+            return True
+        # unknown until the indexer has run
+        return latest_indexed_block is None or int(latest_indexed_block) >= blocknumber
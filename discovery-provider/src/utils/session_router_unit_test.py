@@ -0,0 +1,128 @@
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+from src.utils.session_router import SessionRouter
+
+
+class FakeSessionManager:
+    def __init__(self, lag_sec=0, blocknumber=10, load=0):
+        self.lag_sec = lag_sec
+        self.blocknumber = blocknumber
+        self.load = load
+
+    def checked_out_connections(self):
+        return self.load
+
+    @contextmanager
+    def scoped_session(self):
+        session = mock.Mock()
+        session.execute.return_value.fetchone.return_value = (
+            self.lag_sec,
+            self.blocknumber,
+        )
+        session.execute.return_value.scalar.return_value = self.blocknumber
+        yield session
+
+
+class FakeRedis:
+    def __init__(self, latest_indexed_block):
+        self.latest_indexed_block = latest_indexed_block
+
+    def get(self, key):
+        return str(self.latest_indexed_block).encode()
+
+
+@pytest.fixture
+def no_refresh_thread():
+    """Replica states are refreshed by the tests instead of the background thread"""
+    with mock.patch.object(SessionRouter, "_ensure_refresh_thread"):
+        yield
+
+
+def test_routes_to_least_loaded_replica_within_lag(no_refresh_thread):
+    primary = FakeSessionManager()
+    busy = FakeSessionManager(load=5)
+    idle = FakeSessionManager(load=1)
+    lagging = FakeSessionManager(lag_sec=120, load=0)
+    router = SessionRouter(primary, [busy, idle, lagging], max_lag_sec=30)
+    router.refresh_replica_states()
+
+    assert router.get_read_session_manager() is idle
+    assert router.get_read_session_manager(max_lag_sec=200) is lagging
+
+    # falls back to the primary when every replica is too far behind
+    busy.lag_sec = idle.lag_sec = 60
+    router.refresh_replica_states()
+    assert router.get_read_session_manager() is primary
+
+
+def test_routes_to_replica_that_indexed_min_blocknumber(no_refresh_thread):
+    primary = FakeSessionManager()
+    behind = FakeSessionManager(blocknumber=10, load=0)
+    caught_up = FakeSessionManager(blocknumber=12, load=3)
+    router = SessionRouter(
+        primary, [behind, caught_up], max_lag_sec=30, redis=FakeRedis(13)
+    )
+    router.refresh_replica_states()
+
+    assert router.get_read_session_manager(min_blocknumber=11) is caught_up
+    assert router.get_read_session_manager(min_blocknumber=13) is primary
+
+    # blocks the primary has not indexed either are polled on the replicas
+    with mock.patch.object(behind, "scoped_session") as scoped_session:
+        assert router.get_read_session_manager(min_blocknumber=14) is behind
+        scoped_session.assert_not_called()
+
+    # requests don't query the replicas when their states predate the write,
+    # the replicas are checked for the wanted block by the background thread
+    behind.blocknumber = 13
+    with mock.patch.object(behind, "scoped_session") as scoped_session:
+        assert router.get_read_session_manager(min_blocknumber=13) is primary
+        scoped_session.assert_not_called()
+    router.refresh_replica_blocknumbers()
+    assert router.get_read_session_manager(min_blocknumber=13) is behind
+
+
+def test_unreachable_replica_is_skipped(no_refresh_thread):
+    primary = FakeSessionManager()
+    replica = FakeSessionManager()
+    router = SessionRouter(primary, [replica], max_lag_sec=30)
+
+    with mock.patch.object(
+        replica, "scoped_session", side_effect=Exception("connection refused")
+    ):
+        router.refresh_replica_states()
+        assert router.get_read_session_manager() is primary
+
+
+def test_sheds_primary_fallback_to_least_lagged_replica(no_refresh_thread):
+    primary = FakeSessionManager(load=10)
+    lagging = FakeSessionManager(lag_sec=60)
+    more_lagging = FakeSessionManager(lag_sec=120)
+    router = SessionRouter(
+        primary, [more_lagging, lagging], max_lag_sec=30, max_primary_load=10
+    )
+    router.refresh_replica_states()
+
+    assert router.get_read_session_manager() is lagging
+    primary.load = 9
+    assert router.get_read_session_manager() is primary
+
+
+def test_replica_states_are_measured_before_the_first_read():
+    primary = FakeSessionManager()
+    replica = FakeSessionManager(blocknumber=10)
+    router = SessionRouter(primary, [replica], max_lag_sec=30)
+
+    assert router.get_read_session_manager() is replica
+
+    # blocks a request could not find are checked for in the background
+    replica.blocknumber = 12
+    assert router.get_read_session_manager(min_blocknumber=12) is primary
+    for _ in range(50):
+        if router.replicas[0].blocknumber == 12:
+            break
+        time.sleep(0.1)
+    assert router.get_read_session_manager(min_blocknumber=12) is replica
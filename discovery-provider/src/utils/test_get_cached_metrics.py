@@ -1,11 +1,12 @@
-import json
 from datetime import datetime, timedelta
 
 from src.utils.redis_metrics import (
     datetime_format_secondary,
+    get_bucket_key,
     get_redis_metrics,
     personal_app_metrics,
     personal_route_metrics,
+    update_summed_unique_metrics,
 )
 
 now = datetime.utcnow()
@@ -16,20 +17,28 @@ start_time = int((now - timedelta(minutes=3)).timestamp())
 start_time_obj = datetime.fromtimestamp(start_time)
 
 
+def cache_personal_metrics(redis_mock, metric_type, metrics):
+    for date_time, value_counts in metrics.items():
+        redis_mock.hmset(
+            get_bucket_key(metric_type, date_time.strftime(datetime_format_secondary)),
+            value_counts,
+        )
+
+
 def test_get_cached_route_metrics(redis_mock):
     metrics = {
-        old_time.strftime(datetime_format_secondary): {"some-ip": 1, "other-ip": 2},
-        recent_time_1.strftime(datetime_format_secondary): {
+        old_time: {"some-ip": 1, "other-ip": 2},
+        recent_time_1: {
             "another-ip": 1,
             "some-other-ip": 2,
         },
-        recent_time_2.strftime(datetime_format_secondary): {
+        recent_time_2: {
             "1.2.3.4": 1,
             "some-ip": 2,
             "another-ip": 3,
         },
     }
-    redis_mock.set(personal_route_metrics, json.dumps(metrics))
+    cache_personal_metrics(redis_mock, personal_route_metrics, metrics)
 
     result = get_redis_metrics(redis_mock, start_time_obj, personal_route_metrics)
 
@@ -42,18 +51,18 @@ def test_get_cached_route_metrics(redis_mock):
 
 def test_get_cached_app_metrics(redis_mock):
     metrics = {
-        old_time.strftime(datetime_format_secondary): {"some-app": 1, "other-app": 2},
-        recent_time_1.strftime(datetime_format_secondary): {
+        old_time: {"some-app": 1, "other-app": 2},
+        recent_time_1: {
             "another-app": 1,
             "some-other-app": 2,
         },
-        recent_time_2.strftime(datetime_format_secondary): {
+        recent_time_2: {
             "top-app": 1,
             "some-app": 2,
             "another-app": 3,
         },
     }
-    redis_mock.set(personal_app_metrics, json.dumps(metrics))
+    cache_personal_metrics(redis_mock, personal_app_metrics, metrics)
 
     result = get_redis_metrics(redis_mock, start_time_obj, personal_app_metrics)
 
@@ -62,3 +71,17 @@ def test_get_cached_app_metrics(redis_mock):
     assert result["some-other-app"] == 2
     assert result["top-app"] == 1
     assert result["some-app"] == 2
+
+
+def test_update_summed_unique_metrics(redis_mock):
+    pipe = redis_mock.pipeline()
+    for ip in ["1.2.3.4", "5.6.7.8", "1.2.3.4"]:
+        update_summed_unique_metrics(pipe, now, ip)
+    pipe.execute()
+
+    day = now.strftime("%Y/%m/%d")
+    month = f"{day[:7]}/01"
+    assert redis_mock.pfcount(get_bucket_key("summed_unique_daily_metrics", day)) == 2
+    assert (
+        redis_mock.pfcount(get_bucket_key("summed_unique_monthly_metrics", month)) == 2
+    )
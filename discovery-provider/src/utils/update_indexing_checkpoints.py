@@ -1,3 +1,5 @@
+from typing import Optional, Tuple
+
 from sqlalchemy import text
 from src.models.indexing.indexing_checkpoints import IndexingCheckpoint
 
@@ -32,3 +34,41 @@ def get_last_indexed_checkpoint(session, tablename):
         last_seen = 0
 
     return last_seen
+
+
+UPDATE_INDEXING_SIGNATURE_CHECKPOINTS_QUERY = """
+    INSERT INTO indexing_checkpoints (tablename, last_checkpoint, signature)
+    VALUES(:tablename, :last_checkpoint, :signature)
+    ON CONFLICT (tablename)
+    DO UPDATE SET
+        last_checkpoint = EXCLUDED.last_checkpoint,
+        signature = EXCLUDED.signature;
+    """
+
+
+def save_indexed_signature_checkpoint(session, tablename, checkpoint, signature):
+    session.execute(
+        text(UPDATE_INDEXING_SIGNATURE_CHECKPOINTS_QUERY),
+        {
+            "tablename": tablename,
+            "last_checkpoint": checkpoint,
+            "signature": signature,
+        },
+    )
+
+
+def get_last_indexed_signature_checkpoint(
+    session, tablename
+) -> Optional[Tuple[int, str]]:
+    """Returns the (slot, signature) of the last processed solana tx, if any"""
+    last_seen = (
+        session.query(IndexingCheckpoint.last_checkpoint, IndexingCheckpoint.signature)
+        .filter(
+            IndexingCheckpoint.tablename == tablename,
+            IndexingCheckpoint.signature != None,
+        )
+        .first()
+    )
+    if not last_seen:
+        return None
+    return int(last_seen[0]), last_seen[1]
@@ -27,14 +27,20 @@ def get_web3():
     return web3
 
 
-def get_nethermind_web3():
-    web3endpoint = os.getenv("audius_web3_nethermind_rpc")
-    web3 = Web3(HTTPProvider(web3endpoint))
+nethermind_web3: Optional[Web3] = None
 
-    # required middleware for POA
-    # https://web3py.readthedocs.io/en/latest/middleware.html#proof-of-authority
-    web3.middleware_onion.inject(geth_poa_middleware, layer=0)
-    return web3
+
+def get_nethermind_web3():
+    # pylint: disable=W0603
+    global nethermind_web3
+    if not nethermind_web3:
+        web3endpoint = os.getenv("audius_web3_nethermind_rpc")
+        nethermind_web3 = Web3(HTTPProvider(web3endpoint))
+
+        # required middleware for POA
+        # https://web3py.readthedocs.io/en/latest/middleware.html#proof-of-authority
+        nethermind_web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return nethermind_web3
 
 
 eth_web3: Optional[Web3] = None
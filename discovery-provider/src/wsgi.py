@@ -3,6 +3,7 @@ import logging
 from os import getenv
 
 from src.app import create_app
+from src.utils.green import patch_psycopg
 
 logger = logging.getLogger(__name__)
 
@@ -19,5 +20,8 @@ def child_exit(server, worker):
     multiprocess.mark_process_dead(worker.pid)
 
 
+# let db queries yield to other requests when running on eventlet workers
+patch_psycopg()
+
 app = create_app()
 logger.info("Web server initialized!")